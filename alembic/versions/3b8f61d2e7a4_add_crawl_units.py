@@ -0,0 +1,55 @@
+"""Добавление единиц распределенного обхода источников.
+
+Revision ID: 3b8f61d2e7a4
+Revises: 7e4a0b92c6d5
+Create Date: 2025-09-02 10:05:17.624810
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "3b8f61d2e7a4"
+down_revision: Union[str, Sequence[str], None] = "7e4a0b92c6d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.create_table(
+        "crawl_units",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("source", sa.String(length=50), nullable=False),
+        sa.Column("query", sa.String(length=255), nullable=False),
+        sa.Column("page_start", sa.Integer(), nullable=False),
+        sa.Column("page_end", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("lease_owner", sa.String(length=255), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("pages_fetched", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("found_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("added_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_crawl_units_status_id", "crawl_units", ["status", "id"])
+    op.create_index("ix_crawl_units_source_query", "crawl_units", ["source", "query"])
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_index("ix_crawl_units_source_query", table_name="crawl_units")
+    op.drop_index("ix_crawl_units_status_id", table_name="crawl_units")
+    op.drop_table("crawl_units")
@@ -0,0 +1,63 @@
+"""Добавление запусков плана обхода и регионов единиц обхода.
+
+Revision ID: 5c19e7f4a2b6
+Revises: 3b8f61d2e7a4
+Create Date: 2025-09-03 14:37:52.118406
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "5c19e7f4a2b6"
+down_revision: Union[str, Sequence[str], None] = "3b8f61d2e7a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.create_table(
+        "crawl_runs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entry_key", sa.String(length=400), nullable=False),
+        sa.Column("source", sa.String(length=50), nullable=False),
+        sa.Column("query", sa.String(length=255), nullable=False),
+        sa.Column("area", sa.String(length=50), nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("planned_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("estimated_pages", sa.Integer(), nullable=False),
+        sa.Column("units_total", sa.Integer(), nullable=False),
+        sa.Column("pages_fetched", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("found_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("added_count", sa.Integer(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_crawl_runs_entry_key", "crawl_runs", ["entry_key"])
+    op.create_index("ix_crawl_runs_planned_at", "crawl_runs", ["planned_at"])
+
+    op.add_column("crawl_units", sa.Column("area", sa.String(length=50), nullable=True))
+    op.add_column(
+        "crawl_units",
+        sa.Column("priority", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column("crawl_units", sa.Column("run_id", sa.Integer(), nullable=True))
+    op.create_index("ix_crawl_units_run_id", "crawl_units", ["run_id"])
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_index("ix_crawl_units_run_id", table_name="crawl_units")
+    op.drop_column("crawl_units", "run_id")
+    op.drop_column("crawl_units", "priority")
+    op.drop_column("crawl_units", "area")
+    op.drop_index("ix_crawl_runs_planned_at", table_name="crawl_runs")
+    op.drop_index("ix_crawl_runs_entry_key", table_name="crawl_runs")
+    op.drop_table("crawl_runs")
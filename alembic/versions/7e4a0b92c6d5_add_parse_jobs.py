@@ -0,0 +1,60 @@
+"""Добавление очереди задач ручного парсинга.
+
+Revision ID: 7e4a0b92c6d5
+Revises: d09a5c7e3b41
+Create Date: 2025-08-31 11:20:44.381052
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "7e4a0b92c6d5"
+down_revision: Union[str, Sequence[str], None] = "d09a5c7e3b41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.create_table(
+        "parse_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("query", sa.String(length=255), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("worker_id", sa.String(length=255), nullable=True),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("sources_total", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("sources_done", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("found_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("added_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_parse_jobs_status_id", "parse_jobs", ["status", "id"])
+    op.create_index(
+        "uq_parse_jobs_pending_query",
+        "parse_jobs",
+        ["query"],
+        unique=True,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_index("uq_parse_jobs_pending_query", table_name="parse_jobs")
+    op.drop_index("ix_parse_jobs_status_id", table_name="parse_jobs")
+    op.drop_table("parse_jobs")
@@ -0,0 +1,31 @@
+"""Добавление адаптивного интервала запусков плана обхода.
+
+Revision ID: 9a2d7c3e5f18
+Revises: 5c19e7f4a2b6
+Create Date: 2025-09-05 10:12:40.551207
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "9a2d7c3e5f18"
+down_revision: Union[str, Sequence[str], None] = "5c19e7f4a2b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.add_column("crawl_runs", sa.Column("interval", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_column("crawl_runs", "interval")
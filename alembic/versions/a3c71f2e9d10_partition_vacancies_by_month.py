@@ -0,0 +1,203 @@
+"""Секционирование таблицы вакансий по месяцам публикации.
+
+Revision ID: a3c71f2e9d10
+Revises: e5c1a4e7b8d9
+Create Date: 2025-08-11 09:12:41.508213
+
+"""
+
+from datetime import date
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "a3c71f2e9d10"
+down_revision: Union[str, Sequence[str], None] = "e5c1a4e7b8d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# --- Имена объектов из предыдущих ревизий ---
+TRIGGER_FUNCTION_NAME = "vacancies_tsvector_update"
+TRIGGER_NAME = "tsvector_update_trigger"
+
+# Сколько месяцев вперед создавать секции при миграции
+PREMAKE_MONTHS = 2
+
+VACANCY_COLUMNS = (
+    "id, title, company, location, salary, description, published_at, source, "
+    "original_url, salary_min_rub, salary_max_rub"
+)
+
+
+def _add_months(month: date, months: int) -> date:
+    """Сдвигает первое число месяца на заданное количество месяцев."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_month_partition(month: date) -> None:
+    """Создает секцию vacancies за указанный месяц."""
+    op.execute(
+        sa.text(
+            f"CREATE TABLE IF NOT EXISTS vacancies_y{month.year}m{month.month:02d} "
+            "PARTITION OF vacancies "
+            f"FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{_add_months(month, 1).isoformat()}')"
+        )
+    )
+
+
+def _rename_legacy_objects(table: str, suffix: str) -> None:
+    """Переименовывает ограничения и индексы, чтобы освободить их имена."""
+    for constraint in (
+        "vacancies_pkey",
+        "vacancies_original_url_key",
+        "_title_company_published_uc",
+    ):
+        op.execute(
+            sa.text(
+                f"ALTER TABLE {table} RENAME CONSTRAINT {constraint} "
+                f"TO {constraint}{suffix}"
+            )
+        )
+    op.execute(
+        sa.text(
+            "ALTER INDEX ix_vacancies_tsvector_search "
+            f"RENAME TO ix_vacancies_tsvector_search{suffix}"
+        )
+    )
+    op.execute(sa.text(f"DROP TRIGGER {TRIGGER_NAME} ON {table}"))
+
+
+def _create_search_objects() -> None:
+    """Создает индексы и триггер полнотекстового поиска на новой таблице."""
+    op.create_index(
+        "ix_vacancies_tsvector_search",
+        "vacancies",
+        ["tsvector_search"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.execute(
+        sa.text(
+            f"""
+        CREATE TRIGGER {TRIGGER_NAME}
+        BEFORE INSERT OR UPDATE ON vacancies
+        FOR EACH ROW EXECUTE FUNCTION {TRIGGER_FUNCTION_NAME}();
+        """
+        )
+    )
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    # 1. Освобождаем имя таблицы и имена ограничений
+    op.execute(sa.text("ALTER TABLE vacancies RENAME TO vacancies_legacy"))
+    _rename_legacy_objects("vacancies_legacy", "_legacy")
+
+    # 2. Создаем секционированную таблицу. PostgreSQL требует, чтобы ключ
+    #    секционирования входил во все уникальные ограничения, поэтому
+    #    published_at добавлен и в первичный ключ, и в уникальность URL.
+    op.execute(
+        sa.text(
+            """
+        CREATE TABLE vacancies (
+            id INTEGER NOT NULL DEFAULT nextval('vacancies_id_seq'),
+            title VARCHAR(255) NOT NULL,
+            company VARCHAR(255) NOT NULL,
+            location VARCHAR(255),
+            salary VARCHAR(255),
+            description TEXT,
+            published_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            source VARCHAR(50) NOT NULL,
+            original_url VARCHAR(512) NOT NULL,
+            salary_min_rub INTEGER,
+            salary_max_rub INTEGER,
+            tsvector_search TSVECTOR,
+            CONSTRAINT vacancies_pkey PRIMARY KEY (id, published_at),
+            CONSTRAINT vacancies_original_url_key
+                UNIQUE (original_url, published_at),
+            CONSTRAINT _title_company_published_uc
+                UNIQUE (title, company, published_at)
+        ) PARTITION BY RANGE (published_at)
+        """
+        )
+    )
+    op.execute(sa.text("ALTER SEQUENCE vacancies_id_seq OWNED BY vacancies.id"))
+    op.create_index("ix_vacancies_published_at", "vacancies", ["published_at"])
+    _create_search_objects()
+
+    # 3. Секция по умолчанию принимает строки вне созданных диапазонов,
+    #    помесячные секции покрывают существующие данные и ближайшие месяцы.
+    op.execute(sa.text("CREATE TABLE vacancies_default PARTITION OF vacancies DEFAULT"))
+    bind = op.get_bind()
+    oldest = bind.execute(
+        sa.text("SELECT min(published_at) FROM vacancies_legacy")
+    ).scalar()
+    current = date.today().replace(day=1)
+    month = oldest.date().replace(day=1) if oldest else current
+    month = min(month, current)
+    while month <= _add_months(current, PREMAKE_MONTHS):
+        _create_month_partition(month)
+        month = _add_months(month, 1)
+
+    # 4. Переносим данные; триггер заново заполнит tsvector_search
+    op.execute(
+        sa.text(
+            f"INSERT INTO vacancies ({VACANCY_COLUMNS}) "
+            f"SELECT {VACANCY_COLUMNS} FROM vacancies_legacy"
+        )
+    )
+    op.drop_table("vacancies_legacy")
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.execute(sa.text("ALTER TABLE vacancies RENAME TO vacancies_partitioned"))
+    _rename_legacy_objects("vacancies_partitioned", "_partitioned")
+    op.drop_index("ix_vacancies_published_at", table_name="vacancies_partitioned")
+
+    op.execute(
+        sa.text(
+            """
+        CREATE TABLE vacancies (
+            id INTEGER NOT NULL DEFAULT nextval('vacancies_id_seq'),
+            title VARCHAR(255) NOT NULL,
+            company VARCHAR(255) NOT NULL,
+            location VARCHAR(255),
+            salary VARCHAR(255),
+            description TEXT,
+            published_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            source VARCHAR(50) NOT NULL,
+            original_url VARCHAR(512) NOT NULL,
+            salary_min_rub INTEGER,
+            salary_max_rub INTEGER,
+            tsvector_search TSVECTOR,
+            CONSTRAINT vacancies_pkey PRIMARY KEY (id),
+            CONSTRAINT vacancies_original_url_key UNIQUE (original_url),
+            CONSTRAINT _title_company_published_uc
+                UNIQUE (title, company, published_at)
+        )
+        """
+        )
+    )
+    op.execute(sa.text("ALTER SEQUENCE vacancies_id_seq OWNED BY vacancies.id"))
+    _create_search_objects()
+
+    # При сужении уникальности URL оставляем самую свежую публикацию
+    op.execute(
+        sa.text(
+            f"INSERT INTO vacancies ({VACANCY_COLUMNS}) "
+            f"SELECT DISTINCT ON (original_url) {VACANCY_COLUMNS} "
+            "FROM vacancies_partitioned "
+            "ORDER BY original_url, published_at DESC "
+            "ON CONFLICT DO NOTHING"
+        )
+    )
+    # Секции удаляются вместе с родительской таблицей
+    op.drop_table("vacancies_partitioned")
@@ -0,0 +1,55 @@
+"""Добавление счетчиков HTTP-кэша в единицы и запуски обхода.
+
+Revision ID: b61f3d8a0c47
+Revises: e4b7a19c2d53
+Create Date: 2025-09-08 09:41:27.604118
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "b61f3d8a0c47"
+down_revision: Union[str, Sequence[str], None] = "e4b7a19c2d53"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("crawl_units", "crawl_runs")
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                "cache_requests", sa.Integer(), server_default="0", nullable=False
+            ),
+        )
+        op.add_column(
+            table,
+            sa.Column("cache_hits", sa.Integer(), server_default="0", nullable=False),
+        )
+        op.add_column(
+            table,
+            sa.Column(
+                "cache_bytes_saved",
+                sa.BigInteger(),
+                server_default="0",
+                nullable=False,
+            ),
+        )
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    for table in TABLES:
+        op.drop_column(table, "cache_bytes_saved")
+        op.drop_column(table, "cache_hits")
+        op.drop_column(table, "cache_requests")
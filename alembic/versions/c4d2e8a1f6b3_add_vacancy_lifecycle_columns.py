@@ -0,0 +1,60 @@
+"""Добавление полей жизненного цикла вакансий.
+
+Revision ID: c4d2e8a1f6b3
+Revises: a3c71f2e9d10
+Create Date: 2025-08-18 16:47:03.217954
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "c4d2e8a1f6b3"
+down_revision: Union[str, Sequence[str], None] = "a3c71f2e9d10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    # now() стабильна в пределах транзакции, поэтому PostgreSQL добавит колонку
+    # без перезаписи секций, а существующие строки получат время миграции.
+    op.add_column(
+        "vacancies",
+        sa.Column(
+            "last_seen_at",
+            sa.DateTime(),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.add_column("vacancies", sa.Column("expired_at", sa.DateTime(), nullable=True))
+
+    # Частичные индексы по актуальным вакансиям: для выдачи по дате и для
+    # пакетного поиска давно не встречавшихся вакансий.
+    op.create_index(
+        "ix_vacancies_active_published_at",
+        "vacancies",
+        ["published_at"],
+        postgresql_where=sa.text("expired_at IS NULL"),
+    )
+    op.create_index(
+        "ix_vacancies_active_last_seen_at",
+        "vacancies",
+        ["last_seen_at"],
+        postgresql_where=sa.text("expired_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_index("ix_vacancies_active_last_seen_at", table_name="vacancies")
+    op.drop_index("ix_vacancies_active_published_at", table_name="vacancies")
+    op.drop_column("vacancies", "expired_at")
+    op.drop_column("vacancies", "last_seen_at")
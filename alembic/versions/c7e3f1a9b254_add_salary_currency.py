@@ -0,0 +1,62 @@
+"""Добавление исходной валюты и сумм зарплаты вакансий.
+
+Revision ID: c7e3f1a9b254
+Revises: d2a95c7e1f30
+Create Date: 2025-09-12 11:24:08.531906
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "c7e3f1a9b254"
+down_revision: Union[str, Sequence[str], None] = "d2a95c7e1f30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.add_column(
+        "vacancies", sa.Column("salary_currency", sa.String(length=3), nullable=True)
+    )
+    op.add_column(
+        "vacancies", sa.Column("salary_min_amount", sa.Integer(), nullable=True)
+    )
+    op.add_column(
+        "vacancies", sa.Column("salary_max_amount", sa.Integer(), nullable=True)
+    )
+    op.create_index("ix_vacancies_salary_currency", "vacancies", ["salary_currency"])
+
+    # Парсер hh.ru сохранял в рублевые поля суммы в валюте вакансии, а код
+    # валюты - в конце строки зарплаты ("от 1000 до 2000 USD"). Рублевые
+    # поля пересчитает задача пересчета зарплат (см. core.currency_rates).
+    # Суммы SuperJob уже пересчитаны в рубли, а исходные суммы не сохранились.
+    op.execute(
+        sa.text(
+            """
+        UPDATE vacancies
+        SET salary_currency = CASE
+                WHEN substring(salary from ' ([A-Z]{3})$') = 'RUR' THEN 'RUB'
+                ELSE substring(salary from ' ([A-Z]{3})$')
+            END,
+            salary_min_amount = salary_min_rub,
+            salary_max_amount = salary_max_rub
+        WHERE source = 'hh.ru' AND salary ~ ' [A-Z]{3}$';
+        """
+        )
+    )
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_index("ix_vacancies_salary_currency", table_name="vacancies")
+    op.drop_column("vacancies", "salary_max_amount")
+    op.drop_column("vacancies", "salary_min_amount")
+    op.drop_column("vacancies", "salary_currency")
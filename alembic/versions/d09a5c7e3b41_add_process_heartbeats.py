@@ -0,0 +1,49 @@
+"""Добавление снимков ресурсов процессов веб-приложения и сборщика.
+
+Revision ID: d09a5c7e3b41
+Revises: b6e29d4f0c18
+Create Date: 2025-08-29 16:42:05.907311
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "d09a5c7e3b41"
+down_revision: Union[str, Sequence[str], None] = "b6e29d4f0c18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.create_table(
+        "process_heartbeats",
+        sa.Column("process_id", sa.String(length=255), nullable=False),
+        sa.Column("role", sa.String(length=50), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("is_leader", sa.Boolean(), nullable=False),
+        sa.Column("cpu_user_seconds", sa.Float(), nullable=False),
+        sa.Column("cpu_system_seconds", sa.Float(), nullable=False),
+        sa.Column("rss_kb", sa.Integer(), nullable=True),
+        sa.Column("max_rss_kb", sa.Integer(), nullable=False),
+        sa.Column("threads", sa.Integer(), nullable=False),
+        sa.Column("db_connections", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("process_id"),
+    )
+    op.create_index(
+        "ix_process_heartbeats_updated_at", "process_heartbeats", ["updated_at"]
+    )
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_index("ix_process_heartbeats_updated_at", table_name="process_heartbeats")
+    op.drop_table("process_heartbeats")
@@ -0,0 +1,73 @@
+"""Глобальная уникальность URL вакансий в несекционированной таблице.
+
+Revision ID: d17f7524648c
+Revises: c7e3f1a9b254
+Create Date: 2025-09-15 10:37:12.904521
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "d17f7524648c"
+down_revision: Union[str, Sequence[str], None] = "c7e3f1a9b254"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.create_table(
+        "vacancy_urls",
+        sa.Column("original_url", sa.String(length=512), nullable=False),
+        sa.Column("published_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("original_url"),
+    )
+    op.create_index(
+        "ix_vacancy_urls_published_at", "vacancy_urls", ["published_at"], unique=False
+    )
+
+    # За каждым URL закрепляется первая вставленная вакансия
+    op.execute(
+        sa.text(
+            """
+        INSERT INTO vacancy_urls (original_url, published_at)
+        SELECT DISTINCT ON (original_url) original_url, published_at
+        FROM vacancies
+        ORDER BY original_url, id
+        """
+        )
+    )
+
+    # После секционирования один URL мог вставиться повторно с другой датой
+    # публикации. Такие повторы удаляются вместе с их сигнатурами.
+    duplicates = (
+        "SELECT v.id FROM vacancies v JOIN vacancy_urls u "
+        "ON v.original_url = u.original_url AND v.published_at <> u.published_at"
+    )
+    op.execute(
+        sa.text(f"DELETE FROM vacancy_lsh_bands WHERE vacancy_id IN ({duplicates})")
+    )
+    op.execute(
+        sa.text(f"DELETE FROM vacancy_signatures WHERE vacancy_id IN ({duplicates})")
+    )
+    op.execute(
+        sa.text(
+            """
+        DELETE FROM vacancies v USING vacancy_urls u
+        WHERE v.original_url = u.original_url AND v.published_at <> u.published_at
+        """
+        )
+    )
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_index("ix_vacancy_urls_published_at", table_name="vacancy_urls")
+    op.drop_table("vacancy_urls")
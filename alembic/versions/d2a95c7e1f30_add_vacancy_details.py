@@ -0,0 +1,41 @@
+"""Добавление кэша полных описаний вакансий.
+
+Revision ID: d2a95c7e1f30
+Revises: b61f3d8a0c47
+Create Date: 2025-09-09 16:05:52.219734
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "d2a95c7e1f30"
+down_revision: Union[str, Sequence[str], None] = "b61f3d8a0c47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.create_table(
+        "vacancy_details",
+        sa.Column("source", sa.String(length=50), nullable=False),
+        sa.Column("external_id", sa.String(length=50), nullable=False),
+        sa.Column("version", sa.String(length=40), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column(
+            "fetched_at", sa.DateTime(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("source", "external_id"),
+    )
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_table("vacancy_details")
@@ -0,0 +1,65 @@
+"""Флаг представителя группы почти-дубликатов с частичным индексом.
+
+Revision ID: e3a8c5d1f294
+Revises: d17f7524648c
+Create Date: 2025-09-16 09:12:48.215307
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "e3a8c5d1f294"
+down_revision: Union[str, Sequence[str], None] = "d17f7524648c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.add_column(
+        "vacancies",
+        sa.Column(
+            "is_cluster_representative",
+            sa.Boolean(),
+            nullable=False,
+            server_default=sa.true(),
+        ),
+    )
+
+    # Представитель - самая свежая актуальная вакансия группы
+    op.execute(
+        sa.text(
+            """
+        UPDATE vacancies SET is_cluster_representative = false
+        WHERE duplicate_cluster_id IS NOT NULL
+          AND id NOT IN (
+            SELECT DISTINCT ON (duplicate_cluster_id) id
+            FROM vacancies
+            WHERE duplicate_cluster_id IS NOT NULL AND expired_at IS NULL
+            ORDER BY duplicate_cluster_id, published_at DESC, id DESC
+          )
+        """
+        )
+    )
+
+    op.create_index(
+        "ix_vacancies_active_representative_published_at",
+        "vacancies",
+        ["published_at"],
+        postgresql_where=sa.text("expired_at IS NULL AND is_cluster_representative"),
+    )
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_index(
+        "ix_vacancies_active_representative_published_at", table_name="vacancies"
+    )
+    op.drop_column("vacancies", "is_cluster_representative")
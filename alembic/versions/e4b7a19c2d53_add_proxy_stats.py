@@ -0,0 +1,45 @@
+"""Добавление статистики прокси процессов сборщика.
+
+Revision ID: e4b7a19c2d53
+Revises: 9a2d7c3e5f18
+Create Date: 2025-09-06 14:27:09.318842
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "e4b7a19c2d53"
+down_revision: Union[str, Sequence[str], None] = "9a2d7c3e5f18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.create_table(
+        "proxy_stats",
+        sa.Column("process_id", sa.String(length=255), nullable=False),
+        sa.Column("proxy", sa.String(length=512), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("state", sa.String(length=20), nullable=False),
+        sa.Column("requests", sa.Integer(), nullable=False),
+        sa.Column("failures", sa.Integer(), nullable=False),
+        sa.Column("success_rate", sa.Float(), nullable=False),
+        sa.Column("latency_ms", sa.Float(), nullable=True),
+        sa.Column("quarantined_until", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("process_id", "proxy"),
+    )
+    op.create_index("ix_proxy_stats_updated_at", "proxy_stats", ["updated_at"])
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_index("ix_proxy_stats_updated_at", table_name="proxy_stats")
+    op.drop_table("proxy_stats")
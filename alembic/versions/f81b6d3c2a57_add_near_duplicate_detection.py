@@ -0,0 +1,67 @@
+"""Добавление поиска почти-дубликатов вакансий (MinHash/LSH).
+
+Revision ID: f81b6d3c2a57
+Revises: c4d2e8a1f6b3
+Create Date: 2025-08-25 11:05:37.842160
+
+"""
+
+from typing import Any, Sequence, Union, cast
+
+import sqlalchemy as sa
+
+from alembic import op as _alembic_op  # type: ignore[attr-defined]
+
+op = cast(Any, _alembic_op)
+
+# Идентификаторы ревизии, используемые Alembic.
+revision: str = "f81b6d3c2a57"
+down_revision: Union[str, Sequence[str], None] = "c4d2e8a1f6b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Применяет изменения схемы."""
+    op.add_column(
+        "vacancies", sa.Column("duplicate_cluster_id", sa.Integer(), nullable=True)
+    )
+    op.create_index(
+        "ix_vacancies_duplicate_cluster_id", "vacancies", ["duplicate_cluster_id"]
+    )
+
+    op.create_table(
+        "vacancy_signatures",
+        sa.Column("vacancy_id", sa.Integer(), nullable=False),
+        sa.Column("published_at", sa.DateTime(), nullable=False),
+        sa.Column("cluster_id", sa.Integer(), nullable=False),
+        sa.Column("signature", sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint("vacancy_id"),
+    )
+    op.create_index(
+        "ix_vacancy_signatures_published_at", "vacancy_signatures", ["published_at"]
+    )
+
+    op.create_table(
+        "vacancy_lsh_bands",
+        sa.Column("band_key", sa.BigInteger(), nullable=False),
+        sa.Column("vacancy_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["vacancy_id"], ["vacancy_signatures.vacancy_id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("band_key", "vacancy_id"),
+    )
+    # Для каскадного удаления по vacancy_id
+    op.create_index(
+        "ix_vacancy_lsh_bands_vacancy_id", "vacancy_lsh_bands", ["vacancy_id"]
+    )
+
+
+def downgrade() -> None:
+    """Откатывает изменения схемы."""
+    op.drop_index("ix_vacancy_lsh_bands_vacancy_id", table_name="vacancy_lsh_bands")
+    op.drop_table("vacancy_lsh_bands")
+    op.drop_index("ix_vacancy_signatures_published_at", table_name="vacancy_signatures")
+    op.drop_table("vacancy_signatures")
+    op.drop_index("ix_vacancies_duplicate_cluster_id", table_name="vacancies")
+    op.drop_column("vacancies", "duplicate_cluster_id")
@@ -1,10 +1,14 @@
 """Главный пакет приложения."""
 
 import logging
+import time
 
-from flask import Flask
+from flask import Flask, Response, g, request
 from markupsafe import Markup, escape
 
+from core.config import settings
+from core.metrics import observe_request
+
 from .routes import bp
 
 
@@ -12,7 +16,8 @@ def create_app() -> Flask:
     """Создает и настраивает экземпляр Flask-приложения.
 
     Эта функция выступает фабрикой приложения Flask. Она выполняет
-    инициализацию, регистрацию блупринтов и запуск фоновых сервисов.
+    инициализацию, регистрацию блупринтов и, если это разрешено настройкой
+    RUN_SCHEDULER, запуск фоновых сервисов.
     """
     # --- НАСТРОЙКА ЛОГИРОВАНИЯ ---
     logging.basicConfig(
@@ -38,13 +43,36 @@ def create_app() -> Flask:
     # Добавление функций max и min в глобальный контекст Jinja2
     app.jinja_env.globals.update(max=max, min=min)
 
+    # Время обработки запросов по шаблонам маршрутов для /metrics
+    @app.before_request
+    def start_request_timer() -> None:
+        """Запоминает начало обработки запроса."""
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request_duration(response: Response) -> Response:
+        """Учитывает время обработки запроса в метриках."""
+        started = g.pop("request_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule else "<unmatched>"
+            observe_request(
+                request.method,
+                route,
+                response.status_code,
+                time.perf_counter() - started,
+            )
+        return response
+
     app.register_blueprint(bp)
 
     # --- ЗАПУСК ПЛАНИРОВЩИКА ---
-    # Импортируем здесь, чтобы избежать циклических зависимостей
-    from core.scheduler import start_scheduler
+    # При RUN_SCHEDULER=False сбором вакансий занимается отдельный процесс
+    # worker.py, а веб-приложение только обслуживает запросы.
+    if settings.RUN_SCHEDULER:
+        # Импортируем здесь, чтобы избежать циклических зависимостей
+        from core.scheduler import start_scheduler
 
-    start_scheduler()
+        start_scheduler(role="web")
     # ---------------------------
 
     return app
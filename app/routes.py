@@ -1,12 +1,15 @@
 """Этот модуль определяет основные маршруты для Flask-приложения."""
 
+import hmac
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import wraps
 from math import ceil
-from typing import Any
+from typing import Any, Callable, Optional, Tuple, TypeVar, cast
 
 from flask import (
     Blueprint,
+    Response,
     flash,
     jsonify,
     redirect,
@@ -16,21 +19,97 @@ from flask import (
 )
 from sqlalchemy import text
 
+from core.config import settings
+from core.crawl_plan import (
+    crawl_run_to_dict,
+    get_crawl_plan_stats,
+    get_crawl_run_history,
+)
+from core.crawl_units import get_crawl_summary
 from core.database import (
+    check_saved_search,
+    create_saved_search,
+    delete_saved_search,
+    engine,
     get_average_salary_by_city,
     get_db,
     get_filtered_vacancies,
+    get_saved_searches,
     get_top_companies_by_vacancies,
     get_total_vacancies_count,
     get_unique_cities,
     get_unique_sources,
+    get_vacancies_by_ids,
+    get_vacancy_by_id,
+    pool_usage,
+    slow_query_log,
+)
+from core.leader import leader_election
+from core.metrics import render_metrics
+from core.models import SavedSearch
+from core.parse_jobs import (
+    enqueue_parse_job,
+    get_parse_job_status,
+    get_recent_parse_jobs,
+    parse_job_to_dict,
+)
+from core.process_metrics import (
+    collect_process_metrics,
+    current_process_id,
+    get_process_heartbeats,
+    get_proxy_stats,
 )
-from core.extensions import scheduler
-from core.scheduler import update_vacancies
+from core.scheduler import configured_crawl_plan
+from core.similarity import get_similarity_index
 
 bp = Blueprint("main", __name__)
 logger = logging.getLogger(__name__)
 
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _admin_token_error(token_required: bool) -> Optional[Tuple[Response, int]]:
+    """Проверяет токен служебного маршрута в заголовке Authorization.
+
+    Args:
+        token_required: Маршрут изменяет состояние или раскрывает данные
+            пользователей; без ADMIN_TOKEN он отключен.
+
+    Returns:
+        Ответ с ошибкой или None, если запрос разрешен.
+    """
+    token = settings.ADMIN_TOKEN
+    if not token:
+        if token_required:
+            return jsonify({"error": "admin token is not configured"}), 403
+        return None
+    header = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+        return jsonify({"error": "admin token required"}), 401
+    return None
+
+
+def admin_route(token_required: bool = False) -> Callable[[F], F]:
+    """Декоратор служебных маршрутов, доступных по ADMIN_TOKEN.
+
+    Args:
+        token_required: Маршрут изменяет состояние или раскрывает данные
+            пользователей; без ADMIN_TOKEN он отключен, а остальные
+            маршруты без токена открыты.
+    """
+
+    def decorator(view: F) -> F:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            error = _admin_token_error(token_required)
+            if error is not None:
+                return error
+            return view(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorator
+
 
 @bp.route("/")
 def index() -> Any:
@@ -52,7 +131,8 @@ def index() -> Any:
 def vacancies() -> Any:
     """Отображает страницу с вакансиями, фильтрами и пагинацией.
 
-    Поддерживает фильтрацию по запросу, местоположению, компании, зарплате и источнику.
+    Поддерживает фильтрацию по запросу, местоположению, компании, зарплате,
+    источнику и периоду публикации, а также режим свертки почти-дубликатов.
 
     Returns:
         Ответ с отрендеренным шаблоном страницы вакансий.
@@ -65,6 +145,12 @@ def vacancies() -> Any:
         salary_min = request.args.get("salary_min", type=int)
         salary_max = request.args.get("salary_max", type=int)
         source = request.args.get("source", type=str)
+        period = request.args.get("period", type=int)
+        # Фильтр по дате публикации позволяет PostgreSQL отсечь старые секции
+        published_from = (
+            datetime.now() - timedelta(days=period) if period and period > 0 else None
+        )
+        collapse = 1 if request.args.get("collapse", type=int) else None
         sort = request.args.get("sort", "date", type=str)
         direction = request.args.get("direction", "desc", type=str)
         if direction not in ["asc", "desc"]:
@@ -86,6 +172,8 @@ def vacancies() -> Any:
                 salary_min=salary_min,
                 salary_max=salary_max,
                 source=source,
+                published_from=published_from,
+                collapse_duplicates=bool(collapse),
                 sort_by=sort_by,
                 sort_order=direction,
             )
@@ -97,6 +185,8 @@ def vacancies() -> Any:
                 salary_min=salary_min,
                 salary_max=salary_max,
                 source=source,
+                published_from=published_from,
+                collapse_duplicates=bool(collapse),
             )
             sources = get_unique_sources(db)
 
@@ -120,6 +210,8 @@ def vacancies() -> Any:
         salary_min=salary_min,
         salary_max=salary_max,
         source=source,
+        period=period,
+        collapse=collapse,
         sort=sort,
         direction=direction,
         sources=sources,
@@ -127,33 +219,282 @@ def vacancies() -> Any:
     )
 
 
+@bp.route("/vacancies/<int:vacancy_id>/similar")
+def similar_vacancies(vacancy_id: int) -> Any:
+    """Возвращает вакансии, похожие на заданную, по индексу похожих вакансий.
+
+    Параметр limit задает количество результатов (от 1 до 50, по умолчанию 10).
+
+    Returns:
+        JSON-ответ со списком похожих вакансий и их сходством, 404, если
+        вакансии нет, или 503, если индекс не построен.
+    """
+    limit = max(1, min(50, request.args.get("limit", 10, type=int) or 10))
+    index = get_similarity_index()
+    if index is None:
+        return jsonify({"error": "similarity index is not available"}), 503
+
+    with get_db() as db:
+        vacancy = get_vacancy_by_id(db, vacancy_id)
+        if vacancy is None:
+            return jsonify({"error": "vacancy not found"}), 404
+        # Запрашиваем с запасом: часть кандидатов могла устареть после
+        # построения индекса и будет отброшена при выборке из БД.
+        matches = dict(
+            index.search(
+                vacancy.title,
+                vacancy.description,
+                limit=limit * 2,
+                exclude_id=vacancy_id,
+            )
+        )
+        similar = get_vacancies_by_ids(db, list(matches))[:limit]
+        items = [
+            {
+                "id": item.id,
+                "title": item.title,
+                "company": item.company,
+                "location": item.location,
+                "salary": item.salary,
+                "source": item.source,
+                "url": item.original_url,
+                "published_at": item.published_at.isoformat(),
+                "score": round(matches[item.id], 4),
+            }
+            for item in similar
+        ]
+    return jsonify({"vacancy_id": vacancy_id, "similar": items}), 200
+
+
+def _saved_search_filters(search: SavedSearch) -> dict[str, Any]:
+    """Возвращает фильтры сохраненного поиска без пустых значений."""
+    filters = {
+        "query": search.query,
+        "location": search.location,
+        "company": search.company,
+        "salary_min": search.salary_min,
+        "salary_max": search.salary_max,
+        "source": search.source,
+    }
+    return {key: value for key, value in filters.items() if value is not None}
+
+
+def _saved_search_to_dict(search: SavedSearch) -> dict[str, Any]:
+    """Сериализует сохраненный поиск для JSON-ответа."""
+    return {
+        "id": search.id,
+        "name": search.name,
+        "filters": _saved_search_filters(search),
+        "new_count": search.new_count,
+        "last_checked_at": search.last_checked_at.isoformat(),
+        "url": url_for("main.vacancies", **_saved_search_filters(search)),
+    }
+
+
+@bp.route("/saved-searches", methods=["POST"])
+def create_saved_search_route() -> Any:
+    """Сохраняет текущие фильтры страницы вакансий как поиск.
+
+    Returns:
+        Редирект на страницу вакансий с теми же фильтрами.
+    """
+    query = request.form.get("query", type=str)
+    name = request.form.get("name", type=str) or query or "Мой поиск"
+    with get_db() as db:
+        search = create_saved_search(
+            db,
+            name=name,
+            query=query,
+            location=request.form.get("location", type=str),
+            company=request.form.get("company", type=str),
+            salary_min=request.form.get("salary_min", type=int),
+            salary_max=request.form.get("salary_max", type=int),
+            source=request.form.get("source", type=str),
+        )
+        redirect_url = url_for("main.vacancies", **_saved_search_filters(search))
+
+    flash(
+        f"Поиск '{name}' сохранен. Новые вакансии по нему будут учитываться "
+        "при каждом обновлении.",
+        "success",
+    )
+    return redirect(redirect_url)
+
+
+@bp.route("/saved-searches")
+def list_saved_searches() -> Any:
+    """Возвращает сохраненные поиски с количеством новых вакансий.
+
+    Returns:
+        JSON-ответ со списком сохраненных поисков.
+    """
+    with get_db() as db:
+        searches = [_saved_search_to_dict(s) for s in get_saved_searches(db)]
+    return jsonify({"saved_searches": searches}), 200
+
+
+@bp.route("/saved-searches/<int:search_id>/check", methods=["POST"])
+def check_saved_search_route(search_id: int) -> Any:
+    """Отмечает поиск проверенным и возвращает число новых вакансий.
+
+    Returns:
+        JSON-ответ с количеством новых вакансий с прошлой проверки и
+        ссылкой на выдачу или 404, если поиска нет.
+    """
+    with get_db() as db:
+        checked = check_saved_search(db, search_id)
+        if checked is None:
+            return jsonify({"error": "saved search not found"}), 404
+        search, new_count = checked
+        result = _saved_search_to_dict(search) | {"new_count": new_count}
+    return jsonify(result), 200
+
+
+@bp.route("/saved-searches/<int:search_id>", methods=["DELETE"])
+def delete_saved_search_route(search_id: int) -> Any:
+    """Удаляет сохраненный поиск.
+
+    Returns:
+        Пустой ответ 204 или 404, если поиска нет.
+    """
+    with get_db() as db:
+        if not delete_saved_search(db, search_id):
+            return jsonify({"error": "saved search not found"}), 404
+    return "", 204
+
+
 @bp.route("/trigger-parse", methods=["POST"])
 def trigger_parse() -> Any:
-    """Запускает фоновую задачу парсинга вакансий.
+    """Ставит задачу парсинга вакансий в очередь.
+
+    Повторный запуск с тем же запросом, пока задача ожидает выполнения,
+    не создает новую задачу. Задачи выполняют процессы с планировщиком
+    (см. core.parse_jobs), прогресс доступен по /parse-jobs/<id>.
 
     Returns:
-        Редирект на страницу со списком вакансий после запуска задачи.
+        Редирект на страницу со списком вакансий после постановки задачи.
     """
-    query = request.form.get("query", "Python")
+    query = request.form.get("query", "Python").strip()
     if not query:
         query = "Python"  # Запрос по умолчанию
 
-    # Запускаем задачу один раз, немедленно
-    scheduler.add_job(
-        update_vacancies,
-        "date",  # Триггер 'date' без run_date означает "запустить немедленно"
-        args=[query],
-        id=f"manual_parse_{datetime.now().timestamp()}",  # Уникальный ID для задачи
-    )
+    with get_db() as db:
+        job, created = enqueue_parse_job(db, query)
+        job_id, job_query = job.id, job.query
 
-    flash(
-        f"Задача парсинга по запросу '{query}' запущена в фоновом режиме. "
-        "Результаты появятся через несколько минут.",
-        "success",
-    )
+    if created:
+        flash(
+            f"Задача #{job_id} парсинга по запросу '{job_query}' поставлена в "
+            "очередь. Результаты появятся через несколько минут.",
+            "success",
+        )
+    else:
+        flash(
+            f"Задача #{job_id} по запросу '{job_query}' уже ожидает выполнения.",
+            "info",
+        )
     return redirect(url_for("main.vacancies"))
 
 
+@bp.route("/parse-jobs")
+@admin_route()
+def list_parse_jobs() -> Any:
+    """Возвращает последние задачи ручного парсинга.
+
+    Returns:
+        JSON-ответ со списком задач, начиная с самой новой.
+    """
+    limit = max(1, min(100, request.args.get("limit", 20, type=int) or 20))
+    with get_db() as db:
+        jobs = [parse_job_to_dict(job) for job in get_recent_parse_jobs(db, limit)]
+    return jsonify(jobs), 200
+
+
+@bp.route("/parse-jobs/<int:job_id>")
+def parse_job_status(job_id: int) -> Any:
+    """Возвращает состояние и прогресс задачи ручного парсинга.
+
+    Args:
+        job_id: Идентификатор задачи.
+
+    Returns:
+        JSON-ответ с состоянием задачи или 404, если задачи нет.
+    """
+    with get_db() as db:
+        status = get_parse_job_status(db, job_id)
+    if status is None:
+        return jsonify({"error": "parse job not found"}), 404
+    return jsonify(status), 200
+
+
+@bp.route("/proxies")
+@admin_route()
+def proxies() -> Any:
+    """Показывает здоровье и задержку прокси в пулах процессов сборщика.
+
+    Returns:
+        JSON-ответ со статистикой каждого прокси в каждом процессе,
+        сохранявшем ее в течение трех интервалов HEARTBEAT_INTERVAL.
+    """
+    with get_db() as db:
+        stats = get_proxy_stats(db, settings.HEARTBEAT_INTERVAL * 3)
+    return jsonify(stats), 200
+
+
+@bp.route("/crawl-units")
+@admin_route()
+def crawl_units_summary() -> Any:
+    """Показывает состояние распределенного обхода источников.
+
+    Returns:
+        JSON-ответ с количеством единиц обхода в каждом состоянии по
+        источникам.
+    """
+    with get_db() as db:
+        summary = get_crawl_summary(db)
+    return jsonify(summary), 200
+
+
+@bp.route("/crawl-plan")
+@admin_route()
+def crawl_plan() -> Any:
+    """Показывает записи плана обхода и статистику их запусков.
+
+    Returns:
+        JSON-ответ со списком записей плана, их задержкой и выходом вакансий
+        или ошибка 500, если план обхода в настройках некорректен.
+    """
+    try:
+        entries = configured_crawl_plan()
+    except ValueError as e:
+        return jsonify({"error": f"invalid crawl plan: {e}"}), 500
+    with get_db() as db:
+        stats = get_crawl_plan_stats(db, entries, settings.CRAWL_BACKOFF_FACTOR)
+    return jsonify(stats), 200
+
+
+@bp.route("/crawl-plan/history")
+@admin_route()
+def crawl_plan_history() -> Any:
+    """Показывает последние запуски записи плана и их интервалы.
+
+    Query-параметры:
+        key: Ключ записи плана "источник|регион|запрос".
+        limit: Количество запусков (от 1 до 200, по умолчанию 50).
+
+    Returns:
+        JSON-ответ со списком запусков, начиная с самого нового, или
+        ошибка 400, если ключ не указан.
+    """
+    key = request.args.get("key", type=str)
+    if not key:
+        return jsonify({"error": "key is required"}), 400
+    limit = max(1, min(200, request.args.get("limit", 50, type=int) or 50))
+    with get_db() as db:
+        runs = [crawl_run_to_dict(run) for run in get_crawl_run_history(db, key, limit)]
+    return jsonify(runs), 200
+
+
 @bp.route("/analytics")
 def analytics() -> Any:
     """Отображает страницу с аналитикой по вакансиям.
@@ -176,6 +517,9 @@ def analytics() -> Any:
 def health_check() -> Any:
     """Проверяет состояние приложения и его зависимостей (БД).
 
+    Поле scheduler_leader показывает, выполняет ли этот процесс
+    периодические задачи (держит блокировку ведущего).
+
     Returns:
         JSON-ответ со статусом 'ok' и кодом 200 в случае успеха,
         или 'error' и кодом 503, если есть проблемы с подключением к БД.
@@ -184,10 +528,97 @@ def health_check() -> Any:
         with get_db() as db:
             # Выполняем самый простой и быстрый запрос для проверки подключения
             db.execute(text("SELECT 1"))
-        return jsonify({"status": "ok"}), 200
+        return (
+            jsonify({"status": "ok", "scheduler_leader": leader_election.is_leader}),
+            200,
+        )
     except Exception as e:
         logger.error("Health check failed: database connection error: %s", e)
         return (
             jsonify({"status": "error", "reason": "database connection failed"}),
             503,
         )
+
+
+@bp.route("/processes")
+@admin_route()
+def processes() -> Any:
+    """Показывает потребление ресурсов веб-процесса и процессов сборщика.
+
+    Снимок текущего процесса снимается при запросе, остальные процессы
+    берутся из таблицы process_heartbeats, если они обновлялись в течение
+    трех интервалов HEARTBEAT_INTERVAL. Для текущего процесса также
+    возвращается использование пула соединений БД (db_pool).
+
+    Returns:
+        JSON-ответ со снимком текущего процесса и списком остальных.
+    """
+    current = collect_process_metrics("web", leader_election.is_leader, engine)
+    with get_db() as db:
+        others = get_process_heartbeats(db, settings.HEARTBEAT_INTERVAL * 3)
+    return (
+        jsonify(
+            {
+                "current": current.as_dict(),
+                "db_pool": pool_usage.snapshot().as_dict(),
+                "processes": [
+                    p.as_dict() for p in others if p.process_id != current.process_id
+                ],
+            }
+        ),
+        200,
+    )
+
+
+@bp.route("/slow-queries")
+@admin_route(token_required=True)
+def slow_queries() -> Any:
+    """Показывает самые долгие SQL-запросы процесса с их планами.
+
+    Журнал ведет каждый процесс отдельно (см. core.slow_queries), поэтому
+    в ответе указан обработавший запрос процесс. Параметры запросов
+    содержат поисковые запросы и фильтры пользователей, поэтому журнал
+    доступен только с токеном ADMIN_TOKEN.
+
+    Returns:
+        JSON-ответ с порогом журнала и запросами от самого долгого.
+    """
+    limit = max(1, min(200, request.args.get("limit", 50, type=int) or 50))
+    return (
+        jsonify(
+            {
+                "process_id": current_process_id(),
+                "threshold_ms": slow_query_log.threshold_ms,
+                "queries": slow_query_log.snapshot(limit),
+            }
+        ),
+        200,
+    )
+
+
+@bp.route("/slow-queries", methods=["DELETE"])
+@admin_route(token_required=True)
+def clear_slow_queries() -> Any:
+    """Очищает журнал медленных запросов процесса, например после смены индексов.
+
+    Доступен только с токеном ADMIN_TOKEN.
+
+    Returns:
+        Пустой ответ 204.
+    """
+    slow_query_log.clear()
+    return "", 204
+
+
+@bp.route("/metrics")
+def metrics() -> Any:
+    """Отдает метрики в текстовом формате Prometheus.
+
+    При заданном PROMETHEUS_MULTIPROC_DIR метрики суммируются по всем
+    процессам gunicorn, иначе относятся только к текущему процессу.
+
+    Returns:
+        Ответ с метриками.
+    """
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
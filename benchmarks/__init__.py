@@ -0,0 +1,5 @@
+"""Бенчмарки производительности.
+
+Скрипты запускаются как модули из корня проекта, например
+``python -m benchmarks.bench_dedup``, и не входят в набор тестов.
+"""
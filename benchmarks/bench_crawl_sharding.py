@@ -0,0 +1,220 @@
+"""Бенчмарк распределенного обхода единицами с арендой.
+
+Поднимает локальный HTTP-сервер, имитирующий API поиска hh.ru с заданной
+задержкой ответа, планирует единицы обхода (core.crawl_units) и обходит их
+одним, двумя, четырьмя и т.д. процессами, как если бы это были отдельные
+узлы сборщика. Показывает, что время обхода при постоянном объеме работы
+сокращается почти пропорционально числу процессов, пока не упрется в
+сервер, БД или процессорное время: колонка "CPU, с" - суммарное время
+процессора дочерних процессов (разбор ответов и вставка вакансий), и на
+машине с одним ядром время обхода не может стать меньше нее.
+
+Процессы работают с настроенной БД PostgreSQL (DB_* в .env), к которой
+применены миграции, поэтому запускайте бенчмарк на отдельной базе:
+вакансии каждого прогона вставляются по-настоящему (с дедупликацией и
+сопоставлением с сохраненными поисками) и удаляются после него.
+
+Пример запуска::
+
+    python -m benchmarks.bench_crawl_sharding --processes 1 2 4 8 --queries 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.synchronize import Barrier
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+from sqlalchemy import delete, func, select
+
+from benchmarks.bench_dedup import LEVELS, TITLES, WORDS
+from core.crawl_units import plan_crawl_units, process_crawl_units
+from core.database import get_db
+from core.models import CrawlUnit, Vacancy, VacancySignature, VacancyUrl
+from parsers.hh_parser import HHParser
+from parsers.http_client import set_host_rate
+
+# Отдельный источник, чтобы единицы бенчмарка не взял настоящий сборщик
+SOURCE = "bench-stub"
+PER_PAGE = 50
+# Даты публикации в формате API hh.ru: московское время со смещением +0300
+MSK = timezone(timedelta(hours=3))
+
+
+class StubHHParser(HHParser):
+    """Парсер hh.ru, обращающийся к локальному серверу-заглушке."""
+
+    source = SOURCE
+
+
+def _make_handler(pages: int, latency: float) -> Any:
+    """Создает обработчик запросов к заглушке API поиска вакансий."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            params = parse_qs(urlparse(self.path).query)
+            query = params["text"][0]
+            page = int(params["page"][0])
+            time.sleep(latency)
+            rng = random.Random(f"{query}-{page}")
+            items = [
+                {
+                    "id": f"{query}-{page}-{i}",
+                    "name": f"{rng.choice(TITLES)} {rng.choice(LEVELS)}".strip(),
+                    "employer": {"name": f"Компания {rng.randrange(5000)}"},
+                    "area": {"name": "Москва"},
+                    "salary": {
+                        "from": rng.randrange(50, 300) * 1000,
+                        "currency": "RUR",
+                    },
+                    "snippet": {
+                        "requirement": " ".join(rng.choice(WORDS) for _ in range(30))
+                    },
+                    "published_at": datetime.now(MSK).strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "alternate_url": f"http://stub/{query}/{page}/{i}",
+                }
+                for i in range(PER_PAGE)
+            ]
+            body = json.dumps({"items": items, "pages": pages}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            """Отключает журнал запросов сервера."""
+
+    return Handler
+
+
+def _worker(api_url: str, rate: float, barrier: Barrier) -> None:
+    """Обходит единицы бенчмарка, пока они не закончатся."""
+    # Лимит частоты действует в пределах процесса, как у настоящего сборщика
+    set_host_rate(urlparse(api_url).netloc, rate, burst=1)
+    barrier.wait()
+    process_crawl_units(
+        {SOURCE: partial(StubHHParser, api_url)},
+        f"bench:{os.getpid()}",
+        timedelta(seconds=60),
+        max_attempts=3,
+    )
+
+
+def _cleanup(run_tag: str) -> None:
+    """Удаляет единицы и вакансии прогона."""
+    urls = Vacancy.original_url.like(f"http://stub/{run_tag}-%")
+    with get_db() as db:
+        db.execute(
+            delete(VacancySignature).where(
+                VacancySignature.vacancy_id.in_(select(Vacancy.id).where(urls))
+            )
+        )
+        db.execute(delete(Vacancy).where(urls))
+        db.execute(
+            delete(VacancyUrl).where(
+                VacancyUrl.original_url.like(f"http://stub/{run_tag}-%")
+            )
+        )
+        db.execute(delete(CrawlUnit).where(CrawlUnit.source == SOURCE))
+        db.commit()
+
+
+def _run(args: argparse.Namespace, api_url: str, processes: int) -> Dict[str, Any]:
+    """Планирует единицы и обходит их заданным числом процессов."""
+    run_tag = f"p{processes}"
+    _cleanup(run_tag)
+    with get_db() as db:
+        units = sum(
+            plan_crawl_units(
+                db,
+                f"{run_tag}-q{i}",
+                {SOURCE: (0, args.pages - 1)},
+                args.pages_per_unit,
+            )
+            for i in range(args.queries)
+        )
+
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(processes + 1)
+    workers: List[Any] = [
+        ctx.Process(target=_worker, args=(api_url, args.rate, barrier))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    # Время импорта модулей в дочерних процессах не учитывается
+    barrier.wait()
+    started = time.perf_counter()
+    cpu_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    cpu_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (cpu_after.ru_utime + cpu_after.ru_stime) - (
+        cpu_before.ru_utime + cpu_before.ru_stime
+    )
+
+    with get_db() as db:
+        pages, done = db.execute(
+            select(func.sum(CrawlUnit.pages_fetched), func.count()).where(
+                CrawlUnit.source == SOURCE, CrawlUnit.status == "done"
+            )
+        ).one()
+    _cleanup(run_tag)
+    return {
+        "units": units,
+        "done": done,
+        "pages": pages or 0,
+        "seconds": elapsed,
+        "cpu": cpu,
+    }
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--queries", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--pages-per-unit", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument(
+        "--rate", type=float, default=2.0, help="запросов в секунду на процесс"
+    )
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), _make_handler(args.pages, args.latency)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_port}/vacancies"
+
+    print(
+        f"{'процессов':>9} {'единиц':>7} {'страниц':>8} {'время, с':>9} "
+        f"{'стр./с':>7} {'ускорение':>10} {'CPU, с':>7}"
+    )
+    baseline = None
+    for processes in args.processes:
+        result = _run(args, api_url, processes)
+        assert result["done"] == result["units"], result
+        baseline = baseline or result["seconds"]
+        print(
+            f"{processes:>9} {result['units']:>7} {result['pages']:>8} "
+            f"{result['seconds']:>9.2f} {result['pages'] / result['seconds']:>7.1f} "
+            f"{baseline / result['seconds']:>10.2f} {result['cpu']:>7.1f}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
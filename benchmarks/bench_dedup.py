@@ -0,0 +1,141 @@
+"""Бенчмарк поиска почти-дубликатов (MinHash/LSH).
+
+Генерирует синтетический корпус вакансий, часть которых - измененные копии
+других (как при публикации на двух площадках), и измеряет:
+
+* скорость построения сигнатур;
+* время поиска в LSH-индексе в зависимости от его размера (сублинейность);
+* время полного перебора для сравнения;
+* полноту и точность на заранее известных парах дубликатов.
+
+Пример запуска::
+
+    python -m benchmarks.bench_dedup --sizes 10000 100000 --queries 500
+"""
+
+import argparse
+import random
+import time
+from typing import List, Tuple
+
+from core.dedup import (
+    SIMILARITY_THRESHOLD,
+    LSHIndex,
+    estimate_similarity,
+    minhash_signature,
+    vacancy_features,
+)
+
+TITLES = [
+    "Python-разработчик",
+    "Java developer",
+    "Frontend-разработчик React",
+    "Аналитик данных",
+    "Инженер DevOps",
+    "Тестировщик QA",
+    "Менеджер проектов",
+    "Бухгалтер",
+    "Продавец-консультант",
+    "Водитель-экспедитор",
+]
+LEVELS = ["Junior", "Middle", "Senior", "Lead", "Стажер", ""]
+SYLLABLES = "ра бо та оп ыт зна ни е ко ман да про ект сер ви сы ба за дан ных".split()
+
+
+def _vocabulary(rng: random.Random, size: int) -> List[str]:
+    """Строит словарь псевдослов, чтобы случайные описания почти не совпадали."""
+    return [
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        for _ in range(size)
+    ]
+
+
+WORDS = _vocabulary(random.Random(0), 5000)
+
+Vacancy = Tuple[str, str, str]
+
+
+def _random_vacancy(rng: random.Random, number: int) -> Vacancy:
+    """Создает случайную вакансию."""
+    title = f"{rng.choice(TITLES)} {rng.choice(LEVELS)} {number}".strip()
+    company = f"Компания {rng.randrange(5000)}"
+    description = " ".join(rng.choice(WORDS) for _ in range(40))
+    return title, company, description
+
+
+def _perturb(rng: random.Random, vacancy: Vacancy) -> Vacancy:
+    """Делает копию вакансии так, как ее перепечатала бы другая площадка."""
+    title, company, description = vacancy
+    words = description.split()
+    rng.shuffle(words[20:])
+    return (
+        title.replace("-", " "),
+        f"ООО {company}",
+        " ".join(words[:30] + [rng.choice(WORDS) for _ in range(5)]),
+    )
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    largest = max(args.sizes)
+
+    started = time.perf_counter()
+    corpus = [_random_vacancy(rng, i) for i in range(largest)]
+    signatures = [minhash_signature(vacancy_features(*v)) for v in corpus]
+    elapsed = time.perf_counter() - started
+    print(f"Сигнатуры: {largest} шт. за {elapsed:.2f} с ({largest / elapsed:.0f}/с)")
+
+    print(f"{'размер':>10} {'LSH, мс':>10} {'перебор, мс':>12} {'полнота':>8}")
+    for size in sorted(args.sizes):
+        index = LSHIndex()
+        for item_id in range(size):
+            index.add(item_id, signatures[item_id], item_id)
+
+        targets = [rng.randrange(size) for _ in range(args.queries)]
+        queries: List[Tuple[int, Tuple[int, ...]]] = [
+            (t, minhash_signature(vacancy_features(*_perturb(rng, corpus[t]))))
+            for t in targets
+        ]
+
+        started = time.perf_counter()
+        found = sum(1 for t, sig in queries if (index.query(sig) or (-1, 0))[0] == t)
+        lsh_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        # Полный перебор измеряется на нескольких запросах: он линеен по размеру
+        brute_queries = queries[:10]
+        started = time.perf_counter()
+        for _, sig in brute_queries:
+            max(
+                range(size),
+                key=lambda i: estimate_similarity(sig, signatures[i]),
+            )
+        brute_ms = (time.perf_counter() - started) * 1000 / len(brute_queries)
+
+        print(
+            f"{size:>10} {lsh_ms:>10.3f} {brute_ms:>12.1f} {found / len(queries):>8.1%}"
+        )
+
+    # Точность: случайные непохожие вакансии не должны склеиваться
+    index = LSHIndex()
+    for item_id in range(min(largest, 10000)):
+        index.add(item_id, signatures[item_id], item_id)
+    fresh = [
+        minhash_signature(vacancy_features(*_random_vacancy(rng, largest + i)))
+        for i in range(args.queries)
+    ]
+    false_matches = sum(1 for sig in fresh if index.query(sig) is not None)
+    print(
+        f"Ложные совпадения при пороге {SIMILARITY_THRESHOLD}: "
+        f"{false_matches / len(fresh):.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
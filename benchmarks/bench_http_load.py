@@ -0,0 +1,394 @@
+"""Нагрузочный тест HTTP-маршрутов веб-приложения под gunicorn.
+
+Запускает gunicorn с заданным числом процессов и потоков (или использует
+уже запущенный сервер --url) и для каждого уровня параллельности
+--concurrency в течение --duration секунд отправляет запросы из
+фиксированного числа потоков-клиентов, каждый следующий запрос - сразу
+после ответа на предыдущий. Смесь запросов:
+
+* / - главная страница;
+* /vacancies - смесь фильтров (текст, город, компания, зарплата,
+  источник, период, сортировка по зарплате, свертка дубликатов) и
+  страниц: чаще первые, изредка глубокие, до --max-page;
+* /analytics - страница аналитики;
+* /health - проверка состояния.
+
+Для каждого уровня выводятся пропускная способность, перцентили задержки
+(p50, p95, p99), доля ошибок (ответы 4xx/5xx и сбои соединения) и
+насыщение пула соединений БД: отдельный поток опрашивает /processes и
+берет наибольшее число одновременно выданных соединений в процессах
+gunicorn, ответивших на опрос, относительно емкости пула (DB_POOL_SIZE +
+DB_MAX_OVERFLOW); при заданном ADMIN_TOKEN его передает --admin-token.
+В процессах gunicorn без потоков запрос занимает не
+больше одного соединения, поэтому насыщение пула имеет смысл замерять с
+--threads больше 1.
+
+С --save результаты сохраняются в JSON-файл, а с --baseline сравниваются
+с сохраненными: уровень, у которого p95 вырос или пропускная способность
+упала больше чем в --threshold раз, отмечается, и тест завершается с
+кодом 1.
+
+Запускайте тест на синтетическом наборе (benchmarks.dataset) в отдельной
+базе PostgreSQL (DB_* в .env).
+
+Пример запуска::
+
+    python -m benchmarks.dataset --rows 1000000 --truncate
+    python -m benchmarks.bench_http_load --workers 4 --threads 4 --save load.json
+    python -m benchmarks.bench_http_load --workers 4 --threads 4 --baseline load.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import subprocess  # nosec B404
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import requests
+
+# Маршрут и его доля в смеси запросов
+ROUTES = [("/", 20), ("/vacancies", 50), ("/analytics", 10), ("/health", 20)]
+# Фильтры /vacancies и их доля в смеси запросов
+VACANCY_FILTERS: List[Tuple[Dict[str, Any], int]] = [
+    ({}, 25),
+    ({"query": "python"}, 15),
+    ({"query": "аналитик", "location": "Москва"}, 10),
+    ({"location": "Санкт-Петербург"}, 8),
+    ({"company": "Вектор"}, 5),
+    ({"salary_min": 150000}, 10),
+    ({"salary_min": 100000, "salary_max": 250000, "sort": "salary"}, 8),
+    ({"source": "hh.ru", "period": 7}, 8),
+    ({"query": "менеджер", "sort": "salary", "direction": "asc"}, 6),
+    ({"collapse": 1}, 5),
+]
+
+
+@dataclass
+class Sample:
+    """Результат одного запроса.
+
+    Attributes:
+        route: Маршрут.
+        latency_ms: Время ответа в миллисекундах.
+        ok: Ответ без ошибки.
+    """
+
+    route: str
+    latency_ms: float
+    ok: bool
+
+
+@dataclass
+class PoolObservation:
+    """Наблюдения за пулами соединений процессов за уровень нагрузки.
+
+    Attributes:
+        capacity: Емкость пула процесса.
+        max_checked_out: Наибольшее число выданных соединений в процессе.
+        processes: Процессы, ответившие на опрос.
+    """
+
+    capacity: Optional[int] = None
+    max_checked_out: int = 0
+    processes: Set[int] = field(default_factory=set)
+
+    @property
+    def saturation(self) -> Optional[float]:
+        """Наибольшая доля емкости пула, занятая в процессе."""
+        return self.max_checked_out / self.capacity if self.capacity else None
+
+
+def _page(rng: random.Random, max_page: int) -> int:
+    """Выбирает страницу: чаще первые, изредка глубокие."""
+    roll = rng.random()
+    if roll < 0.6:
+        return 1
+    if roll < 0.9:
+        return rng.randint(2, 10)
+    # Логарифмически равномерно между 10 и max_page
+    return int(math.exp(rng.uniform(math.log(10), math.log(max(max_page, 10)))))
+
+
+def request_path(rng: random.Random, max_page: int) -> Tuple[str, Dict[str, Any]]:
+    """Выбирает маршрут и параметры очередного запроса."""
+    route = rng.choices([r for r, _ in ROUTES], [w for _, w in ROUTES])[0]
+    if route != "/vacancies":
+        return route, {}
+    params = dict(
+        rng.choices([f for f, _ in VACANCY_FILTERS], [w for _, w in VACANCY_FILTERS])[0]
+    )
+    params["page"] = _page(rng, max_page)
+    return route, params
+
+
+def _client(
+    base_url: str, seed: str, max_page: int, deadline: float, samples: List[Sample]
+) -> None:
+    """Отправляет запросы до deadline, добавляя результаты в samples."""
+    rng = random.Random(seed)  # nosec B311
+    session = requests.Session()
+    while time.perf_counter() < deadline:
+        route, params = request_path(rng, max_page)
+        started = time.perf_counter()
+        try:
+            response = session.get(base_url + route, params=params, timeout=60)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            ok = False
+        samples.append(Sample(route, (time.perf_counter() - started) * 1000, ok))
+    session.close()
+
+
+def _sample_pools(
+    base_url: str,
+    interval: float,
+    admin_token: Optional[str],
+    stop: threading.Event,
+    pools: PoolObservation,
+) -> None:
+    """Опрашивает /processes и запоминает наибольшую занятость пулов."""
+    session = requests.Session()
+    if admin_token:
+        session.headers["Authorization"] = f"Bearer {admin_token}"
+    while not stop.wait(interval):
+        try:
+            data = session.get(base_url + "/processes", timeout=10).json()
+        except (requests.RequestException, ValueError):
+            continue
+        pool = data.get("db_pool") or {}
+        pools.processes.add(data["current"]["process_id"])
+        pools.capacity = pool.get("capacity")
+        pools.max_checked_out = max(pools.max_checked_out, pool.get("checked_out", 0))
+    session.close()
+
+
+def _percentiles(latencies: List[float]) -> Tuple[float, float, float]:
+    """Возвращает p50, p95 и p99 в миллисекундах."""
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(latencies, n=100)
+    return statistics.median(latencies), cuts[94], cuts[98]
+
+
+def run_level(
+    base_url: str, concurrency: int, args: argparse.Namespace
+) -> Dict[str, Any]:
+    """Нагружает сервер concurrency клиентами и возвращает итоги уровня."""
+    # Прогрев: соединения пулов и кэши PostgreSQL
+    warmup: List[Sample] = []
+    _client(
+        base_url, "warmup", args.max_page, time.perf_counter() + args.warmup, warmup
+    )
+
+    samples: List[Sample] = []
+    pools = PoolObservation()
+    stop = threading.Event()
+    sampler = threading.Thread(
+        target=_sample_pools,
+        args=(base_url, args.sample_interval, args.admin_token, stop, pools),
+    )
+    sampler.start()
+    deadline = time.perf_counter() + args.duration
+    clients = [
+        threading.Thread(
+            target=_client,
+            args=(base_url, f"{args.seed}-{i}", args.max_page, deadline, samples),
+        )
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampler.join()
+
+    by_route: Dict[str, List[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_route[sample.route].append(sample)
+    p50, p95, p99 = _percentiles([s.latency_ms for s in samples])
+    routes = {}
+    for route, route_samples in sorted(by_route.items()):
+        r50, r95, r99 = _percentiles([s.latency_ms for s in route_samples])
+        routes[route] = {
+            "requests": len(route_samples),
+            "p50_ms": round(r50, 1),
+            "p95_ms": round(r95, 1),
+            "p99_ms": round(r99, 1),
+            "error_rate": sum(not s.ok for s in route_samples) / len(route_samples),
+        }
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(p50, 1),
+        "p95_ms": round(p95, 1),
+        "p99_ms": round(p99, 1),
+        "error_rate": sum(not s.ok for s in samples) / max(len(samples), 1),
+        "pool_capacity": pools.capacity,
+        "pool_max_checked_out": pools.max_checked_out,
+        "pool_saturation": pools.saturation,
+        "processes_sampled": len(pools.processes),
+        "routes": routes,
+    }
+
+
+def start_gunicorn(args: argparse.Namespace) -> "subprocess.Popen[bytes]":
+    """Запускает gunicorn с приложением и ждет ответа /health."""
+    env = {**os.environ, "RUN_SCHEDULER": "false"}
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--bind",
+        f"127.0.0.1:{args.port}",
+        "--workers",
+        str(args.workers),
+        "--threads",
+        str(args.threads),
+        "--log-level",
+        "warning",
+        "run:app",
+    ]
+    server = subprocess.Popen(command, env=env)  # nosec B603
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{_local_url(args)}/health", timeout=2).ok:
+                return server
+        except requests.RequestException:
+            pass
+        if server.poll() is not None:
+            break
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("gunicorn не ответил на /health")
+
+
+def _local_url(args: argparse.Namespace) -> str:
+    """Адрес запущенного тестом gunicorn."""
+    return f"http://127.0.0.1:{args.port}"
+
+
+def _print_level(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> bool:
+    """Печатает итоги уровня; возвращает True при ухудшении."""
+    saturation = result["pool_saturation"]
+    pool = (
+        f"{result['pool_max_checked_out']}/{result['pool_capacity']}"
+        if result["pool_capacity"]
+        else "-"
+    )
+    print(
+        f"{result['concurrency']:>10} {result['requests']:>8} {result['rps']:>8.1f} "
+        f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+        f"{result['error_rate'] * 100:>8.2f} {pool:>7} "
+        f"{'-' if saturation is None else f'{saturation:.0%}':>6}"
+    )
+    for route, stats in result["routes"].items():
+        print(
+            f"{route:>10} {stats['requests']:>8} {'':>8} "
+            f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+            f"{stats['error_rate'] * 100:>8.2f}"
+        )
+    return baseline is not None and bool(_regressions(result, baseline))
+
+
+def _regressions(result: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Возвращает описания ухудшений относительно базового уровня."""
+    threshold = baseline["threshold"]
+    problems = []
+    if result["p95_ms"] > baseline["p95_ms"] * threshold:
+        problems.append(f"p95 {baseline['p95_ms']:.1f} -> {result['p95_ms']:.1f} мс")
+    if result["rps"] * threshold < baseline["rps"]:
+        problems.append(f"запросов/с {baseline['rps']:.1f} -> {result['rps']:.1f}")
+    if result["error_rate"] > baseline["error_rate"]:
+        problems.append(
+            f"ошибок {baseline['error_rate']:.2%} -> {result['error_rate']:.2%}"
+        )
+    for problem in problems:
+        print(f"{'':>10} УХУДШЕНИЕ: {problem}")
+    return problems
+
+
+def main() -> None:
+    """Точка входа нагрузочного теста."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="адрес запущенного сервера вместо gunicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--max-page", type=int, default=500)
+    parser.add_argument("--sample-interval", type=float, default=0.5)
+    parser.add_argument(
+        "--admin-token",
+        default=os.environ.get("ADMIN_TOKEN"),
+        help="токен служебного маршрута /processes (по умолчанию ADMIN_TOKEN)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="файл для сохранения результатов")
+    parser.add_argument("--baseline", help="файл базовых результатов")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    baseline_levels: Dict[int, Dict[str, Any]] = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            for level in json.load(file)["levels"]:
+                baseline_levels[level["concurrency"]] = {
+                    **level,
+                    "threshold": args.threshold,
+                }
+
+    server = None if args.url else start_gunicorn(args)
+    base_url = (args.url or _local_url(args)).rstrip("/")
+    results = []
+    regressions = 0
+    print(
+        f"{'клиентов':>10} {'запросов':>8} {'запр./с':>8} {'p50, мс':>8} "
+        f"{'p95, мс':>8} {'p99, мс':>8} {'ошибок,%':>8} {'пул БД':>7} "
+        f"{'насыщ.':>6}"
+    )
+    try:
+        for concurrency in args.concurrency:
+            result = run_level(base_url, concurrency, args)
+            results.append(result)
+            regressions += _print_level(result, baseline_levels.get(concurrency))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "workers": args.workers,
+                    "threads": args.threads,
+                    "levels": results,
+                },
+                file,
+                ensure_ascii=False,
+                indent=2,
+            )
+    if regressions:
+        print(f"Уровней с ухудшением: {regressions}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""Бенчмарк сбора вакансий от запроса к источнику до вставки в БД.
+
+Обходит выдачу hh.ru и SuperJob настоящими парсерами (с HTTP-клиентом,
+разбором страниц и нормализацией зарплат), но вместо источников
+обращается к серверу воспроизведения записанного трафика
+(benchmarks.replay_server) с заданной задержкой и долей ошибок.
+
+По умолчанию (--pipeline crawl-units) выдача обходится так же, как в
+сборщике: запросы делятся на единицы обхода (core.crawl_units), которые
+процесс берет в аренду, обходит с продлением аренды и сохраняет после
+каждой единицы. Единицы создаются для отдельных источников бенчмарка,
+поэтому их не возьмет настоящий сборщик, работающий с той же базой. С
+--pipeline manual выдача обходится целиком, как задачей ручного
+парсинга, и сохраняется одной вставкой, а время обхода и вставки
+показывается отдельно.
+
+Вакансии сохраняются add_vacancies_from_dto (с дедупликацией и
+сопоставлением с сохраненными поисками). Показывает страницы и вакансии
+в секунду и пиковый объем памяти процесса; с --output результат
+дописывается строкой JSON в файл, чтобы сравнивать его между версиями.
+
+Записи берутся из каталога --recordings (записанного с HTTP_RECORD_DIR,
+запросы --queries должны совпадать с записанными). Без него выдача
+создается синтетическими серверами-источниками и записывается во
+временный каталог тем же регистратором, что и настоящий трафик.
+
+Вакансии вставляются в настроенную БД PostgreSQL (DB_* в .env), к которой
+применены миграции, и удаляются после прогона, поэтому запускайте
+бенчмарк на отдельной базе.
+
+Пример запуска::
+
+    python -m benchmarks.bench_ingest --synthetic-queries 4 --error-rate 0.01
+    python -m benchmarks.bench_ingest --pipeline manual
+    python -m benchmarks.bench_ingest --recordings recordings/ --queries Python
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple, Type, TypeVar
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import delete, func, select
+
+from benchmarks.bench_crawl_sharding import _make_handler as _make_hh_handler
+from benchmarks.bench_superjob_extract import _page
+from benchmarks.replay_server import ReplayServer
+from core.config import settings
+from core.crawl_units import (
+    DONE,
+    SKIPPED,
+    ParserFactory,
+    plan_crawl_units,
+    process_crawl_units,
+)
+from core.database import add_vacancies_from_dto, get_db
+from core.models import CrawlUnit, Vacancy, VacancySignature, VacancyUrl
+from core.vacancy_details import enrich_descriptions
+from parsers.dto import VacancyDTO
+from parsers.hh_parser import HH_API_URL, HHParser
+from parsers.http_client import reset_http_state, set_host_rate
+from parsers.http_recording import HttpRecorder
+from parsers.superjob_parser import SUPERJOB_BASE_URL, SuperJobParser
+
+ParserT = TypeVar("ParserT", HHParser, SuperJobParser)
+
+
+class BenchHHParser(HHParser):
+    """Парсер hh.ru с отдельным источником для единиц обхода бенчмарка."""
+
+    source = "bench-hh.ru"
+
+
+class BenchSuperJobParser(SuperJobParser):
+    """Парсер SuperJob с отдельным источником для единиц обхода бенчмарка."""
+
+    source = "bench-superjob.ru"
+
+
+def _make_superjob_handler(pages: int, cards: int) -> Any:
+    """Создает обработчик запросов к синтетической выдаче SuperJob."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            params = parse_qs(urlsplit(self.path).query)
+            query = params["keywords"][0]
+            page = int(params["page"][0])
+            html = _page(random.Random(f"{query}-{page}"), cards, noise=200)
+            # Уникальные адреса вакансий для каждой страницы и запроса
+            html = html.replace(
+                "/vakansii/vacancy-", f"/vakansii/{query}-{page}-vacancy-"
+            )
+            if page >= pages:
+                html = html.replace("f-test-button-dalshe", "")
+            body = html.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            """Отключает журнал запросов сервера."""
+
+    return Handler
+
+
+def _bench_parser(parser_class: Type[ParserT], url: str) -> ParserT:
+    """Создает парсер источника без кэша, прокси и записи ответов."""
+    parser = parser_class(url)
+    parser.http.cache = None
+    parser.http.recorder = None
+    parser.http.proxy_pool = None
+    return parser
+
+
+def _parsers(hh_url: str, superjob_url: str) -> Tuple[HHParser, SuperJobParser]:
+    """Создает парсеры источников бенчмарка."""
+    return (
+        _bench_parser(BenchHHParser, hh_url),
+        _bench_parser(BenchSuperJobParser, superjob_url),
+    )
+
+
+def record_synthetic(
+    directory: str, queries: List[str], pages: int, cards: int
+) -> Tuple[str, str]:
+    """Записывает обход синтетических источников в каталог.
+
+    Returns:
+        Адреса синтетических источников hh.ru и SuperJob, под которыми
+        сохранены записи.
+    """
+    servers = [
+        ThreadingHTTPServer(("127.0.0.1", 0), _make_hh_handler(pages, 0.0)),
+        ThreadingHTTPServer(("127.0.0.1", 0), _make_superjob_handler(pages, cards)),
+    ]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        set_host_rate(f"127.0.0.1:{server.server_port}", 1000.0, burst=1000)
+    hh_url = f"http://127.0.0.1:{servers[0].server_port}/vacancies"
+    superjob_url = f"http://127.0.0.1:{servers[1].server_port}"
+
+    recorder = HttpRecorder(directory)
+    for query in queries:
+        for parser in _parsers(hh_url, superjob_url):
+            parser.http.recorder = recorder
+            parser.parse_pages(query, *parser.page_range())
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    return hh_url, superjob_url
+
+
+def _cleanup(max_id: int) -> None:
+    """Удаляет вакансии и единицы обхода, созданные прогоном."""
+    with get_db() as db:
+        db.execute(
+            delete(CrawlUnit).where(
+                CrawlUnit.source.in_([BenchHHParser.source, BenchSuperJobParser.source])
+            )
+        )
+        db.execute(delete(VacancySignature).where(VacancySignature.vacancy_id > max_id))
+        db.execute(
+            delete(VacancyUrl).where(
+                VacancyUrl.original_url.in_(
+                    select(Vacancy.original_url).where(Vacancy.id > max_id)
+                )
+            )
+        )
+        db.execute(delete(Vacancy).where(Vacancy.id > max_id))
+        db.commit()
+
+
+def _peak_rss_mb() -> float:
+    """Возвращает пиковый объем памяти процесса в мегабайтах."""
+    # ru_maxrss в Linux - в килобайтах
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _run_crawl_units(
+    queries: List[str],
+    replay: ReplayServer,
+    hh_url: str,
+    superjob_url: str,
+    pages_per_unit: int,
+) -> Dict[str, Any]:
+    """Обходит выдачу единицами обхода через сервер воспроизведения."""
+    factories: Dict[str, ParserFactory] = {
+        BenchHHParser.source: partial(
+            _bench_parser, BenchHHParser, replay.url_for(hh_url)
+        ),
+        BenchSuperJobParser.source: partial(
+            _bench_parser, BenchSuperJobParser, replay.url_for(superjob_url)
+        ),
+    }
+    page_ranges = {
+        BenchHHParser.source: BenchHHParser.page_range(),
+        BenchSuperJobParser.source: BenchSuperJobParser.page_range(),
+    }
+    with get_db() as db:
+        max_id = db.scalar(select(func.max(Vacancy.id))) or 0
+    _cleanup(max_id)
+    with get_db() as db:
+        units = sum(
+            plan_crawl_units(db, query, page_ranges, pages_per_unit)
+            for query in queries
+        )
+
+    started = time.perf_counter()
+    process_crawl_units(
+        factories,
+        f"bench:{os.getpid()}",
+        timedelta(seconds=settings.CRAWL_LEASE_SECONDS),
+        settings.CRAWL_MAX_ATTEMPTS,
+    )
+    seconds = time.perf_counter() - started
+
+    with get_db() as db:
+        pages, found, inserted, failed = db.execute(
+            select(
+                func.coalesce(func.sum(CrawlUnit.pages_fetched), 0),
+                func.coalesce(func.sum(CrawlUnit.found_count), 0),
+                func.coalesce(func.sum(CrawlUnit.added_count), 0),
+                func.count().filter(CrawlUnit.status.notin_([DONE, SKIPPED])),
+            ).where(CrawlUnit.source.in_(factories))
+        ).one()
+    _cleanup(max_id)
+    return {
+        "units": units,
+        "pages": pages,
+        "failed_ranges": failed,
+        "vacancies": found,
+        "inserted": inserted,
+        "seconds": round(seconds, 3),
+        "pages_per_second": round(pages / seconds, 1),
+        "vacancies_per_second": round(found / seconds, 1),
+        "peak_rss_mb": _peak_rss_mb(),
+        "replay_errors": replay.stats.errors,
+        "replay_missing": replay.stats.missing,
+    }
+
+
+def _run_manual(
+    queries: List[str], replay: ReplayServer, hh_url: str, superjob_url: str
+) -> Dict[str, Any]:
+    """Обходит выдачу целиком, как задача ручного парсинга, и сохраняет ее."""
+    with get_db() as db:
+        max_id = db.scalar(select(func.max(Vacancy.id))) or 0
+
+    pages = 0
+    failed = 0
+    vacancies: List[VacancyDTO] = []
+    hh, superjob = _parsers(replay.url_for(hh_url), replay.url_for(superjob_url))
+    started = time.perf_counter()
+    for query in queries:
+        for parser in (hh, superjob):
+            result = parser.parse_pages(query, *parser.page_range())
+            pages += result.pages_fetched
+            failed += result.failed_page is not None
+            vacancies.extend(result.vacancies)
+    fetch_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with get_db() as db:
+        if settings.HH_DETAILS_ENABLED:
+            enrich_descriptions(db, vacancies, parser=hh)
+        inserted = add_vacancies_from_dto(db, vacancies)
+    insert_seconds = time.perf_counter() - started
+    _cleanup(max_id)
+
+    total = fetch_seconds + insert_seconds
+    return {
+        "pages": pages,
+        "failed_ranges": failed,
+        "vacancies": len(vacancies),
+        "inserted": inserted,
+        "seconds": round(total, 3),
+        "fetch_seconds": round(fetch_seconds, 3),
+        "insert_seconds": round(insert_seconds, 3),
+        "pages_per_second": round(pages / fetch_seconds, 1),
+        "vacancies_per_second": round(len(vacancies) / total, 1),
+        "peak_rss_mb": _peak_rss_mb(),
+        "replay_errors": replay.stats.errors,
+        "replay_missing": replay.stats.missing,
+    }
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pipeline",
+        choices=["crawl-units", "manual"],
+        default="crawl-units",
+        help="обход единицами, как в сборщике, или целиком, как ручной парсинг",
+    )
+    parser.add_argument("--recordings", help="каталог записей (HTTP_RECORD_DIR)")
+    parser.add_argument(
+        "--queries",
+        nargs="+",
+        default=[settings.DEFAULT_PARSE_QUERY],
+        help="записанные поисковые запросы (с --recordings)",
+    )
+    parser.add_argument("--synthetic-queries", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--cards", type=int, default=20)
+    parser.add_argument(
+        "--pages-per-unit", type=int, default=settings.CRAWL_PAGES_PER_UNIT
+    )
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--rate", type=float, default=100.0, help="запросов в секунду к серверу"
+    )
+    parser.add_argument("--output", help="файл, в который дописывается результат")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.recordings:
+            directory = args.recordings
+            hh_url, superjob_url = HH_API_URL, SUPERJOB_BASE_URL
+        else:
+            directory = tmp
+            args.queries = [f"bench{i}" for i in range(args.synthetic_queries)]
+            hh_url, superjob_url = record_synthetic(
+                tmp, args.queries, args.pages, args.cards
+            )
+        # Лимиты и автоматы отключения записи не влияют на замер
+        reset_http_state()
+        with ReplayServer(
+            directory,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        ) as replay:
+            set_host_rate(urlsplit(replay.url).netloc, args.rate, burst=1)
+            if args.pipeline == "manual":
+                result = _run_manual(args.queries, replay, hh_url, superjob_url)
+            else:
+                result = _run_crawl_units(
+                    args.queries, replay, hh_url, superjob_url, args.pages_per_unit
+                )
+
+    print(
+        f"{'страниц':>8} {'вакансий':>9} {'вставлено':>10} {'стр./с':>7} "
+        f"{'вак./с':>7} {'время, с':>9} {'RSS, МБ':>8} {'ошибок':>7}"
+    )
+    print(
+        f"{result['pages']:>8} {result['vacancies']:>9} {result['inserted']:>10} "
+        f"{result['pages_per_second']:>7.1f} {result['vacancies_per_second']:>7.1f} "
+        f"{result['seconds']:>9.2f} {result['peak_rss_mb']:>8.1f} "
+        f"{result['replay_errors']:>7}"
+    )
+    if args.pipeline == "manual":
+        print(
+            f"Обход: {result['fetch_seconds']:.2f} с, "
+            f"вставка: {result['insert_seconds']:.2f} с."
+        )
+    if args.output:
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "args": {k: v for k, v in vars(args).items() if k != "output"},
+            **result,
+        }
+        with open(args.output, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
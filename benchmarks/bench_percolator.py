@@ -0,0 +1,106 @@
+"""Бенчмарк сопоставления новых вакансий с сохраненными поисками.
+
+Сравнивает перколятор (индекс поисков по якорным терминам) с проверкой
+каждого поиска против каждой новой вакансии - аналогом выполнения N
+запросов после каждой загрузки. Показывает, что стоимость перколятора
+растет с размером пакета, а не с числом поисков.
+
+Пример запуска::
+
+    python -m benchmarks.bench_percolator --searches 1000 10000 --batch 1000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+from typing import List
+
+from benchmarks.bench_dedup import LEVELS, TITLES, WORDS
+from core.dedup import InsertedVacancy, stem_tokens
+from core.percolator import Percolator, SearchPredicate
+
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Удаленно"]
+SOURCES = ["hh.ru", "superjob.ru"]
+
+
+def _predicate(rng: random.Random, search_id: int) -> SearchPredicate:
+    """Создает случайный сохраненный поиск: 1-2 слова и иногда фильтры."""
+    words = rng.sample(WORDS, rng.randint(1, 2))
+    if rng.random() < 0.5:
+        words[0] = rng.choice(TITLES).split()[0]
+    return SearchPredicate(
+        search_id=search_id,
+        terms=frozenset(stem_tokens(" ".join(words))),
+        location=rng.choice(CITIES).lower() if rng.random() < 0.3 else None,
+        source=rng.choice(SOURCES) if rng.random() < 0.2 else None,
+        salary_min=rng.choice([None, 100000, 200000]),
+    )
+
+
+def _vacancy(rng: random.Random, vacancy_id: int) -> InsertedVacancy:
+    """Создает случайную новую вакансию."""
+    salary = rng.choice([None, 80000, 150000, 250000])
+    return InsertedVacancy(
+        id=vacancy_id,
+        published_at=datetime.now(),
+        title=f"{rng.choice(TITLES)} {rng.choice(LEVELS)}".strip(),
+        company=f"Компания {rng.randrange(5000)}",
+        description=" ".join(rng.choice(WORDS) for _ in range(60)),
+        location=rng.choice(CITIES),
+        source=rng.choice(SOURCES),
+        salary_min_rub=salary,
+        salary_max_rub=salary,
+    )
+
+
+def _naive_counts(
+    predicates: List[SearchPredicate], vacancies: List[InsertedVacancy]
+) -> int:
+    """Проверяет каждый поиск против каждой вакансии."""
+    matches = 0
+    for vacancy in vacancies:
+        terms = set(stem_tokens(vacancy.title)) | set(stem_tokens(vacancy.description))
+        matches += sum(1 for p in predicates if p.matches(vacancy, terms))
+    return matches
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--searches", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vacancies = [_vacancy(rng, i) for i in range(args.batch)]
+
+    print(
+        f"{'поисков':>8} {'индекс, мс':>11} {'сопост., мс':>12} "
+        f"{'перебор, мс':>12} {'совпадений':>11}"
+    )
+    for size in sorted(args.searches):
+        predicates = [_predicate(rng, i) for i in range(size)]
+
+        started = time.perf_counter()
+        percolator = Percolator(predicates)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        counts = percolator.count_matches(vacancies)
+        match_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        naive = _naive_counts(predicates, vacancies)
+        naive_ms = (time.perf_counter() - started) * 1000
+
+        assert naive == sum(counts.values())
+        print(
+            f"{size:>8} {build_ms:>11.1f} {match_ms:>12.1f} "
+            f"{naive_ms:>12.1f} {naive:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
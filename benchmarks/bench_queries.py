@@ -0,0 +1,323 @@
+"""Бенчмарк запросов выдачи и аналитики core.database на большом наборе.
+
+Выполняет матрицу вариантов get_filtered_vacancies (фильтры x сортировки x
+страницы), get_total_vacancies_count для каждого фильтра и функции
+аналитики, и для каждого варианта сохраняет медиану и 95-й перцентиль
+времени, а также план выполнения (EXPLAIN) перехваченного SQL-запроса.
+План сводится к "форме" - дереву типов узлов с таблицами и индексами, где
+имена помесячных секций заменены на vacancies_*, - чтобы смена плана была
+видна при сравнении.
+
+С --save результаты сохраняются в JSON-файл, а с --baseline сравниваются
+с ранее сохраненными: вариант, медиана которого выросла больше чем в
+--threshold раз (и больше чем на --min-delta-ms), или план которого
+изменился, отмечается в таблице, а при замедлениях бенчмарк завершается с
+кодом 1.
+
+Набор данных создает benchmarks.dataset в отдельной базе PostgreSQL
+(DB_* в .env), например на 1 или 10 млн строк.
+
+Пример запуска::
+
+    python -m benchmarks.dataset --rows 1000000 --truncate
+    python -m benchmarks.bench_queries --save baseline.json
+    python -m benchmarks.bench_queries --baseline baseline.json
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from core.database import (
+    engine,
+    get_average_salary_by_city,
+    get_db,
+    get_filtered_vacancies,
+    get_top_companies_by_vacancies,
+    get_total_vacancies_count,
+    get_unique_cities,
+    get_unique_sources,
+)
+from core.models import Vacancy
+
+FILTERS: Dict[str, Dict[str, Any]] = {
+    "все": {},
+    "текст": {"query": "python"},
+    "текст редкий": {"query": "юрист"},
+    "город": {"location": "Москва"},
+    "компания": {"company": "Вектор"},
+    "зарплата": {"salary_min": 150000, "salary_max": 300000},
+    "источник": {"source": "superjob.ru"},
+    "30 дней": {"published_from": timedelta(days=30)},
+    "текст+город+зарплата": {
+        "query": "разработчик",
+        "location": "Москва",
+        "salary_min": 150000,
+    },
+    "без дубликатов": {"collapse_duplicates": True},
+}
+SORTS: Dict[str, Tuple[str, str]] = {
+    "дата": ("published_at", "desc"),
+    "зарплата убыв.": ("salary", "desc"),
+    "зарплата возр.": ("salary", "asc"),
+}
+ANALYTICS: Dict[str, Callable[[Session], Any]] = {
+    "топ компаний": get_top_companies_by_vacancies,
+    "зарплата по городам": get_average_salary_by_city,
+    "города": get_unique_cities,
+    "источники": get_unique_sources,
+}
+# Имена помесячных секций и их индексов меняются со временем
+PARTITION_RE = re.compile(r"vacancies_(?:y\d{4}m\d{2}|default)")
+
+
+class StatementCapture:
+    """Запоминает последний SQL-запрос, отправленный движком."""
+
+    def __init__(self) -> None:
+        """Создает пустой перехватчик."""
+        self.statement: Optional[str] = None
+        self.parameters: Any = None
+
+    def __call__(
+        self,
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        """Сохраняет запрос (обработчик события before_cursor_execute)."""
+        self.statement = statement
+        self.parameters = parameters
+
+
+def plan_shape(node: Dict[str, Any]) -> str:
+    """Сводит узел плана EXPLAIN (FORMAT JSON) к строке из типов узлов.
+
+    Одинаковые подряд идущие дочерние узлы (например, сканы секций)
+    записываются один раз с числом повторов.
+    """
+    name = str(node["Node Type"])
+    target = node.get("Index Name") or node.get("Relation Name")
+    if target:
+        name += f"[{PARTITION_RE.sub('vacancies_*', target)}]"
+    children: List[Tuple[str, int]] = []
+    for child in node.get("Plans", []):
+        shape = plan_shape(child)
+        if children and children[-1][0] == shape:
+            children[-1] = (shape, children[-1][1] + 1)
+        else:
+            children.append((shape, 1))
+    if not children:
+        return name
+    inner = ", ".join(
+        shape if count == 1 else f"{shape} x{count}" for shape, count in children
+    )
+    return f"{name}({inner})"
+
+
+def explain(db: Session, capture: StatementCapture, analyze: bool) -> Dict[str, Any]:
+    """Возвращает план последнего перехваченного запроса."""
+    assert capture.statement is not None
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    rows = (
+        db.connection()
+        .exec_driver_sql(f"EXPLAIN ({options}) {capture.statement}", capture.parameters)
+        .scalar_one()
+    )
+    plan = rows[0]["Plan"]
+    result = {"shape": plan_shape(plan), "cost": plan["Total Cost"]}
+    if analyze:
+        result["actual_ms"] = rows[0]["Execution Time"]
+    return result
+
+
+def measure(
+    db: Session,
+    capture: StatementCapture,
+    call: Callable[[], Any],
+    repeat: int,
+    analyze: bool,
+) -> Dict[str, Any]:
+    """Замеряет вариант и получает план его запроса.
+
+    Первый вызов прогревает кэш и не учитывается.
+    """
+    call()
+    plan = explain(db, capture, analyze)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+        # Объекты не накапливаются в сессии между повторами
+        db.expunge_all()
+    p95 = statistics.quantiles(timings, n=20)[18] if len(timings) > 1 else timings[0]
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(p95, 2),
+        "plan": plan,
+    }
+
+
+def _filter_arguments(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Подставляет в фильтр абсолютные значения (например, дату)."""
+    arguments = dict(spec)
+    if "published_from" in arguments:
+        arguments["published_from"] = datetime.now() - arguments["published_from"]
+    return arguments
+
+
+def run_suite(
+    db: Session, pages: List[int], repeat: int, analyze: bool
+) -> Dict[str, Dict[str, Any]]:
+    """Выполняет матрицу вариантов и возвращает результаты по их названиям."""
+    capture = StatementCapture()
+    event.listen(engine, "before_cursor_execute", capture)
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for filter_name, spec in FILTERS.items():
+            arguments = _filter_arguments(spec)
+            for sort_name, (sort_by, sort_order) in SORTS.items():
+                for page in pages:
+                    results[f"выдача: {filter_name} / {sort_name} / стр. {page}"] = (
+                        measure(
+                            db,
+                            capture,
+                            lambda: get_filtered_vacancies(
+                                db,
+                                page=page,
+                                sort_by=sort_by,
+                                sort_order=sort_order,
+                                **arguments,
+                            ),
+                            repeat,
+                            analyze,
+                        )
+                    )
+            results[f"количество: {filter_name}"] = measure(
+                db,
+                capture,
+                lambda: get_total_vacancies_count(db, **arguments),
+                repeat,
+                analyze,
+            )
+        for name, function in ANALYTICS.items():
+            results[f"аналитика: {name}"] = measure(
+                db, capture, lambda: function(db), repeat, analyze
+            )
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float,
+    min_delta_ms: float,
+) -> int:
+    """Печатает сравнение с базовыми результатами.
+
+    Returns:
+        Количество замедлившихся вариантов.
+    """
+    regressions = 0
+    print(
+        f"{'вариант':<58} {'p50, мс':>8} {'p95, мс':>8} {'база p50':>9} "
+        f"{'x':>5}  отметки"
+    )
+    for name, result in results.items():
+        base = baseline.get(name)
+        marks = []
+        changed_plan: Optional[str] = None
+        base_p50 = ratio = None
+        if base is not None:
+            base_p50 = base["p50_ms"]
+            ratio = result["p50_ms"] / base_p50 if base_p50 else None
+            if (
+                ratio is not None
+                and ratio > threshold
+                and result["p50_ms"] - base_p50 > min_delta_ms
+            ):
+                marks.append("ЗАМЕДЛЕНИЕ")
+                regressions += 1
+            if base["plan"]["shape"] != result["plan"]["shape"]:
+                marks.append("план изменился")
+                changed_plan = base["plan"]["shape"]
+        else:
+            marks.append("нет в базе")
+        print(
+            f"{name:<58} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{'-' if base_p50 is None else f'{base_p50:.1f}':>9} "
+            f"{'-' if ratio is None else f'{ratio:.2f}':>5}  {', '.join(marks)}"
+        )
+        if changed_plan is not None:
+            print(f"    было:  {changed_plan}")
+            print(f"    стало: {result['plan']['shape']}")
+    return regressions
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 50])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--analyze", action="store_true", help="EXPLAIN ANALYZE вместо EXPLAIN"
+    )
+    parser.add_argument("--save", help="файл для сохранения результатов")
+    parser.add_argument("--baseline", help="файл базовых результатов")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    parser.add_argument(
+        "--plans", action="store_true", help="печатать формы планов всех вариантов"
+    )
+    args = parser.parse_args()
+
+    with get_db() as db:
+        rows = db.scalar(select(func.count()).select_from(Vacancy))
+        print(f"Строк в таблице вакансий: {rows}")
+        results = run_suite(db, args.pages, args.repeat, args.analyze)
+
+    baseline: Dict[str, Dict[str, Any]] = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            stored = json.load(file)
+        baseline = stored["cases"]
+        if stored.get("rows") != rows:
+            print(f"В базовом замере было строк: {stored.get('rows')}")
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    if args.plans:
+        for name, result in results.items():
+            print(f"{name}: {result['plan']['shape']}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "timestamp": datetime.now().isoformat(timespec="seconds"),
+                    "rows": rows,
+                    "cases": results,
+                },
+                file,
+                ensure_ascii=False,
+                indent=2,
+            )
+    if regressions:
+        print(f"Замедлившихся вариантов: {regressions}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
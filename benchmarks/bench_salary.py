@@ -0,0 +1,163 @@
+"""Бенчмарк нормализации строк зарплаты.
+
+Сравнивает прежнюю функцию разбора (таблица валют и JSON курсов на каждом
+вызове, поиск валюты перебором подстрок) с SalaryNormalizer: без памяти
+результатов, с памятью результатов и пакетный вызов normalize_many. Перед
+замером проверяет, что оба способа дают одинаковые результаты.
+
+Корпус составлен из строк в форматах выдачи SuperJob и hh.ru: суммы
+повторяются, как в реальной выдаче, где большая часть вакансий указывает
+круглые суммы.
+
+Пример запуска::
+
+    python -m benchmarks.bench_salary --strings 10000 100000 --repeat 5
+"""
+
+import argparse
+import random
+import re
+import statistics
+import time
+from typing import Callable, List, Optional, Tuple
+
+from core.config import settings
+from parsers.salary import SalaryNormalizer
+
+FORMATS = [
+    "от {a} ₽",
+    "до {b} ₽",
+    "{a} — {b} ₽",
+    "{a} - {b} руб.",
+    "от {a} до {b} руб.",
+    "{a} ₽ на руки",
+    "от {a} ₽ до вычета налогов",
+    "{a} 000 — {b} 000 тенге",
+    "от {usd} $",
+    "{usd} – {usd2} USD",
+    "до {usd2} EUR",
+    "По договорённости",
+    "з/п не указана",
+]
+
+
+def legacy_parse_salary_string(
+    salary_str: Optional[str],
+) -> Tuple[Optional[int], Optional[int]]:
+    """Разбирает строку зарплаты прежним способом."""
+    if not salary_str:
+        return None, None
+    salary_str = salary_str.strip().lower().replace("\u202f", " ").replace("\xa0", " ")
+    if "не указана" in salary_str or "договор" in salary_str:
+        return None, None
+    currency_map = {
+        "руб": "RUB",
+        "р.": "RUB",
+        "₽": "RUB",
+        "kzt": "KZT",
+        "тенге": "KZT",
+        "usd": "USD",
+        "$": "USD",
+        "eur": "EUR",
+        "€": "EUR",
+    }
+    found_currency = "RUB"
+    for key, val in currency_map.items():
+        if key in salary_str:
+            found_currency = val
+            break
+    rate = settings.currency_rates.get(found_currency, 1.0)
+    numbers = [int(s.replace(" ", "")) for s in re.findall(r"\d[\d\s]*", salary_str)]
+    if not numbers:
+        return None, None
+    min_salary, max_salary = None, None
+    if "от" in salary_str and "до" in salary_str and len(numbers) >= 2:
+        min_salary, max_salary = min(numbers), max(numbers)
+    elif "от" in salary_str and numbers:
+        min_salary = numbers[0]
+    elif "до" in salary_str and numbers:
+        max_salary = numbers[0]
+    elif len(numbers) == 1:
+        min_salary = max_salary = numbers[0]
+    elif len(numbers) >= 2:
+        min_salary, max_salary = min(numbers), max(numbers)
+    min_salary_rub = int(min_salary * rate) if min_salary else None
+    max_salary_rub = int(max_salary * rate) if max_salary else None
+    return min_salary_rub, max_salary_rub
+
+
+def _amount(value: int, rng: random.Random) -> str:
+    """Форматирует сумму с разделителем разрядов, как на сайтах."""
+    separator = rng.choice([" ", "\xa0", "\u202f"])
+    return f"{value:,}".replace(",", separator)
+
+
+def make_corpus(size: int, rng: random.Random) -> List[str]:
+    """Создает корпус строк зарплаты с повторами сумм."""
+    corpus = []
+    for _ in range(size):
+        low = rng.choice(range(30, 300, 5)) * 1000
+        high = low + rng.choice(range(10, 150, 10)) * 1000
+        usd = rng.choice(range(500, 5000, 250))
+        corpus.append(
+            rng.choice(FORMATS).format(
+                a=_amount(low, rng),
+                b=_amount(high, rng),
+                usd=_amount(usd, rng),
+                usd2=_amount(usd + 1000, rng),
+            )
+        )
+    return corpus
+
+
+def _median_ms(func: Callable[[], object], repeat: int) -> float:
+    """Возвращает медиану времени выполнения в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--strings", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rates = settings.currency_rates
+
+    print(
+        f"{'строк':>8} {'уникальных':>11} {'прежний, мс':>12} "
+        f"{'без памяти, мс':>15} {'с памятью, мс':>14} {'пачкой, мс':>11}"
+    )
+    for size in args.strings:
+        corpus = make_corpus(size, rng)
+        uncached = SalaryNormalizer(rates, cache_size=0)
+        expected = [legacy_parse_salary_string(s) for s in corpus]
+        assert [uncached.normalize(s) for s in corpus] == expected
+
+        legacy_ms = _median_ms(
+            lambda: [legacy_parse_salary_string(s) for s in corpus], args.repeat
+        )
+        uncached_ms = _median_ms(
+            lambda: [uncached.normalize(s) for s in corpus], args.repeat
+        )
+        # Память результатов общая для повторов, как у нормализатора процесса
+        cached = SalaryNormalizer(rates)
+        cached_ms = _median_ms(
+            lambda: [cached.normalize(s) for s in corpus], args.repeat
+        )
+        batch_ms = _median_ms(lambda: cached.normalize_many(corpus), args.repeat)
+        print(
+            f"{size:>8} {len(set(corpus)):>11} {legacy_ms:>12.1f} "
+            f"{uncached_ms:>15.1f} {cached_ms:>14.1f} {batch_ms:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
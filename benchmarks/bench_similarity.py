@@ -0,0 +1,132 @@
+"""Бенчмарк индекса похожих вакансий.
+
+Генерирует синтетический корпус вакансий по темам (у каждой темы свой набор
+слов, плюс общие слова) и измеряет:
+
+* время построения базового сегмента и размер индекса на диске;
+* время загрузки индекса (mmap);
+* задержку поиска top-k: медиану, 95-й и 99-й перцентили;
+* время инкрементального добавления пакета вакансий в дельту;
+* долю результатов из той же темы, что и образец (качество).
+
+Пример запуска::
+
+    python -m benchmarks.bench_similarity --size 1000000 --queries 500
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from benchmarks.bench_dedup import LEVELS, TITLES, WORDS
+from core.similarity import Document, SimilarityIndex
+
+TOPICS = 500
+TOPIC_WORDS = 40
+
+
+def _topic_vocabulary(rng: random.Random) -> List[List[str]]:
+    """Выбирает для каждой темы собственное подмножество слов."""
+    return [rng.sample(WORDS, TOPIC_WORDS) for _ in range(TOPICS)]
+
+
+def _document(
+    rng: random.Random,
+    topics: List[List[str]],
+    number: int,
+    topic: Optional[int] = None,
+) -> Tuple[int, Document]:
+    """Создает вакансию; возвращает ее тему и документ для индекса."""
+    if topic is None:
+        topic = rng.randrange(TOPICS)
+    title = f"{TITLES[topic % len(TITLES)]} {rng.choice(LEVELS)}".strip()
+    words = [
+        rng.choice(topics[topic]) if rng.random() < 0.6 else rng.choice(WORDS)
+        for _ in range(60)
+    ]
+    return topic, (number, title, " ".join(words))
+
+
+def _corpus(
+    rng: random.Random, topics: List[List[str]], size: int, labels: List[int]
+) -> Iterator[Document]:
+    """Порождает корпус, записывая темы документов в labels."""
+    for number in range(1, size + 1):
+        topic, document = _document(rng, topics, number)
+        labels.append(topic)
+        yield document
+
+
+def _percentile(values: List[float], share: float) -> float:
+    """Возвращает перцентиль отсортированного списка."""
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    topics = _topic_vocabulary(rng)
+    labels: List[int] = []
+
+    started = time.perf_counter()
+    index = SimilarityIndex.build(_corpus(rng, topics, args.size, labels))
+    print(f"Построение: {args.size} вакансий за {time.perf_counter() - started:.1f} с")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        index.save_base(directory)
+        size_mb = sum(p.stat().st_size for p in directory.rglob("*") if p.is_file()) / (
+            1 << 20
+        )
+        started = time.perf_counter()
+        index = SimilarityIndex.load(directory)
+        load_ms = (time.perf_counter() - started) * 1000
+        print(f"Размер на диске: {size_mb:.1f} МБ, загрузка: {load_ms:.1f} мс")
+
+        batch = [
+            _document(rng, topics, args.size + 1 + i)[1] for i in range(args.batch)
+        ]
+        started = time.perf_counter()
+        index.add(batch)
+        index.save_delta(directory)
+        add_ms = (time.perf_counter() - started) * 1000
+        print(f"Добавление {args.batch} вакансий в дельту: {add_ms:.1f} мс")
+
+        # Запросы - новые вакансии на темы из корпуса: тема образца известна
+        latencies, same_topic, results_total = [], 0, 0
+        for _ in range(args.queries):
+            target = rng.randrange(args.size)
+            _, (_, title, description) = _document(rng, topics, 0, labels[target])
+            started = time.perf_counter()
+            results = index.search(title, description, limit=args.limit)
+            latencies.append((time.perf_counter() - started) * 1000)
+            results_total += len(results)
+            same_topic += sum(
+                1
+                for vacancy_id, _ in results
+                if vacancy_id <= args.size and labels[vacancy_id - 1] == labels[target]
+            )
+
+    latencies.sort()
+    print(
+        f"Поиск top-{args.limit}: медиана {statistics.median(latencies):.2f} мс, "
+        f"p95 {_percentile(latencies, 0.95):.2f} мс, "
+        f"p99 {_percentile(latencies, 0.99):.2f} мс"
+    )
+    print(f"Результатов из той же темы: {same_topic / max(results_total, 1):.1%}")
+
+
+if __name__ == "__main__":
+    main()
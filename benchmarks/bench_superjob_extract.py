@@ -0,0 +1,186 @@
+"""Бенчмарк разбора страницы поиска SuperJob.
+
+Сравнивает текущий разбор (одно дерево lxml и заранее скомпилированные
+XPath-выражения) с прежним: дерево BeautifulSoup и отдельный CSS-селектор
+для каждого поля каждой карточки. Перед замером проверяет, что оба способа
+дают одинаковые VacancyDTO.
+
+Страница генерируется синтетически: карточки со структурой реальной выдачи
+и окружающая их разметка (меню, фильтры, скрипты), объем которой задает
+--noise.
+
+Пример запуска::
+
+    python -m benchmarks.bench_superjob_extract --cards 20 40 --repeat 50
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, List, Optional
+from unittest.mock import Mock
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Tag
+
+from benchmarks.bench_dedup import LEVELS, TITLES, WORDS
+from parsers.dates import RussianDateResolver, today_reference
+from parsers.dto import VacancyDTO
+from parsers.salary import get_salary_normalizer
+from parsers.superjob_parser import SuperJobParser
+
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Удаленно"]
+MONTHS = ["января", "марта", "июля", "сентября", "декабря"]
+
+
+def _card(rng: random.Random, index: int) -> str:
+    """Создает разметку карточки вакансии."""
+    salary = rng.choice(
+        [
+            "По договорённости",
+            f"от {rng.randrange(50, 300)} 000 ₽",
+            f"{rng.randrange(50, 150)} 000 — {rng.randrange(150, 400)} 000 ₽",
+        ]
+    )
+    description = " ".join(rng.choice(WORDS) for _ in range(40))
+    published = f"{rng.randint(1, 28)} {rng.choice(MONTHS)}"
+    return f"""
+    <div class="_3Zxb _2Ue2i f-test-search-result-item" data-id="{index}">
+      <div class="_1tH7S"><div class="_2J-3z">
+        <span class="_9fIP1 _249GZ"><a class="_1IHWd _6Nb0L" target="_blank"
+          href="/vakansii/vacancy-{index}.html">{rng.choice(TITLES)}
+          <b>{rng.choice(LEVELS)}</b></a></span>
+        <div class="_2nteL"><span class="_2eYAG f-test-text-company-item-salary">
+          <span>{salary}</span></span></div>
+      </div></div>
+      <div class="_3gyJS"><span class="_3nMqD f-test-text-vacancy-item-company-name">
+        <a href="/clients/company-{index}.html">Компания {index}</a></span></div>
+      <div class="_1fUBh"><div class="_3mh6G"><svg class="_2PDBr"><use href="#pin">
+        </use></svg><span class="_2Q1BH">{rng.choice(CITIES)}</span></div></div>
+      <span class="_2Q1BH _3doCL _2eclS">{published}</span>
+      <span class="_2Q1BH _3doCL _2k8ZM rtYnN sPJuZ">{description}
+        <b>{rng.choice(WORDS)}</b></span>
+      <div class="_3Qutk"><button class="_1Ut9c">Откликнуться</button>
+        <a href="/vakansii/vacancy-{index}.html#similar">Похожие</a></div>
+    </div>"""
+
+
+def _page(rng: random.Random, cards: int, noise: int) -> str:
+    """Создает страницу поиска с карточками и окружающей разметкой."""
+    filler = "".join(
+        f'<li class="_1Ttd8"><a href="/vakansii/?f={i}">{rng.choice(WORDS)}</a></li>'
+        for i in range(noise)
+    )
+    body = "".join(_card(rng, i) for i in range(cards))
+    return (
+        "<!DOCTYPE html><html><head><title>Вакансии</title>"
+        f"<script>window.__STATE__ = {{'items': {list(range(noise))}}};</script>"
+        f"</head><body><nav><ul>{filler}</ul></nav>"
+        f'<div class="_2h0xN">{body}</div>'
+        '<a class="_1IHWd f-test-button-dalshe" href="?page=2">Дальше</a>'
+        f"<footer><ul>{filler}</ul></footer></body></html>"
+    )
+
+
+def _legacy_card(
+    parser: SuperJobParser, card: Tag, dates: RussianDateResolver
+) -> Optional[VacancyDTO]:
+    """Извлекает карточку прежним способом - CSS-селектором на каждое поле."""
+    title_tag = card.select_one('a[href*="/vakansii/"]')
+    if not title_tag:
+        return None
+    href_value = title_tag.get("href")
+    if not isinstance(href_value, str):
+        return None
+    company_tag = card.select_one("span.f-test-text-vacancy-item-company-name")
+    location = "Не указан"
+    location_pin = card.select_one('svg use[href="#pin"]')
+    if location_pin:
+        parent_div = location_pin.find_parent("div")
+        if isinstance(parent_div, Tag):
+            location_tag = parent_div.find("span")
+            if location_tag:
+                location = location_tag.text.strip()
+    salary_tag = card.select_one(".f-test-text-company-item-salary")
+    salary_str = salary_tag.text.strip() if salary_tag else "По договоренности"
+    date_tag = card.select_one("span._2Q1BH._3doCL._2eclS")
+    description_tags = card.select("span._2Q1BH._3doCL._2k8ZM.rtYnN.sPJuZ")
+    salary = get_salary_normalizer().parse(salary_str)
+    return VacancyDTO(
+        title=title_tag.text.strip(),
+        company=company_tag.text.strip() if company_tag else "Не указана",
+        location=location,
+        salary=salary_str,
+        description="\n".join(
+            tag.get_text(separator=" ", strip=True) for tag in description_tags
+        ),
+        published_at=dates.resolve(date_tag.text) if date_tag else dates.reference,
+        source="superjob.ru",
+        original_url=urljoin(parser.base_url, href_value),
+        salary_min_rub=salary.min_rub,
+        salary_max_rub=salary.max_rub,
+        salary_currency=salary.currency,
+        salary_min_amount=salary.min_amount,
+        salary_max_amount=salary.max_amount,
+    )
+
+
+def legacy_parse_page(
+    parser: SuperJobParser, text: str, dates: RussianDateResolver
+) -> List[VacancyDTO]:
+    """Разбирает страницу прежним способом - через BeautifulSoup."""
+    soup = BeautifulSoup(text, "lxml")
+    cards = soup.select("div.f-test-search-result-item")
+    return [dto for dto in (_legacy_card(parser, card, dates) for card in cards) if dto]
+
+
+def _median_ms(func: Callable[[], object], repeat: int) -> float:
+    """Возвращает медиану времени выполнения в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, nargs="+", default=[20, 40, 100])
+    parser.add_argument("--noise", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    superjob = SuperJobParser()
+    reference = today_reference()
+    dates = RussianDateResolver(reference)
+
+    print(
+        f"{'карточек':>9} {'страница, КБ':>13} {'BeautifulSoup, мс':>18} "
+        f"{'lxml, мс':>9} {'ускорение':>10}"
+    )
+    for cards in args.cards:
+        text = _page(rng, cards, args.noise)
+        response = Mock(text=text)
+        current = superjob._parse_page(response, reference).vacancies
+        assert current == legacy_parse_page(superjob, text, dates)
+        assert len(current) == cards
+
+        legacy_ms = _median_ms(
+            lambda: legacy_parse_page(superjob, text, dates), args.repeat
+        )
+        lxml_ms = _median_ms(
+            lambda: superjob._parse_page(response, reference), args.repeat
+        )
+        print(
+            f"{cards:>9} {len(text.encode()) / 1024:>13.0f} {legacy_ms:>18.2f} "
+            f"{lxml_ms:>9.2f} {legacy_ms / lxml_ms:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
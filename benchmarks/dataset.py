@@ -0,0 +1,380 @@
+"""Генератор большого синтетического набора вакансий для замеров запросов.
+
+Создает детерминированный (при одинаковых --seed и --end) набор вакансий с
+реалистичным распределением: названия профессий с уровнями и
+специализациями, описания из требований, обязанностей и условий на русском,
+зарплаты по логнормальному распределению вокруг медианы профессии
+(в рублях и изредка в валюте), города с весами крупных рынков, компании с
+распределением "тяжелого хвоста" (немногие крупные работодатели публикуют
+большую часть вакансий), источники hh.ru и SuperJob, даты публикации со
+смещением к последним неделям и часть устаревших вакансий.
+
+Строки загружаются в таблицу vacancies командой COPY пакетами по --batch
+строк; tsvector_search заполняет триггер таблицы, а недостающие помесячные
+секции создаются заранее. После загрузки выполняется VACUUM ANALYZE.
+
+Генератор пишет в настроенную БД PostgreSQL (DB_* в .env), к которой
+применены миграции, а с --truncate предварительно очищает таблицу
+вакансий, поэтому запускайте его только на отдельной базе.
+
+Пример запуска::
+
+    python -m benchmarks.dataset --rows 1000000 --truncate
+"""
+
+import argparse
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Iterator, List, Optional, Tuple, cast
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import engine, get_db
+from core.partitions import ensure_month_partitions
+from parsers.salary import SalaryNormalizer
+
+COLUMNS = (
+    "title",
+    "company",
+    "location",
+    "salary",
+    "description",
+    "published_at",
+    "source",
+    "original_url",
+    "salary_min_rub",
+    "salary_max_rub",
+    "salary_currency",
+    "salary_min_amount",
+    "salary_max_amount",
+    "last_seen_at",
+    "expired_at",
+)
+Row = Tuple[Any, ...]
+
+# Профессия, ее медианная зарплата в рублях и специализации
+PROFESSIONS: List[Tuple[str, int, List[str]]] = [
+    ("Python-разработчик", 220_000, ["Django", "FastAPI", "ML", "бэкенд"]),
+    ("Java-разработчик", 240_000, ["Spring", "микросервисы", "финтех"]),
+    ("Frontend-разработчик", 190_000, ["React", "Vue", "TypeScript"]),
+    ("Аналитик данных", 170_000, ["SQL", "BI", "продуктовый"]),
+    ("Системный аналитик", 180_000, ["банк", "интеграции", "1С"]),
+    ("Инженер DevOps", 250_000, ["Kubernetes", "CI/CD", "облако"]),
+    ("Тестировщик", 120_000, ["автоматизация", "мобильные приложения"]),
+    ("Менеджер проектов", 160_000, ["IT", "строительство", "маркетинг"]),
+    ("Бухгалтер", 80_000, ["на участок", "главный", "расчетный отдел"]),
+    ("Продавец-консультант", 55_000, ["электроника", "одежда", "мебель"]),
+    ("Водитель-экспедитор", 75_000, ["категория C", "межгород"]),
+    ("Менеджер по продажам", 90_000, ["B2B", "холодные звонки", "опт"]),
+    ("Оператор call-центра", 45_000, ["входящая линия", "удаленно"]),
+    ("Кладовщик", 60_000, ["склад", "сменный график"]),
+    ("Врач-терапевт", 110_000, ["поликлиника", "частная клиника"]),
+    ("Инженер-конструктор", 130_000, ["машиностроение", "КОМПАС-3D"]),
+    ("Дизайнер интерфейсов", 150_000, ["UX/UI", "Figma", "мобильные"]),
+    ("Юрист", 100_000, ["корпоративный", "договорная работа"]),
+]
+LEVELS = [("", 1.0), ("Junior", 0.6), ("Middle", 1.0), ("Senior", 1.5), ("Lead", 1.9)]
+LEVEL_WEIGHTS = [40, 15, 25, 15, 5]
+REQUIREMENTS = [
+    "опыт работы от {years} лет",
+    "высшее образование",
+    "знание {skill}",
+    "уверенное владение ПК",
+    "умение работать в команде",
+    "английский язык на уровне чтения документации",
+    "ответственность и внимательность к деталям",
+    "опыт работы с {skill} будет плюсом",
+]
+DUTIES = [
+    "участие в развитии продукта",
+    "работа с клиентами и партнерами",
+    "подготовка отчетности",
+    "взаимодействие со смежными отделами",
+    "разработка и поддержка {skill}",
+    "соблюдение сроков и стандартов качества",
+    "наставничество младших сотрудников",
+]
+CONDITIONS = [
+    "официальное трудоустройство по ТК РФ",
+    "ДМС после испытательного срока",
+    "гибкий график",
+    "удаленная работа или гибрид",
+    "обучение за счет компании",
+    "премии по результатам работы",
+    "современный офис рядом с метро",
+]
+CITIES = [
+    ("Москва", 32),
+    ("Санкт-Петербург", 14),
+    ("Удаленно", 8),
+    ("Новосибирск", 5),
+    ("Екатеринбург", 5),
+    ("Казань", 4),
+    ("Нижний Новгород", 4),
+    ("Краснодар", 3),
+    ("Самара", 3),
+    ("Ростов-на-Дону", 3),
+    ("Уфа", 2),
+    ("Пермь", 2),
+    ("Воронеж", 2),
+    ("Челябинск", 2),
+    ("Омск", 2),
+    ("Тюмень", 2),
+    ("Алматы", 2),
+    ("Минск", 1),
+    ("Владивосток", 1),
+    ("Калининград", 1),
+]
+COMPANY_FORMS = ["ООО", "АО", "ПАО", "ГК", "ИП"]
+COMPANY_ROOTS = [
+    "Альфа",
+    "Вектор",
+    "Техно",
+    "Гео",
+    "Инфо",
+    "Пром",
+    "Строй",
+    "Мед",
+    "Агро",
+    "Нефть",
+    "Логистик",
+    "Софт",
+    "Дата",
+    "Телеком",
+    "Ритейл",
+    "Финанс",
+    "Энерго",
+    "Север",
+]
+COMPANY_SUFFIXES = ["Групп", "Сервис", "Системс", "Лаб", "Трейд", "Холдинг", "Плюс"]
+# Валюта зарплаты, ее доля и шаг округления суммы
+CURRENCIES = [("RUB", 92, 5000), ("USD", 4, 100), ("EUR", 2, 100), ("KZT", 2, 50000)]
+SOURCES = [("hh.ru", 70), ("superjob.ru", 30)]
+UNSPECIFIED_SALARY_SHARE = 0.25
+EXPIRED_SHARE = 0.3
+
+
+def company_names(count: int) -> List[str]:
+    """Возвращает count различных названий компаний."""
+    names = []
+    for index in range(count):
+        form = COMPANY_FORMS[index % len(COMPANY_FORMS)]
+        rest = index // len(COMPANY_FORMS)
+        root = COMPANY_ROOTS[rest % len(COMPANY_ROOTS)]
+        rest //= len(COMPANY_ROOTS)
+        suffix = COMPANY_SUFFIXES[rest % len(COMPANY_SUFFIXES)]
+        number = rest // len(COMPANY_SUFFIXES)
+        names.append(f"{form} «{root}{suffix}{f' {number + 1}' if number else ''}»")
+    return names
+
+
+def _amount(value: int) -> str:
+    """Форматирует сумму с пробелами между разрядами."""
+    return f"{value:,}".replace(",", " ")
+
+
+class VacancyGenerator:
+    """Детерминированный генератор строк вакансий для COPY."""
+
+    def __init__(self, rows: int, seed: int, end: datetime, months: int = 12) -> None:
+        """Создает генератор.
+
+        Args:
+            rows: Количество строк.
+            seed: Начальное значение генератора случайных чисел.
+            end: Самая поздняя дата публикации.
+            months: За сколько месяцев до end распределены публикации.
+        """
+        self.rows = rows
+        self.seed = seed
+        self.end = end
+        self.span = timedelta(days=30 * months)
+        self.rng = random.Random(seed)  # nosec B311
+        self.companies = company_names(max(100, rows // 40))
+        self.salaries = SalaryNormalizer(settings.currency_rates)
+        self._cities = [city for city, _ in CITIES]
+        self._city_weights = [weight for _, weight in CITIES]
+
+    @property
+    def start(self) -> datetime:
+        """Самая ранняя возможная дата публикации."""
+        return self.end - self.span
+
+    def _company(self) -> str:
+        """Выбирает компанию: первые в списке публикуют больше вакансий."""
+        count = len(self.companies)
+        # Логарифмически равномерный номер со сдвигом к середине списка:
+        # у крупнейшего работодателя около 2% вакансий
+        return self.companies[int(count ** (self.rng.random() ** 0.6)) - 1]
+
+    def _text(self, templates: List[str], skills: List[str], count: int) -> str:
+        """Составляет перечисление из случайных шаблонов."""
+        return "; ".join(
+            template.format(years=self.rng.randint(1, 5), skill=self.rng.choice(skills))
+            for template in self.rng.sample(templates, count)
+        )
+
+    def _salary(
+        self, median: int, factor: float
+    ) -> Tuple[Optional[str], Optional[int], Optional[int], Optional[str]]:
+        """Возвращает строку зарплаты, границы в валюте и код валюты."""
+        if self.rng.random() < UNSPECIFIED_SALARY_SHARE:
+            return None, None, None, None
+        currency, step = self.rng.choices(
+            [(code, step) for code, _, step in CURRENCIES],
+            [weight for _, weight, _ in CURRENCIES],
+        )[0]
+        rate = self.salaries.rates.get(currency, 1.0)
+        center = median * factor * math.exp(self.rng.gauss(0, 0.35)) / rate
+        low = max(step, round(center * 0.85 / step) * step)
+        high = max(low + step, round(center * 1.2 / step) * step)
+        symbol = "₽" if currency == "RUB" else currency
+        kind = self.rng.random()
+        if kind < 0.5:
+            return f"от {_amount(low)} до {_amount(high)} {symbol}", low, high, currency
+        if kind < 0.85:
+            return f"от {_amount(low)} {symbol}", low, None, currency
+        return f"до {_amount(high)} {symbol}", None, high, currency
+
+    def row(self, index: int) -> Row:
+        """Создает строку вакансии с номером index."""
+        rng = self.rng
+        profession, median, specializations = rng.choice(PROFESSIONS)
+        level, factor = rng.choices(LEVELS, LEVEL_WEIGHTS)[0]
+        title = profession
+        if rng.random() < 0.5:
+            title += f" ({rng.choice(specializations)})"
+        if level:
+            title = f"{level} {title}"
+        skills = specializations + [profession.split("-")[0]]
+        description = (
+            f"Требования: {self._text(REQUIREMENTS, skills, 3)}. "
+            f"Обязанности: {self._text(DUTIES, skills, 2)}. "
+            f"Условия: {self._text(CONDITIONS, skills, 3)}."
+        )
+
+        # Публикации смещены к концу периода; микросекунды из номера строки
+        # не дают повторить (название, компания, дата) у разных строк
+        age = self.span * (rng.random() ** 2)
+        published_at = (self.end - age).replace(microsecond=index % 1_000_000)
+        last_seen_at = min(self.end, published_at + age * rng.random())
+        expired_at = None
+        if age > timedelta(days=30) and rng.random() < EXPIRED_SHARE:
+            expired_at = last_seen_at + timedelta(days=7)
+
+        salary, min_amount, max_amount, currency = self._salary(median, factor)
+        converted = self.salaries.convert(min_amount, max_amount, currency)
+        source = rng.choices(
+            [name for name, _ in SOURCES], [weight for _, weight in SOURCES]
+        )[0]
+        if source == "hh.ru":
+            url = f"https://hh.ru/vacancy/{self.seed}{index:09d}"
+        else:
+            url = f"https://russia.superjob.ru/vakansii/{self.seed}-{index}.html"
+        return (
+            title,
+            self._company(),
+            rng.choices(self._cities, self._city_weights)[0],
+            salary,
+            description,
+            published_at,
+            source,
+            url,
+            converted.min_rub,
+            converted.max_rub,
+            currency,
+            min_amount,
+            max_amount,
+            last_seen_at,
+            expired_at,
+        )
+
+    def __iter__(self) -> Iterator[Row]:
+        """Возвращает строки по порядку."""
+        return (self.row(index) for index in range(self.rows))
+
+
+def copy_rows(db: Session, rows: Iterator[Row], batch: int) -> int:
+    """Загружает строки командой COPY, фиксируя каждый пакет.
+
+    Returns:
+        Количество загруженных строк.
+    """
+    statement = f"COPY vacancies ({', '.join(COLUMNS)}) FROM STDIN"
+    loaded = 0
+    while True:
+        connection = cast(
+            psycopg.Connection, db.connection().connection.driver_connection
+        )
+        copied = 0
+        with connection.cursor() as cursor, cursor.copy(statement) as copy:
+            for row in rows:
+                copy.write_row(row)
+                copied += 1
+                if copied >= batch:
+                    break
+        db.commit()
+        loaded += copied
+        if copied < batch:
+            return loaded
+        print(f"Загружено строк: {loaded}")
+
+
+def main() -> None:
+    """Точка входа генератора."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="самая поздняя дата публикации (ГГГГ-ММ-ДД)",
+    )
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--batch", type=int, default=100_000)
+    parser.add_argument(
+        "--truncate", action="store_true", help="очистить таблицу вакансий"
+    )
+    args = parser.parse_args()
+
+    end = datetime.combine(args.end, datetime.min.time())
+    generator = VacancyGenerator(args.rows, args.seed, end, args.months)
+    started = time.perf_counter()
+    with get_db() as db:
+        if args.truncate:
+            db.execute(
+                text(
+                    "TRUNCATE vacancies, vacancy_urls, vacancy_signatures, "
+                    "vacancy_lsh_bands"
+                )
+            )
+            db.commit()
+        ensure_month_partitions(
+            db, months_ahead=args.months + 1, today=generator.start.date()
+        )
+        loaded = copy_rows(db, iter(generator), args.batch)
+        # URL набора уникальны; приложение вставляет вакансию, только
+        # закрепив ее URL в vacancy_urls
+        db.execute(
+            text(
+                "INSERT INTO vacancy_urls (original_url, published_at) "
+                "SELECT original_url, published_at FROM vacancies "
+                "ON CONFLICT DO NOTHING"
+            )
+        )
+        db.commit()
+    # VACUUM выполняется вне транзакции; карта видимости нужна для
+    # index-only сканирования, без нее планы отличались бы от рабочих
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM ANALYZE vacancies")
+    print(f"Загружено строк: {loaded} за {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Локальный сервер, воспроизводящий записанный трафик парсеров.
+
+Отдает ответы, сохраненные регистратором (см. parsers.http_recording), по
+запросам вида /<хост>/<путь>?<параметры>: парсер, которому вместо адреса
+источника передан адрес сервера с хостом источника в пути (например,
+http://127.0.0.1:8765/api.hh.ru/vacancies), получает те же ответы, что и
+при записи. Запрос без записи получает 404.
+
+Задержка ответа (с необязательным случайным разбросом) имитирует сеть, а
+доля ответов с ошибкой (по умолчанию 503) проверяет повторы и автомат
+отключения парсеров.
+
+Пример запуска::
+
+    python -m benchmarks.replay_server recordings/ --latency 0.05 --error-rate 0.02
+"""
+
+import argparse
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from parsers.http_recording import Recording, load_recordings, recording_key
+
+
+@dataclass
+class ReplayStats:
+    """Счетчики сервера.
+
+    Attributes:
+        served: Ответы из записей.
+        missing: Запросы без записи.
+        errors: Ответы с внесенной ошибкой.
+    """
+
+    served: int = 0
+    missing: int = 0
+    errors: int = 0
+
+
+class ReplayServer:
+    """HTTP-сервер записей, работающий в фоновом потоке."""
+
+    def __init__(
+        self,
+        directory: str,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """Загружает записи каталога.
+
+        Args:
+            directory: Каталог записей.
+            latency: Задержка каждого ответа в секундах.
+            jitter: Максимальная случайная добавка к задержке в секундах.
+            error_rate: Доля запросов, получающих ответ error_status.
+            error_status: Код ответа с ошибкой.
+            seed: Начальное значение генератора задержек и ошибок.
+            host: Адрес, на котором слушает сервер.
+            port: Порт; 0 - любой свободный.
+        """
+        self.recordings: Dict[str, Recording] = {
+            recording.key: recording for recording in load_recordings(directory)
+        }
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.host = host
+        self.stats = ReplayStats()
+        self._rng = random.Random(seed)  # nosec B311
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Базовый адрес сервера."""
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def url_for(self, original_url: str) -> str:
+        """Возвращает адрес сервера, воспроизводящий адрес источника.
+
+        Args:
+            original_url: Адрес источника, например "https://api.hh.ru/vacancies".
+        """
+        parts = urlsplit(original_url)
+        return f"{self.url}/{parts.netloc}{parts.path}".rstrip("/")
+
+    def _draw(self) -> Tuple[float, bool]:
+        """Выбирает задержку ответа и то, получит ли он ошибку."""
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            failed = self._rng.random() < self.error_rate
+        return delay, failed
+
+    def _count(self, counter: str) -> None:
+        """Увеличивает счетчик сервера."""
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
+
+    def _make_handler(self) -> Any:
+        """Создает обработчик запросов к записям."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                delay, failed = server._draw()
+                if delay > 0:
+                    time.sleep(delay)
+                if failed:
+                    server._count("errors")
+                    self._send(server.error_status, b"", None)
+                    return
+                # Путь /<хост>/<путь> соответствует адресу источника
+                recording = server.recordings.get(recording_key("http:/" + self.path))
+                if recording is None:
+                    server._count("missing")
+                    self._send(404, b"", None)
+                    return
+                server._count("served")
+                self._send(recording.status, recording.body, recording.content_type)
+
+            def _send(
+                self, status: int, body: bytes, content_type: Optional[str]
+            ) -> None:
+                self.send_response(status)
+                if content_type:
+                    self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                """Отключает журнал запросов сервера."""
+
+        return Handler
+
+    def start(self) -> "ReplayServer":
+        """Запускает сервер в фоновом потоке."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Останавливает сервер и освобождает порт."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "ReplayServer":
+        """Запускает сервер в блоке with."""
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Останавливает сервер при выходе из блока with."""
+        self.stop()
+
+
+def main() -> None:
+    """Точка входа сервера."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="каталог записей (HTTP_RECORD_DIR)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = ReplayServer(
+        args.directory,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Записей: {len(server.recordings)}, адрес: {server.url}")
+    for host in sorted({urlsplit(r.url).netloc for r in server.recordings.values()}):
+        print(f"  {host}: {server.url_for(f'http://{host}')}")
+    with server:
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    print(
+        f"Ответов: {server.stats.served}, без записи: {server.stats.missing}, "
+        f"ошибок: {server.stats.errors}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -19,21 +19,142 @@ class Settings(BaseSettings):
     DB_USER: Optional[str] = None
     DB_PASSWORD: Optional[str] = None
     DB_NAME: Optional[str] = None
+    # Пул соединений каждого процесса: DB_POOL_SIZE постоянных соединений,
+    # до DB_MAX_OVERFLOW временных сверх них и ожидание свободного
+    # соединения не дольше DB_POOL_TIMEOUT секунд
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    # Журнал медленных запросов (см. core.slow_queries): порог в
+    # миллисекундах (0 - журнал выключен), размер журнала, доля запросов с
+    # планом EXPLAIN ANALYZE и ограничение времени его построения
+    SLOW_QUERY_THRESHOLD_MS: float = 500
+    SLOW_QUERY_LOG_SIZE: int = 50
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 30000
 
     # Настройки планировщика
     SCHEDULER_INTERVAL: int = 3600
     DEFAULT_PARSE_QUERY: str = "Python"
+    # False - веб-приложение не запускает планировщик, сбором занимается
+    # отдельный процесс worker.py
+    RUN_SCHEDULER: bool = True
+    HEARTBEAT_INTERVAL: int = 30
+
+    # Настройки очереди задач ручного парсинга
+    PARSE_JOB_CONCURRENCY: int = 2
+    PARSE_JOB_POLL_INTERVAL: int = 5
+    PARSE_JOB_STALE_SECONDS: int = 120
+    PARSE_JOB_MAX_ATTEMPTS: int = 3
+    PARSE_JOB_LOCK_KEY: int = 720_415_002
+
+    # Настройки распределенного обхода единицами (диапазонами страниц)
+    CRAWL_PAGES_PER_UNIT: int = 5
+    # Аренда продлевается после каждой страницы, перед каждым повтором
+    # запроса и во время загрузки описаний hh.ru, поэтому должна покрывать
+    # одну попытку с ожиданием лимита
+    CRAWL_LEASE_SECONDS: int = 60
+    CRAWL_POLL_INTERVAL: int = 10
+    CRAWL_MAX_ATTEMPTS: int = 3
+    CRAWL_UNIT_RETENTION_DAYS: int = 7
+
+    # Настройки плана обхода (см. core.crawl_plan). Без CRAWL_PLAN_JSON
+    # обходится DEFAULT_PARSE_QUERY во всех источниках раз в SCHEDULER_INTERVAL
+    CRAWL_PLAN_JSON: Optional[str] = None
+    CRAWL_PLAN_TICK: int = 60
+    # Границы адаптивного интервала записей плана и множитель его изменения
+    # после запуска без новых вакансий (или с ними - в обратную сторону)
+    CRAWL_MIN_INTERVAL: Optional[int] = 900
+    CRAWL_MAX_INTERVAL: Optional[int] = 86400
+    CRAWL_BACKOFF_FACTOR: float = 2.0
+    # Бюджеты запросов источников, страниц в час
+    CRAWL_SOURCE_BUDGETS_JSON: str = '{"hh.ru": 1500, "superjob.ru": 300}'
+
+    # Настройки выбора ведущего процесса для периодических задач
+    LEADER_LOCK_KEY: int = 720_415_001
+    LEADER_CHECK_INTERVAL: int = 15
+
+    # Настройки обслуживания секций таблицы вакансий
+    MAINTENANCE_INTERVAL: int = 86400
+    PARTITION_PREMAKE_MONTHS: int = 2
+    VACANCY_RETENTION_MONTHS: int = 12
+    ARCHIVE_EXPIRED_PARTITIONS: bool = False
+
+    # Настройки пометки устаревших вакансий
+    VACANCY_EXPIRY_DAYS: int = 14
+    EXPIRY_BATCH_SIZE: int = 1000
+
+    # Настройки индекса похожих вакансий (без каталога поиск выключен)
+    SIMILARITY_INDEX_DIR: Optional[str] = None
+    SIMILARITY_REBUILD_INTERVAL: int = 86400
 
     # Настройки Flask
     DEBUG: bool = False
+    # Токен служебных маршрутов (/processes, /proxies, /slow-queries и др.):
+    # с ним они требуют заголовок "Authorization: Bearer <токен>", а без
+    # него отключены изменяющие состояние маршруты и журнал медленных
+    # запросов с параметрами пользователей
+    ADMIN_TOKEN: Optional[str] = None
+
+    # Метрики Prometheus (см. core.metrics): каталог файлов метрик процессов
+    # gunicorn (без него /metrics показывает только обработавший запрос
+    # процесс) и порт, на котором метрики отдает сборщик worker.py
+    PROMETHEUS_MULTIPROC_DIR: Optional[str] = None
+    WORKER_METRICS_PORT: Optional[int] = None
 
-    # Настройки прокси (опционально)
+    # Настройки HTTP-клиента парсеров (см. parsers.http_client): лимиты
+    # запросов в секунду по хостам, повторы и автомат отключения источника
+    HTTP_RATE_LIMITS_JSON: str = '{"api.hh.ru": 2, "russia.superjob.ru": 1}'
+    HTTP_DEFAULT_RATE: float = 1.0
+    HTTP_BURST: int = 2
+    HTTP_TIMEOUT: float = 10.0
+    HTTP_MAX_RETRIES: int = 4
+    HTTP_BACKOFF_BASE: float = 1.0
+    HTTP_BACKOFF_MAX: float = 60.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: int = 60
+
+    # Дисковый HTTP-кэш парсеров (см. parsers.http_cache); без каталога
+    # кэш отключен
+    HTTP_CACHE_DIR: Optional[str] = None
+    HTTP_CACHE_TTL: int = 604800
+    HTTP_CACHE_MAX_BYTES: int = 536870912
+    HTTP_CACHE_MAX_AGE: int = 0
+
+    # Запись ответов источников для воспроизведения (см.
+    # parsers.http_recording); без каталога запись выключена
+    HTTP_RECORD_DIR: Optional[str] = None
+
+    # Обогащение вакансий hh.ru полными описаниями (см. core.vacancy_details)
+    HH_DETAILS_ENABLED: bool = False
+    HH_DETAILS_BUDGET: int = 200
+    HH_DETAILS_WORKERS: int = 4
+
+    # Разбор страниц SuperJob в пуле процессов (см. parsers.parse_pool); при
+    # PARSE_WORKERS = 0 страницы разбираются в потоке обхода
+    PARSE_WORKERS: int = 0
+    PARSE_QUEUE_SIZE: int = 4
+
+    # Настройки прокси (опционально) и оценки их здоровья (см.
+    # parsers.proxy_pool)
     PROXY_LIST: Optional[str] = None
+    PROXY_EWMA_ALPHA: float = 0.3
+    PROXY_QUARANTINE_FAILURES: int = 3
+    PROXY_QUARANTINE_SECONDS: int = 60
+    PROXY_QUARANTINE_MAX_SECONDS: int = 1800
 
     # Курсы валют в формате JSON
     CURRENCY_RATES_JSON: str = (
         '{"USD": 90, "EUR": 100, "KZT": 0.2, "UAH": 2.5, "BYN": 30, "RUR": 1, "RUB": 1}'
     )
+    # Источник курсов (см. core.currency_rates): функция "модуль:функция" или
+    # JSON-файл; без них используется CURRENCY_RATES_JSON. Курсы кэшируются
+    # на CURRENCY_RATES_TTL секунд, с тем же интервалом ведущий процесс
+    # пересчитывает рублевые зарплаты сохраненных вакансий
+    CURRENCY_RATES_SOURCE: Optional[str] = None
+    CURRENCY_RATES_FILE: Optional[str] = None
+    CURRENCY_RATES_TTL: int = 3600
+    SALARY_RENORMALIZE_BATCH_SIZE: int = 1000
 
     # Переменная для тестовой БД
     TEST_DATABASE_URL: Optional[str] = None
@@ -131,6 +252,38 @@ class Settings(BaseSettings):
                 "RUB": 1.0,
             }
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def crawl_source_budgets(self) -> Dict[str, int]:
+        """Преобразует строку CRAWL_SOURCE_BUDGETS_JSON в словарь.
+
+        В случае ошибки парсинга бюджеты не ограничиваются.
+
+        Returns:
+            Словарь с количеством страниц в час по источникам.
+        """
+        try:
+            budgets = json.loads(self.CRAWL_SOURCE_BUDGETS_JSON)
+            return {k: int(v) for k, v in budgets.items()}
+        except (AttributeError, TypeError, ValueError):
+            return {}
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def http_rate_limits(self) -> Dict[str, float]:
+        """Преобразует строку HTTP_RATE_LIMITS_JSON в словарь.
+
+        В случае ошибки парсинга для всех хостов действует HTTP_DEFAULT_RATE.
+
+        Returns:
+            Словарь с количеством запросов в секунду по хостам.
+        """
+        try:
+            limits = json.loads(self.HTTP_RATE_LIMITS_JSON)
+            return {k: float(v) for k, v in limits.items()}
+        except (AttributeError, TypeError, ValueError):
+            return {}
+
 
 # Создаем глобальный экземпляр настроек для всего приложения
 settings = Settings()
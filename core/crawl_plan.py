@@ -0,0 +1,508 @@
+"""План периодического обхода: запросы, регионы, приоритеты и бюджеты.
+
+Вместо одного обхода DEFAULT_PARSE_QUERY раз в SCHEDULER_INTERVAL ведущий
+процесс раз в CRAWL_PLAN_TICK проверяет записи плана (CRAWL_PLAN_JSON) и
+планирует единицы обхода (см. core.crawl_units) только для подошедших:
+
+* Запись подходит, если с планирования ее предыдущего запуска прошло
+  interval секунд и этот запуск завершен. По умолчанию interval равен
+  SCHEDULER_INTERVAL, деленному на приоритет, поэтому важные запросы
+  обходятся чаще, а запуски разных записей распределяются во времени.
+* Подошедшие записи планируются по убыванию приоритета, а при равном
+  приоритете - начиная с дольше всех ожидающей.
+* У каждого источника есть бюджет страниц в час (CRAWL_SOURCE_BUDGETS_JSON).
+  Запись откладывается до следующей проверки, если ее оценка вместе со
+  страницами запусков за последний час превысит бюджет. Оценка - число
+  страниц предыдущего запуска записи, а до первого запуска - весь
+  диапазон выдачи.
+
+Интервал записи подстраивается под выход новых вакансий: после запуска
+без новых вакансий он увеличивается в CRAWL_BACKOFF_FACTOR раз, а после
+запуска с новыми - во столько же раз уменьшается, оставаясь в пределах
+min_interval..max_interval записи. Редко меняющиеся запросы обходятся все
+реже, а всплески на популярных быстро возвращают частый обход. Записи без
+границ (min_interval = max_interval = interval) обходятся с постоянным
+интервалом.
+
+Каждый запуск записи сохраняется в crawl_runs вместе с интервалом, через
+который он был запланирован; по ним строится статистика задержки, выхода
+вакансий и история интервалов для каждой записи.
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.orm import Session
+
+from core.crawl_units import DONE, FAILED, SKIPPED, plan_crawl_units
+from core.models import CrawlRun, CrawlUnit
+
+# Окно, за которое считается расход бюджета источника
+BUDGET_WINDOW = timedelta(hours=1)
+# Количество последних запусков, по которым считается статистика записи
+STATS_RUNS = 10
+
+
+class CrawlPlanEntry(BaseModel):
+    """Запись плана обхода.
+
+    Attributes:
+        query: Поисковый запрос.
+        source: Источник; без него запись раскрывается во все источники.
+        area: Код региона в терминах источника (area hh.ru, город
+            SuperJob); требует указать источник.
+        priority: Приоритет, не меньше 1.
+        interval: Начальный интервал между запусками в секундах; по
+            умолчанию SCHEDULER_INTERVAL, деленный на приоритет.
+        min_interval: Нижняя граница адаптивного интервала.
+        max_interval: Верхняя граница адаптивного интервала.
+        max_pages: Ограничение количества страниц выдачи.
+    """
+
+    query: str = Field(min_length=1)
+    source: Optional[str] = None
+    area: Optional[str] = None
+    priority: int = Field(default=1, ge=1)
+    interval: Optional[int] = Field(default=None, gt=0)
+    min_interval: Optional[int] = Field(default=None, gt=0)
+    max_interval: Optional[int] = Field(default=None, gt=0)
+    max_pages: Optional[int] = Field(default=None, gt=0)
+
+    @model_validator(mode="after")
+    def validate_area(self) -> "CrawlPlanEntry":
+        """Проверяет, что регион указан вместе с источником.
+
+        Коды регионов у источников разные, поэтому регион без источника
+        не имеет смысла.
+
+        Raises:
+            ValueError: Если регион указан без источника.
+        """
+        if self.area is not None and self.source is None:
+            raise ValueError("Регион записи плана указывается вместе с источником")
+        if (
+            self.min_interval is not None
+            and self.max_interval is not None
+            and self.min_interval > self.max_interval
+        ):
+            raise ValueError("min_interval записи плана больше max_interval")
+        return self
+
+    @property
+    def key(self) -> str:
+        """Ключ записи "источник|регион|запрос"."""
+        return f"{self.source}|{self.area or ''}|{self.query}"
+
+
+def load_crawl_plan(
+    raw: Optional[str],
+    default_query: str,
+    default_interval: int,
+    sources: Iterable[str],
+    min_interval: Optional[int] = None,
+    max_interval: Optional[int] = None,
+) -> List[CrawlPlanEntry]:
+    """Разбирает план обхода и раскрывает записи по источникам.
+
+    Границы адаптивного интервала записи по умолчанию берутся из
+    min_interval и max_interval, но всегда включают ее начальный интервал.
+    Без них интервал записи постоянен.
+
+    Args:
+        raw: JSON-список записей или None для плана по умолчанию.
+        default_query: Запрос плана по умолчанию.
+        default_interval: Интервал записи с приоритетом 1.
+        sources: Известные источники.
+        min_interval: Нижняя граница адаптивного интервала по умолчанию.
+        max_interval: Верхняя граница адаптивного интервала по умолчанию.
+
+    Returns:
+        Записи плана с заполненными источником, интервалом и его границами.
+
+    Raises:
+        ValueError: Если план не является списком записей, содержит
+            неизвестный источник или повторяющиеся записи.
+    """
+    known = list(sources)
+    if raw is None:
+        items: Any = [{"query": default_query}]
+    else:
+        items = json.loads(raw)
+        if not isinstance(items, list):
+            raise ValueError("План обхода должен быть JSON-списком записей")
+
+    entries: Dict[str, CrawlPlanEntry] = {}
+    for item in items:
+        try:
+            entry = CrawlPlanEntry.model_validate(item)
+        except ValidationError as e:
+            raise ValueError(f"Некорректная запись плана обхода {item!r}: {e}") from e
+        if entry.source is not None and entry.source not in known:
+            raise ValueError(f"Неизвестный источник в плане обхода: {entry.source}")
+        interval = entry.interval or max(default_interval // entry.priority, 1)
+        bounds = {
+            "interval": interval,
+            "min_interval": min(
+                entry.min_interval or min_interval or interval, interval
+            ),
+            "max_interval": max(
+                entry.max_interval or max_interval or interval, interval
+            ),
+        }
+        for source in [entry.source] if entry.source else known:
+            expanded = entry.model_copy(update={"source": source, **bounds})
+            if expanded.key in entries:
+                raise ValueError(f"Повторяющаяся запись плана обхода: {expanded.key}")
+            entries[expanded.key] = expanded
+    return list(entries.values())
+
+
+def _last_runs(db: Session, keys: List[str]) -> Dict[str, CrawlRun]:
+    """Возвращает последний запуск каждой записи."""
+    latest = (
+        select(func.max(CrawlRun.id))
+        .where(CrawlRun.entry_key.in_(keys))
+        .group_by(CrawlRun.entry_key)
+    )
+    runs = db.execute(select(CrawlRun).where(CrawlRun.id.in_(latest))).scalars()
+    return {run.entry_key: run for run in runs}
+
+
+def next_interval(
+    entry: CrawlPlanEntry, last: Optional[CrawlRun], backoff_factor: float
+) -> int:
+    """Возвращает интервал, через который запись обходится после запуска last.
+
+    Args:
+        entry: Запись плана.
+        last: Последний завершенный запуск записи или None.
+        backoff_factor: Во сколько раз меняется интервал после запуска.
+
+    Returns:
+        Интервал в секундах в пределах границ записи.
+    """
+    interval = entry.interval or 1
+    if last is None or last.finished_at is None:
+        return interval
+    previous = last.interval or interval
+    if last.added_count:
+        adapted = previous / backoff_factor
+    else:
+        adapted = previous * backoff_factor
+    low = entry.min_interval or interval
+    high = entry.max_interval or interval
+    return int(min(max(adapted, low), high))
+
+
+def _spent_pages(db: Session, since: datetime) -> Dict[str, int]:
+    """Возвращает расход бюджета источников с момента since.
+
+    Для завершенных запусков учитываются загруженные страницы, для
+    выполняющихся - их оценка.
+    """
+    pages = case(
+        (CrawlRun.finished_at.is_(None), CrawlRun.estimated_pages),
+        else_=CrawlRun.pages_fetched,
+    )
+    rows = db.execute(
+        select(CrawlRun.source, func.sum(pages))
+        .where(CrawlRun.planned_at >= since)
+        .group_by(CrawlRun.source)
+    ).all()
+    return {source: int(spent or 0) for source, spent in rows}
+
+
+def _entry_pages(
+    entry: CrawlPlanEntry, page_ranges: Mapping[str, Tuple[int, int]]
+) -> Tuple[int, int]:
+    """Возвращает диапазон страниц записи с учетом max_pages."""
+    first_page, last_page = page_ranges[str(entry.source)]
+    if entry.max_pages is not None:
+        last_page = min(last_page, first_page + entry.max_pages - 1)
+    return first_page, last_page
+
+
+def plan_due_entries(
+    db: Session,
+    entries: List[CrawlPlanEntry],
+    page_ranges: Mapping[str, Tuple[int, int]],
+    budgets: Mapping[str, int],
+    pages_per_unit: int,
+    backoff_factor: float = 2.0,
+    now: Optional[datetime] = None,
+) -> List[CrawlRun]:
+    """Планирует единицы обхода для подошедших записей плана.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        entries: Записи плана (см. load_crawl_plan).
+        page_ranges: Первая и последняя страница выдачи каждого источника.
+        budgets: Бюджеты источников, страниц в час; источник без бюджета
+            не ограничивается.
+        pages_per_unit: Количество страниц в единице.
+        backoff_factor: Во сколько раз меняется интервал записи после
+            запуска без новых вакансий или с ними.
+        now: Текущее время.
+
+    Returns:
+        Созданные запуски.
+    """
+    now = now or datetime.now()
+    last_runs = _last_runs(db, [entry.key for entry in entries])
+
+    due: List[Tuple[datetime, int, CrawlPlanEntry]] = []
+    for entry in entries:
+        last = last_runs.get(entry.key)
+        interval = next_interval(entry, last, backoff_factor)
+        if last is None:
+            due.append((datetime.min, interval, entry))
+        elif last.finished_at is not None:
+            due_at = last.planned_at + timedelta(seconds=interval)
+            if now >= due_at:
+                due.append((due_at, interval, entry))
+    due.sort(key=lambda item: (-item[2].priority, item[0]))
+
+    spent = _spent_pages(db, now - BUDGET_WINDOW)
+    runs: List[CrawlRun] = []
+    for _, interval, entry in due:
+        source = str(entry.source)
+        first_page, last_page = _entry_pages(entry, page_ranges)
+        last = last_runs.get(entry.key)
+        if last is not None and last.pages_fetched > 0:
+            estimate = min(last.pages_fetched, last_page - first_page + 1)
+        else:
+            estimate = last_page - first_page + 1
+        budget = budgets.get(source)
+        spent_pages = spent.get(source, 0)
+        # Запись дороже всего бюджета все равно обходится, когда он не тронут
+        if budget is not None and spent_pages and spent_pages + estimate > budget:
+            continue
+
+        run = CrawlRun(
+            entry_key=entry.key,
+            source=source,
+            query=entry.query,
+            area=entry.area,
+            priority=entry.priority,
+            planned_at=now,
+            interval=interval,
+            estimated_pages=estimate,
+            units_total=0,
+        )
+        db.add(run)
+        db.flush()
+        run.units_total = plan_crawl_units(
+            db,
+            entry.query,
+            {source: (first_page, last_page)},
+            pages_per_unit,
+            area=entry.area,
+            priority=entry.priority,
+            run_id=run.id,
+        )
+        if run.units_total == 0:
+            # Единицы того же запроса и региона еще в очереди (например,
+            # поставлены до смены плана)
+            db.delete(run)
+            db.commit()
+            continue
+        db.commit()
+        spent[source] = spent_pages + estimate
+        runs.append(run)
+    return runs
+
+
+def close_finished_runs(db: Session) -> int:
+    """Закрывает запуски, все единицы которых завершены, и сводит их итоги.
+
+    Returns:
+        Количество закрытых запусков.
+    """
+    finished = CrawlUnit.status.in_([DONE, SKIPPED, FAILED])
+    rows = db.execute(
+        select(
+            CrawlUnit.run_id,
+            func.sum(case((finished, 0), else_=1)),
+            func.sum(CrawlUnit.pages_fetched),
+            func.sum(CrawlUnit.found_count),
+            func.sum(CrawlUnit.added_count),
+            func.sum(CrawlUnit.cache_requests),
+            func.sum(CrawlUnit.cache_hits),
+            func.sum(CrawlUnit.cache_bytes_saved),
+            func.max(CrawlUnit.finished_at),
+        )
+        .join(CrawlRun, CrawlRun.id == CrawlUnit.run_id)
+        .where(CrawlRun.finished_at.is_(None))
+        .group_by(CrawlUnit.run_id)
+    ).all()
+    closed = 0
+    for (
+        run_id,
+        outstanding,
+        pages,
+        found,
+        added,
+        cache_requests,
+        cache_hits,
+        cache_bytes_saved,
+        finished_at,
+    ) in rows:
+        if outstanding:
+            continue
+        run = db.get(CrawlRun, run_id)
+        if run is None:
+            continue
+        run.pages_fetched = int(pages or 0)
+        run.found_count = int(found or 0)
+        run.added_count = int(added or 0)
+        run.cache_requests = int(cache_requests or 0)
+        run.cache_hits = int(cache_hits or 0)
+        run.cache_bytes_saved = int(cache_bytes_saved or 0)
+        run.finished_at = finished_at or datetime.now()
+        closed += 1
+    db.commit()
+    return closed
+
+
+def prune_crawl_runs(db: Session, older_than: datetime) -> int:
+    """Удаляет завершенные запуски, запланированные раньше older_than.
+
+    Returns:
+        Количество удаленных запусков.
+    """
+    result = db.execute(
+        delete(CrawlRun).where(
+            CrawlRun.finished_at.is_not(None), CrawlRun.planned_at < older_than
+        )
+    )
+    db.commit()
+    return int(result.rowcount)  # type: ignore[attr-defined]
+
+
+def get_crawl_plan_stats(
+    db: Session, entries: List[CrawlPlanEntry], backoff_factor: float = 2.0
+) -> List[Dict[str, Any]]:
+    """Возвращает записи плана со статистикой их последних запусков.
+
+    Задержка запуска - время от планирования до завершения последней
+    единицы, выход - количество найденных вакансий на загруженную страницу.
+    Средние значения считаются по STATS_RUNS последним завершенным запускам.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        entries: Записи плана.
+        backoff_factor: Во сколько раз меняется интервал записи после
+            запуска (см. plan_due_entries).
+
+    Returns:
+        Список словарей для JSON-ответа в порядке записей плана.
+    """
+    keys = [entry.key for entry in entries]
+    last_runs = _last_runs(db, keys)
+    finished: Dict[str, List[CrawlRun]] = {}
+    for run in db.execute(
+        select(CrawlRun)
+        .where(CrawlRun.entry_key.in_(keys), CrawlRun.finished_at.is_not(None))
+        .order_by(CrawlRun.id.desc())
+    ).scalars():
+        runs = finished.setdefault(run.entry_key, [])
+        if len(runs) < STATS_RUNS:
+            runs.append(run)
+
+    stats = []
+    for entry in entries:
+        last = last_runs.get(entry.key)
+        runs = finished.get(entry.key, [])
+        latencies = [
+            (run.finished_at - run.planned_at).total_seconds()
+            for run in runs
+            if run.finished_at is not None
+        ]
+        pages = sum(run.pages_fetched for run in runs)
+        interval = next_interval(entry, runs[0] if runs else None, backoff_factor)
+        stats.append(
+            {
+                "key": entry.key,
+                "query": entry.query,
+                "source": entry.source,
+                "area": entry.area,
+                "priority": entry.priority,
+                "interval": interval,
+                "min_interval": entry.min_interval,
+                "max_interval": entry.max_interval,
+                "next_run_at": (
+                    (last.planned_at + timedelta(seconds=interval)).isoformat()
+                    if last
+                    else None
+                ),
+                "last_planned_at": last.planned_at.isoformat() if last else None,
+                "last_finished_at": (
+                    last.finished_at.isoformat() if last and last.finished_at else None
+                ),
+                "last_latency_seconds": latencies[0] if latencies else None,
+                "avg_latency_seconds": (
+                    sum(latencies) / len(latencies) if latencies else None
+                ),
+                "runs": len(runs),
+                "pages_fetched": pages,
+                "found_count": sum(run.found_count for run in runs),
+                "added_count": sum(run.added_count for run in runs),
+                "yield_per_page": (
+                    sum(run.found_count for run in runs) / pages if pages else None
+                ),
+                "added_per_run": (
+                    sum(run.added_count for run in runs) / len(runs) if runs else None
+                ),
+            }
+        )
+    return stats
+
+
+def get_crawl_run_history(db: Session, entry_key: str, limit: int) -> List[CrawlRun]:
+    """Возвращает последние запуски записи плана, начиная с самого нового.
+
+    По истории видно, как интервал записи менялся вслед за выходом новых
+    вакансий и сколько страниц на это потрачено.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        entry_key: Ключ записи плана.
+        limit: Максимальное количество запусков.
+
+    Returns:
+        Список запусков.
+    """
+    return list(
+        db.execute(
+            select(CrawlRun)
+            .where(CrawlRun.entry_key == entry_key)
+            .order_by(CrawlRun.id.desc())
+            .limit(limit)
+        ).scalars()
+    )
+
+
+def crawl_run_to_dict(run: CrawlRun) -> Dict[str, Any]:
+    """Преобразует запуск в словарь для JSON-ответа."""
+    return {
+        "id": run.id,
+        "planned_at": run.planned_at.isoformat(),
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+        "interval": run.interval,
+        "estimated_pages": run.estimated_pages,
+        "units_total": run.units_total,
+        "pages_fetched": run.pages_fetched,
+        "found_count": run.found_count,
+        "added_count": run.added_count,
+        "cache_requests": run.cache_requests,
+        "cache_hits": run.cache_hits,
+        "cache_hit_ratio": (
+            round(run.cache_hits / run.cache_requests, 3)
+            if run.cache_requests
+            else None
+        ),
+        "cache_bytes_saved": run.cache_bytes_saved,
+    }
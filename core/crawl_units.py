@@ -0,0 +1,463 @@
+"""Распределенный обход источников единицами с арендой.
+
+Когда отслеживаемых запросов много, один процесс не успевает обойти все
+источники за SCHEDULER_INTERVAL. Поэтому ведущий процесс только
+планирует обход: делит выдачу каждого источника по каждому запросу на
+диапазоны страниц (таблица crawl_units), а выполняют их процессы сборщика
+на любом количестве узлов:
+
+* Процесс берет единицу в аренду на CRAWL_LEASE_SECONDS. Строка
+  выбирается с FOR UPDATE SKIP LOCKED, поэтому процессы не ждут друг друга
+  и не получают одну и ту же единицу.
+* После каждой страницы аренда продлевается. Повторы одной страницы
+  могут длиться дольше аренды, поэтому она продлевается и перед каждой
+  паузой повтора запроса, на срок аренды плюс пауза (HttpClient.on_retry).
+  Загрузка полных описаний hh.ru после обхода страниц может длиться
+  дольше аренды, поэтому во время нее аренда продлевается, как только
+  прошла половина ее срока.
+  Если продлить не удалось (аренда истекла и единицу забрал другой
+  процесс), обход прекращается.
+* Единицу с истекшей арендой (процесс упал или потерял связь с БД) может
+  забрать любой процесс, пока не исчерпаны попытки.
+* При ошибке запроса единица возвращается в очередь, начиная с
+  необработанной страницы, а найденные вакансии сохраняются.
+* Если выдача закончилась раньше диапазона, ожидающие единицы с
+  последующими страницами того же запроса пропускаются. Единицы, взятые
+  другими процессами одновременно, тратят по одному запросу на пустую
+  страницу.
+
+Какие запросы, в каких регионах и как часто обходить, решает план обхода
+(см. core.crawl_plan); единицы записей с большим приоритетом выдаются
+раньше.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from core.config import settings
+from core.database import add_vacancies_from_dto, get_db
+from core.models import CrawlUnit
+from core.vacancy_details import enrich_descriptions
+from parsers.base_parser import BaseParser, PageRangeResult
+from parsers.hh_parser import HHParser
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+ParserFactory = Callable[[], BaseParser]
+
+
+class CrawlLeaseLost(Exception):
+    """Аренда единицы обхода истекла и, возможно, передана другому процессу."""
+
+
+class LeasedUnit(NamedTuple):
+    """Параметры арендованной единицы, достаточные для ее обхода."""
+
+    id: int
+    source: str
+    query: str
+    page_start: int
+    page_end: int
+    area: Optional[str] = None
+
+
+def plan_crawl_units(
+    db: Session,
+    query: str,
+    page_ranges: Mapping[str, Tuple[int, int]],
+    pages_per_unit: int,
+    area: Optional[str] = None,
+    priority: int = 0,
+    run_id: Optional[int] = None,
+) -> int:
+    """Делит обход источников по запросу на единицы.
+
+    Источник пропускается, если предыдущий обход того же запроса в том же
+    регионе еще не завершен, чтобы медленный обход не накапливал очередь.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        query: Поисковый запрос.
+        page_ranges: Первая и последняя страница выдачи каждого источника.
+        pages_per_unit: Количество страниц в единице.
+        area: Код региона в терминах источника или None.
+        priority: Приоритет единиц; единицы с большим приоритетом
+            выдаются раньше.
+        run_id: Запуск записи плана обхода, к которому относятся единицы.
+
+    Returns:
+        Количество созданных единиц.
+    """
+    outstanding = set(
+        db.execute(
+            select(CrawlUnit.source).where(
+                CrawlUnit.query == query,
+                _same_area(area),
+                CrawlUnit.status.in_([PENDING, LEASED]),
+            )
+        ).scalars()
+    )
+    units = [
+        CrawlUnit(
+            source=source,
+            query=query,
+            area=area,
+            priority=priority,
+            run_id=run_id,
+            page_start=start,
+            page_end=min(start + pages_per_unit - 1, last_page),
+            status=PENDING,
+        )
+        for source, (first_page, last_page) in page_ranges.items()
+        if source not in outstanding
+        for start in range(first_page, last_page + 1, pages_per_unit)
+    ]
+    db.add_all(units)
+    db.commit()
+    return len(units)
+
+
+def _same_area(area: Optional[str]) -> ColumnElement[bool]:
+    """Условие "единица относится к указанному региону"."""
+    if area is None:
+        return CrawlUnit.area.is_(None)
+    return CrawlUnit.area == area
+
+
+def claim_crawl_unit(
+    db: Session,
+    owner: str,
+    lease: timedelta,
+    max_attempts: int,
+    sources: List[str],
+) -> Optional[LeasedUnit]:
+    """Берет в аренду ожидающую единицу или единицу с истекшей арендой.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        owner: Идентификатор процесса.
+        lease: Срок аренды.
+        max_attempts: Максимальное количество аренд одной единицы.
+        sources: Источники, которые умеет обходить процесс.
+
+    Returns:
+        Арендованная единица или None, если работы нет.
+    """
+    now = datetime.now()
+    expired = (CrawlUnit.status == LEASED) & (CrawlUnit.lease_expires_at < now)
+    # Единицы, упавшие на последней попытке, больше не выдаются
+    db.execute(
+        update(CrawlUnit)
+        .where(expired, CrawlUnit.attempts >= max_attempts)
+        .values(
+            status=FAILED,
+            finished_at=now,
+            error="Аренда истекла на последней попытке",
+        )
+    )
+    unit = db.execute(
+        select(CrawlUnit)
+        .where(
+            (CrawlUnit.status == PENDING) | expired,
+            CrawlUnit.attempts < max_attempts,
+            CrawlUnit.source.in_(sources),
+        )
+        .order_by(CrawlUnit.priority.desc(), CrawlUnit.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+    if unit is None:
+        db.commit()
+        return None
+    unit.status = LEASED
+    unit.lease_owner = owner
+    unit.lease_expires_at = now + lease
+    unit.attempts += 1
+    leased = LeasedUnit(
+        unit.id, unit.source, unit.query, unit.page_start, unit.page_end, unit.area
+    )
+    db.commit()
+    return leased
+
+
+def _owned_by(unit_id: int, owner: str) -> ColumnElement[bool]:
+    """Условие "единица арендована указанным процессом"."""
+    return (
+        (CrawlUnit.id == unit_id)
+        & (CrawlUnit.status == LEASED)
+        & (CrawlUnit.lease_owner == owner)
+    )
+
+
+def extend_crawl_lease(db: Session, unit_id: int, owner: str, lease: timedelta) -> bool:
+    """Продлевает аренду единицы.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        unit_id: Идентификатор единицы.
+        owner: Идентификатор процесса.
+        lease: Новый срок аренды, отсчитываемый от текущего момента.
+
+    Returns:
+        False, если процесс больше не владеет единицей.
+    """
+    result = db.execute(
+        update(CrawlUnit)
+        .where(_owned_by(unit_id, owner))
+        .values(lease_expires_at=datetime.now() + lease)
+    )
+    db.commit()
+    return bool(result.rowcount)  # type: ignore[attr-defined]
+
+
+def finish_crawl_unit(
+    db: Session,
+    unit_id: int,
+    owner: str,
+    result: PageRangeResult,
+    added_count: int,
+    max_attempts: int,
+) -> None:
+    """Сохраняет результат обхода единицы.
+
+    Единица, обход которой прервался ошибкой запроса, возвращается в
+    очередь с первой необработанной страницы. Если выдача закончилась,
+    ожидающие единицы со следующими страницами того же запроса
+    пропускаются.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        unit_id: Идентификатор единицы.
+        owner: Идентификатор процесса.
+        result: Результат обхода диапазона страниц.
+        added_count: Количество добавленных вакансий.
+        max_attempts: Максимальное количество аренд одной единицы.
+    """
+    unit = db.execute(
+        select(CrawlUnit).where(_owned_by(unit_id, owner)).with_for_update()
+    ).scalar_one_or_none()
+    if unit is None:
+        db.rollback()
+        return
+    now = datetime.now()
+    unit.pages_fetched += result.pages_fetched
+    unit.found_count += len(result.vacancies)
+    unit.added_count += added_count
+    if result.cache_stats is not None:
+        unit.cache_requests += result.cache_stats.requests
+        unit.cache_hits += result.cache_stats.hits
+        unit.cache_bytes_saved += result.cache_stats.bytes_saved
+    unit.lease_owner = None
+    unit.lease_expires_at = None
+    if result.failed_page is not None:
+        unit.page_start = result.failed_page
+        unit.error = f"Ошибка запроса страницы {result.failed_page}"
+        if unit.attempts >= max_attempts:
+            unit.status = FAILED
+            unit.finished_at = now
+        else:
+            unit.status = PENDING
+        db.commit()
+        return
+
+    unit.status = DONE
+    unit.finished_at = now
+    unit.error = None
+    if result.exhausted:
+        db.execute(
+            update(CrawlUnit)
+            .where(
+                CrawlUnit.source == unit.source,
+                CrawlUnit.query == unit.query,
+                _same_area(unit.area),
+                CrawlUnit.status == PENDING,
+                CrawlUnit.page_start > unit.page_end,
+            )
+            .values(status=SKIPPED, finished_at=now)
+        )
+    db.commit()
+
+
+def release_crawl_unit(
+    db: Session, unit_id: int, owner: str, error: str, max_attempts: int
+) -> None:
+    """Возвращает единицу в очередь после непредвиденной ошибки.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        unit_id: Идентификатор единицы.
+        owner: Идентификатор процесса.
+        error: Текст ошибки.
+        max_attempts: Максимальное количество аренд одной единицы.
+    """
+    unit = db.execute(
+        select(CrawlUnit).where(_owned_by(unit_id, owner)).with_for_update()
+    ).scalar_one_or_none()
+    if unit is None:
+        db.rollback()
+        return
+    unit.lease_owner = None
+    unit.lease_expires_at = None
+    unit.error = error
+    if unit.attempts >= max_attempts:
+        unit.status = FAILED
+        unit.finished_at = datetime.now()
+    else:
+        unit.status = PENDING
+    db.commit()
+
+
+def prune_crawl_units(db: Session, older_than: datetime) -> int:
+    """Удаляет завершенные единицы, закрытые раньше older_than.
+
+    Returns:
+        Количество удаленных единиц.
+    """
+    result = db.execute(
+        delete(CrawlUnit).where(
+            CrawlUnit.status.in_([DONE, SKIPPED, FAILED]),
+            CrawlUnit.finished_at < older_than,
+        )
+    )
+    db.commit()
+    return int(result.rowcount)  # type: ignore[attr-defined]
+
+
+def get_crawl_summary(db: Session) -> Dict[str, Dict[str, int]]:
+    """Возвращает количество единиц в каждом состоянии по источникам."""
+    rows = db.execute(
+        select(CrawlUnit.source, CrawlUnit.status, func.count())
+        .group_by(CrawlUnit.source, CrawlUnit.status)
+        .order_by(CrawlUnit.source, CrawlUnit.status)
+    ).all()
+    summary: Dict[str, Dict[str, int]] = {}
+    for source, status, count in rows:
+        summary.setdefault(source, {})[status] = count
+    return summary
+
+
+def run_crawl_unit(
+    unit: LeasedUnit,
+    parser_factory: ParserFactory,
+    owner: str,
+    lease: timedelta,
+    max_attempts: int,
+) -> None:
+    """Обходит арендованную единицу и сохраняет вакансии.
+
+    Args:
+        unit: Арендованная единица.
+        parser_factory: Создает парсер источника единицы.
+        owner: Идентификатор процесса.
+        lease: Срок аренды, на который она продлевается после каждой страницы.
+        max_attempts: Максимальное количество аренд одной единицы.
+    """
+    lease_extended_at = time.monotonic()
+
+    def renew_lease(duration: timedelta) -> None:
+        nonlocal lease_extended_at
+        with get_db() as db:
+            if not extend_crawl_lease(db, unit.id, owner, duration):
+                raise CrawlLeaseLost(f"Аренда единицы {unit.id} потеряна")
+        lease_extended_at = time.monotonic()
+
+    def extend_lease(pages_fetched: int, found_count: int) -> None:
+        renew_lease(lease)
+
+    def extend_lease_before_retry(delay: float) -> None:
+        # Пауза по Retry-After может быть длиннее самой аренды
+        renew_lease(lease + timedelta(seconds=delay))
+
+    def extend_lease_while_enriching(descriptions_done: int) -> None:
+        # Описания загружаются быстрее аренды, поэтому продлевать ее после
+        # каждого описания незачем
+        if time.monotonic() - lease_extended_at >= lease.total_seconds() / 2:
+            renew_lease(lease)
+
+    try:
+        parser = parser_factory()
+        parser.http.on_retry = extend_lease_before_retry
+        result = parser.parse_pages(
+            unit.query, unit.page_start, unit.page_end, extend_lease, area=unit.area
+        )
+        stats = result.cache_stats
+        if stats is not None and stats.requests:
+            logger.info(
+                "HTTP-кэш единицы %d: %d из %d ответов из кэша, "
+                "сэкономлено %d байт, пропущено разборов: %d.",
+                unit.id,
+                stats.hits,
+                stats.requests,
+                stats.bytes_saved,
+                stats.parses_skipped,
+            )
+        added_count = 0
+        if result.vacancies:
+            with get_db() as db:
+                if settings.HH_DETAILS_ENABLED:
+                    enrich_descriptions(
+                        db,
+                        result.vacancies,
+                        parser if isinstance(parser, HHParser) else None,
+                        on_progress=extend_lease_while_enriching,
+                    )
+                added_count = add_vacancies_from_dto(db, result.vacancies)
+        with get_db() as db:
+            finish_crawl_unit(db, unit.id, owner, result, added_count, max_attempts)
+    except CrawlLeaseLost as e:
+        # Единицу обходит другой процесс, найденное им будет сохранено
+        logger.warning("%s, обход прекращен.", e)
+    except Exception as e:
+        logger.error("Ошибка при обходе единицы %d: %s", unit.id, e, exc_info=True)
+        with get_db() as db:
+            release_crawl_unit(db, unit.id, owner, str(e), max_attempts)
+
+
+def process_crawl_units(
+    parsers: Mapping[str, ParserFactory],
+    owner: str,
+    lease: timedelta,
+    max_attempts: int,
+    stop_event: Optional[threading.Event] = None,
+) -> int:
+    """Берет в аренду и обходит единицы, пока очередь не опустеет.
+
+    Args:
+        parsers: Фабрики парсеров по названию источника.
+        owner: Идентификатор процесса.
+        lease: Срок аренды.
+        max_attempts: Максимальное количество аренд одной единицы.
+        stop_event: Событие остановки процесса; проверяется между единицами.
+
+    Returns:
+        Количество обойденных единиц.
+    """
+    processed = 0
+    while stop_event is None or not stop_event.is_set():
+        with get_db() as db:
+            unit = claim_crawl_unit(db, owner, lease, max_attempts, list(parsers))
+        if unit is None:
+            break
+        logger.info(
+            "Обход %s по запросу '%s', страницы %d-%d.",
+            unit.source,
+            unit.query,
+            unit.page_start,
+            unit.page_end,
+        )
+        run_crawl_unit(unit, parsers[unit.source], owner, lease, max_attempts)
+        processed += 1
+    return processed
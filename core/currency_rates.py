@@ -0,0 +1,216 @@
+"""Курсы валют для нормализации зарплат и пересчет сохраненных вакансий.
+
+Зарплаты вакансий хранятся в исходной валюте (salary_currency,
+salary_min_amount, salary_max_amount) и в рублях (salary_min_rub,
+salary_max_rub) - по рублевым столбцам работают фильтры и сортировка.
+Курсы берет CurrencyRateProvider из источника, заданного в настройках:
+
+* CURRENCY_RATES_SOURCE - функция "модуль:функция", возвращающая словарь
+  курсов (например, загрузка из внешнего API);
+* CURRENCY_RATES_FILE - JSON-файл вида {"USD": 90, "EUR": 100};
+* иначе - строка CURRENCY_RATES_JSON из настроек.
+
+Курсы кэшируются в процессе на CURRENCY_RATES_TTL секунд, а если источник
+недоступен, используются последние загруженные. Курс рубля всегда равен 1
+(код RUR, который использует hh.ru, приводится к RUB).
+
+После смены курсов renormalize_salaries переписывает рублевые столбцы
+сохраненных вакансий короткими пакетными транзакциями, не блокируя
+таблицу целиком.
+"""
+
+import importlib
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, cast
+
+from sqlalchemy import ColumnElement, Integer, func, or_, select, update
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from core.config import settings
+from core.models import Vacancy
+
+logger = logging.getLogger(__name__)
+
+BASE_CURRENCY = "RUB"
+CURRENCY_ALIASES = {"RUR": BASE_CURRENCY}
+
+RateSource = Callable[[], Dict[str, float]]
+
+
+def normalize_currency(code: str) -> str:
+    """Приводит код валюты к верхнему регистру и заменяет синонимы."""
+    code = code.strip().upper()
+    return CURRENCY_ALIASES.get(code, code)
+
+
+def settings_rate_source() -> Dict[str, float]:
+    """Возвращает курсы из CURRENCY_RATES_JSON."""
+    return settings.currency_rates
+
+
+def file_rate_source(path: str) -> RateSource:
+    """Создает источник, читающий курсы из JSON-файла при каждой загрузке."""
+
+    def load() -> Dict[str, float]:
+        with open(path, encoding="utf-8") as file:
+            return cast(Dict[str, float], json.load(file))
+
+    return load
+
+
+def import_rate_source(spec: str) -> RateSource:
+    """Импортирует функцию-источник курсов по строке "модуль:функция".
+
+    Raises:
+        ValueError: Если строка не в формате "модуль:функция".
+    """
+    module_name, _, attribute = spec.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(
+            f"Источник курсов должен быть задан как 'модуль:функция': {spec}"
+        )
+    return cast(RateSource, getattr(importlib.import_module(module_name), attribute))
+
+
+def _clean_rates(rates: Dict[str, float]) -> Dict[str, float]:
+    """Проверяет курсы и приводит коды валют к единому виду.
+
+    Raises:
+        ValueError: Если курс не число или не положителен.
+    """
+    cleaned = {}
+    for code, rate in rates.items():
+        value = float(rate)
+        if value <= 0:
+            raise ValueError(f"Курс {code} должен быть положительным: {rate}")
+        cleaned[normalize_currency(code)] = value
+    cleaned[BASE_CURRENCY] = 1.0
+    return cleaned
+
+
+class CurrencyRateProvider:
+    """Курсы валют к рублю с кэшированием в процессе."""
+
+    def __init__(
+        self,
+        source: RateSource,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Создает провайдер; курсы загружаются при первом обращении.
+
+        Args:
+            source: Функция, возвращающая курсы по кодам валют.
+            ttl: Сколько секунд загруженные курсы считаются актуальными.
+            clock: Источник монотонного времени (заменяется в тестах).
+        """
+        self.source = source
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rates: Optional[Dict[str, float]] = None
+        self._loaded_at = 0.0
+
+    def rates(self) -> Dict[str, float]:
+        """Возвращает курсы, при необходимости загружая их из источника.
+
+        Если источник недоступен, возвращаются последние загруженные курсы,
+        а до первой успешной загрузки - курсы из CURRENCY_RATES_JSON.
+        """
+        with self._lock:
+            now = self._clock()
+            if self._rates is None or now - self._loaded_at >= self.ttl:
+                try:
+                    self._rates = _clean_rates(self.source())
+                except Exception as e:
+                    logger.warning("Не удалось загрузить курсы валют: %s", e)
+                    if self._rates is None:
+                        self._rates = _clean_rates(settings_rate_source())
+                self._loaded_at = now
+            return self._rates
+
+
+_provider_lock = threading.Lock()
+_providers: Dict[Tuple[Optional[str], Optional[str]], CurrencyRateProvider] = {}
+
+
+def get_rate_provider() -> CurrencyRateProvider:
+    """Возвращает общий провайдер курсов процесса для источника из настроек."""
+    key = (settings.CURRENCY_RATES_SOURCE, settings.CURRENCY_RATES_FILE)
+    with _provider_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            if settings.CURRENCY_RATES_SOURCE:
+                source = import_rate_source(settings.CURRENCY_RATES_SOURCE)
+            elif settings.CURRENCY_RATES_FILE:
+                source = file_rate_source(settings.CURRENCY_RATES_FILE)
+            else:
+                source = settings_rate_source
+            provider = _providers[key] = CurrencyRateProvider(
+                source, settings.CURRENCY_RATES_TTL
+            )
+        return provider
+
+
+def _converted(amount: InstrumentedAttribute[int], rate: float) -> ColumnElement[int]:
+    """Возвращает выражение суммы в рублях, как в SalaryNormalizer.to_rub."""
+    # Пустая или нулевая сумма дает NULL; coalesce внутри floor нужен SQLite,
+    # где SQLAlchemy подменяет floor функцией Python, не принимающей NULL
+    return func.nullif(func.floor(func.coalesce(amount, 0) * rate), 0).cast(Integer)
+
+
+def renormalize_salaries(
+    db: Session,
+    rates: Dict[str, float],
+    batch_size: Optional[int] = None,
+) -> int:
+    """Пересчитывает рублевые зарплаты вакансий по текущим курсам.
+
+    Для каждой валюты, кроме рубля, выбирает пакет из не более batch_size
+    вакансий, чьи рублевые суммы расходятся с пересчетом исходных сумм по
+    курсу, обновляет их и фиксирует пакет отдельной короткой транзакцией.
+    Вакансии без известной валюты не изменяются.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        rates: Курсы валют к рублю.
+        batch_size: Размер пакета. По умолчанию из настроек.
+
+    Returns:
+        Количество обновленных вакансий.
+    """
+    if batch_size is None:
+        batch_size = settings.SALARY_RENORMALIZE_BATCH_SIZE
+    updated_total = 0
+    for code, rate in sorted(rates.items()):
+        if code == BASE_CURRENCY:
+            continue
+        min_rub = _converted(Vacancy.salary_min_amount, rate)
+        max_rub = _converted(Vacancy.salary_max_amount, rate)
+        stale = or_(
+            Vacancy.salary_min_rub.is_distinct_from(min_rub),
+            Vacancy.salary_max_rub.is_distinct_from(max_rub),
+        )
+        while True:
+            ids = list(
+                db.execute(
+                    select(Vacancy.id)
+                    .where(Vacancy.salary_currency == code, stale)
+                    .limit(batch_size)
+                ).scalars()
+            )
+            if not ids:
+                break
+            db.execute(
+                update(Vacancy)
+                .where(Vacancy.id.in_(ids))
+                .values(salary_min_rub=min_rub, salary_max_rub=max_rub)
+            )
+            db.commit()
+            updated_total += len(ids)
+            if len(ids) < batch_size:
+                break
+    return updated_total
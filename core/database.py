@@ -1,23 +1,87 @@
 """Модуль для взаимодействия с базой данных с использованием SQLAlchemy ORM.
 
 Содержит функции для работы с вакансиями, включая добавление, поиск и фильтрацию.
+Время выполнения функций попадает в метрики Prometheus (см. core.metrics).
 """
 
+import logging
+import time
 from contextlib import contextmanager
-from typing import Any, Generator, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, Generator, List, Optional, Tuple
 
-from sqlalchemy import create_engine, func, select
+from sqlalchemy import create_engine, delete, func, select, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.sql.elements import ColumnElement
 
 from core.config import settings
-from core.models import Vacancy
+from core.dedup import (
+    InsertedVacancy,
+    assign_duplicate_clusters,
+    refresh_cluster_representatives,
+)
+from core.metrics import observe_insert, timed_query
+from core.models import SavedSearch, Vacancy, VacancyUrl
+from core.percolator import percolate_saved_searches
+from core.process_metrics import PoolUsageTracker
+from core.similarity import update_similarity_index
+from core.slow_queries import SlowQueryLog
 from parsers.dto import VacancyDTO
 
+
+def _pool_options() -> Dict[str, Any]:
+    """Возвращает параметры пула соединений из настроек.
+
+    SQLite (в тестах) использует собственный пул без этих параметров.
+    """
+    if settings.database_url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+
 # Создаем engine и sessionmaker для всего приложения один раз при инициализации
-engine = create_engine(settings.database_url, pool_pre_ping=True)
+engine = create_engine(settings.database_url, pool_pre_ping=True, **_pool_options())
+pool_usage = PoolUsageTracker(
+    engine,
+    settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW if _pool_options() else None,
+)
+slow_query_log = SlowQueryLog(
+    engine,
+    settings.SLOW_QUERY_THRESHOLD_MS,
+    settings.SLOW_QUERY_LOG_SIZE,
+    settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+logger = logging.getLogger(__name__)
+
+
+def _is_active() -> ColumnElement[bool]:
+    """Условие отбора актуальных (не помеченных устаревшими) вакансий.
+
+    Совпадает с условием частичных индексов ix_vacancies_active_*, поэтому
+    запросы выдачи используют их и не затрагивают устаревшие строки.
+    """
+    return Vacancy.expired_at.is_(None)
+
+
+def _is_cluster_representative() -> ColumnElement[bool]:
+    """Условие, оставляющее по одной вакансии из каждой группы дубликатов.
+
+    Представитель - самая свежая актуальная вакансия группы, он отмечается
+    при вставке (см. core.dedup.refresh_cluster_representatives), поэтому
+    вместе с _is_active() условие совпадает с условием частичного индекса
+    ix_vacancies_active_representative_published_at. Остальные фильтры
+    применяются к представителям: группа попадает в выдачу, если ей
+    соответствует ее самая свежая вакансия. Вакансии без группы считаются
+    отдельными группами.
+    """
+    return Vacancy.is_cluster_representative.expression
 
 
 @contextmanager
@@ -37,12 +101,22 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+@timed_query
 def add_vacancies_from_dto(db: Session, vacancies_dto: list[VacancyDTO]) -> int:
     """Добавляет список вакансий в базу данных из DTO-объектов.
 
-    Использует механизм PostgreSQL "ON CONFLICT DO NOTHING" для атомарного
-    игнорирования дубликатов, фильтрует поля DTO, чтобы они соответствовали
-    модели, и использует RETURNING для точного подсчета вставленных строк.
+    Использует механизм PostgreSQL "ON CONFLICT DO NOTHING", чтобы атомарно
+    игнорировать дубликаты: сначала URL пакета добавляются в vacancy_urls,
+    где URL уникален во всей таблице вакансий, а затем вставляются только
+    вакансии с новыми URL, без указания ограничения, чтобы пропустить и
+    совпадения по названию/компании/дате. Поля DTO фильтруются, чтобы они
+    соответствовали модели, а RETURNING дает точный подсчет вставленных строк.
+
+    Для всех вакансий пакета, в том числе уже известных, одним UPDATE
+    обновляется last_seen_at, а ранее устаревшие снова становятся актуальными.
+    Новым вакансиям в той же транзакции назначаются группы почти-дубликатов
+    и увеличиваются счетчики подходящих сохраненных поисков, а после
+    фиксации они дописываются в индекс похожих вакансий.
 
     Args:
         db: Сессия SQLAlchemy.
@@ -59,8 +133,10 @@ def add_vacancies_from_dto(db: Session, vacancies_dto: list[VacancyDTO]) -> int:
 
     # 2. Фильтруем каждый словарь из DTO, оставляя только те ключи,
     #    которые присутствуют в модели Vacancy.
+    seen_at = datetime.now()
     values_to_insert = [
         {k: v for k, v in dto.model_dump().items() if k in allowed_keys}
+        | {"last_seen_at": seen_at}
         for dto in vacancies_dto
     ]
 
@@ -68,29 +144,99 @@ def add_vacancies_from_dto(db: Session, vacancies_dto: list[VacancyDTO]) -> int:
     if not values_to_insert:
         return 0
 
-    # 3. Создаем statement с ON CONFLICT и RETURNING в одной цепочке
-    stmt = (
-        insert(Vacancy)
-        .values(values_to_insert)
-        .on_conflict_do_nothing(index_elements=["original_url"])
-        .returning(Vacancy.id)
-    )
+    # 3. Оставляем по одной вакансии на URL: повтор в пакете все равно
+    #    не будет вставлен
+    values_by_url: Dict[str, Dict[str, Any]] = {}
+    for values in values_to_insert:
+        values_by_url.setdefault(values["original_url"], values)
 
+    started = time.perf_counter()
     try:
-        # 5. Выполняем запрос и получаем результат
-        result = db.execute(stmt)
-        inserted_ids = result.scalars().all()
+        # 4. Закрепляем за пакетом новые URL. Уникальность секционированной
+        #    таблицы включает published_at, поэтому URL проверяется по
+        #    vacancy_urls: параллельная вставка того же URL ждет фиксации
+        #    этой транзакции и ничего не добавляет.
+        claimed_urls = db.scalars(
+            insert(VacancyUrl)
+            .values(
+                [
+                    {"original_url": url, "published_at": values["published_at"]}
+                    for url, values in values_by_url.items()
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(VacancyUrl.original_url)
+        ).all()
+
+        # 5. Вставляем вакансии с новыми URL; ON CONFLICT пропускает
+        #    совпадения по названию, компании и дате публикации
+        inserted_rows: List[Any] = []
+        if claimed_urls:
+            inserted_rows = list(
+                db.execute(
+                    insert(Vacancy)
+                    .values([values_by_url[url] for url in claimed_urls])
+                    .on_conflict_do_nothing()
+                    .returning(Vacancy.id, Vacancy.original_url, Vacancy.published_at)
+                )
+            )
+        # URL пропущенных вакансий освобождаются, чтобы каждому URL в
+        # vacancy_urls соответствовала вакансия
+        skipped_urls = set(claimed_urls) - {row.original_url for row in inserted_rows}
+        if skipped_urls:
+            db.execute(
+                delete(VacancyUrl).where(VacancyUrl.original_url.in_(skipped_urls))
+            )
+
+        # Строки RETURNING сопоставляются с пакетом только по URL: дата
+        # публикации с часовым поясом (как у hh.ru) возвращается из столбца
+        # без часового пояса уже другим значением
+        inserted = []
+        for row in inserted_rows:
+            values = values_by_url[row.original_url]
+            inserted.append(
+                InsertedVacancy(
+                    id=row.id,
+                    published_at=row.published_at,
+                    title=values["title"],
+                    company=values["company"],
+                    description=values.get("description"),
+                    location=values.get("location"),
+                    source=values.get("source"),
+                    salary_min_rub=values.get("salary_min_rub"),
+                    salary_max_rub=values.get("salary_max_rub"),
+                )
+            )
+        assign_duplicate_clusters(db, inserted)
+        percolate_saved_searches(db, inserted)
+        seen_clusters = db.scalars(
+            update(Vacancy)
+            .where(
+                Vacancy.original_url.in_({dto.original_url for dto in vacancies_dto})
+            )
+            .values(last_seen_at=seen_at, expired_at=None)
+            .returning(Vacancy.duplicate_cluster_id)
+        ).all()
+        # Новые и снова актуальные вакансии могут сменить представителя группы
+        refresh_cluster_representatives(db, seen_clusters)
         db.commit()
-        # 6. Возвращаем точное количество вставленных ID
-        return len(inserted_ids)
+        observe_insert(len(values_to_insert), time.perf_counter() - started)
     except Exception as e:
-        import logging
-
-        logging.critical("DATABASE INSERT FAILED: %s", e, exc_info=True)
+        logger.critical("DATABASE INSERT FAILED: %s", e, exc_info=True)
         db.rollback()
         return 0
 
+    # Ошибка обновления индекса похожих вакансий не должна отменять вставку:
+    # вакансии попадут в индекс при следующей полной перестройке.
+    try:
+        update_similarity_index(inserted)
+    except Exception as e:
+        logger.error("Ошибка обновления индекса похожих вакансий: %s", e)
+    # 6. Возвращаем точное количество вставленных ID
+    return len(inserted_rows)
 
+
+@timed_query
 def get_filtered_vacancies(
     db: Session,
     page: int = 1,
@@ -101,6 +247,8 @@ def get_filtered_vacancies(
     salary_min: Optional[int] = None,
     salary_max: Optional[int] = None,
     source: Optional[str] = None,
+    published_from: Optional[datetime] = None,
+    collapse_duplicates: bool = False,
     sort_by: str = "published_at",
     sort_order: str = "desc",
 ) -> List[Vacancy]:
@@ -119,6 +267,10 @@ def get_filtered_vacancies(
         salary_min: Минимальная зарплата для фильтрации.
         salary_max: Максимальная зарплата для фильтрации.
         source: Фильтр по источнику вакансии.
+        published_from: Нижняя граница даты публикации. Позволяет PostgreSQL
+            отсечь секции за более ранние месяцы.
+        collapse_duplicates: Оставить по одной вакансии из каждой группы
+            почти-дубликатов.
         sort_by: Поле для сортировки ('published_at' или 'salary').
         sort_order: Направление сортировки ('asc' или 'desc').
 
@@ -126,10 +278,10 @@ def get_filtered_vacancies(
         Список ORM-объектов Vacancy.
     """
     stmt = select(Vacancy)
-    filters: list[ColumnElement[bool]] = []
+    filters: list[ColumnElement[bool]] = [_is_active()]
 
     if query:
-        stmt = stmt.where(
+        filters.append(
             Vacancy.tsvector_search.match(query, postgresql_regconfig="russian")
         )
 
@@ -139,11 +291,15 @@ def get_filtered_vacancies(
         filters.append(Vacancy.company.ilike(f"%{company}%"))
     if source:
         filters.append(Vacancy.source == source)
+    if published_from is not None:
+        filters.append(Vacancy.published_at >= published_from)
 
     if salary_min is not None:
         filters.append(Vacancy.salary_max_rub >= salary_min)
     if salary_max is not None:
         filters.append(Vacancy.salary_min_rub <= salary_max)
+    if collapse_duplicates:
+        filters.append(_is_cluster_representative())
 
     for filter_clause in filters:
         stmt = stmt.where(filter_clause)
@@ -173,6 +329,7 @@ def get_filtered_vacancies(
     return list(result.scalars().all())
 
 
+@timed_query
 def get_total_vacancies_count(
     db: Session,
     query: Optional[str] = None,
@@ -181,6 +338,8 @@ def get_total_vacancies_count(
     salary_min: Optional[int] = None,
     salary_max: Optional[int] = None,
     source: Optional[str] = None,
+    published_from: Optional[datetime] = None,
+    collapse_duplicates: bool = False,
 ) -> int:
     """Возвращает общее количество вакансий, соответствующих заданным фильтрам.
 
@@ -192,15 +351,17 @@ def get_total_vacancies_count(
         salary_min: Минимальная зарплата для фильтрации.
         salary_max: Максимальная зарплата для фильтрации.
         source: Фильтр по источнику вакансии.
+        published_from: Нижняя граница даты публикации.
+        collapse_duplicates: Считать каждую группу почти-дубликатов один раз.
 
     Returns:
         Общее количество подходящих вакансий.
     """
     stmt = select(func.count()).select_from(Vacancy)
-    filters: list[ColumnElement[bool]] = []
+    filters: list[ColumnElement[bool]] = [_is_active()]
 
     if query:
-        stmt = stmt.where(
+        filters.append(
             Vacancy.tsvector_search.match(query, postgresql_regconfig="russian")
         )
 
@@ -210,10 +371,14 @@ def get_total_vacancies_count(
         filters.append(Vacancy.company.ilike(f"%{company}%"))
     if source:
         filters.append(Vacancy.source == source)
+    if published_from is not None:
+        filters.append(Vacancy.published_at >= published_from)
     if salary_min is not None:
         filters.append(Vacancy.salary_max_rub >= salary_min)
     if salary_max is not None:
         filters.append(Vacancy.salary_min_rub <= salary_max)
+    if collapse_duplicates:
+        filters.append(_is_cluster_representative())
 
     for filter_clause in filters:
         stmt = stmt.where(filter_clause)
@@ -224,6 +389,7 @@ def get_total_vacancies_count(
     return count
 
 
+@timed_query
 def get_unique_sources(db: Session) -> List[str]:
     """Возвращает список уникальных источников вакансий.
 
@@ -233,11 +399,14 @@ def get_unique_sources(db: Session) -> List[str]:
     Returns:
         Список строк с названиями источников.
     """
-    stmt = select(Vacancy.source).distinct().order_by(Vacancy.source)
+    stmt = (
+        select(Vacancy.source).distinct().where(_is_active()).order_by(Vacancy.source)
+    )
     result = db.execute(stmt)
     return list(result.scalars().all())
 
 
+@timed_query
 def get_unique_cities(db: Session) -> List[str]:
     """Возвращает список уникальных городов из вакансий.
 
@@ -250,13 +419,48 @@ def get_unique_cities(db: Session) -> List[str]:
     stmt = (
         select(Vacancy.location)
         .distinct()
-        .where(Vacancy.location.isnot(None))
+        .where(Vacancy.location.isnot(None), _is_active())
         .order_by(Vacancy.location)
     )
     result = db.execute(stmt)
     return list(result.scalars().all())
 
 
+@timed_query
+def get_vacancy_by_id(db: Session, vacancy_id: int) -> Optional[Vacancy]:
+    """Возвращает вакансию по id или None, если ее нет.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        vacancy_id: Идентификатор вакансии.
+
+    Returns:
+        Объект Vacancy или None.
+    """
+    return db.execute(
+        select(Vacancy).where(Vacancy.id == vacancy_id)
+    ).scalar_one_or_none()
+
+
+@timed_query
+def get_vacancies_by_ids(db: Session, vacancy_ids: List[int]) -> List[Vacancy]:
+    """Возвращает актуальные вакансии с заданными id в порядке списка.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        vacancy_ids: Идентификаторы вакансий.
+
+    Returns:
+        Список найденных вакансий; устаревшие и отсутствующие пропускаются.
+    """
+    if not vacancy_ids:
+        return []
+    stmt = select(Vacancy).where(Vacancy.id.in_(vacancy_ids), _is_active())
+    by_id = {vacancy.id: vacancy for vacancy in db.execute(stmt).scalars()}
+    return [by_id[vacancy_id] for vacancy_id in vacancy_ids if vacancy_id in by_id]
+
+
+@timed_query
 def get_top_companies_by_vacancies(
     db: Session, limit: int = 10
 ) -> list[dict[str, Any]]:
@@ -272,6 +476,7 @@ def get_top_companies_by_vacancies(
     """
     stmt = (
         select(Vacancy.company, func.count(Vacancy.id).label("vacancy_count"))
+        .where(_is_active())
         .group_by(Vacancy.company)
         .order_by(func.count(Vacancy.id).desc())
         .limit(limit)
@@ -280,6 +485,7 @@ def get_top_companies_by_vacancies(
     return [dict(row) for row in result.mappings()]
 
 
+@timed_query
 def get_average_salary_by_city(db: Session, limit: int = 10) -> list[dict[str, Any]]:
     """Рассчитывает среднюю зарплату и количество вакансий по городам.
 
@@ -301,7 +507,7 @@ def get_average_salary_by_city(db: Session, limit: int = 10) -> list[dict[str, A
             func.round(func.avg(Vacancy.salary_max_rub)).label("avg_max_salary"),
             func.count(Vacancy.id).label("vacancy_count"),
         )
-        .where(Vacancy.salary_min_rub.isnot(None))
+        .where(Vacancy.salary_min_rub.isnot(None), _is_active())
         .group_by(Vacancy.location)
         .order_by(func.count(Vacancy.id).desc())
         .limit(limit)
@@ -309,3 +515,148 @@ def get_average_salary_by_city(db: Session, limit: int = 10) -> list[dict[str, A
     result = db.execute(stmt)
     # Преобразуем результат в список словарей для удобства
     return [dict(row) for row in result.mappings()]
+
+
+@timed_query
+def create_saved_search(
+    db: Session,
+    name: str,
+    query: Optional[str] = None,
+    location: Optional[str] = None,
+    company: Optional[str] = None,
+    salary_min: Optional[int] = None,
+    salary_max: Optional[int] = None,
+    source: Optional[str] = None,
+) -> SavedSearch:
+    """Сохраняет набор фильтров страницы вакансий.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        name: Название поиска.
+        query: Текст для полнотекстового поиска.
+        location: Фильтр по местоположению.
+        company: Фильтр по названию компании.
+        salary_min: Минимальная зарплата.
+        salary_max: Максимальная зарплата.
+        source: Фильтр по источнику.
+
+    Returns:
+        Созданный объект SavedSearch.
+    """
+    search = SavedSearch(
+        name=name,
+        query=query or None,
+        location=location or None,
+        company=company or None,
+        salary_min=salary_min,
+        salary_max=salary_max,
+        source=source or None,
+    )
+    db.add(search)
+    db.commit()
+    return search
+
+
+@timed_query
+def get_saved_searches(db: Session) -> List[SavedSearch]:
+    """Возвращает все сохраненные поиски в порядке создания."""
+    return list(db.execute(select(SavedSearch).order_by(SavedSearch.id)).scalars())
+
+
+@timed_query
+def check_saved_search(
+    db: Session, search_id: int
+) -> Optional[Tuple[SavedSearch, int]]:
+    """Отмечает сохраненный поиск проверенным и сбрасывает счетчик новых вакансий.
+
+    Строка блокируется, чтобы параллельная загрузка вакансий не потеряла
+    приращение счетчика между чтением и сбросом.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        search_id: Идентификатор поиска.
+
+    Returns:
+        Пара (поиск, количество новых вакансий до сброса) или None,
+        если поиска нет.
+    """
+    search = db.execute(
+        select(SavedSearch).where(SavedSearch.id == search_id).with_for_update()
+    ).scalar_one_or_none()
+    if search is None:
+        return None
+    new_count = search.new_count
+    search.new_count = 0
+    search.last_checked_at = datetime.now()
+    db.commit()
+    return search, new_count
+
+
+@timed_query
+def delete_saved_search(db: Session, search_id: int) -> bool:
+    """Удаляет сохраненный поиск.
+
+    Returns:
+        True, если поиск был удален.
+    """
+    search = db.get(SavedSearch, search_id)
+    if search is None:
+        return False
+    db.delete(search)
+    db.commit()
+    return True
+
+
+@timed_query
+def expire_stale_vacancies(
+    db: Session,
+    max_age_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """Помечает устаревшими вакансии, которые парсеры давно не встречали.
+
+    Работает пакетами: каждый пакет выбирает по частичному индексу
+    ix_vacancies_active_last_seen_at не более batch_size идентификаторов и
+    фиксируется отдельной короткой транзакцией, чтобы не держать блокировки
+    на большом числе строк.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        max_age_days: Через сколько дней без появления в выдаче источника
+            вакансия считается закрытой. По умолчанию из настроек.
+        batch_size: Размер пакета. По умолчанию из настроек.
+
+    Returns:
+        Количество вакансий, помеченных устаревшими.
+    """
+    if max_age_days is None:
+        max_age_days = settings.VACANCY_EXPIRY_DAYS
+    if batch_size is None:
+        batch_size = settings.EXPIRY_BATCH_SIZE
+    now = datetime.now()
+    cutoff = now - timedelta(days=max_age_days)
+
+    expired_total = 0
+    while True:
+        ids = list(
+            db.execute(
+                select(Vacancy.id)
+                .where(_is_active(), Vacancy.last_seen_at < cutoff)
+                .limit(batch_size)
+            ).scalars()
+        )
+        if not ids:
+            break
+        expired_clusters = db.scalars(
+            update(Vacancy)
+            .where(Vacancy.id.in_(ids), _is_active())
+            .values(expired_at=now)
+            .returning(Vacancy.duplicate_cluster_id)
+        ).all()
+        # Вместо устаревшего представителя группы отмечается следующий
+        refresh_cluster_representatives(db, expired_clusters)
+        db.commit()
+        expired_total += len(ids)
+        if len(ids) < batch_size:
+            break
+    return expired_total
@@ -0,0 +1,372 @@
+"""Поиск почти-дубликатов вакансий между источниками с помощью MinHash и LSH.
+
+Одна и та же вакансия часто публикуется и на hh.ru, и на superjob.ru с разными
+URL и датами, поэтому уникальные ограничения таблицы ее не ловят. При вставке
+для каждой новой вакансии строится MinHash-сигнатура по нормализованным
+названию, компании и началу описания. Сигнатура режется на полосы (LSH), ключи
+полос хранятся в индексированной таблице vacancy_lsh_bands, поэтому поиск
+кандидатов - это выборка по индексу, не зависящая линейно от размера таблицы.
+Кандидаты проверяются оценкой сходства Жаккара по полным сигнатурам.
+
+Найденная группа записывается в vacancies.duplicate_cluster_id: это id первой
+вакансии группы. Вакансия без дубликатов образует собственную группу.
+Самая свежая актуальная вакансия группы отмечается флагом
+vacancies.is_cluster_representative, поэтому выдача со сверткой дубликатов
+выбирает представителей по частичному индексу, а не ранжирует все
+подходящие строки при каждом запросе. Флаг пересчитывается только для
+групп, в которых появились, устарели или снова стали актуальными вакансии.
+"""
+
+import hashlib
+import re
+import struct
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, cast
+
+from sqlalchemy import Table, bindparam, delete, func, select, update
+from sqlalchemy.orm import Session
+
+from core.models import Vacancy, VacancyLSHBand, VacancySignature
+
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // NUM_BANDS
+# Порог оценки сходства Жаккара, начиная с которого вакансии - дубликаты.
+# При 16 полосах по 4 строки вероятность попасть в кандидаты при J=0.5
+# около 64%, при J=0.7 - более 99%.
+SIMILARITY_THRESHOLD = 0.6
+# Из описания берется только начало: описания на разных площадках
+# расходятся сильнее, чем название и компания.
+DESCRIPTION_TOKENS = 40
+# Длина псевдоосновы: грубо отсекает окончания русских слов
+STEM_LENGTH = 6
+
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r"\w+")
+_SIGNATURE_FORMAT = f"<{NUM_PERMUTATIONS}I"
+_DIGEST_SIZE = struct.calcsize(_SIGNATURE_FORMAT)
+
+
+def normalize_text(value: Optional[str]) -> List[str]:
+    """Приводит текст к списку токенов в нижнем регистре, 'ё' заменяется на 'е'."""
+    if not value:
+        return []
+    return _TOKEN_RE.findall(value.lower().replace("ё", "е"))
+
+
+def stem_tokens(value: Optional[str]) -> List[str]:
+    """Возвращает псевдоосновы токенов текста.
+
+    Токены обрезаются до STEM_LENGTH символов, что приближенно заменяет
+    стемминг; однобуквенные и чисто числовые токены пропускаются.
+    """
+    return [
+        token[:STEM_LENGTH]
+        for token in normalize_text(value)
+        if len(token) > 1 and not token.isdigit()
+    ]
+
+
+def vacancy_features(title: str, company: str, description: Optional[str]) -> Set[str]:
+    """Строит множество признаков вакансии для MinHash.
+
+    Название дает символьные 4-граммы (устойчивы к перестановке слов и
+    мелким различиям в написании), компания - целые токены, описание -
+    пары соседних слов из его начала. Признаки помечены префиксом поля,
+    чтобы слово из названия не совпадало с тем же словом из описания.
+
+    Args:
+        title: Название вакансии.
+        company: Название компании.
+        description: Описание вакансии.
+
+    Returns:
+        Множество строковых признаков.
+    """
+    features: Set[str] = set()
+    title_text = " ".join(normalize_text(title))
+    for start in range(max(1, len(title_text) - 3)):
+        features.add("t:" + title_text[start : start + 4])
+    features.update("c:" + token for token in normalize_text(company))
+    words = normalize_text(description)[:DESCRIPTION_TOKENS]
+    features.update(f"d:{first} {second}" for first, second in zip(words, words[1:]))
+    return features
+
+
+def minhash_signature(features: Iterable[str]) -> Tuple[int, ...]:
+    """Вычисляет MinHash-сигнатуру множества признаков.
+
+    Вместо NUM_PERMUTATIONS отдельных перестановок каждый признак хешируется
+    один раз функцией SHAKE-128, выход которой режется на NUM_PERMUTATIONS
+    независимых 32-битных хешей. Минимумы по позициям считаются через
+    zip/min, поэтому весь цикл выполняется на уровне C.
+
+    Args:
+        features: Признаки объекта.
+
+    Returns:
+        Кортеж из NUM_PERMUTATIONS 32-битных минимальных хешей.
+    """
+    rows = [
+        struct.unpack(
+            _SIGNATURE_FORMAT, hashlib.shake_128(feature.encode()).digest(_DIGEST_SIZE)
+        )
+        for feature in features
+    ]
+    if not rows:
+        return (_MAX_HASH,) * NUM_PERMUTATIONS
+    return tuple(map(min, zip(*rows)))
+
+
+def estimate_similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Оценивает сходство Жаккара по доле совпадающих позиций сигнатур."""
+    matches = sum(1 for x, y in zip(first, second) if x == y)
+    return matches / NUM_PERMUTATIONS
+
+
+def band_keys(signature: Sequence[int]) -> List[int]:
+    """Режет сигнатуру на полосы и возвращает 64-битный ключ каждой полосы.
+
+    Номер полосы входит в хеш, поэтому одинаковые значения в разных полосах
+    дают разные ключи и все ключи можно хранить в одном индексе.
+    """
+    keys = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            struct.pack(f"<I{ROWS_PER_BAND}I", band, *rows), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+def pack_signature(signature: Sequence[int]) -> bytes:
+    """Упаковывает сигнатуру в байты для хранения в БД."""
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data: bytes) -> Tuple[int, ...]:
+    """Распаковывает сигнатуру, сохраненную pack_signature."""
+    return struct.unpack(_SIGNATURE_FORMAT, data)
+
+
+@dataclass
+class _Entry:
+    """Сигнатура вакансии и ее группа."""
+
+    cluster_id: int
+    signature: Tuple[int, ...]
+
+
+class LSHIndex:
+    """LSH-индекс сигнатур в памяти.
+
+    Используется для сопоставления вакансий внутри одного пакета вставки и
+    в бенчмарках; долговременный индекс хранится в таблице vacancy_lsh_bands.
+    """
+
+    def __init__(self) -> None:
+        """Создает пустой индекс."""
+        self._buckets: Dict[int, List[int]] = {}
+        self._entries: Dict[int, _Entry] = {}
+
+    def __len__(self) -> int:
+        """Возвращает количество проиндексированных вакансий."""
+        return len(self._entries)
+
+    def add(self, item_id: int, signature: Tuple[int, ...], cluster_id: int) -> None:
+        """Добавляет сигнатуру в индекс."""
+        self._entries[item_id] = _Entry(cluster_id, signature)
+        for key in band_keys(signature):
+            self._buckets.setdefault(key, []).append(item_id)
+
+    def query(self, signature: Tuple[int, ...]) -> Optional[Tuple[int, float]]:
+        """Находит группу самого похожего кандидата выше порога сходства.
+
+        Returns:
+            Пара (id группы, сходство) или None, если дубликатов нет.
+        """
+        candidates = {
+            item_id
+            for key in band_keys(signature)
+            for item_id in self._buckets.get(key, ())
+        }
+        best: Optional[Tuple[int, float]] = None
+        for item_id in candidates:
+            entry = self._entries[item_id]
+            similarity = estimate_similarity(signature, entry.signature)
+            if similarity >= SIMILARITY_THRESHOLD and (
+                best is None or similarity > best[1]
+            ):
+                best = (entry.cluster_id, similarity)
+        return best
+
+
+@dataclass(frozen=True)
+class InsertedVacancy:
+    """Данные только что вставленной вакансии для обработки после вставки.
+
+    Используются для поиска дубликатов, индекса похожих вакансий и
+    сопоставления с сохраненными поисками.
+    """
+
+    id: int
+    published_at: datetime
+    title: str
+    company: str
+    description: Optional[str]
+    location: Optional[str] = None
+    source: Optional[str] = None
+    salary_min_rub: Optional[int] = None
+    salary_max_rub: Optional[int] = None
+
+
+def _load_candidates(db: Session, keys: Set[int]) -> LSHIndex:
+    """Загружает из БД сигнатуры вакансий, совпавших хотя бы по одной полосе."""
+    index = LSHIndex()
+    if not keys:
+        return index
+    stmt = (
+        select(
+            VacancySignature.vacancy_id,
+            VacancySignature.cluster_id,
+            VacancySignature.signature,
+        )
+        .join(VacancyLSHBand, VacancyLSHBand.vacancy_id == VacancySignature.vacancy_id)
+        .where(VacancyLSHBand.band_key.in_(keys))
+        .distinct()
+    )
+    for vacancy_id, cluster_id, signature in db.execute(stmt):
+        index.add(vacancy_id, unpack_signature(signature), cluster_id)
+    return index
+
+
+def assign_duplicate_clusters(
+    db: Session, vacancies: Sequence[InsertedVacancy]
+) -> Dict[int, int]:
+    """Определяет группы дубликатов для новых вакансий и сохраняет их.
+
+    Кандидаты из БД выбираются одним запросом по ключам полос всех вакансий
+    пакета, вакансии внутри пакета сопоставляются через индекс в памяти.
+    Изменения не фиксируются: транзакцией управляет вызывающий код.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        vacancies: Вставленные вакансии.
+
+    Returns:
+        Словарь id вакансии -> id ее группы.
+    """
+    if not vacancies:
+        return {}
+    signatures = {
+        v.id: minhash_signature(vacancy_features(v.title, v.company, v.description))
+        for v in vacancies
+    }
+    keys = {v.id: band_keys(signatures[v.id]) for v in vacancies}
+    index = _load_candidates(db, {key for ks in keys.values() for key in ks})
+
+    clusters: Dict[int, int] = {}
+    for vacancy in vacancies:
+        match = index.query(signatures[vacancy.id])
+        clusters[vacancy.id] = match[0] if match else vacancy.id
+        index.add(vacancy.id, signatures[vacancy.id], clusters[vacancy.id])
+
+    db.add_all(
+        VacancySignature(
+            vacancy_id=v.id,
+            published_at=v.published_at,
+            cluster_id=clusters[v.id],
+            signature=pack_signature(signatures[v.id]),
+        )
+        for v in vacancies
+    )
+    db.flush()
+    db.add_all(
+        VacancyLSHBand(band_key=key, vacancy_id=v.id)
+        for v in vacancies
+        for key in set(keys[v.id])
+    )
+    # published_at в условии позволяет PostgreSQL сразу выбрать нужную секцию
+    vacancies_table = cast(Table, Vacancy.__table__)
+    db.execute(
+        update(vacancies_table)
+        .where(
+            vacancies_table.c.id == bindparam("vacancy_id"),
+            vacancies_table.c.published_at == bindparam("vacancy_published_at"),
+        )
+        .values(duplicate_cluster_id=bindparam("cluster_id")),
+        [
+            {
+                "vacancy_id": v.id,
+                "vacancy_published_at": v.published_at,
+                "cluster_id": clusters[v.id],
+            }
+            for v in vacancies
+        ],
+    )
+    return clusters
+
+
+def refresh_cluster_representatives(
+    db: Session, cluster_ids: Iterable[Optional[int]]
+) -> None:
+    """Отмечает представителя каждой из групп cluster_ids.
+
+    Представитель - самая свежая актуальная вакансия группы (при равной
+    дате - с большим id). Обновляются только строки, у которых флаг
+    меняется. Изменения не фиксируются: транзакцией управляет вызывающий
+    код.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        cluster_ids: Группы, состав или актуальность вакансий которых
+            изменились; None (вакансия без группы) пропускается.
+    """
+    clusters = {cluster_id for cluster_id in cluster_ids if cluster_id is not None}
+    if not clusters:
+        return
+    in_clusters = Vacancy.duplicate_cluster_id.in_(clusters)
+    ranked = (
+        select(
+            Vacancy.id,
+            func.row_number()
+            .over(
+                partition_by=Vacancy.duplicate_cluster_id,
+                order_by=(Vacancy.published_at.desc(), Vacancy.id.desc()),
+            )
+            .label("position"),
+        )
+        .where(in_clusters, Vacancy.expired_at.is_(None))
+        .subquery()
+    )
+    is_representative = Vacancy.id.in_(
+        select(ranked.c.id).where(ranked.c.position == 1)
+    )
+    db.execute(
+        update(Vacancy)
+        .where(in_clusters, Vacancy.is_cluster_representative != is_representative)
+        .values(is_cluster_representative=is_representative)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def prune_signatures(db: Session, before: datetime) -> int:
+    """Удаляет сигнатуры вакансий, опубликованных раньше before.
+
+    Вызывается вместе с удалением устаревших секций, чтобы LSH-индекс не
+    рос бесконечно. Ключи полос удаляются вместе с сигнатурами.
+
+    Returns:
+        Количество удаленных сигнатур.
+    """
+    old_ids = select(VacancySignature.vacancy_id).where(
+        VacancySignature.published_at < before
+    )
+    db.execute(delete(VacancyLSHBand).where(VacancyLSHBand.vacancy_id.in_(old_ids)))
+    result = db.execute(
+        delete(VacancySignature).where(VacancySignature.published_at < before)
+    )
+    db.commit()
+    return int(getattr(result, "rowcount", 0) or 0)
@@ -0,0 +1,139 @@
+"""Выбор ведущего процесса для периодических задач.
+
+create_app() запускает планировщик в каждом воркере gunicorn и в каждой
+реплике, поэтому без координации каждая задача выполнялась бы столько раз,
+сколько запущено процессов. Ведущим становится процесс, получивший
+сессионную рекомендательную блокировку PostgreSQL (pg_try_advisory_lock)
+на отдельном соединении. Блокировка живет, пока живо соединение: если
+ведущий процесс падает или теряет связь с БД, PostgreSQL снимает ее, и
+следующая попытка другого процесса ее получает.
+
+Периодические задачи оборачиваются leader_only и перед запуском проверяют
+лидерство. На других СУБД (SQLite в тестах) процесс всегда ведущий.
+"""
+
+import functools
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from core.config import settings
+from core.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """Лидерство на основе рекомендательной блокировки PostgreSQL.
+
+    Attributes:
+        lock_key: Ключ рекомендательной блокировки.
+    """
+
+    def __init__(self, db_engine: Engine, lock_key: int) -> None:
+        """Создает объект выбора ведущего; блокировка еще не запрашивается."""
+        self._engine = db_engine
+        self.lock_key = lock_key
+        self._connection: Optional[Connection] = None
+        self._is_leader = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        """Возвращает результат последней проверки лидерства."""
+        return self._is_leader
+
+    def try_acquire(self) -> bool:
+        """Проверяет лидерство и пытается стать ведущим, если им никто не является.
+
+        Ведущий процесс проверяет, что его соединение с блокировкой живо;
+        остальные пытаются получить блокировку без ожидания.
+
+        Returns:
+            True, если процесс - ведущий.
+        """
+        with self._lock:
+            if self._engine.dialect.name != "postgresql":
+                self._is_leader = True
+                return True
+            if self._connection is not None:
+                try:
+                    self._connection.execute(text("SELECT 1"))
+                    return True
+                except Exception as e:
+                    logger.warning("Соединение ведущего процесса потеряно: %s", e)
+                    self._close()
+            try:
+                self._acquire()
+            except Exception as e:
+                logger.error("Не удалось запросить блокировку ведущего: %s", e)
+                self._close()
+            return self._is_leader
+
+    def _acquire(self) -> None:
+        """Запрашивает блокировку на отдельном соединении в режиме autocommit.
+
+        Autocommit не оставляет соединение в состоянии "idle in transaction",
+        а сессионная блокировка не зависит от транзакций.
+        """
+        connection = self._engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        )
+        acquired = connection.execute(
+            text("SELECT pg_try_advisory_lock(:key)"), {"key": self.lock_key}
+        ).scalar()
+        if not acquired:
+            connection.close()
+            return
+        self._connection = connection
+        self._is_leader = True
+        logger.info("Процесс стал ведущим для периодических задач.")
+
+    def release(self) -> None:
+        """Снимает блокировку и закрывает соединение (при остановке процесса)."""
+        with self._lock:
+            if self._connection is not None:
+                try:
+                    self._connection.execute(
+                        text("SELECT pg_advisory_unlock(:key)"), {"key": self.lock_key}
+                    )
+                except Exception as e:
+                    logger.warning("Не удалось снять блокировку ведущего: %s", e)
+            self._close()
+
+    def _close(self) -> None:
+        """Закрывает соединение с блокировкой и сбрасывает лидерство."""
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                logger.debug("Ошибка при закрытии соединения ведущего", exc_info=True)
+        if self._is_leader:
+            logger.info("Процесс перестал быть ведущим.")
+        self._connection = None
+        self._is_leader = False
+
+
+# Глобальный объект выбора ведущего для процесса
+leader_election = LeaderElection(engine, settings.LEADER_LOCK_KEY)
+
+
+def leader_only(func: Callable[..., None]) -> Callable[..., None]:
+    """Оборачивает периодическую задачу так, чтобы ее выполнял только ведущий.
+
+    Лидерство проверяется непосредственно перед запуском, а не только по
+    расписанию, чтобы процесс, потерявший соединение, не выполнил задачу
+    одновременно с новым ведущим.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> None:
+        if not leader_election.try_acquire():
+            logger.debug("Задача %s пропущена: процесс не ведущий.", func.__name__)
+            return
+        func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,274 @@
+"""Метрики Prometheus веб-приложения и сборщика вакансий.
+
+Значения обновляются на горячих путях, и каждое обновление - это запись
+числа в память процесса без обращений к БД и сети:
+
+* время обработки HTTP-запросов по маршрутам (app.create_app);
+* время функций core.database (декоратор timed_query);
+* выданные соединения пула БД, в том числе сверх DB_POOL_SIZE
+  (core.process_metrics.PoolUsageTracker);
+* загруженные страницы, найденные вакансии, ошибки и время запросов
+  парсеров по источникам;
+* размеры и время вставки пакетов вакансий;
+* время выполнения задач планировщика и их пропуски из-за еще не
+  завершившегося предыдущего запуска (JobMetrics).
+
+Процессы gunicorn не разделяют память, поэтому при заданном
+PROMETHEUS_MULTIPROC_DIR каждый процесс пишет значения в собственные файлы
+в этом каталоге (multiprocess-режим prometheus_client), а /metrics
+складывает файлы всех процессов. Каталог очищается при запуске gunicorn, а
+датчики завершившихся процессов удаляются (см. gunicorn.conf.py). Сборщик
+worker.py отдает свои метрики на порту WORKER_METRICS_PORT.
+"""
+
+import os
+import re
+import time
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Optional, Tuple, TypeVar, cast
+
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_SUBMITTED,
+    JobExecutionEvent,
+    JobSubmissionEvent,
+)
+from apscheduler.schedulers.base import BaseScheduler
+
+from core.config import settings
+
+# prometheus_client выбирает хранилище значений при импорте, поэтому каталог
+# из .env передается ему через окружение заранее
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Границы корзин для быстрых операций (запросы к БД и HTTP-запросы)
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+# Границы корзин для задач планировщика, которые длятся до часа
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса.",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения функции core.database.",
+    ["function"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Соединения пула БД, выданные потокам.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Выданные соединения пула БД сверх DB_POOL_SIZE.",
+    multiprocess_mode="livesum",
+)
+PARSER_PAGES = Counter(
+    "parser_pages", "Обработанные страницы выдачи источника.", ["source"]
+)
+PARSER_ITEMS = Counter("parser_items", "Найденные вакансии источника.", ["source"])
+PARSER_ERRORS = Counter(
+    "parser_errors",
+    "Обходы выдачи, прерванные ошибкой запроса после всех повторов.",
+    ["source"],
+)
+PARSER_FETCH_DURATION = Histogram(
+    "parser_fetch_duration_seconds",
+    "Время одной попытки HTTP-запроса к источнику.",
+    ["source"],
+    buckets=LATENCY_BUCKETS,
+)
+INSERT_BATCH_SIZE = Histogram(
+    "vacancy_insert_batch_size",
+    "Количество вакансий в пакете вставки.",
+    buckets=(1, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+INSERT_DURATION = Histogram(
+    "vacancy_insert_duration_seconds",
+    "Время вставки пакета вакансий с группировкой дубликатов и сопоставлением "
+    "с сохраненными поисками.",
+    buckets=LATENCY_BUCKETS,
+)
+JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds",
+    "Время выполнения задачи планировщика.",
+    ["job", "outcome"],
+    buckets=JOB_BUCKETS,
+)
+JOB_RUNNING = Gauge(
+    "scheduler_jobs_running",
+    "Выполняющиеся запуски задачи планировщика.",
+    ["job"],
+    multiprocess_mode="livesum",
+)
+JOB_OVERLAPS = Counter(
+    "scheduler_job_overlaps",
+    "Запуски задачи, пропущенные из-за еще не завершившегося предыдущего.",
+    ["job"],
+)
+
+# Номер в идентификаторе задачи очереди (parse_job_42)
+JOB_NUMBER_RE = re.compile(r"_\d+$")
+
+
+def timed_query(function: F) -> F:
+    """Декоратор, замеряющий время функции в db_query_duration_seconds."""
+    histogram = DB_QUERY_DURATION.labels(function.__name__)
+
+    @wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return cast(F, wrapper)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    """Учитывает обработанный HTTP-запрос.
+
+    Args:
+        method: HTTP-метод.
+        route: Шаблон маршрута (например, /vacancies/<int:vacancy_id>/similar),
+            а не путь запроса, чтобы число рядов метрики было ограничено.
+        status: Код ответа.
+        seconds: Время обработки.
+    """
+    REQUEST_DURATION.labels(method, route, str(status)).observe(seconds)
+
+
+def observe_pool(checked_out: int, overflow: int) -> None:
+    """Обновляет датчики пула соединений БД текущего процесса."""
+    DB_POOL_CHECKED_OUT.set(checked_out)
+    DB_POOL_OVERFLOW.set(overflow)
+
+
+def observe_page(source: str, items: int) -> None:
+    """Учитывает обработанную страницу выдачи источника."""
+    PARSER_PAGES.labels(source).inc()
+    PARSER_ITEMS.labels(source).inc(items)
+
+
+def observe_parser_error(source: str) -> None:
+    """Учитывает обход выдачи, прерванный ошибкой запроса."""
+    PARSER_ERRORS.labels(source).inc()
+
+
+def observe_fetch(source: str, seconds: float) -> None:
+    """Учитывает попытку HTTP-запроса к источнику."""
+    PARSER_FETCH_DURATION.labels(source).observe(seconds)
+
+
+def observe_insert(batch_size: int, seconds: float) -> None:
+    """Учитывает вставку пакета вакансий."""
+    INSERT_BATCH_SIZE.observe(batch_size)
+    INSERT_DURATION.observe(seconds)
+
+
+def job_name(job_id: str) -> str:
+    """Возвращает имя задачи для метки без номера задачи очереди."""
+    return JOB_NUMBER_RE.sub("", job_id)
+
+
+class JobMetrics:
+    """Замеряет задачи планировщика по его событиям.
+
+    Время задачи отсчитывается от запланированного момента запуска до его
+    завершения, то есть включает ожидание свободного потока исполнителя.
+    Пропуск запуска из-за того, что предыдущий еще выполняется
+    (max_instances), считается наложением.
+    """
+
+    def __init__(self) -> None:
+        """Создает счетчики без подписки на планировщик."""
+        self._scheduler: Optional[BaseScheduler] = None
+
+    def attach(self, scheduler: BaseScheduler) -> None:
+        """Подписывается на события планировщика (повторно - без эффекта)."""
+        if self._scheduler is scheduler:
+            return
+        self._scheduler = scheduler
+        scheduler.add_listener(self._on_submitted, EVENT_JOB_SUBMITTED)
+        scheduler.add_listener(self._on_finished, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+        scheduler.add_listener(self._on_skipped, EVENT_JOB_MAX_INSTANCES)
+
+    def _on_submitted(self, event: JobSubmissionEvent) -> None:
+        """Учитывает запуски, переданные исполнителю."""
+        JOB_RUNNING.labels(job_name(event.job_id)).inc(len(event.scheduled_run_times))
+
+    def _on_finished(self, event: JobExecutionEvent) -> None:
+        """Учитывает время завершившегося запуска."""
+        name = job_name(event.job_id)
+        # Событие завершения быстрой задачи может прийти раньше события
+        # передачи, поэтому датчик ненадолго уходит ниже нуля
+        JOB_RUNNING.labels(name).dec()
+        run_time = event.scheduled_run_time
+        seconds = (datetime.now(run_time.tzinfo) - run_time).total_seconds()
+        outcome = "error" if event.exception is not None else "ok"
+        JOB_DURATION.labels(name, outcome).observe(max(seconds, 0.0))
+
+    def _on_skipped(self, event: JobSubmissionEvent) -> None:
+        """Учитывает запуски, пропущенные из-за выполняющегося предыдущего."""
+        JOB_OVERLAPS.labels(job_name(event.job_id)).inc(len(event.scheduled_run_times))
+
+
+job_metrics = JobMetrics()
+
+
+def metrics_registry() -> CollectorRegistry:
+    """Возвращает реестр метрик всех процессов или текущего процесса."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    return registry
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Возвращает метрики в текстовом формате Prometheus и его тип содержимого."""
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int) -> None:
+    """Отдает метрики процесса по HTTP на порту port в фоновом потоке."""
+    start_http_server(port, registry=metrics_registry())
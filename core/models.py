@@ -1,9 +1,20 @@
 """Модели базы данных с использованием ORM SQLAlchemy."""
 
 from datetime import datetime
+from typing import Optional
 
 import sqlalchemy as sa
-from sqlalchemy import DateTime, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
@@ -29,7 +40,14 @@ class Vacancy(Base):
         original_url: Оригинальная ссылка на вакансию
         salary_min_rub: Минимальная зарплата в рублях
         salary_max_rub: Максимальная зарплата в рублях
+        salary_currency: Код валюты зарплаты в источнике
+        salary_min_amount: Минимальная зарплата в валюте источника
+        salary_max_amount: Максимальная зарплата в валюте источника
         tsvector_search: Поле для полнотекстового поиска
+        last_seen_at: Когда вакансия в последний раз встречалась при парсинге
+        expired_at: Когда вакансия помечена устаревшей (мягкое удаление)
+        duplicate_cluster_id: Группа почти-дубликатов (id первой вакансии группы)
+        is_cluster_representative: Самая свежая актуальная вакансия группы
     """
 
     __tablename__ = "vacancies"
@@ -40,26 +58,504 @@ class Vacancy(Base):
     location: Mapped[str] = mapped_column(String(255), nullable=True)
     salary: Mapped[str] = mapped_column(String(255), nullable=True)
     description: Mapped[str] = mapped_column(Text, nullable=True)
-    published_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    published_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
     source: Mapped[str] = mapped_column(String(50), nullable=False)
-    original_url: Mapped[str] = mapped_column(String(512), nullable=False, unique=True)
+    original_url: Mapped[str] = mapped_column(String(512), nullable=False)
 
     # Поля для нормализованной зарплаты в рублях
     salary_min_rub: Mapped[int] = mapped_column(Integer, nullable=True)
     salary_max_rub: Mapped[int] = mapped_column(Integer, nullable=True)
 
+    # Зарплата в валюте источника: по ней рублевые поля пересчитываются
+    # при смене курсов (см. core.currency_rates)
+    salary_currency: Mapped[str] = mapped_column(String(3), nullable=True, index=True)
+    salary_min_amount: Mapped[int] = mapped_column(Integer, nullable=True)
+    salary_max_amount: Mapped[int] = mapped_column(Integer, nullable=True)
+
     # Поле для полнотекстового поиска PostgreSQL
     tsvector_search: Mapped[sa.dialects.postgresql.TSVECTOR] = mapped_column(
         TSVECTOR, nullable=True, index=True
     )
 
-    # Ограничение уникальности для предотвращения дубликатов вакансий
+    # Поля жизненного цикла: вакансии, которые парсеры давно не видели,
+    # помечаются устаревшими и исключаются из выдачи
+    last_seen_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.now, server_default=sa.func.now()
+    )
+    expired_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+    # Группа почти-дубликатов, найденная при вставке (см. core.dedup)
+    duplicate_cluster_id: Mapped[int] = mapped_column(
+        Integer, nullable=True, index=True
+    )
+    # Представитель группы в выдаче со сверткой дубликатов; обновляется при
+    # вставке и при пометке устаревшими (см. refresh_cluster_representatives)
+    is_cluster_representative: Mapped[bool] = mapped_column(
+        sa.Boolean, nullable=False, default=True, server_default=sa.true()
+    )
+
+    # Ограничения уникальности для предотвращения дубликатов вакансий.
+    # В PostgreSQL таблица секционирована по месяцам published_at, поэтому ключ
+    # секционирования входит в каждое уникальное ограничение (и в первичный
+    # ключ, см. миграцию a3c71f2e9d10). В ORM идентичность строки задается
+    # только id, который по-прежнему выдается общей последовательностью.
+    # Уникальность URL во всей таблице обеспечивает VacancyUrl.
     __table_args__ = (
+        UniqueConstraint(
+            "original_url", "published_at", name="vacancies_original_url_key"
+        ),
         UniqueConstraint(
             "title", "company", "published_at", name="_title_company_published_uc"
         ),
+        # Частичные индексы покрывают только актуальные вакансии
+        Index(
+            "ix_vacancies_active_published_at",
+            "published_at",
+            postgresql_where=sa.text("expired_at IS NULL"),
+            sqlite_where=sa.text("expired_at IS NULL"),
+        ),
+        Index(
+            "ix_vacancies_active_last_seen_at",
+            "last_seen_at",
+            postgresql_where=sa.text("expired_at IS NULL"),
+            sqlite_where=sa.text("expired_at IS NULL"),
+        ),
+        # Выдача со сверткой дубликатов
+        Index(
+            "ix_vacancies_active_representative_published_at",
+            "published_at",
+            postgresql_where=sa.text(
+                "expired_at IS NULL AND is_cluster_representative"
+            ),
+            sqlite_where=sa.text("expired_at IS NULL AND is_cluster_representative"),
+        ),
+        {"postgresql_partition_by": "RANGE (published_at)"},
     )
 
     def __repr__(self) -> str:
         """Возвращает строковое представление объекта вакансии."""
         return f"<Vacancy(id={self.id}, title='{self.title}')>"
+
+
+class VacancyUrl(Base):
+    """URL вакансии, уникальный во всей таблице вакансий.
+
+    Уникальные ограничения секционированной таблицы vacancies включают
+    published_at, поэтому вакансия, дата публикации которой изменилась между
+    обходами (например, "вчера" у SuperJob), вставилась бы повторно.
+    Таблица не секционирована: вакансия вставляется, только если ее URL
+    удалось добавить сюда в той же транзакции (см. add_vacancies_from_dto).
+
+    Атрибуты:
+        original_url: Оригинальная ссылка на вакансию
+        published_at: Дата публикации (для очистки вместе со старыми секциями)
+    """
+
+    __tablename__ = "vacancy_urls"
+
+    original_url: Mapped[str] = mapped_column(String(512), primary_key=True)
+    published_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class VacancySignature(Base):
+    """MinHash-сигнатура вакансии для поиска почти-дубликатов.
+
+    Атрибуты:
+        vacancy_id: Идентификатор вакансии
+        published_at: Дата публикации (для очистки вместе со старыми секциями)
+        cluster_id: Группа почти-дубликатов
+        signature: Упакованная MinHash-сигнатура
+    """
+
+    __tablename__ = "vacancy_signatures"
+
+    vacancy_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    published_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    cluster_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    signature: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
+class VacancyLSHBand(Base):
+    """Ключ LSH-полосы сигнатуры вакансии.
+
+    Первичный ключ начинается с band_key, поэтому поиск кандидатов по
+    ключам полос выполняется по индексу. Отдельный индекс по vacancy_id
+    нужен для удаления ключей вместе с сигнатурами.
+
+    Атрибуты:
+        band_key: 64-битный хеш полосы сигнатуры
+        vacancy_id: Идентификатор вакансии
+    """
+
+    __tablename__ = "vacancy_lsh_bands"
+
+    band_key: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    vacancy_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("vacancy_signatures.vacancy_id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+
+
+class SavedSearch(Base):
+    """Сохраненный поиск с набором фильтров страницы вакансий.
+
+    Новые вакансии сопоставляются с сохраненными поисками при вставке
+    (см. core.percolator), поэтому счетчик new_count не требует повторного
+    выполнения запроса.
+
+    Атрибуты:
+        id: Уникальный идентификатор поиска
+        name: Название поиска
+        query: Текст для полнотекстового поиска
+        location: Фильтр по местоположению
+        company: Фильтр по названию компании
+        salary_min: Минимальная зарплата в рублях
+        salary_max: Максимальная зарплата в рублях
+        source: Фильтр по источнику
+        created_at: Дата создания
+        last_checked_at: Когда пользователь последний раз проверял поиск
+        new_count: Количество новых вакансий с последней проверки
+    """
+
+    __tablename__ = "saved_searches"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    query: Mapped[str] = mapped_column(String(255), nullable=True)
+    location: Mapped[str] = mapped_column(String(255), nullable=True)
+    company: Mapped[str] = mapped_column(String(255), nullable=True)
+    salary_min: Mapped[int] = mapped_column(Integer, nullable=True)
+    salary_max: Mapped[int] = mapped_column(Integer, nullable=True)
+    source: Mapped[str] = mapped_column(String(50), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.now, server_default=sa.func.now()
+    )
+    last_checked_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.now, server_default=sa.func.now()
+    )
+    new_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+
+    def __repr__(self) -> str:
+        """Возвращает строковое представление сохраненного поиска."""
+        return f"<SavedSearch(id={self.id}, name='{self.name}')>"
+
+
+class ProcessHeartbeat(Base):
+    """Последний снимок потребления ресурсов процесса приложения.
+
+    Каждый процесс сборщика периодически перезаписывает свою строку, поэтому
+    веб-приложение может показать состояние процессов, к которым у него нет
+    прямого доступа.
+
+    Атрибуты:
+        process_id: Идентификатор процесса в формате "хост:pid"
+        role: Роль процесса ('web' или 'worker')
+        started_at: Время запуска процесса
+        updated_at: Время снимка
+        is_leader: Выполняет ли процесс периодические задачи
+        cpu_user_seconds: Процессорное время в режиме пользователя
+        cpu_system_seconds: Процессорное время в режиме ядра
+        rss_kb: Текущий объем резидентной памяти
+        max_rss_kb: Пиковый объем резидентной памяти
+        threads: Количество потоков
+        db_connections: Количество занятых соединений пула БД
+    """
+
+    __tablename__ = "process_heartbeats"
+
+    process_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    role: Mapped[str] = mapped_column(String(50), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    is_leader: Mapped[bool] = mapped_column(sa.Boolean, nullable=False)
+    cpu_user_seconds: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    cpu_system_seconds: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    rss_kb: Mapped[int] = mapped_column(Integer, nullable=True)
+    max_rss_kb: Mapped[int] = mapped_column(Integer, nullable=False)
+    threads: Mapped[int] = mapped_column(Integer, nullable=False)
+    db_connections: Mapped[int] = mapped_column(Integer, nullable=True)
+
+
+class VacancyDetail(Base):
+    """Полное описание вакансии со страницы деталей источника.
+
+    Служит постоянным кэшем этапа обогащения (см. core.vacancy_details):
+    описание загружается заново, только если вакансия переопубликована.
+
+    Атрибуты:
+        source: Источник вакансии
+        external_id: Идентификатор вакансии в источнике
+        version: Дата публикации в формате ISO, для которой загружено описание
+        description: Текст описания
+        fetched_at: Время загрузки
+    """
+
+    __tablename__ = "vacancy_details"
+
+    source: Mapped[str] = mapped_column(String(50), primary_key=True)
+    external_id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[str] = mapped_column(String(40), nullable=False)
+    description: Mapped[str] = mapped_column(Text, nullable=False)
+    fetched_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.now, server_default=sa.func.now()
+    )
+
+
+class ProxyStat(Base):
+    """Последняя статистика прокси в пуле процесса сборщика.
+
+    Пулы прокси (см. parsers.proxy_pool) живут в памяти процессов, поэтому
+    процессы сохраняют их статистику вместе со снимком ресурсов.
+
+    Атрибуты:
+        process_id: Идентификатор процесса в формате "хост:pid"
+        proxy: Адрес прокси без учетных данных
+        updated_at: Время снимка
+        state: Состояние ('active', 'probing' или 'quarantined')
+        requests: Количество запросов через прокси
+        failures: Количество ошибок
+        success_rate: Сглаженная доля успешных запросов
+        latency_ms: Сглаженная задержка успешных запросов
+        quarantined_until: Время окончания карантина
+    """
+
+    __tablename__ = "proxy_stats"
+
+    process_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    proxy: Mapped[str] = mapped_column(String(512), primary_key=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    state: Mapped[str] = mapped_column(String(20), nullable=False)
+    requests: Mapped[int] = mapped_column(Integer, nullable=False)
+    failures: Mapped[int] = mapped_column(Integer, nullable=False)
+    success_rate: Mapped[float] = mapped_column(sa.Float, nullable=False)
+    latency_ms: Mapped[Optional[float]] = mapped_column(sa.Float, nullable=True)
+    quarantined_until: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True
+    )
+
+
+class ParseJob(Base):
+    """Задача ручного парсинга вакансий в очереди на стороне PostgreSQL.
+
+    Задачи создает веб-приложение, а забирают процессы с планировщиком
+    (см. core.parse_jobs). Для одного запроса в очереди может быть только
+    одна ожидающая задача: повторные запросы объединяются с ней.
+
+    Атрибуты:
+        id: Уникальный идентификатор задачи
+        query: Поисковый запрос
+        status: Состояние ('pending', 'running', 'done' или 'failed')
+        created_at: Время постановки в очередь
+        started_at: Время начала последней попытки
+        finished_at: Время завершения
+        heartbeat_at: Когда выполняющий процесс последний раз подтвердил работу
+        worker_id: Процесс, выполняющий задачу, в формате "хост:pid"
+        attempts: Количество начатых попыток
+        sources_total: Количество источников для обхода
+        sources_done: Количество обойденных источников
+        found_count: Количество найденных вакансий
+        added_count: Количество добавленных вакансий
+        error: Текст ошибки для неудачной задачи
+    """
+
+    __tablename__ = "parse_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    query: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.now, server_default=sa.func.now()
+    )
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    worker_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    sources_total: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    sources_done: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    found_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    added_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_parse_jobs_status_id", "status", "id"),
+        # Гарантирует объединение одинаковых ожидающих запросов
+        Index(
+            "uq_parse_jobs_pending_query",
+            "query",
+            unique=True,
+            postgresql_where=sa.text("status = 'pending'"),
+            sqlite_where=sa.text("status = 'pending'"),
+        ),
+    )
+
+    def __repr__(self) -> str:
+        """Возвращает строковое представление задачи парсинга."""
+        return f"<ParseJob(id={self.id}, query='{self.query}', status={self.status})>"
+
+
+class CrawlUnit(Base):
+    """Единица распределенного обхода: диапазон страниц выдачи источника.
+
+    Ведущий процесс делит обход на единицы, а процессы сборщика на любых
+    узлах берут их в аренду (см. core.crawl_units).
+
+    Атрибуты:
+        id: Уникальный идентификатор единицы
+        source: Источник вакансий
+        query: Поисковый запрос
+        area: Код региона в терминах источника
+        priority: Приоритет записи плана обхода (больше - раньше)
+        run_id: Запуск записи плана обхода, к которому относится единица
+        page_start: Первая страница диапазона (после частичного обхода -
+            первая необработанная)
+        page_end: Последняя страница диапазона
+        status: Состояние ('pending', 'leased', 'done', 'skipped' или 'failed')
+        lease_owner: Процесс, арендовавший единицу, в формате "хост:pid"
+        lease_expires_at: Когда истекает аренда
+        attempts: Количество выданных аренд
+        pages_fetched: Количество загруженных страниц
+        found_count: Количество найденных вакансий
+        added_count: Количество добавленных вакансий
+        cache_requests: Количество запросов через HTTP-кэш
+        cache_hits: Количество ответов из HTTP-кэша
+        cache_bytes_saved: Объем ответов из HTTP-кэша в байтах
+        created_at: Время планирования
+        finished_at: Время завершения
+        error: Текст последней ошибки
+    """
+
+    __tablename__ = "crawl_units"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    source: Mapped[str] = mapped_column(String(50), nullable=False)
+    query: Mapped[str] = mapped_column(String(255), nullable=False)
+    area: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    priority: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    run_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)
+    page_start: Mapped[int] = mapped_column(Integer, nullable=False)
+    page_end: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime, nullable=True
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    pages_fetched: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    found_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    added_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    cache_requests: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    cache_hits: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    cache_bytes_saved: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.now, server_default=sa.func.now()
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_crawl_units_status_id", "status", "id"),
+        Index("ix_crawl_units_source_query", "source", "query"),
+    )
+
+    def __repr__(self) -> str:
+        """Возвращает строковое представление единицы обхода."""
+        return (
+            f"<CrawlUnit(id={self.id}, source='{self.source}', "
+            f"pages={self.page_start}-{self.page_end}, status={self.status})>"
+        )
+
+
+class CrawlRun(Base):
+    """Запуск записи плана обхода и его итоговая статистика.
+
+    Запуск создается, когда ведущий процесс планирует единицы обхода по
+    записи плана (см. core.crawl_plan), и закрывается, когда все его
+    единицы завершены.
+
+    Атрибуты:
+        id: Уникальный идентификатор запуска
+        entry_key: Ключ записи плана "источник|регион|запрос"
+        source: Источник вакансий
+        query: Поисковый запрос
+        area: Код региона в терминах источника
+        priority: Приоритет записи плана
+        planned_at: Время планирования
+        interval: Интервал в секундах, через который запуск был запланирован
+            после предыдущего (адаптивный, см. core.crawl_plan)
+        finished_at: Время завершения последней единицы
+        estimated_pages: Оценка числа запросов, учитываемая в бюджете источника
+        units_total: Количество единиц
+        pages_fetched: Количество загруженных страниц
+        found_count: Количество найденных вакансий
+        added_count: Количество добавленных вакансий
+        cache_requests: Количество запросов через HTTP-кэш
+        cache_hits: Количество ответов из HTTP-кэша
+        cache_bytes_saved: Объем ответов из HTTP-кэша в байтах
+    """
+
+    __tablename__ = "crawl_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    entry_key: Mapped[str] = mapped_column(String(400), nullable=False, index=True)
+    source: Mapped[str] = mapped_column(String(50), nullable=False)
+    query: Mapped[str] = mapped_column(String(255), nullable=False)
+    area: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False)
+    planned_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    interval: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    estimated_pages: Mapped[int] = mapped_column(Integer, nullable=False)
+    units_total: Mapped[int] = mapped_column(Integer, nullable=False)
+    pages_fetched: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    found_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    added_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    cache_requests: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    cache_hits: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    cache_bytes_saved: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
+
+    def __repr__(self) -> str:
+        """Возвращает строковое представление запуска плана обхода."""
+        return f"<CrawlRun(id={self.id}, entry_key='{self.entry_key}')>"
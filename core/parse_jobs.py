@@ -0,0 +1,320 @@
+"""Очередь задач ручного парсинга вакансий в PostgreSQL.
+
+Кнопка "Обновить" на странице вакансий ставит задачу в таблицу parse_jobs
+вместо немедленного запуска обхода в потоке веб-процесса, поэтому задачи
+переживают перезапуск и выполняются процессами сборщика. Очередь
+обеспечивает три свойства:
+
+* Объединение: для запроса в очереди хранится одна ожидающая задача
+  (частичный уникальный индекс uq_parse_jobs_pending_query), повторные
+  нажатия возвращают ее же.
+* Общий лимит параллельности: процессы забирают задачи под
+  транзакционной рекомендательной блокировкой, поэтому подсчет
+  выполняющихся задач и их захват не гоняются между процессами. Сами
+  строки выбираются с FOR UPDATE SKIP LOCKED, чтобы не ждать строк,
+  которые в этот момент возвращаются в очередь.
+* Восстановление: выполняющий процесс регулярно обновляет heartbeat_at;
+  задача упавшего процесса по истечении таймаута возвращается в очередь
+  или, после исчерпания попыток, помечается неудачной.
+
+На SQLite (в тестах) блокировки не используются.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.models import ParseJob
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def normalize_query(query: str) -> str:
+    """Схлопывает пробелы в запросе, чтобы "Python " и "Python" объединялись."""
+    return " ".join(query.split())
+
+
+def enqueue_parse_job(db: Session, query: str) -> Tuple[ParseJob, bool]:
+    """Ставит задачу парсинга в очередь или возвращает ожидающую с тем же запросом.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        query: Поисковый запрос.
+
+    Returns:
+        Пара (задача, True - если задача создана, False - если объединена
+        с уже ожидающей).
+    """
+    query = normalize_query(query)
+    pending = select(ParseJob).where(
+        ParseJob.status == PENDING, ParseJob.query == query
+    )
+    existing = db.execute(pending).scalar_one_or_none()
+    if existing is not None:
+        return existing, False
+
+    job = ParseJob(query=query, status=PENDING)
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Параллельный запрос успел поставить такую же задачу
+        db.rollback()
+        return db.execute(pending).scalar_one(), False
+    return job, True
+
+
+def claim_parse_jobs(
+    db: Session, worker_id: str, concurrency: int, lock_key: int
+) -> List[ParseJob]:
+    """Забирает ожидающие задачи в пределах общего лимита параллельности.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        worker_id: Идентификатор процесса, забирающего задачи.
+        concurrency: Максимальное число задач, выполняемых всеми процессами.
+        lock_key: Ключ рекомендательной блокировки, сериализующей захват.
+
+    Returns:
+        Задачи, переведенные в состояние 'running', в порядке постановки.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Если задачи сейчас забирает другой процесс, попробуем в следующий раз
+        locked = db.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": lock_key}
+        ).scalar()
+        if not locked:
+            db.rollback()
+            return []
+
+    running = db.execute(
+        select(func.count()).select_from(ParseJob).where(ParseJob.status == RUNNING)
+    ).scalar_one()
+    slots = concurrency - running
+    if slots <= 0:
+        db.rollback()
+        return []
+
+    jobs = list(
+        db.execute(
+            select(ParseJob)
+            .where(ParseJob.status == PENDING)
+            .order_by(ParseJob.id)
+            .limit(slots)
+            .with_for_update(skip_locked=True)
+        ).scalars()
+    )
+    now = datetime.now()
+    for job in jobs:
+        job.status = RUNNING
+        job.started_at = now
+        job.heartbeat_at = now
+        job.worker_id = worker_id
+        job.attempts += 1
+        job.sources_done = 0
+        job.found_count = 0
+        job.error = None
+    db.commit()
+    return jobs
+
+
+def _owned_by(worker_id: str) -> Any:
+    """Условие "задача выполняется указанным процессом".
+
+    Процесс, задачу которого уже вернули в очередь и отдали другому, не
+    должен перезаписывать ее состояние.
+    """
+    return (ParseJob.status == RUNNING) & (ParseJob.worker_id == worker_id)
+
+
+def touch_parse_jobs(db: Session, worker_id: str, job_ids: List[int]) -> None:
+    """Подтверждает, что задачи еще выполняются текущим процессом.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        worker_id: Идентификатор текущего процесса.
+        job_ids: Идентификаторы выполняемых задач.
+    """
+    db.execute(
+        update(ParseJob)
+        .where(ParseJob.id.in_(job_ids), _owned_by(worker_id))
+        .values(heartbeat_at=datetime.now())
+    )
+    db.commit()
+
+
+def update_parse_job_progress(
+    db: Session,
+    job_id: int,
+    worker_id: str,
+    sources_total: int,
+    sources_done: int,
+    found_count: int,
+) -> None:
+    """Сохраняет прогресс выполняющейся задачи.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        job_id: Идентификатор задачи.
+        worker_id: Идентификатор текущего процесса.
+        sources_total: Количество источников для обхода.
+        sources_done: Количество обойденных источников.
+        found_count: Количество найденных вакансий.
+    """
+    db.execute(
+        update(ParseJob)
+        .where(ParseJob.id == job_id, _owned_by(worker_id))
+        .values(
+            sources_total=sources_total,
+            sources_done=sources_done,
+            found_count=found_count,
+            heartbeat_at=datetime.now(),
+        )
+    )
+    db.commit()
+
+
+def finish_parse_job(
+    db: Session,
+    job_id: int,
+    worker_id: str,
+    added_count: int = 0,
+    error: Optional[str] = None,
+) -> None:
+    """Завершает задачу успешно или с ошибкой.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        job_id: Идентификатор задачи.
+        worker_id: Идентификатор текущего процесса.
+        added_count: Количество добавленных вакансий.
+        error: Текст ошибки; если задан, задача помечается неудачной.
+    """
+    db.execute(
+        update(ParseJob)
+        .where(ParseJob.id == job_id, _owned_by(worker_id))
+        .values(
+            status=FAILED if error else DONE,
+            finished_at=datetime.now(),
+            added_count=added_count,
+            error=error,
+        )
+    )
+    db.commit()
+
+
+def reclaim_stale_parse_jobs(
+    db: Session, stale_after: timedelta, max_attempts: int
+) -> int:
+    """Возвращает в очередь задачи, выполнявший которые процесс перестал отвечать.
+
+    Задача, исчерпавшая попытки, помечается неудачной. Если тот же запрос
+    уже снова стоит в очереди, зависшая задача закрывается, а работу
+    выполнит ожидающая.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        stale_after: Через сколько после последнего heartbeat_at задача
+            считается брошенной.
+        max_attempts: Максимальное количество попыток.
+
+    Returns:
+        Количество обработанных задач.
+    """
+    stale_jobs = list(
+        db.execute(
+            select(ParseJob)
+            .where(
+                ParseJob.status == RUNNING,
+                ParseJob.heartbeat_at < datetime.now() - stale_after,
+            )
+            .with_for_update(skip_locked=True)
+        ).scalars()
+    )
+    if not stale_jobs:
+        db.rollback()
+        return 0
+
+    pending_ids = dict(
+        db.execute(
+            select(ParseJob.query, ParseJob.id).where(
+                ParseJob.status == PENDING,
+                ParseJob.query.in_([job.query for job in stale_jobs]),
+            )
+        ).all()
+    )
+    now = datetime.now()
+    for job in stale_jobs:
+        pending_id = pending_ids.get(job.query)
+        if job.attempts >= max_attempts:
+            job.status = FAILED
+            job.error = f"Процесс {job.worker_id} перестал отвечать"
+        elif pending_id is not None:
+            job.status = FAILED
+            job.error = f"Прервана; запрос уже стоит в очереди задачей #{pending_id}"
+        else:
+            job.status = PENDING
+            job.worker_id = None
+            pending_ids[job.query] = job.id
+            continue
+        job.finished_at = now
+    db.commit()
+    return len(stale_jobs)
+
+
+def get_parse_job_status(db: Session, job_id: int) -> Optional[Dict[str, Any]]:
+    """Возвращает состояние и прогресс задачи.
+
+    Для ожидающей задачи дополнительно возвращается queue_position -
+    количество задач, стоящих в очереди перед ней.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        job_id: Идентификатор задачи.
+
+    Returns:
+        Словарь с полями задачи или None, если задачи нет.
+    """
+    job = db.get(ParseJob, job_id)
+    if job is None:
+        return None
+    status = parse_job_to_dict(job)
+    if job.status == PENDING:
+        status["queue_position"] = db.execute(
+            select(func.count())
+            .select_from(ParseJob)
+            .where(ParseJob.status == PENDING, ParseJob.id < job.id)
+        ).scalar_one()
+    return status
+
+
+def get_recent_parse_jobs(db: Session, limit: int) -> List[ParseJob]:
+    """Возвращает последние поставленные задачи, начиная с самой новой."""
+    return list(
+        db.execute(select(ParseJob).order_by(ParseJob.id.desc()).limit(limit)).scalars()
+    )
+
+
+def parse_job_to_dict(job: ParseJob) -> Dict[str, Any]:
+    """Преобразует задачу в словарь для JSON-ответа."""
+    return {
+        "id": job.id,
+        "query": job.query,
+        "status": job.status,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "worker_id": job.worker_id,
+        "attempts": job.attempts,
+        "sources_total": job.sources_total,
+        "sources_done": job.sources_done,
+        "found_count": job.found_count,
+        "added_count": job.added_count,
+        "error": job.error,
+    }
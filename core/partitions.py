@@ -0,0 +1,227 @@
+"""Обслуживание помесячных секций таблицы вакансий.
+
+Таблица vacancies в PostgreSQL секционирована по диапазонам published_at
+(см. миграцию a3c71f2e9d10). Модуль заранее создает секции на ближайшие
+месяцы и удаляет (или отсоединяет для архива) секции старше срока хранения.
+Удаление целой секции выполняется за O(1) и не требует DELETE по таблице.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import delete, text
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.models import VacancyUrl
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "vacancies"
+DEFAULT_PARTITION = "vacancies_default"
+PARTITION_NAME_RE = re.compile(r"^vacancies_y(\d{4})m(\d{2})$")
+
+
+@dataclass(frozen=True)
+class MonthPartition:
+    """Описание помесячной секции.
+
+    Attributes:
+        name: Имя таблицы-секции.
+        month: Первое число месяца, который покрывает секция.
+    """
+
+    name: str
+    month: date
+
+    @property
+    def upper_bound(self) -> date:
+        """Возвращает исключающую верхнюю границу диапазона секции."""
+        return add_months(self.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Сдвигает дату на заданное число месяцев, возвращая первое число месяца.
+
+    Args:
+        month: Исходная дата.
+        months: Количество месяцев (может быть отрицательным).
+
+    Returns:
+        Первое число результирующего месяца.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Возвращает имя секции для месяца, например 'vacancies_y2025m07'."""
+    return f"{PARENT_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def parse_partition_name(name: str) -> Optional[MonthPartition]:
+    """Разбирает имя секции. Для секции по умолчанию и чужих таблиц вернет None."""
+    match = PARTITION_NAME_RE.match(name)
+    if not match:
+        return None
+    return MonthPartition(name=name, month=date(int(match[1]), int(match[2]), 1))
+
+
+def retention_cutoff(
+    retention_months: Optional[int] = None, today: Optional[date] = None
+) -> date:
+    """Возвращает границу срока хранения: данные раньше нее устарели.
+
+    Args:
+        retention_months: Срок хранения в месяцах. По умолчанию из настроек.
+        today: Опорная дата (для тестов).
+
+    Returns:
+        Первое число месяца, отстоящего от текущего на retention_months.
+    """
+    if retention_months is None:
+        retention_months = settings.VACANCY_RETENTION_MONTHS
+    return add_months((today or date.today()).replace(day=1), -retention_months)
+
+
+def _is_partitioned(db: Session) -> bool:
+    """Проверяет, что сессия работает с PostgreSQL (секции есть только там)."""
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def list_month_partitions(db: Session) -> List[MonthPartition]:
+    """Возвращает прикрепленные помесячные секции, отсортированные по месяцу.
+
+    Args:
+        db: Сессия SQLAlchemy.
+
+    Returns:
+        Список секций; пустой, если БД не поддерживает секционирование.
+    """
+    if not _is_partitioned(db):
+        return []
+    rows = db.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON pg_inherits.inhparent = parent.oid
+            JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+            WHERE parent.relname = :parent
+            """
+        ),
+        {"parent": PARENT_TABLE},
+    ).scalars()
+    partitions = [p for p in map(parse_partition_name, rows) if p is not None]
+    return sorted(partitions, key=lambda p: p.month)
+
+
+def ensure_month_partitions(
+    db: Session, months_ahead: Optional[int] = None, today: Optional[date] = None
+) -> List[str]:
+    """Создает недостающие секции с текущего месяца на months_ahead вперед.
+
+    Секции создаются заранее, чтобы новые вакансии не попадали в секцию по
+    умолчанию: если в ней уже есть строки из диапазона новой секции,
+    PostgreSQL откажется ее создавать.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        months_ahead: Сколько месяцев вперед покрыть. По умолчанию из настроек.
+        today: Опорная дата (для тестов).
+
+    Returns:
+        Имена созданных секций.
+    """
+    if not _is_partitioned(db):
+        return []
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_PREMAKE_MONTHS
+    current = (today or date.today()).replace(day=1)
+    existing = {p.name for p in list_month_partitions(db)}
+
+    created = []
+    for offset in range(months_ahead + 1):
+        partition = MonthPartition(
+            partition_name(add_months(current, offset)), add_months(current, offset)
+        )
+        if partition.name in existing:
+            continue
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {partition.name} "
+                f"PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{partition.month.isoformat()}') "
+                f"TO ('{partition.upper_bound.isoformat()}')"
+            )
+        )
+        created.append(partition.name)
+    db.commit()
+    for name in created:
+        logger.info("Создана секция %s.", name)
+    return created
+
+
+def drop_expired_partitions(
+    db: Session,
+    retention_months: Optional[int] = None,
+    archive: Optional[bool] = None,
+    today: Optional[date] = None,
+) -> List[str]:
+    """Удаляет или отсоединяет секции, целиком вышедшие за срок хранения.
+
+    Секция устаревает, когда ее верхняя граница не позже начала месяца,
+    отстоящего от текущего на retention_months. Строки старше срока в секции
+    по умолчанию удаляются обычным DELETE (она небольшая).
+
+    Args:
+        db: Сессия SQLAlchemy.
+        retention_months: Срок хранения в месяцах. По умолчанию из настроек.
+        archive: Отсоединять секции вместо удаления, оставляя их таблицами
+            для архивации. По умолчанию из настроек.
+        today: Опорная дата (для тестов).
+
+    Returns:
+        Имена удаленных или отсоединенных секций.
+    """
+    if not _is_partitioned(db):
+        return []
+    if archive is None:
+        archive = settings.ARCHIVE_EXPIRED_PARTITIONS
+    cutoff = retention_cutoff(retention_months, today)
+
+    expired = [p for p in list_month_partitions(db) if p.upper_bound <= cutoff]
+    for partition in expired:
+        if archive:
+            db.execute(
+                text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition.name}")
+            )
+        else:
+            db.execute(text(f"DROP TABLE {partition.name}"))
+    db.execute(
+        text(f"DELETE FROM {DEFAULT_PARTITION} WHERE published_at < :cutoff"),
+        {"cutoff": datetime.combine(cutoff, datetime.min.time())},
+    )
+    db.commit()
+
+    action = "отсоединена" if archive else "удалена"
+    for partition in expired:
+        logger.info("Секция %s %s по сроку хранения.", partition.name, action)
+    return [p.name for p in expired]
+
+
+def prune_vacancy_urls(db: Session, before: datetime) -> int:
+    """Удаляет URL вакансий, опубликованных раньше before.
+
+    Вызывается вместе с удалением устаревших секций: иначе вакансия с тем же
+    URL, снова встреченная после срока хранения, не была бы вставлена.
+
+    Returns:
+        Количество удаленных URL.
+    """
+    result = db.execute(delete(VacancyUrl).where(VacancyUrl.published_at < before))
+    db.commit()
+    return int(getattr(result, "rowcount", 0) or 0)
@@ -0,0 +1,172 @@
+"""Сопоставление новых вакансий с сохраненными поисками (перколятор).
+
+Вместо того чтобы после каждой загрузки выполнять N запросов по всей таблице,
+сохраненные поиски компилируются в предикаты и раскладываются по индексу в
+памяти. Для каждой новой вакансии кандидаты выбираются по ее токенам, и
+проверяются только они, поэтому стоимость пропорциональна числу новых
+вакансий и не зависит от размера таблицы.
+
+Поиск с текстом индексируется по одному "якорному" термину (самой длинной
+основе запроса: длинные основы реже встречаются), поиск без текста - по
+источнику или в общий список. Текстовое условие повторяет семантику
+plainto_tsquery: в названии или описании должны встретиться все основы
+запроса. Стемминг PostgreSQL приближен обрезкой до псевдоосновы, поэтому
+на редких словоформах счетчик может расходиться с выдачей /vacancies.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, cast
+
+from sqlalchemy import Table, bindparam, select, update
+from sqlalchemy.orm import Session
+
+from core.dedup import InsertedVacancy, stem_tokens
+from core.models import SavedSearch
+
+
+@dataclass(frozen=True)
+class SearchPredicate:
+    """Скомпилированные условия сохраненного поиска.
+
+    Attributes:
+        search_id: Идентификатор сохраненного поиска.
+        terms: Основы слов запроса, которые должны встретиться все.
+        location: Подстрока местоположения в нижнем регистре.
+        company: Подстрока названия компании в нижнем регистре.
+        source: Точное значение источника.
+        salary_min: Минимальная зарплата в рублях.
+        salary_max: Максимальная зарплата в рублях.
+    """
+
+    search_id: int
+    terms: FrozenSet[str]
+    location: Optional[str] = None
+    company: Optional[str] = None
+    source: Optional[str] = None
+    salary_min: Optional[int] = None
+    salary_max: Optional[int] = None
+
+    @classmethod
+    def from_saved_search(cls, search: SavedSearch) -> "SearchPredicate":
+        """Компилирует сохраненный поиск в предикат."""
+        return cls(
+            search_id=search.id,
+            terms=frozenset(stem_tokens(search.query)),
+            location=search.location.lower() if search.location else None,
+            company=search.company.lower() if search.company else None,
+            source=search.source or None,
+            salary_min=search.salary_min,
+            salary_max=search.salary_max,
+        )
+
+    def matches(self, vacancy: InsertedVacancy, vacancy_terms: Set[str]) -> bool:
+        """Проверяет вакансию теми же условиями, что и get_filtered_vacancies.
+
+        Args:
+            vacancy: Новая вакансия.
+            vacancy_terms: Основы слов ее названия и описания.
+
+        Returns:
+            True, если вакансия подходит под поиск.
+        """
+        if not self.terms <= vacancy_terms:
+            return False
+        if self.source is not None and vacancy.source != self.source:
+            return False
+        if self.location is not None and (
+            not vacancy.location or self.location not in vacancy.location.lower()
+        ):
+            return False
+        if self.company is not None and self.company not in vacancy.company.lower():
+            return False
+        # Как и в SQL, сравнение с неизвестной зарплатой не выполняется
+        if self.salary_min is not None and (
+            vacancy.salary_max_rub is None or vacancy.salary_max_rub < self.salary_min
+        ):
+            return False
+        if self.salary_max is not None and (
+            vacancy.salary_min_rub is None or vacancy.salary_min_rub > self.salary_max
+        ):
+            return False
+        return True
+
+
+class Percolator:
+    """Индекс сохраненных поисков в памяти."""
+
+    def __init__(self, predicates: Iterable[SearchPredicate]) -> None:
+        """Раскладывает предикаты по якорным терминам и источникам."""
+        self._by_term: Dict[str, List[SearchPredicate]] = {}
+        self._by_source: Dict[Optional[str], List[SearchPredicate]] = {}
+        self._size = 0
+        for predicate in predicates:
+            self._size += 1
+            if predicate.terms:
+                anchor = max(sorted(predicate.terms), key=len)
+                self._by_term.setdefault(anchor, []).append(predicate)
+            else:
+                self._by_source.setdefault(predicate.source, []).append(predicate)
+
+    def __len__(self) -> int:
+        """Возвращает количество проиндексированных поисков."""
+        return self._size
+
+    def match(self, vacancy: InsertedVacancy) -> List[int]:
+        """Возвращает id сохраненных поисков, под которые подходит вакансия."""
+        terms = set(stem_tokens(vacancy.title)) | set(stem_tokens(vacancy.description))
+        candidates: List[SearchPredicate] = []
+        for term in terms:
+            candidates.extend(self._by_term.get(term, ()))
+        candidates.extend(self._by_source.get(None, ()))
+        if vacancy.source is not None:
+            candidates.extend(self._by_source.get(vacancy.source, ()))
+        return [p.search_id for p in candidates if p.matches(vacancy, terms)]
+
+    def count_matches(self, vacancies: Iterable[InsertedVacancy]) -> Dict[int, int]:
+        """Считает количество подходящих вакансий для каждого поиска.
+
+        Returns:
+            Словарь id поиска -> количество новых вакансий (только ненулевые).
+        """
+        counts: Dict[int, int] = {}
+        for vacancy in vacancies:
+            for search_id in self.match(vacancy):
+                counts[search_id] = counts.get(search_id, 0) + 1
+        return counts
+
+
+def percolate_saved_searches(
+    db: Session, vacancies: Sequence[InsertedVacancy]
+) -> Dict[int, int]:
+    """Увеличивает счетчики новых вакансий сохраненных поисков.
+
+    Сохраненные поиски читаются одним запросом, сопоставление выполняется в
+    памяти, счетчики обновляются одним пакетным UPDATE. Изменения не
+    фиксируются: транзакцией управляет вызывающий код.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        vacancies: Только что вставленные вакансии.
+
+    Returns:
+        Словарь id поиска -> количество добавленных к счетчику вакансий.
+    """
+    if not vacancies:
+        return {}
+    searches = db.execute(select(SavedSearch)).scalars()
+    percolator = Percolator(SearchPredicate.from_saved_search(s) for s in searches)
+    if not len(percolator):
+        return {}
+    counts = percolator.count_matches(vacancies)
+    if counts:
+        searches_table = cast(Table, SavedSearch.__table__)
+        db.execute(
+            update(searches_table)
+            .where(searches_table.c.id == bindparam("search_id"))
+            .values(new_count=searches_table.c.new_count + bindparam("added")),
+            [
+                {"search_id": search_id, "added": added}
+                for search_id, added in counts.items()
+            ],
+        )
+    return counts
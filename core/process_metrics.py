@@ -0,0 +1,297 @@
+"""Метрики потребления ресурсов процессов веб-приложения и сборщика.
+
+Веб-приложение и сборщик вакансий (worker.py) работают в разных процессах и
+масштабируются независимо. Каждый процесс может снять собственный снимок
+ресурсов: процессорное время, память, потоки и занятые соединения пула БД.
+Процессы с планировщиком периодически сохраняют снимок в таблицу
+process_heartbeats, а веб-приложение показывает их вместе со своим.
+
+Вместе со снимком процесс сохраняет статистику своего пула прокси
+(таблица proxy_stats), которая иначе видна только внутри процесса.
+
+PoolUsageTracker считает выдачи соединений пула БД и их максимум с
+запуска процесса: по отношению максимума к емкости пула (DB_POOL_SIZE +
+DB_MAX_OVERFLOW) видно, упираются ли потоки процесса в пул. Текущие
+значения он также передает датчикам Prometheus (см. core.metrics).
+
+Используется только стандартная библиотека: текущий RSS читается из
+/proc/self/statm и на системах без procfs не заполняется.
+"""
+
+import os
+import resource
+import socket
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from core.metrics import observe_pool
+from core.models import ProcessHeartbeat, ProxyStat
+from parsers.proxy_pool import ProxySnapshot
+
+# Строки процессов, не обновлявшиеся дольше, удаляются при записи снимка
+HEARTBEAT_RETENTION = timedelta(days=1)
+
+PROCESS_STARTED_AT = datetime.now()
+
+
+@dataclass(frozen=True)
+class ProcessMetrics:
+    """Снимок потребления ресурсов процесса.
+
+    Поля совпадают с колонками ProcessHeartbeat.
+    """
+
+    process_id: str
+    role: str
+    started_at: datetime
+    updated_at: datetime
+    is_leader: bool
+    cpu_user_seconds: float
+    cpu_system_seconds: float
+    rss_kb: Optional[int]
+    max_rss_kb: int
+    threads: int
+    db_connections: Optional[int]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Возвращает снимок в виде словаря для JSON-ответа."""
+        data = asdict(self)
+        data["started_at"] = self.started_at.isoformat()
+        data["updated_at"] = self.updated_at.isoformat()
+        return data
+
+
+def current_process_id() -> str:
+    """Возвращает идентификатор процесса "хост:pid"."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _current_rss_kb() -> Optional[int]:
+    """Читает текущий объем резидентной памяти из procfs."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def collect_process_metrics(
+    role: str, is_leader: bool, db_engine: Optional[Engine] = None
+) -> ProcessMetrics:
+    """Снимает метрики текущего процесса.
+
+    Args:
+        role: Роль процесса ('web' или 'worker').
+        is_leader: Выполняет ли процесс периодические задачи.
+        db_engine: Engine, пул которого нужно учесть.
+
+    Returns:
+        Снимок потребления ресурсов.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    checked_out = getattr(db_engine.pool, "checkedout", None) if db_engine else None
+    return ProcessMetrics(
+        process_id=current_process_id(),
+        role=role,
+        started_at=PROCESS_STARTED_AT,
+        updated_at=datetime.now(),
+        is_leader=is_leader,
+        cpu_user_seconds=round(usage.ru_utime, 3),
+        cpu_system_seconds=round(usage.ru_stime, 3),
+        rss_kb=_current_rss_kb(),
+        # В Linux ru_maxrss измеряется в килобайтах
+        max_rss_kb=int(usage.ru_maxrss),
+        threads=threading.active_count(),
+        db_connections=checked_out() if callable(checked_out) else None,
+    )
+
+
+@dataclass(frozen=True)
+class DbPoolStats:
+    """Снимок использования пула соединений БД процесса.
+
+    Attributes:
+        capacity: Максимум одновременно выданных соединений или None, если
+            пул не ограничен (SQLite в тестах).
+        checked_out: Выдано соединений сейчас.
+        peak_checked_out: Максимум одновременно выданных соединений с
+            запуска процесса.
+        checkouts: Всего выдач соединений с запуска процесса.
+    """
+
+    capacity: Optional[int]
+    checked_out: int
+    peak_checked_out: int
+    checkouts: int
+
+    @property
+    def saturation(self) -> Optional[float]:
+        """Доля емкости пула, занятая в пике, или None без ограничения."""
+        return self.peak_checked_out / self.capacity if self.capacity else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Возвращает снимок в виде словаря для JSON-ответа."""
+        return {**asdict(self), "saturation": self.saturation}
+
+
+class PoolUsageTracker:
+    """Счетчики выдачи соединений пула БД, обновляемые событиями пула."""
+
+    def __init__(self, db_engine: Engine, capacity: Optional[int] = None) -> None:
+        """Подписывается на события пула.
+
+        Args:
+            db_engine: Engine, пул которого нужно отслеживать.
+            capacity: Емкость пула (постоянные соединения и переполнение).
+        """
+        self.capacity = capacity
+        self._pool = db_engine.pool
+        self._lock = threading.Lock()
+        self._checked_out = 0
+        self._peak = 0
+        self._checkouts = 0
+        event.listen(db_engine, "checkout", self._on_checkout)
+        event.listen(db_engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, *args: Any) -> None:
+        """Учитывает выдачу соединения."""
+        with self._lock:
+            self._checked_out += 1
+            self._checkouts += 1
+            self._peak = max(self._peak, self._checked_out)
+            observe_pool(self._checked_out, self._overflow())
+
+    def _on_checkin(self, *args: Any) -> None:
+        """Учитывает возврат соединения."""
+        with self._lock:
+            self._checked_out = max(0, self._checked_out - 1)
+            observe_pool(self._checked_out, self._overflow())
+
+    def _overflow(self) -> int:
+        """Возвращает число выданных соединений сверх постоянных."""
+        if isinstance(self._pool, QueuePool):
+            return max(0, self._checked_out - self._pool.size())
+        return 0
+
+    def snapshot(self) -> DbPoolStats:
+        """Возвращает текущие счетчики."""
+        with self._lock:
+            return DbPoolStats(
+                self.capacity, self._checked_out, self._peak, self._checkouts
+            )
+
+
+def record_heartbeat(db: Session, metrics: ProcessMetrics) -> None:
+    """Сохраняет снимок процесса и удаляет строки давно остановленных процессов.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        metrics: Снимок текущего процесса.
+    """
+    db.merge(ProcessHeartbeat(**asdict(metrics)))
+    db.execute(
+        delete(ProcessHeartbeat).where(
+            ProcessHeartbeat.updated_at < metrics.updated_at - HEARTBEAT_RETENTION
+        )
+    )
+    db.commit()
+
+
+def record_proxy_stats(
+    db: Session, process_id: str, snapshots: List[ProxySnapshot], updated_at: datetime
+) -> None:
+    """Перезаписывает статистику прокси процесса.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        process_id: Идентификатор процесса.
+        snapshots: Статистика прокси пула процесса.
+        updated_at: Время снимка.
+    """
+    db.execute(
+        delete(ProxyStat).where(
+            (ProxyStat.process_id == process_id)
+            | (ProxyStat.updated_at < updated_at - HEARTBEAT_RETENTION)
+        )
+    )
+    db.add_all(
+        ProxyStat(process_id=process_id, updated_at=updated_at, **asdict(snapshot))
+        for snapshot in snapshots
+    )
+    db.commit()
+
+
+def get_proxy_stats(db: Session, max_age_seconds: int) -> List[Dict[str, Any]]:
+    """Возвращает статистику прокси процессов, обновленную не раньше max_age_seconds.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        max_age_seconds: Максимальный возраст статистики.
+
+    Returns:
+        Список словарей для JSON-ответа, отсортированный по прокси и процессу.
+    """
+    threshold = datetime.now() - timedelta(seconds=max_age_seconds)
+    rows = db.execute(
+        select(ProxyStat)
+        .where(ProxyStat.updated_at >= threshold)
+        .order_by(ProxyStat.proxy, ProxyStat.process_id)
+    ).scalars()
+    return [
+        {
+            "process_id": row.process_id,
+            "proxy": row.proxy,
+            "updated_at": row.updated_at.isoformat(),
+            "state": row.state,
+            "requests": row.requests,
+            "failures": row.failures,
+            "success_rate": row.success_rate,
+            "latency_ms": row.latency_ms,
+            "quarantined_until": (
+                row.quarantined_until.isoformat() if row.quarantined_until else None
+            ),
+        }
+        for row in rows
+    ]
+
+
+def get_process_heartbeats(db: Session, max_age_seconds: int) -> List[ProcessMetrics]:
+    """Возвращает снимки процессов, обновленные не раньше max_age_seconds назад.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        max_age_seconds: Максимальный возраст снимка.
+
+    Returns:
+        Снимки процессов, отсортированные по роли и идентификатору.
+    """
+    threshold = datetime.now() - timedelta(seconds=max_age_seconds)
+    rows = db.execute(
+        select(ProcessHeartbeat)
+        .where(ProcessHeartbeat.updated_at >= threshold)
+        .order_by(ProcessHeartbeat.role, ProcessHeartbeat.process_id)
+    ).scalars()
+    return [
+        ProcessMetrics(
+            process_id=row.process_id,
+            role=row.role,
+            started_at=row.started_at,
+            updated_at=row.updated_at,
+            is_leader=row.is_leader,
+            cpu_user_seconds=row.cpu_user_seconds,
+            cpu_system_seconds=row.cpu_system_seconds,
+            rss_kb=row.rss_kb,
+            max_rss_kb=row.max_rss_kb,
+            threads=row.threads,
+            db_connections=row.db_connections,
+        )
+        for row in rows
+    ]
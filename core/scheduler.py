@@ -1,31 +1,88 @@
 """Фоновые задачи и настройки планировщика."""
 
+import atexit
 import logging
-from datetime import datetime
+import threading
+from datetime import datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Set, Type
 
 from core.config import settings
+from core.crawl_plan import (
+    CrawlPlanEntry,
+    close_finished_runs,
+    load_crawl_plan,
+    plan_due_entries,
+    prune_crawl_runs,
+)
+from core.crawl_units import process_crawl_units, prune_crawl_units
+from core.currency_rates import get_rate_provider, renormalize_salaries
 from core.database import (
     add_vacancies_from_dto,
+    engine,
+    expire_stale_vacancies,
     get_db,
-    get_total_vacancies_count,
 )
+from core.dedup import prune_signatures
 from core.extensions import scheduler
+from core.leader import leader_election, leader_only
+from core.metrics import job_metrics
+from core.parse_jobs import (
+    claim_parse_jobs,
+    finish_parse_job,
+    reclaim_stale_parse_jobs,
+    touch_parse_jobs,
+    update_parse_job_progress,
+)
+from core.partitions import (
+    drop_expired_partitions,
+    ensure_month_partitions,
+    prune_vacancy_urls,
+    retention_cutoff,
+)
+from core.process_metrics import (
+    collect_process_metrics,
+    current_process_id,
+    record_heartbeat,
+    record_proxy_stats,
+)
+from core.similarity import rebuild_similarity_index
+from core.vacancy_details import enrich_descriptions
+from parsers.base_parser import BaseParser
+from parsers.dto import VacancyDTO
 from parsers.hh_parser import HHParser
+from parsers.http_client import is_circuit_open
+from parsers.proxy_pool import get_proxy_pool
 from parsers.superjob_parser import SuperJobParser
 
 logger = logging.getLogger(__name__)
 
+# Устанавливается при остановке процесса, чтобы обход не брал новые единицы
+crawl_stop_event = threading.Event()
 
-def update_vacancies(search_query: str) -> None:
-    """Обновляет вакансии в базе данных, запуская все доступные парсеры.
+# Задачи очереди, выполняемые текущим процессом
+_active_parse_jobs: Set[int] = set()
+_active_parse_jobs_lock = threading.Lock()
+
+
+def _parse_sources(
+    search_query: str,
+    on_progress: Optional[Callable[[int, int, int], None]] = None,
+) -> List[VacancyDTO]:
+    """Запускает все доступные парсеры и собирает найденные вакансии.
+
+    Ошибка одного парсера не прерывает обход остальных источников.
 
     Args:
         search_query: Поисковый запрос для сбора вакансий.
+        on_progress: Вызывается после каждого источника с количеством
+            источников, обойденных источников и найденных вакансий.
+
+    Returns:
+        Вакансии со всех источников.
     """
-    logger.info("Запуск задачи обновления вакансий по запросу: '%s'...", search_query)
     parsers = [HHParser, SuperJobParser]
-    all_vacancies_dto = []
-    for parser_class in parsers:
+    all_vacancies_dto: List[VacancyDTO] = []
+    for done, parser_class in enumerate(parsers, start=1):
         try:
             parser = parser_class()
             vacancies_from_parser = parser.parse(search_query)
@@ -37,43 +94,354 @@ def update_vacancies(search_query: str) -> None:
                 e,
                 exc_info=True,
             )
-    if not all_vacancies_dto:
-        logger.info("Новых вакансий по всем источникам не найдено.")
+        if on_progress is not None:
+            on_progress(len(parsers), done, len(all_vacancies_dto))
+    return all_vacancies_dto
+
+
+def source_parsers() -> Dict[str, Type[BaseParser]]:
+    """Возвращает классы парсеров по названию источника."""
+    return {parser.source: parser for parser in (HHParser, SuperJobParser)}
+
+
+def configured_crawl_plan() -> List[CrawlPlanEntry]:
+    """Возвращает записи плана обхода из настроек.
+
+    Raises:
+        ValueError: Если CRAWL_PLAN_JSON некорректен.
+    """
+    return load_crawl_plan(
+        settings.CRAWL_PLAN_JSON,
+        settings.DEFAULT_PARSE_QUERY,
+        settings.SCHEDULER_INTERVAL,
+        source_parsers(),
+        settings.CRAWL_MIN_INTERVAL,
+        settings.CRAWL_MAX_INTERVAL,
+    )
+
+
+def plan_crawl() -> None:
+    """Закрывает завершенные запуски и планирует подошедшие записи плана обхода.
+
+    Сами единицы обходят все процессы с планировщиком (см. crawl_vacancies).
+    """
+    page_ranges = {
+        source: parser.page_range() for source, parser in source_parsers().items()
+    }
+    try:
+        entries = configured_crawl_plan()
+        cutoff = datetime.now() - timedelta(days=settings.CRAWL_UNIT_RETENTION_DAYS)
+        with get_db() as db:
+            close_finished_runs(db)
+            runs = plan_due_entries(
+                db,
+                entries,
+                page_ranges,
+                settings.crawl_source_budgets,
+                settings.CRAWL_PAGES_PER_UNIT,
+                settings.CRAWL_BACKOFF_FACTOR,
+            )
+            for run in runs:
+                logger.info(
+                    "Запланирован обход %s по запросу '%s' (регион %s): "
+                    "единиц %d, интервал %d с.",
+                    run.source,
+                    run.query,
+                    run.area or "по умолчанию",
+                    run.units_total,
+                    run.interval,
+                )
+            prune_crawl_units(db, cutoff)
+            prune_crawl_runs(db, cutoff)
+    except Exception as e:
+        logger.error("Ошибка при планировании обхода: %s", e, exc_info=True)
+
+
+def crawl_vacancies() -> None:
+    """Берет в аренду и обходит единицы, пока очередь не опустеет.
+
+    Единицы отключенных автоматом источников (см. parsers.http_client) не
+    берутся, чтобы не тратить на них попытки.
+    """
+    parsers = {
+        source: parser
+        for source, parser in source_parsers().items()
+        if not is_circuit_open(source)
+    }
+    if not parsers:
         return
+    try:
+        processed = process_crawl_units(
+            parsers,
+            current_process_id(),
+            timedelta(seconds=settings.CRAWL_LEASE_SECONDS),
+            settings.CRAWL_MAX_ATTEMPTS,
+            crawl_stop_event,
+        )
+        if processed:
+            logger.info("Обойдено единиц: %d.", processed)
+    except Exception as e:
+        logger.error("Ошибка при обходе единиц: %s", e, exc_info=True)
+
+
+def run_parse_job(job_id: int, search_query: str) -> None:
+    """Выполняет задачу ручного парсинга из очереди и сохраняет ее прогресс.
+
+    Args:
+        job_id: Идентификатор задачи.
+        search_query: Поисковый запрос задачи.
+    """
+    worker_id = current_process_id()
+
+    def save_progress(total: int, done: int, found: int) -> None:
+        try:
+            with get_db() as db:
+                update_parse_job_progress(db, job_id, worker_id, total, done, found)
+        except Exception as e:
+            # Прогресс нужен только для отображения, обход продолжается
+            logger.warning("Не удалось сохранить прогресс задачи #%d: %s", job_id, e)
+
+    logger.info("Запуск задачи парсинга #%d по запросу: '%s'...", job_id, search_query)
+    added_count = 0
+    error: Optional[str] = None
+    try:
+        all_vacancies_dto = _parse_sources(search_query, save_progress)
+        if all_vacancies_dto:
+            with get_db() as db:
+                if settings.HH_DETAILS_ENABLED:
+                    enrich_descriptions(db, all_vacancies_dto)
+                added_count = add_vacancies_from_dto(db, all_vacancies_dto)
+    except Exception as e:
+        logger.error("Ошибка в задаче парсинга #%d: %s", job_id, e, exc_info=True)
+        error = str(e) or type(e).__name__
     try:
         with get_db() as db:
-            count_before = get_total_vacancies_count(db)
-            add_vacancies_from_dto(db, all_vacancies_dto)
-            count_after = get_total_vacancies_count(db)
-            added_count = count_after - count_before
-            logger.info(
-                "Задача завершена. Всего найдено %d вакансий, добавлено %d новых.",
-                len(all_vacancies_dto),
-                added_count,
+            finish_parse_job(db, job_id, worker_id, added_count, error)
+        logger.info("Задача парсинга #%d завершена, добавлено %d.", job_id, added_count)
+    except Exception as e:
+        # Задача останется в состоянии 'running' и будет возвращена в очередь
+        logger.error("Ошибка при завершении задачи #%d: %s", job_id, e, exc_info=True)
+    finally:
+        with _active_parse_jobs_lock:
+            _active_parse_jobs.discard(job_id)
+
+
+def dispatch_parse_jobs() -> None:
+    """Подтверждает выполняемые задачи очереди и забирает новые.
+
+    Выполняется во всех процессах с планировщиком, а не только в ведущем:
+    общий лимит параллельности обеспечивает сама очередь. Забранные задачи
+    запускаются в пуле потоков планировщика.
+    """
+    worker_id = current_process_id()
+    with _active_parse_jobs_lock:
+        active = sorted(_active_parse_jobs)
+    try:
+        with get_db() as db:
+            if active:
+                touch_parse_jobs(db, worker_id, active)
+            reclaim_stale_parse_jobs(
+                db,
+                timedelta(seconds=settings.PARSE_JOB_STALE_SECONDS),
+                settings.PARSE_JOB_MAX_ATTEMPTS,
             )
+            claimed = [
+                (job.id, job.query)
+                for job in claim_parse_jobs(
+                    db,
+                    worker_id,
+                    settings.PARSE_JOB_CONCURRENCY,
+                    settings.PARSE_JOB_LOCK_KEY,
+                )
+            ]
     except Exception as e:
-        logger.error("Ошибка при сохранении вакансий в БД: %s", e, exc_info=True)
+        logger.error("Ошибка при обработке очереди парсинга: %s", e, exc_info=True)
+        return
+
+    for job_id, query in claimed:
+        with _active_parse_jobs_lock:
+            _active_parse_jobs.add(job_id)
+        scheduler.add_job(
+            run_parse_job,
+            "date",  # Триггер 'date' без run_date означает "запустить немедленно"
+            args=[job_id, query],
+            id=f"parse_job_{job_id}",
+        )
+
 
+def maintain_partitions() -> None:
+    """Создает секции на ближайшие месяцы и удаляет данные старше срока хранения."""
+    try:
+        with get_db() as db:
+            created = ensure_month_partitions(db)
+            dropped = drop_expired_partitions(db)
+            # Сигнатуры почти-дубликатов и URL вакансий живут столько же,
+            # сколько секции
+            cutoff = datetime.combine(retention_cutoff(), time.min)
+            prune_signatures(db, cutoff)
+            prune_vacancy_urls(db, cutoff)
+        logger.info(
+            "Обслуживание секций завершено. Создано: %d, удалено: %d.",
+            len(created),
+            len(dropped),
+        )
+    except Exception as e:
+        logger.error("Ошибка при обслуживании секций: %s", e, exc_info=True)
 
-def start_scheduler() -> None:
-    """Добавляет периодическую задачу и запускает планировщик, если он не запущен.
 
+def expire_vacancies() -> None:
+    """Помечает устаревшими вакансии, которые давно не встречались при парсинге."""
+    try:
+        with get_db() as db:
+            expired_count = expire_stale_vacancies(db)
+        logger.info("Помечено устаревшими вакансий: %d.", expired_count)
+    except Exception as e:
+        logger.error("Ошибка при пометке устаревших вакансий: %s", e, exc_info=True)
+
+
+def renormalize_salary_rates() -> None:
+    """Пересчитывает рублевые зарплаты вакансий по актуальным курсам валют."""
+    try:
+        rates = get_rate_provider().rates()
+        with get_db() as db:
+            updated_count = renormalize_salaries(db, rates)
+        if updated_count:
+            logger.info("Пересчитаны зарплаты вакансий: %d.", updated_count)
+    except Exception as e:
+        logger.error("Ошибка при пересчете зарплат вакансий: %s", e, exc_info=True)
+
+
+def rebuild_similarity() -> None:
+    """Перестраивает индекс похожих вакансий с пересчетом весов IDF."""
+    try:
+        with get_db() as db:
+            rebuild_similarity_index(db)
+    except Exception as e:
+        logger.error(
+            "Ошибка при перестройке индекса похожих вакансий: %s", e, exc_info=True
+        )
+
+
+def check_leadership() -> None:
+    """Подтверждает лидерство или пытается стать ведущим процессом."""
+    leader_election.try_acquire()
+
+
+def record_process_heartbeat(role: str) -> None:
+    """Сохраняет снимок потребления ресурсов текущего процесса.
+
+    Args:
+        role: Роль процесса ('web' или 'worker').
+    """
+    try:
+        metrics = collect_process_metrics(role, leader_election.is_leader, engine)
+        proxy_pool = get_proxy_pool()
+        with get_db() as db:
+            record_heartbeat(db, metrics)
+            if proxy_pool is not None:
+                record_proxy_stats(
+                    db, metrics.process_id, proxy_pool.snapshot(), metrics.updated_at
+                )
+    except Exception as e:
+        logger.error("Ошибка при сохранении метрик процесса: %s", e, exc_info=True)
+
+
+def start_scheduler(role: str = "web") -> None:
+    """Добавляет периодические задачи и запускает планировщик, если он не запущен.
+
+    Планировщик работает во всех процессах, но периодические задачи
+    выполняет только ведущий (см. core.leader); остальные процессы раз в
+    LEADER_CHECK_INTERVAL секунд пытаются перехватить лидерство. Задачи
+    очереди ручного парсинга и единицы распределенного обхода забирают все
+    процессы.
     Интервал и поисковый запрос берутся из настроек приложения.
+
+    Args:
+        role: Роль процесса для метрик: 'web', если планировщик запущен
+            внутри веб-приложения, или 'worker' для отдельного сборщика.
     """
-    if not scheduler.get_job("update_vacancies_job"):
+    if not scheduler.get_job("leader_election_job"):
+        leader_election.try_acquire()
+        atexit.register(leader_election.release)
+        scheduler.add_job(
+            check_leadership,
+            "interval",
+            seconds=settings.LEADER_CHECK_INTERVAL,
+            id="leader_election_job",
+        )
+
+    if not scheduler.get_job("process_heartbeat_job"):
+        scheduler.add_job(
+            record_process_heartbeat,
+            "interval",
+            seconds=settings.HEARTBEAT_INTERVAL,
+            args=[role],
+            id="process_heartbeat_job",
+        )
+
+    if not scheduler.get_job("parse_jobs_job"):
         scheduler.add_job(
-            update_vacancies,
+            dispatch_parse_jobs,
             "interval",
-            seconds=settings.SCHEDULER_INTERVAL,
-            args=[settings.DEFAULT_PARSE_QUERY],  # Используем настройку
-            id="update_vacancies_job",
+            seconds=settings.PARSE_JOB_POLL_INTERVAL,
+            id="parse_jobs_job",
+        )
+
+    if not scheduler.get_job("crawl_units_job"):
+        scheduler.add_job(
+            crawl_vacancies,
+            "interval",
+            seconds=settings.CRAWL_POLL_INTERVAL,
+            id="crawl_units_job",
+        )
+
+    if not scheduler.get_job("crawl_plan_job"):
+        scheduler.add_job(
+            leader_only(plan_crawl),
+            "interval",
+            seconds=settings.CRAWL_PLAN_TICK,
+            id="crawl_plan_job",
         )
         print(
-            f"[{datetime.now()}] Периодическая задача обновления вакансий добавлена. "
-            f"Запрос: '{settings.DEFAULT_PARSE_QUERY}', "
-            f"интервал: {settings.SCHEDULER_INTERVAL} секунд."
+            f"[{datetime.now()}] Периодическая задача планирования обхода добавлена. "
+            f"Интервал проверки плана: {settings.CRAWL_PLAN_TICK} секунд."
+        )
+
+    if not scheduler.get_job("maintain_partitions_job"):
+        scheduler.add_job(
+            leader_only(maintain_partitions),
+            "interval",
+            seconds=settings.MAINTENANCE_INTERVAL,
+            id="maintain_partitions_job",
+        )
+
+    if not scheduler.get_job("expire_vacancies_job"):
+        scheduler.add_job(
+            leader_only(expire_vacancies),
+            "interval",
+            seconds=settings.MAINTENANCE_INTERVAL,
+            id="expire_vacancies_job",
+        )
+
+    if not scheduler.get_job("renormalize_salaries_job"):
+        scheduler.add_job(
+            leader_only(renormalize_salary_rates),
+            "interval",
+            seconds=settings.CURRENCY_RATES_TTL,
+            id="renormalize_salaries_job",
+        )
+
+    if settings.SIMILARITY_INDEX_DIR and not scheduler.get_job(
+        "rebuild_similarity_job"
+    ):
+        scheduler.add_job(
+            leader_only(rebuild_similarity),
+            "interval",
+            seconds=settings.SIMILARITY_REBUILD_INTERVAL,
+            id="rebuild_similarity_job",
         )
 
     if not scheduler.running:
+        job_metrics.attach(scheduler)
         scheduler.start()
         print(f"[{datetime.now()}] Планировщик запущен.")
@@ -0,0 +1,565 @@
+"""Поиск похожих вакансий по предрассчитанному векторному индексу.
+
+Вакансия представляется разреженным TF-IDF вектором над хешированными
+признаками (hashing trick): токены названия и описания обрезаются до
+псевдоосновы и хешируются в пространство из DIMENSION измерений, поэтому
+словарь не нужно хранить и дополнять. Сходство - косинусное.
+
+Индекс хранится как инвертированный список в формате CSC: для каждого
+признака - строки документов и веса. Массивы numpy сохраняются в отдельные
+.npy файлы и открываются через mmap, поэтому загрузка мгновенная, а страницы
+делятся между процессами веб-сервера. Запрос читает только списки
+нескольких самых весомых признаков запроса и только их начало (вхождения
+упорядочены по убыванию веса), а частые признаки (встречаются больше чем в
+MAX_DF_RATIO документов) в индекс не попадают, поэтому время поиска
+ограничено сверху и почти не зависит от размера таблицы.
+
+Индекс состоит из базового сегмента, который полностью перестраивается по
+расписанию, и небольшой дельты: add_vacancies_from_dto дописывает в нее
+новые вакансии с весами IDF базового сегмента.
+
+Раскладка каталога SIMILARITY_INDEX_DIR::
+
+    CURRENT          имя каталога актуальной версии базового сегмента
+    v<timestamp>/    массивы базового сегмента
+    delta.npz        вакансии, добавленные после построения базы
+    index.lock       блокировка чтения-изменения-записи дельты
+
+Дельту дописывают все процессы, вставляющие вакансии, поэтому загрузка,
+дополнение и сохранение дельты выполняются под блокировкой flock файла
+index.lock, а не только под блокировкой потоков процесса: иначе процессы
+перезаписывали бы векторы друг друга.
+"""
+
+import fcntl
+import logging
+import os
+import shutil
+import threading
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.dedup import InsertedVacancy, stem_tokens
+from core.models import Vacancy
+
+logger = logging.getLogger(__name__)
+
+DIMENSION = 1 << 20
+# Вес вхождения токена из названия относительно токена из описания
+TITLE_WEIGHT = 2.0
+# Сколько самых весомых признаков документа попадает в индекс
+MAX_TERMS_PER_DOC = 24
+# Сколько самых весомых признаков запроса участвует в поиске
+MAX_QUERY_TERMS = 16
+# Сколько самых весомых вхождений списка признака читается при поиске
+MAX_POSTINGS_PER_TERM = 10000
+# Признаки, встречающиеся в большей доле документов, не индексируются
+MAX_DF_RATIO = 0.1
+# На маленьких корпусах доля не применяется, чтобы не выбросить все признаки
+MIN_DF_LIMIT = 1000
+
+CURRENT_FILE = "CURRENT"
+DELTA_FILE = "delta.npz"
+LOCK_FILE = "index.lock"
+_SEGMENT_ARRAYS = ("ids", "indptr", "rows", "weights", "idf")
+
+Document = Tuple[int, str, Optional[str]]
+IntArray = npt.NDArray[np.int64]
+FloatArray = npt.NDArray[np.float32]
+
+
+def document_terms(title: str, description: Optional[str]) -> List[Tuple[int, float]]:
+    """Разбивает вакансию на хешированные признаки с частотами.
+
+    Args:
+        title: Название вакансии.
+        description: Описание вакансии.
+
+    Returns:
+        Пары (номер признака, взвешенная частота); токены названия
+        учитываются с весом TITLE_WEIGHT.
+    """
+    counts: dict[int, float] = {}
+    for text, weight in ((title, TITLE_WEIGHT), (description, 1.0)):
+        for stem in stem_tokens(text):
+            feature = zlib.crc32(stem.encode()) & (DIMENSION - 1)
+            counts[feature] = counts.get(feature, 0.0) + weight
+    return list(counts.items())
+
+
+@dataclass
+class _Triplets:
+    """Разреженная матрица документов в координатном формате."""
+
+    ids: IntArray
+    doc_rows: IntArray
+    features: IntArray
+    weights: FloatArray
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document]) -> "_Triplets":
+        """Токенизирует документы; веса - сырые частоты.
+
+        Промежуточные данные копятся в array.array, а не в списках, чтобы
+        построение на миллионе вакансий не требовало гигабайтов памяти.
+        """
+        ids, lengths = array("q"), array("q")
+        features, counts = array("q"), array("f")
+        for vacancy_id, title, description in documents:
+            terms = document_terms(title, description)
+            ids.append(vacancy_id)
+            lengths.append(len(terms))
+            for feature, count in terms:
+                features.append(feature)
+                counts.append(count)
+        id_array = np.frombuffer(ids, dtype=np.int64).copy()
+        return cls(
+            ids=id_array,
+            doc_rows=np.repeat(
+                np.arange(len(id_array), dtype=np.int64),
+                np.frombuffer(lengths, dtype=np.int64),
+            ),
+            features=np.frombuffer(features, dtype=np.int64).copy(),
+            weights=np.frombuffer(counts, dtype=np.float32).copy(),
+        )
+
+    def apply_idf(self, idf: FloatArray, max_terms: int) -> "_Triplets":
+        """Переводит частоты в нормированные TF-IDF веса.
+
+        Признаки с нулевым IDF (слишком частые) отбрасываются, у каждого
+        документа остается не больше max_terms самых весомых признаков.
+        """
+        weights = (1.0 + np.log(self.weights)) * idf[self.features]
+        keep = weights > 0
+        doc_rows, features = self.doc_rows[keep], self.features[keep]
+        weights = weights[keep]
+
+        order = np.lexsort((-weights, doc_rows))
+        doc_rows, features = doc_rows[order], features[order]
+        weights = weights[order]
+        per_doc = np.bincount(doc_rows, minlength=len(self.ids))
+        starts = np.concatenate(([0], np.cumsum(per_doc)[:-1]))
+        keep = np.arange(len(doc_rows)) - starts[doc_rows] < max_terms
+        doc_rows, features = doc_rows[keep], features[keep]
+        weights = weights[keep]
+
+        norms = np.sqrt(
+            np.bincount(doc_rows, weights=weights**2, minlength=len(self.ids))
+        )
+        return _Triplets(
+            ids=self.ids,
+            doc_rows=doc_rows,
+            features=features,
+            weights=(weights / norms[doc_rows]).astype(np.float32),
+        )
+
+
+def compute_idf(triplets: _Triplets) -> FloatArray:
+    """Вычисляет сглаженный IDF; у слишком частых признаков он нулевой."""
+    total = len(triplets.ids)
+    df = np.bincount(triplets.features, minlength=DIMENSION)
+    idf = (np.log((total + 1) / (df + 1)) + 1).astype(np.float32)
+    idf[df > max(MAX_DF_RATIO * total, MIN_DF_LIMIT)] = 0
+    return idf
+
+
+class _Segment:
+    """Инвертированный индекс части документов.
+
+    Attributes:
+        ids: id вакансий по номерам строк.
+        indptr: Границы списков признаков в rows и weights.
+        rows: Номера строк документов, сгруппированные по признакам.
+        weights: Веса признаков в документах.
+    """
+
+    def __init__(
+        self,
+        ids: IntArray,
+        indptr: IntArray,
+        rows: npt.NDArray[np.int32],
+        weights: FloatArray,
+    ) -> None:
+        """Создает сегмент из готовых массивов."""
+        self.ids = ids
+        self.indptr = indptr
+        self.rows = rows
+        self.weights = weights
+
+    @classmethod
+    def from_triplets(cls, triplets: _Triplets) -> "_Segment":
+        """Транспонирует матрицу документов в инвертированные списки.
+
+        Внутри списка вхождения упорядочены по убыванию веса, чтобы при
+        поиске можно было читать только начало длинных списков.
+        """
+        order = np.lexsort((-triplets.weights, triplets.features))
+        indptr = np.zeros(DIMENSION + 1, dtype=np.int64)
+        np.cumsum(np.bincount(triplets.features, minlength=DIMENSION), out=indptr[1:])
+        return cls(
+            ids=triplets.ids,
+            indptr=indptr,
+            rows=triplets.doc_rows[order].astype(np.int32),
+            weights=triplets.weights[order],
+        )
+
+    def top(
+        self,
+        features: IntArray,
+        weights: FloatArray,
+        limit: int,
+        exclude_id: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """Находит документы сегмента с наибольшим скалярным произведением.
+
+        Из каждого списка читается не больше MAX_POSTINGS_PER_TERM самых
+        весомых вхождений, а ранжируются только затронутые строки, поэтому
+        стоимость не растет линейно с размером сегмента.
+
+        Returns:
+            Пары (id вакансии, сходство) по убыванию сходства.
+        """
+        starts = self.indptr[features]
+        ends = np.minimum(self.indptr[features + 1], starts + MAX_POSTINGS_PER_TERM)
+        if not len(self.ids) or not (ends - starts).any():
+            return []
+        rows = np.concatenate([self.rows[s:e] for s, e in zip(starts, ends)])
+        contributions = np.concatenate(
+            [self.weights[s:e] * w for s, e, w in zip(starts, ends, weights)]
+        )
+        scores = np.bincount(rows, weights=contributions, minlength=len(self.ids))
+        candidates = np.flatnonzero(scores)
+        if exclude_id is not None:
+            candidates = candidates[self.ids[candidates] != exclude_id]
+        if len(candidates) > limit:
+            best = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[best]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(self.ids[row]), float(scores[row])) for row in candidates]
+
+
+class SimilarityIndex:
+    """Индекс похожих вакансий: базовый сегмент и дельта.
+
+    Attributes:
+        idf: Веса IDF базового сегмента, применяемые и к дельте.
+    """
+
+    def __init__(
+        self,
+        base: Optional[_Segment] = None,
+        idf: Optional[FloatArray] = None,
+        delta: Optional[_Triplets] = None,
+    ) -> None:
+        """Создает индекс; без базового сегмента IDF всех признаков равен 1."""
+        self._base = base
+        self.idf = idf if idf is not None else np.ones(DIMENSION, dtype=np.float32)
+        self._delta = delta
+        self._delta_segment: Optional[_Segment] = None
+
+    def __len__(self) -> int:
+        """Возвращает количество проиндексированных вакансий."""
+        base = len(self._base.ids) if self._base else 0
+        return base + (len(self._delta.ids) if self._delta else 0)
+
+    @property
+    def max_base_id(self) -> int:
+        """Возвращает наибольший id базового сегмента (0, если его нет)."""
+        if self._base is None or not len(self._base.ids):
+            return 0
+        return int(self._base.ids.max())
+
+    @classmethod
+    def build(cls, documents: Iterable[Document]) -> "SimilarityIndex":
+        """Строит базовый сегмент по документам (id, название, описание)."""
+        triplets = _Triplets.from_documents(documents)
+        idf = compute_idf(triplets)
+        base = _Segment.from_triplets(triplets.apply_idf(idf, MAX_TERMS_PER_DOC))
+        return cls(base=base, idf=idf)
+
+    def add(self, documents: Iterable[Document]) -> int:
+        """Дописывает документы в дельту с текущими весами IDF.
+
+        Returns:
+            Количество добавленных документов.
+        """
+        added = _Triplets.from_documents(documents)
+        if not len(added.ids):
+            return 0
+        added = added.apply_idf(self.idf, MAX_TERMS_PER_DOC)
+        count = len(added.ids)
+        if self._delta is not None:
+            offset = len(self._delta.ids)
+            added = _Triplets(
+                ids=np.concatenate((self._delta.ids, added.ids)),
+                doc_rows=np.concatenate(
+                    (self._delta.doc_rows, added.doc_rows + offset)
+                ),
+                features=np.concatenate((self._delta.features, added.features)),
+                weights=np.concatenate((self._delta.weights, added.weights)),
+            )
+        self._delta = added
+        self._delta_segment = None
+        return count
+
+    def search(
+        self,
+        title: str,
+        description: Optional[str],
+        limit: int = 10,
+        exclude_id: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """Находит вакансии, наиболее похожие на заданный текст.
+
+        Args:
+            title: Название вакансии-образца.
+            description: Описание вакансии-образца.
+            limit: Максимальное количество результатов.
+            exclude_id: id вакансии, которую не нужно возвращать (сам образец).
+
+        Returns:
+            Пары (id вакансии, косинусное сходство) по убыванию сходства.
+        """
+        query = _Triplets.from_documents([(0, title, description)]).apply_idf(
+            self.idf, MAX_QUERY_TERMS
+        )
+        if not len(query.features):
+            return []
+        results: List[Tuple[int, float]] = []
+        for segment in (self._base, self._get_delta_segment()):
+            if segment is not None:
+                results.extend(
+                    segment.top(query.features, query.weights, limit, exclude_id)
+                )
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results[:limit]
+
+    def _get_delta_segment(self) -> Optional[_Segment]:
+        """Лениво строит инвертированные списки дельты."""
+        if self._delta is not None and self._delta_segment is None:
+            self._delta_segment = _Segment.from_triplets(self._delta)
+        return self._delta_segment
+
+    def save_base(self, directory: Path) -> None:
+        """Сохраняет базовый сегмент новой версией и атомарно переключает CURRENT.
+
+        Дельта при этом сокращается до документов новее базового сегмента,
+        а старые версии удаляются.
+        """
+        if self._base is None:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        version = f"v{time.time_ns()}"
+        (directory / version).mkdir()
+        arrays: Dict[str, npt.NDArray[Any]] = {
+            "ids": self._base.ids,
+            "indptr": self._base.indptr,
+            "rows": self._base.rows,
+            "weights": self._base.weights,
+            "idf": self.idf,
+        }
+        for name, values in arrays.items():
+            np.save(directory / version / f"{name}.npy", values)
+        _write_atomic(directory / CURRENT_FILE, version.encode())
+        for old in directory.glob("v*"):
+            if old.is_dir() and old.name != version:
+                shutil.rmtree(old, ignore_errors=True)
+
+    def save_delta(self, directory: Path) -> None:
+        """Атомарно перезаписывает файл дельты."""
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = directory / f"{DELTA_FILE}.tmp"
+        with open(tmp_path, "wb") as file:
+            if self._delta is None:
+                np.savez(file)
+            else:
+                np.savez(
+                    file,
+                    ids=self._delta.ids,
+                    doc_rows=self._delta.doc_rows,
+                    features=self._delta.features,
+                    weights=self._delta.weights,
+                )
+        os.replace(tmp_path, directory / DELTA_FILE)
+
+    def replace_delta(self, previous: "SimilarityIndex") -> None:
+        """Переносит дельту предыдущей версии индекса.
+
+        Из нее убираются документы, уже вошедшие в базовый сегмент.
+        """
+        self._delta = previous._delta
+        self._delta_segment = None
+        if self._delta is None:
+            return
+        keep = self._delta.ids > self.max_base_id
+        rows_keep = keep[self._delta.doc_rows]
+        new_rows = np.cumsum(keep) - 1
+        if not keep.any():
+            self._delta = None
+            return
+        self._delta = _Triplets(
+            ids=self._delta.ids[keep],
+            doc_rows=new_rows[self._delta.doc_rows[rows_keep]],
+            features=self._delta.features[rows_keep],
+            weights=self._delta.weights[rows_keep],
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> "SimilarityIndex":
+        """Загружает индекс из каталога; массивы базы открываются через mmap."""
+        base, idf = None, None
+        current = directory / CURRENT_FILE
+        if current.exists():
+            version = directory / current.read_text().strip()
+            arrays = {
+                name: np.load(version / f"{name}.npy", mmap_mode="r")
+                for name in _SEGMENT_ARRAYS
+            }
+            base = _Segment(
+                arrays["ids"], arrays["indptr"], arrays["rows"], arrays["weights"]
+            )
+            idf = arrays["idf"]
+        delta = None
+        if (directory / DELTA_FILE).exists():
+            with np.load(directory / DELTA_FILE) as data:
+                if "ids" in data:
+                    delta = _Triplets(
+                        ids=data["ids"],
+                        doc_rows=data["doc_rows"],
+                        features=data["features"],
+                        weights=data["weights"],
+                    )
+        return cls(base=base, idf=idf, delta=delta)
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    """Записывает файл через временный файл и os.replace."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(content)
+    os.replace(tmp_path, path)
+
+
+def _index_directory() -> Optional[Path]:
+    """Возвращает каталог индекса из настроек или None, если поиск выключен."""
+    if not settings.SIMILARITY_INDEX_DIR:
+        return None
+    return Path(settings.SIMILARITY_INDEX_DIR)
+
+
+def _file_stamp(path: Path) -> Optional[int]:
+    """Возвращает время изменения файла в наносекундах или None."""
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+_lock = threading.Lock()
+_cached_index: Optional[SimilarityIndex] = None
+_cached_stamp: Optional[Tuple[Optional[int], Optional[int]]] = None
+
+
+@contextmanager
+def _locked_directory(directory: Path) -> Iterator[None]:
+    """Блокирует изменение файлов индекса в каталоге для потоков и процессов."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with _lock, open(directory / LOCK_FILE, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    """Возвращает индекс, перечитывая его при изменении файлов на диске.
+
+    Индекс обновляется другим процессом (планировщиком), поэтому при каждом
+    обращении сравниваются времена изменения CURRENT и дельты.
+
+    Returns:
+        Индекс или None, если поиск выключен или индекс еще не построен.
+    """
+    global _cached_index, _cached_stamp
+    directory = _index_directory()
+    if directory is None:
+        return None
+    stamp = (
+        _file_stamp(directory / CURRENT_FILE),
+        _file_stamp(directory / DELTA_FILE),
+    )
+    if stamp == (None, None):
+        return None
+    with _lock:
+        if _cached_index is None or stamp != _cached_stamp:
+            _cached_index = SimilarityIndex.load(directory)
+            _cached_stamp = stamp
+        return _cached_index
+
+
+def update_similarity_index(vacancies: Sequence[InsertedVacancy]) -> int:
+    """Дописывает новые вакансии в дельту индекса на диске.
+
+    Args:
+        vacancies: Только что вставленные вакансии.
+
+    Returns:
+        Количество добавленных в индекс вакансий.
+    """
+    directory = _index_directory()
+    if directory is None or not vacancies:
+        return 0
+    with _locked_directory(directory):
+        index = SimilarityIndex.load(directory)
+        added = index.add((v.id, v.title, v.description) for v in vacancies)
+        index.save_delta(directory)
+    return added
+
+
+def rebuild_similarity_index(db: Session, batch_size: int = 10000) -> int:
+    """Полностью перестраивает базовый сегмент по актуальным вакансиям.
+
+    Пересчитывает IDF по всему корпусу и переносит дельту в базу. Вакансии,
+    добавленные в дельту во время построения, в ней сохраняются.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        batch_size: Размер порции при потоковом чтении вакансий.
+
+    Returns:
+        Количество вакансий в новом базовом сегменте.
+    """
+    directory = _index_directory()
+    if directory is None:
+        return 0
+    stmt = (
+        select(Vacancy.id, Vacancy.title, Vacancy.description)
+        .where(Vacancy.expired_at.is_(None))
+        .order_by(Vacancy.id)
+        .execution_options(yield_per=batch_size)
+    )
+    started = time.perf_counter()
+    rebuilt = SimilarityIndex.build(
+        (row.id, row.title, row.description) for row in db.execute(stmt)
+    )
+    with _locked_directory(directory):
+        rebuilt.replace_delta(SimilarityIndex.load(directory))
+        rebuilt.save_base(directory)
+        rebuilt.save_delta(directory)
+    logger.info(
+        "Индекс похожих вакансий перестроен: %d вакансий за %.1f с.",
+        len(rebuilt),
+        time.perf_counter() - started,
+    )
+    return len(rebuilt)
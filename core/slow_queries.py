@@ -0,0 +1,265 @@
+"""Журнал медленных SQL-запросов с планами выполнения.
+
+SlowQueryLog подписывается на события курсора engine и замеряет каждый
+запрос. Запросы дольше SLOW_QUERY_THRESHOLD_MS попадают в журнал вместе с
+параметрами, поэтому видно, какое сочетание фильтров выдачи оказалось
+медленным (при SLOW_QUERY_THRESHOLD_MS = 0 запросы не замеряются). Журнал
+хранит SLOW_QUERY_LOG_SIZE самых долгих запросов с запуска процесса или
+очистки: более быстрый запрос вытесняется более медленным.
+
+Для доли SLOW_QUERY_EXPLAIN_SAMPLE_RATE попавших в журнал запросов SELECT
+отдельный поток выполняет EXPLAIN (ANALYZE, BUFFERS) с теми же параметрами
+на собственном соединении, в транзакции только для чтения, которая затем
+откатывается, и не дольше SLOW_QUERY_EXPLAIN_TIMEOUT_MS. Запросы с
+блокировкой строк (FOR UPDATE, FOR SHARE) и с рекомендательными
+блокировками (pg_try_advisory_lock и другие) не повторяются: первые ждали бы
+блокировок рабочих транзакций, а сеансовую рекомендательную блокировку
+откат не снимает, и она осталась бы на соединении пула. Пока план
+строится, следующие запросы не ставятся в очередь на EXPLAIN, поэтому
+обработка запросов его не ждет. Планы строятся только для PostgreSQL.
+
+Журнал ведет каждый процесс отдельно, как и PoolUsageTracker, и
+показывает маршрут /slow-queries.
+"""
+
+import heapq
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+Clock = Callable[[], float]
+
+# Запросы, повтор которых под EXPLAIN ANALYZE берет блокировки
+UNSAFE_TO_EXPLAIN_RE = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b|\bpg_\w*advisory",
+    re.IGNORECASE,
+)
+
+
+def is_explainable(statement: str) -> bool:
+    """Проверяет, можно ли повторить запрос под EXPLAIN ANALYZE.
+
+    Повторяются только запросы SELECT без блокировок строк и без
+    рекомендательных блокировок.
+    """
+    return statement.lstrip()[:6].upper() == "SELECT" and not (
+        UNSAFE_TO_EXPLAIN_RE.search(statement)
+    )
+
+
+def _jsonable(value: Any) -> Any:
+    """Приводит параметр запроса к значению, допустимому в JSON."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+@dataclass
+class SlowQuery:
+    """Медленный запрос из журнала.
+
+    Attributes:
+        statement: Текст запроса с заполнителями параметров.
+        parameters: Параметры запроса.
+        duration_ms: Время выполнения в миллисекундах.
+        captured_at: Время завершения запроса.
+        plan: Строки плана EXPLAIN (ANALYZE, BUFFERS), если он построен.
+        explain_error: Ошибка построения плана, если она была.
+    """
+
+    statement: str
+    parameters: Any
+    duration_ms: float
+    captured_at: datetime
+    plan: Optional[List[str]] = None
+    explain_error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Возвращает запрос в виде словаря для JSON-ответа."""
+        return {
+            "statement": self.statement,
+            "parameters": _jsonable(self.parameters),
+            "duration_ms": round(self.duration_ms, 2),
+            "captured_at": self.captured_at.isoformat(),
+            "plan": self.plan,
+            "explain_error": self.explain_error,
+        }
+
+
+@dataclass(order=True)
+class _Entry:
+    """Элемент кучи журнала: самый быстрый запрос на вершине."""
+
+    duration_ms: float
+    sequence: int
+    query: SlowQuery = field(compare=False)
+
+
+class SlowQueryLog:
+    """Журнал самых долгих запросов engine, обновляемый событиями курсора."""
+
+    def __init__(
+        self,
+        db_engine: Engine,
+        threshold_ms: float,
+        capacity: int = 50,
+        explain_sample_rate: float = 0.0,
+        explain_timeout_ms: int = 30000,
+        clock: Clock = time.perf_counter,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        """Подписывается на события курсора engine.
+
+        Args:
+            db_engine: Engine, запросы которого нужно замерять.
+            threshold_ms: Порог попадания в журнал; 0 отключает журнал.
+            capacity: Количество хранимых запросов.
+            explain_sample_rate: Доля попавших в журнал запросов, для
+                которых строится план.
+            explain_timeout_ms: Ограничение времени построения плана.
+            clock: Источник монотонного времени в секундах.
+            rng: Генератор случайных чисел для выборки запросов.
+        """
+        self.threshold_ms = threshold_ms
+        self.capacity = capacity
+        self.explain_timeout_ms = explain_timeout_ms
+        self._engine = db_engine
+        self._clock = clock
+        self._rng = rng or random.Random()  # nosec B311
+        # Планы строятся только для PostgreSQL
+        self._explain_sample_rate = (
+            explain_sample_rate if db_engine.dialect.name == "postgresql" else 0.0
+        )
+        self._lock = threading.Lock()
+        self._entries: List[_Entry] = []
+        self._sequence = count()
+        self._explain_pending = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Поток построения планов не замеряет собственные запросы
+        self._local = threading.local()
+        if threshold_ms <= 0:
+            return
+        event.listen(db_engine, "before_cursor_execute", self._before_execute)
+        event.listen(db_engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        """Запоминает начало выполнения запроса в его контексте."""
+        context.slow_query_started = self._clock()
+
+    def _after_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        """Добавляет запрос в журнал, если он дольше порога."""
+        started = getattr(context, "slow_query_started", None)
+        if started is None or getattr(self._local, "explaining", False):
+            return
+        duration_ms = (self._clock() - started) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        query = SlowQuery(statement, parameters, duration_ms, datetime.now())
+        with self._lock:
+            entry = _Entry(duration_ms, next(self._sequence), query)
+            if len(self._entries) < self.capacity:
+                heapq.heappush(self._entries, entry)
+            elif self._entries and self._entries[0] < entry:
+                heapq.heapreplace(self._entries, entry)
+            else:
+                return
+            explain = (
+                not executemany
+                and not self._explain_pending
+                and self._rng.random() < self._explain_sample_rate
+                and is_explainable(statement)
+            )
+            if explain:
+                self._explain_pending = True
+        if explain:
+            self._submit_explain(query)
+
+    def _submit_explain(self, query: SlowQuery) -> None:
+        """Передает построение плана фоновому потоку."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="slow-query-explain"
+            )
+        self._executor.submit(self._explain, query)
+
+    def _explain(self, query: SlowQuery) -> None:
+        """Строит план запроса на отдельном соединении и откатывает транзакцию."""
+        self._local.explaining = True
+        try:
+            with self._engine.connect() as conn:
+                # Запрос с побочными эффектами (например, nextval) завершится
+                # ошибкой, а не изменит данные
+                conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                conn.exec_driver_sql(
+                    f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}"
+                )
+                rows = conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {query.statement}", query.parameters
+                ).scalars()
+                plan = [str(row) for row in rows]
+                conn.rollback()
+            with self._lock:
+                query.plan = plan
+        except Exception as e:
+            logger.warning("Не удалось построить план медленного запроса: %s", e)
+            with self._lock:
+                query.explain_error = str(e) or type(e).__name__
+        finally:
+            self._local.explaining = False
+            with self._lock:
+                self._explain_pending = False
+
+    def snapshot(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Возвращает запросы журнала от самого долгого.
+
+        Args:
+            limit: Максимальное количество запросов.
+        """
+        with self._lock:
+            entries = sorted(self._entries, reverse=True)[:limit]
+            return [entry.query.as_dict() for entry in entries]
+
+    def clear(self) -> None:
+        """Очищает журнал."""
+        with self._lock:
+            self._entries.clear()
+
+    def shutdown(self) -> None:
+        """Дожидается построения плана и останавливает фоновый поток."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,184 @@
+"""Обогащение вакансий hh.ru полными описаниями.
+
+Поиск hh.ru отдает только фрагменты требований и обязанностей, поэтому
+полнотекстовый поиск видит малую часть текста вакансии. Этап обогащения
+загружает описания со страниц /vacancies/{id} перед сохранением вакансий:
+
+* Описания хранятся в таблице vacancy_details по идентификатору вакансии и
+  дате ее публикации, поэтому загружаются только новые и переопубликованные
+  вакансии.
+* За один обход загружается не больше HH_DETAILS_BUDGET описаний, начиная
+  с самых свежих вакансий; остальные получат описание в следующих обходах.
+* Запросы выполняются пулом из HH_DETAILS_WORKERS потоков через HTTP-клиент
+  парсера, то есть в пределах лимита частоты запросов к api.hh.ru.
+
+Уже сохраненным вакансиям описание обновляется в таблице vacancies, а
+триггер пересчитывает их вектор полнотекстового поиска.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple, cast
+
+from sqlalchemy import Table, bindparam, select, update
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.models import Vacancy, VacancyDetail
+from parsers.dto import VacancyDTO
+from parsers.hh_parser import HHParser, vacancy_id_from_url
+
+SOURCE = "hh.ru"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DetailsStats:
+    """Итоги этапа обогащения.
+
+    Attributes:
+        cached: Описания, взятые из кэша.
+        fetched: Загруженные описания.
+        failed: Описания, которые не удалось загрузить.
+        deferred: Вакансии, не уместившиеся в бюджет обхода.
+    """
+
+    cached: int = 0
+    fetched: int = 0
+    failed: int = 0
+    deferred: int = 0
+
+
+def enrich_descriptions(
+    db: Session,
+    vacancies: List[VacancyDTO],
+    parser: Optional[HHParser] = None,
+    budget: Optional[int] = None,
+    workers: Optional[int] = None,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> DetailsStats:
+    """Заменяет фрагменты описаний вакансий hh.ru полными описаниями.
+
+    Список вакансий изменяется на месте.
+
+    Args:
+        db: Сессия SQLAlchemy.
+        vacancies: Вакансии перед сохранением.
+        parser: Парсер hh.ru для загрузки описаний.
+        budget: Максимум загружаемых описаний; по умолчанию HH_DETAILS_BUDGET.
+        workers: Размер пула потоков; по умолчанию HH_DETAILS_WORKERS.
+        on_progress: Функция, вызываемая с количеством обработанных
+            вакансий после каждой загрузки описания (см.
+            HHParser.fetch_descriptions).
+
+    Returns:
+        Итоги этапа.
+    """
+    if budget is None:
+        budget = settings.HH_DETAILS_BUDGET
+    if workers is None:
+        workers = settings.HH_DETAILS_WORKERS
+    stats = DetailsStats()
+
+    # Индексы вакансий по идентификатору и версии (дате публикации)
+    targets: Dict[str, Tuple[str, List[int]]] = {}
+    for index, dto in enumerate(vacancies):
+        vacancy_id = vacancy_id_from_url(dto.original_url)
+        if dto.source != SOURCE or vacancy_id is None:
+            continue
+        version = dto.published_at.isoformat()
+        targets.setdefault(vacancy_id, (version, []))[1].append(index)
+    if not targets:
+        return stats
+
+    cached = {
+        row.external_id: row
+        for row in db.execute(
+            select(VacancyDetail).where(
+                VacancyDetail.source == SOURCE,
+                VacancyDetail.external_id.in_(targets),
+            )
+        ).scalars()
+    }
+    descriptions: Dict[str, str] = {}
+    missing = []
+    for vacancy_id, (version, _) in targets.items():
+        row = cached.get(vacancy_id)
+        if row is not None and row.version == version:
+            descriptions[vacancy_id] = row.description
+            stats.cached += 1
+        else:
+            missing.append(vacancy_id)
+
+    missing.sort(key=lambda vacancy_id: targets[vacancy_id][0], reverse=True)
+    stats.deferred = max(0, len(missing) - budget)
+    to_fetch = missing[:budget]
+    fetched: Dict[str, str] = {}
+    if to_fetch:
+        fetched = (parser or HHParser()).fetch_descriptions(
+            to_fetch, workers, on_progress
+        )
+        stats.fetched = len(fetched)
+        stats.failed = len(to_fetch) - len(fetched)
+
+    now = datetime.now()
+    for vacancy_id, text in fetched.items():
+        version = targets[vacancy_id][0]
+        row = cached.get(vacancy_id)
+        if row is None:
+            db.add(
+                VacancyDetail(
+                    source=SOURCE,
+                    external_id=vacancy_id,
+                    version=version,
+                    description=text,
+                    fetched_at=now,
+                )
+            )
+        else:
+            row.version = version
+            row.description = text
+            row.fetched_at = now
+    descriptions.update(fetched)
+
+    updates = []
+    for vacancy_id, text in descriptions.items():
+        if not text:
+            continue
+        for index in targets[vacancy_id][1]:
+            dto = vacancies[index]
+            if dto.description == text:
+                continue
+            vacancies[index] = dto.model_copy(update={"description": text})
+            if vacancy_id in fetched:
+                updates.append(
+                    {
+                        "url": dto.original_url,
+                        "published": dto.published_at,
+                        "text": text,
+                    }
+                )
+    if updates:
+        # Вакансии, сохраненные до загрузки описания, обновляются на месте
+        vacancies_table = cast(Table, Vacancy.__table__)
+        db.execute(
+            update(vacancies_table)
+            .where(
+                vacancies_table.c.original_url == bindparam("url"),
+                vacancies_table.c.published_at == bindparam("published"),
+            )
+            .values(description=bindparam("text")),
+            updates,
+        )
+    db.commit()
+    if stats.fetched or stats.failed or stats.deferred:
+        logger.info(
+            "Описания hh.ru: из кэша %d, загружено %d, ошибок %d, отложено %d.",
+            stats.cached,
+            stats.fetched,
+            stats.failed,
+            stats.deferred,
+        )
+    return stats
@@ -0,0 +1,35 @@
+"""Настройки gunicorn, загружаемые им автоматически из рабочего каталога.
+
+Готовят каталог метрик Prometheus для multiprocess-режима (см. core.metrics):
+при запуске сервера каталог создается и очищается от файлов прошлых
+запусков, а датчики завершившихся процессов удаляются, чтобы не
+учитываться в /metrics.
+"""
+
+import glob
+import os
+from typing import Any
+
+from core.config import settings
+
+
+def on_starting(server: Any) -> None:
+    """Готовит каталог метрик до запуска рабочих процессов."""
+    directory = settings.PROMETHEUS_MULTIPROC_DIR
+    if not directory:
+        return
+    # Рабочие процессы наследуют окружение главного
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", directory)
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+
+
+def child_exit(server: Any, worker: Any) -> None:
+    """Удаляет датчики завершившегося рабочего процесса."""
+    directory = settings.PROMETHEUS_MULTIPROC_DIR
+    if not directory:
+        return
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid, directory)  # type: ignore[no-untyped-call]
@@ -1,13 +1,108 @@
 """Абстрактный базовый класс для всех парсеров."""
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+import requests
 
 from parsers.dto import VacancyDTO
+from parsers.http_cache import CacheStats, normalize_url
+from parsers.http_client import HttpClient
+
+# Вызывается после каждой страницы с количеством обработанных страниц и
+# найденных вакансий
+PageCallback = Callable[[int, int], None]
+
+
+class PageRangeResult(NamedTuple):
+    """Результат обхода диапазона страниц выдачи.
+
+    Attributes:
+        vacancies: Найденные вакансии.
+        pages_fetched: Количество успешно загруженных страниц.
+        exhausted: Выдача закончилась внутри диапазона, следующих страниц нет.
+        failed_page: Страница, на которой обход прервался из-за ошибки
+            запроса, или None.
+        cache_stats: Счетчики HTTP-кэша за обход.
+    """
+
+    vacancies: List[VacancyDTO]
+    pages_fetched: int
+    exhausted: bool
+    failed_page: Optional[int] = None
+    cache_stats: Optional[CacheStats] = None
+
+
+class ParsedPage(NamedTuple):
+    """Результат разбора одной страницы выдачи.
+
+    Attributes:
+        vacancies: Вакансии страницы.
+        last: Страница последняя в выдаче.
+    """
+
+    vacancies: List[VacancyDTO]
+    last: bool
 
 
 class BaseParser(ABC):
-    """Абстрактный базовый класс для всех парсеров."""
+    """Абстрактный базовый класс для всех парсеров.
+
+    Attributes:
+        source: Название источника, совпадающее с VacancyDTO.source.
+        http: HTTP-клиент источника.
+    """
+
+    source: str
+    http: HttpClient
+
+    def _cached_page(self, response: requests.Response) -> Optional[ParsedPage]:
+        """Возвращает сохраненный разбор тела ответа, если оно не изменилось."""
+        cache = self.http.cache
+        if cache is None:
+            return None
+        payload = cache.load_parsed(normalize_url(response.url), response.content)
+        if payload is None:
+            return None
+        self.http.cache_stats.parses_skipped += 1
+        return ParsedPage(
+            [VacancyDTO.model_validate(item) for item in payload["vacancies"]],
+            payload["last"],
+        )
+
+    def _store_page(self, response: requests.Response, page: ParsedPage) -> None:
+        """Сохраняет разбор тела ответа в HTTP-кэше, если он задан."""
+        cache = self.http.cache
+        if cache is None:
+            return
+        cache.store_parsed(
+            normalize_url(response.url),
+            response.content,
+            {
+                "vacancies": [dto.model_dump(mode="json") for dto in page.vacancies],
+                "last": page.last,
+            },
+        )
+
+    def _parse_response(
+        self,
+        response: requests.Response,
+        parse: Callable[[requests.Response], ParsedPage],
+    ) -> ParsedPage:
+        """Разбирает страницу выдачи, используя сохраненный разбор того же тела.
+
+        Args:
+            response: Ответ с телом страницы.
+            parse: Разбирает тело ответа.
+
+        Returns:
+            Вакансии страницы и признак последней страницы.
+        """
+        page = self._cached_page(response)
+        if page is None:
+            page = parse(response)
+            self._store_page(response, page)
+        return page
 
     @abstractmethod
     def parse(self, search_query: str) -> List[VacancyDTO]:
@@ -20,3 +115,36 @@ class BaseParser(ABC):
             Список объектов VacancyDTO.
         """
         raise NotImplementedError
+
+    @classmethod
+    @abstractmethod
+    def page_range(cls) -> Tuple[int, int]:
+        """Возвращает номера первой и последней доступной страницы выдачи."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def parse_pages(
+        self,
+        search_query: str,
+        first_page: int,
+        last_page: int,
+        on_page: Optional[PageCallback] = None,
+        area: Optional[str] = None,
+    ) -> PageRangeResult:
+        """Обходит страницы выдачи с first_page по last_page включительно.
+
+        Используется для распределенного обхода, в котором выдача делится
+        на диапазоны страниц между процессами (см. core.crawl_units).
+
+        Args:
+            search_query: Поисковый запрос.
+            first_page: Номер первой страницы.
+            last_page: Номер последней страницы.
+            on_page: Функция, вызываемая после каждой загруженной страницы.
+            area: Код региона в терминах источника или None для региона
+                по умолчанию.
+
+        Returns:
+            Вакансии и состояние обхода диапазона.
+        """
+        raise NotImplementedError
@@ -0,0 +1,104 @@
+"""Разбор дат публикации на русском языке ("сегодня", "вчера", "19 июля").
+
+Относительные даты разрешаются от момента отсчета, общего для всего обхода:
+иначе "сегодня" у карточек одной выдачи получало бы разное время. Момент
+отсчета обхода - полночь текущего дня (today_reference), поэтому вакансия,
+встреченная повторно в другом обходе того же дня, получает то же значение
+published_at, по которому определяются дубликаты. Результаты для
+одинаковых строк запоминаются.
+"""
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Optional
+
+MONTHS = {
+    "января": 1,
+    "февраля": 2,
+    "марта": 3,
+    "апреля": 4,
+    "мая": 5,
+    "июня": 6,
+    "июля": 7,
+    "августа": 8,
+    "сентября": 9,
+    "октября": 10,
+    "ноября": 11,
+    "декабря": 12,
+}
+# Дата без года может быть на день впереди часов сборщика из-за разницы
+# часовых поясов; более поздняя дата относится к прошлому году
+FUTURE_TOLERANCE = timedelta(days=1)
+DEFAULT_CACHE_SIZE = 1024
+
+
+def today_reference() -> datetime:
+    """Возвращает момент отсчета обхода: полночь текущего дня."""
+    return datetime.combine(date.today(), time.min)
+
+
+class RussianDateResolver:
+    """Преобразует даты публикации в datetime относительно момента отсчета."""
+
+    def __init__(
+        self,
+        reference: Optional[datetime] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        """Создает разборщик дат.
+
+        Args:
+            reference: Момент отсчета для "сегодня" и "вчера"; по умолчанию
+                полночь текущего дня.
+            cache_size: Количество запоминаемых результатов.
+        """
+        self.reference = reference or today_reference()
+        self._resolve_cached = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _resolve(self, date_str: str) -> datetime:
+        """Разбирает дату без учета запомненных результатов."""
+        date_str = date_str.strip().lower()
+        if "сегодня" in date_str:
+            return self.reference
+        if "вчера" in date_str:
+            return self.reference - timedelta(days=1)
+
+        # Формат "19 июля" или "19 июля 2024"
+        parts = date_str.split()
+        if len(parts) >= 2 and parts[0].isdigit() and parts[1] in MONTHS:
+            day = int(parts[0])
+            month = MONTHS[parts[1]]
+            explicit_year = len(parts) >= 3 and parts[2].isdigit()
+            year = int(parts[2]) if explicit_year else self.reference.year
+            try:
+                resolved = datetime(year, month, day)
+                if not explicit_year and resolved > self.reference + FUTURE_TOLERANCE:
+                    # "31 декабря" в январе - дата прошлого года
+                    resolved = datetime(year - 1, month, day)
+            except ValueError:
+                # Несуществующая дата, например "29 февраля" не в високосный год
+                return self.reference
+            return resolved
+
+        return self.reference  # Момент отсчета, если формат не распознан
+
+    def resolve(self, date_str: str) -> datetime:
+        """Возвращает дату публикации для строки с сайта.
+
+        Args:
+            date_str: Строка даты, например "Сегодня" или "19 июля".
+
+        Returns:
+            Дата публикации; момент отсчета, если формат не распознан.
+        """
+        return self._resolve_cached(date_str)
+
+
+@lru_cache(maxsize=4)
+def get_date_resolver(reference: datetime) -> RussianDateResolver:
+    """Возвращает разборщик дат для момента отсчета обхода.
+
+    Процессы пула разбора получают момент отсчета вместе со страницей и
+    используют один разборщик на обход.
+    """
+    return RussianDateResolver(reference)
@@ -21,3 +21,8 @@ class VacancyDTO(BaseModel):
     # Эти поля теперь будут заполняться напрямую парсерами
     salary_min_rub: Optional[int] = None
     salary_max_rub: Optional[int] = None
+
+    # Зарплата в валюте источника для пересчета при смене курсов
+    salary_currency: Optional[str] = None
+    salary_min_amount: Optional[int] = None
+    salary_max_amount: Optional[int] = None
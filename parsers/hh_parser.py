@@ -1,31 +1,60 @@
 """Парсер для hh.ru с использованием их официального API."""
 
 import logging
-import time
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
+from bs4 import BeautifulSoup
 from requests import Session
 
-from parsers.base_parser import BaseParser
+from core.metrics import observe_page, observe_parser_error
+from parsers.base_parser import BaseParser, PageCallback, PageRangeResult, ParsedPage
 from parsers.dto import VacancyDTO
+from parsers.http_cache import get_http_cache
+from parsers.http_client import HttpClient
+from parsers.http_recording import get_http_recorder
+from parsers.salary import Salary, SalaryNormalizer, get_salary_normalizer
 
 HH_API_URL = "https://api.hh.ru/vacancies"
-REQUEST_DELAY = 0.5  # Задержка между запросами
+DEFAULT_AREA = "1"  # Москва
+MAX_PAGES = 40  # API отдает не больше 2000 вакансий по запросу (40 страниц по 50)
 USER_AGENT = "JobVacancyExplorer/1.0 (https://github.com/Relayn/job-vacancy-explorer)"
+VACANCY_ID_RE = re.compile(r"/vacancy/(\d+)")
 logger = logging.getLogger(__name__)
 
 
+def vacancy_id_from_url(url: str) -> Optional[str]:
+    """Извлекает идентификатор вакансии hh.ru из ее адреса."""
+    match = VACANCY_ID_RE.search(url)
+    return match.group(1) if match else None
+
+
 class HHParser(BaseParser):
     """Парсер для сайта hh.ru, использующий их официальное API."""
 
-    def __init__(self) -> None:
-        """Инициализирует сессию requests."""
+    source = "hh.ru"
+
+    def __init__(self, api_url: str = HH_API_URL) -> None:
+        """Инициализирует сессию requests и HTTP-клиент источника.
+
+        Args:
+            api_url: Адрес API поиска вакансий (заменяется в бенчмарках).
+        """
+        self.api_url = api_url
         self.session: Session = requests.Session()
         self.session.headers.update(
             {"User-Agent": USER_AGENT, "Accept": "application/json"}
         )
+        self.http = HttpClient(
+            self.source,
+            self.session,
+            cache=get_http_cache(),
+            recorder=get_http_recorder(),
+        )
 
     def __del__(self) -> None:
         """Закрывает сессию requests при уничтожении объекта."""
@@ -63,13 +92,28 @@ class HHParser(BaseParser):
         )
         return f"{requirement}\n{responsibility}".strip()
 
-    def _parse_api_item(self, item: Dict[str, Any]) -> Optional[VacancyDTO]:
-        """Парсит один элемент из ответа API в VacancyDTO с защитой от ошибок."""
+    def _parse_api_item(
+        self, item: Dict[str, Any], salaries: Optional[SalaryNormalizer] = None
+    ) -> Optional[VacancyDTO]:
+        """Парсит один элемент из ответа API в VacancyDTO с защитой от ошибок.
+
+        API отдает границы зарплаты в валюте вакансии; в рубли они
+        пересчитываются нормализатором salaries (по умолчанию - общим
+        нормализатором процесса).
+        """
         try:
             # Безопасный доступ к вложенным данным с помощью .get()
             employer = item.get("employer") or {}
             area = item.get("area") or {}
             salary_data = item.get("salary")
+            if salary_data:
+                salary = (salaries or get_salary_normalizer()).convert(
+                    salary_data.get("from"),
+                    salary_data.get("to"),
+                    salary_data.get("currency"),
+                )
+            else:
+                salary = Salary()
 
             return VacancyDTO(
                 title=item["name"],  # Название - единственное обязательное поле
@@ -80,8 +124,11 @@ class HHParser(BaseParser):
                 published_at=datetime.fromisoformat(item["published_at"]),
                 source="hh.ru",
                 original_url=item["alternate_url"],
-                salary_min_rub=salary_data.get("from") if salary_data else None,
-                salary_max_rub=salary_data.get("to") if salary_data else None,
+                salary_min_rub=salary.min_rub,
+                salary_max_rub=salary.max_rub,
+                salary_currency=salary.currency,
+                salary_min_amount=salary.min_amount,
+                salary_max_amount=salary.max_amount,
             )
         except (KeyError, ValueError) as e:
             # Сработает, только если нет ключевых полей (name, url и т.д.)
@@ -92,31 +139,135 @@ class HHParser(BaseParser):
             )
             return None
 
+    def _parse_page(self, response: requests.Response, page: int) -> ParsedPage:
+        """Разбирает страницу ответа API."""
+        data = response.json()
+        items = data.get("items", [])
+        parse_item = partial(self._parse_api_item, salaries=get_salary_normalizer())
+        vacancies = [dto for dto in map(parse_item, items) if dto]
+        return ParsedPage(vacancies, not items or page >= data.get("pages", 1) - 1)
+
+    def fetch_description(self, vacancy_id: str) -> str:
+        """Загружает полное описание вакансии со страницы /vacancies/{id}.
+
+        HTML описания преобразуется в текст, а ключевые навыки дописываются
+        в конец, чтобы они попадали в полнотекстовый поиск.
+
+        Raises:
+            requests.RequestException: Если запрос не удался.
+        """
+        data = self.http.get(f"{self.api_url}/{vacancy_id}").json()
+        text = BeautifulSoup(data.get("description") or "", "lxml").get_text(
+            separator="\n", strip=True
+        )
+        skills = [skill["name"] for skill in data.get("key_skills") or []]
+        if skills:
+            text += "\nКлючевые навыки: " + ", ".join(skills)
+        return text.strip()
+
+    def fetch_descriptions(
+        self,
+        vacancy_ids: List[str],
+        workers: int,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, str]:
+        """Загружает описания вакансий параллельно.
+
+        Частоту запросов ограничивает корзина токенов HTTP-клиента, а
+        workers - количество одновременных запросов.
+
+        Args:
+            vacancy_ids: Идентификаторы вакансий.
+            workers: Размер пула потоков.
+            on_progress: Функция, вызываемая с количеством обработанных
+                вакансий после каждой из них; ее исключение прерывает
+                загрузку, и еще не начатые запросы отменяются.
+
+        Returns:
+            Описания успешно загруженных вакансий по идентификатору.
+        """
+
+        def fetch(vacancy_id: str) -> Optional[str]:
+            try:
+                return self.fetch_description(vacancy_id)
+            except (requests.RequestException, ValueError) as e:
+                logger.warning("Не удалось загрузить вакансию %s: %s", vacancy_id, e)
+                return None
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [executor.submit(fetch, vacancy_id) for vacancy_id in vacancy_ids]
+            descriptions = {}
+            for done, (vacancy_id, future) in enumerate(zip(vacancy_ids, futures), 1):
+                text = future.result()
+                if text is not None:
+                    descriptions[vacancy_id] = text
+                if on_progress is not None:
+                    on_progress(done)
+            return descriptions
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @classmethod
+    def page_range(cls) -> Tuple[int, int]:
+        """Возвращает номера первой и последней доступной страницы выдачи."""
+        return 0, MAX_PAGES - 1
+
     def parse(self, search_query: str, area: int = 1) -> List[VacancyDTO]:
         """Основной метод парсинга вакансий с hh.ru."""
-        vacancies_dto = []
-        params: Dict[str, Any] = {"text": search_query, "area": area, "per_page": 50}
         logger.info("Начало парсинга hh.ru по запросу: '%s'", search_query)
-        page = 0
-        while True:
+        first_page, last_page = self.page_range()
+        result = self.parse_pages(search_query, first_page, last_page, area=str(area))
+        logger.info(
+            "Парсинг hh.ru завершен. Найдено %d вакансий.", len(result.vacancies)
+        )
+        return result.vacancies
+
+    def parse_pages(
+        self,
+        search_query: str,
+        first_page: int,
+        last_page: int,
+        on_page: Optional[PageCallback] = None,
+        area: Optional[str] = None,
+    ) -> PageRangeResult:
+        """Обходит страницы выдачи API с first_page по last_page включительно.
+
+        area - идентификатор региона из справочника hh.ru (/areas).
+        """
+        vacancies_dto: List[VacancyDTO] = []
+        cache_stats = self.http.reset_cache_stats()
+        params: Dict[str, Any] = {
+            "text": search_query,
+            "area": area or DEFAULT_AREA,
+            "per_page": 50,
+        }
+        for page in range(first_page, last_page + 1):
             params["page"] = page
             try:
-                response = self.session.get(HH_API_URL, params=params)
-                response.raise_for_status()
-                data = response.json()
+                response = self.http.get(self.api_url, params=params)
+                parsed = self._parse_response(
+                    response, partial(self._parse_page, page=page)
+                )
             except requests.RequestException as e:
                 logger.error("Ошибка запроса к API hh.ru: %s", e)
-                break
-            items = data.get("items", [])
-            if not items:
-                break
-            for item in items:
-                dto = self._parse_api_item(item)
-                if dto:
-                    vacancies_dto.append(dto)
-            if page >= data.get("pages", 1) - 1:
-                break
-            page += 1
-            time.sleep(REQUEST_DELAY)
-        logger.info("Парсинг hh.ru завершен. Найдено %d вакансий.", len(vacancies_dto))
-        return vacancies_dto
+                observe_parser_error(self.source)
+                return PageRangeResult(
+                    vacancies_dto,
+                    page - first_page,
+                    False,
+                    failed_page=page,
+                    cache_stats=cache_stats,
+                )
+            observe_page(self.source, len(parsed.vacancies))
+            vacancies_dto.extend(parsed.vacancies)
+            pages_fetched = page - first_page + 1
+            if on_page is not None:
+                on_page(pages_fetched, len(vacancies_dto))
+            if parsed.last:
+                return PageRangeResult(
+                    vacancies_dto, pages_fetched, True, cache_stats=cache_stats
+                )
+        return PageRangeResult(
+            vacancies_dto, last_page - first_page + 1, False, cache_stats=cache_stats
+        )
@@ -0,0 +1,308 @@
+"""Дисковый HTTP-кэш парсеров с условными запросами.
+
+Каждый обход заново загружает те же страницы поиска и ответы API. Кэш
+хранит тела ответов в каталоге HTTP_CACHE_DIR в сжатом виде (gzip) по
+ключу из нормализованного URL с параметрами запроса:
+
+* При повторном запросе HttpClient отправляет If-None-Match и
+  If-Modified-Since по сохраненным ETag и Last-Modified, и ответ 304 отдается
+  из кэша. Ответ моложе HTTP_CACHE_MAX_AGE секунд отдается без запроса.
+* Рядом с телом ответа хранится результат его разбора вместе с хэшем тела:
+  если тело не изменилось, страница не разбирается заново.
+* Записи старше HTTP_CACHE_TTL секунд удаляются, а при превышении
+  HTTP_CACHE_MAX_BYTES удаляются самые старые записи.
+
+Запись выполняется через временный файл и os.replace, поэтому кэш можно
+использовать из нескольких потоков и процессов с общим каталогом.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BODY_SUFFIX = ".gz"
+PARSED_SUFFIX = ".parsed.gz"
+
+
+def normalize_url(url: str) -> str:
+    """Приводит URL к каноническому виду для ключа кэша.
+
+    Схема и хост приводятся к нижнему регистру, параметры запроса
+    сортируются, а фрагмент отбрасывается.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, "")
+    )
+
+
+def body_hash(body: bytes) -> str:
+    """Возвращает хэш тела ответа."""
+    return hashlib.sha256(body).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Счетчики кэша за обход.
+
+    Attributes:
+        requests: Количество запросов через кэш.
+        hits: Ответы, отданные из кэша (свежие записи и ответы 304).
+        bytes_saved: Объем тел ответов, которые не пришлось загружать.
+        parses_skipped: Страницы, разбор которых взят из кэша.
+    """
+
+    requests: int = 0
+    hits: int = 0
+    bytes_saved: int = 0
+    parses_skipped: int = 0
+
+    @property
+    def hit_ratio(self) -> Optional[float]:
+        """Доля запросов, отданных из кэша, или None без запросов."""
+        return self.hits / self.requests if self.requests else None
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """Сохраненный ответ.
+
+    Attributes:
+        url: Нормализованный URL запроса.
+        body: Тело ответа.
+        stored_at: Время сохранения или последней проверки (Unix-время).
+        etag: Заголовок ETag ответа.
+        last_modified: Заголовок Last-Modified ответа.
+        content_type: Заголовок Content-Type ответа.
+        encoding: Кодировка тела, определенная requests.
+    """
+
+    url: str
+    body: bytes
+    stored_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_type: Optional[str] = None
+    encoding: Optional[str] = None
+
+    def validators(self) -> Dict[str, str]:
+        """Возвращает заголовки условного запроса."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self) -> requests.Response:
+        """Создает ответ requests с сохраненным телом."""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response._content = self.body
+        response.encoding = self.encoding
+        headers: Dict[str, str] = {}
+        for name, value in (
+            ("Content-Type", self.content_type),
+            ("ETag", self.etag),
+            ("Last-Modified", self.last_modified),
+        ):
+            if value:
+                headers[name] = value
+        response.headers = CaseInsensitiveDict(headers)
+        return response
+
+
+class HttpCache:
+    """Дисковый кэш ответов с вытеснением по возрасту и объему."""
+
+    def __init__(self, directory: str, ttl: float, max_bytes: int) -> None:
+        """Создает кэш и удаляет из каталога устаревшие записи.
+
+        Args:
+            directory: Каталог кэша; создается при необходимости.
+            ttl: Срок хранения записи в секундах с последней проверки.
+            max_bytes: Максимальный объем файлов кэша.
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = 0
+        self.evict()
+
+    def _path(self, url: str, suffix: str) -> str:
+        """Возвращает путь файла записи."""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, key + suffix)
+
+    def _read(self, path: str) -> Optional[bytes]:
+        """Читает файл записи, удаляя его, если срок хранения истек."""
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with gzip.open(path, "rb") as file:
+                return file.read()
+        except (OSError, EOFError):
+            return None
+
+    def _write(self, path: str, data: bytes) -> None:
+        """Атомарно записывает файл записи и вытесняет лишние записи."""
+        compressed = gzip.compress(data)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(compressed)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Не удалось сохранить запись HTTP-кэша: %s", e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self._total_bytes += len(compressed)
+            over_limit = self._total_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Возвращает сохраненный ответ или None.
+
+        Args:
+            url: Нормализованный URL запроса.
+        """
+        path = self._path(url, BODY_SUFFIX)
+        data = self._read(path)
+        if data is None:
+            return None
+        header, _, body = data.partition(b"\n")
+        try:
+            meta = json.loads(header)
+            stored_at = os.path.getmtime(path)
+        except (OSError, ValueError):
+            return None
+        return CacheEntry(url=url, body=body, stored_at=stored_at, **meta)
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """Сохраняет успешный ответ.
+
+        Args:
+            url: Нормализованный URL запроса.
+            response: Ответ со статусом 200.
+        """
+        meta = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+            "encoding": response.encoding,
+        }
+        header = json.dumps(meta).encode()
+        self._write(self._path(url, BODY_SUFFIX), header + b"\n" + response.content)
+
+    def touch(self, url: str) -> None:
+        """Продлевает срок хранения записи после ответа 304."""
+        try:
+            os.utime(self._path(url, BODY_SUFFIX))
+        except OSError:
+            pass
+
+    def load_parsed(self, url: str, body: bytes) -> Optional[Any]:
+        """Возвращает сохраненный разбор тела ответа, если тело не изменилось.
+
+        Args:
+            url: Нормализованный URL запроса.
+            body: Текущее тело ответа.
+        """
+        data = self._read(self._path(url, PARSED_SUFFIX))
+        if data is None:
+            return None
+        try:
+            parsed = json.loads(data)
+        except ValueError:
+            return None
+        if parsed.get("body_hash") != body_hash(body):
+            return None
+        return parsed.get("payload")
+
+    def store_parsed(self, url: str, body: bytes, payload: Any) -> None:
+        """Сохраняет разбор тела ответа.
+
+        Args:
+            url: Нормализованный URL запроса.
+            body: Разобранное тело ответа.
+            payload: Результат разбора, сериализуемый в JSON.
+        """
+        data = json.dumps({"body_hash": body_hash(body), "payload": payload})
+        self._write(self._path(url, PARSED_SUFFIX), data.encode())
+
+    def evict(self) -> int:
+        """Удаляет записи с истекшим сроком, а затем самые старые сверх объема.
+
+        Returns:
+            Количество удаленных файлов.
+        """
+        now = time.time()
+        files = []
+        removed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(BODY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                    if now - stat.st_mtime > self.ttl:
+                        os.remove(entry.path)
+                        removed += 1
+                    else:
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+                except OSError:
+                    continue
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._total_bytes = total
+        return removed
+
+
+_cache_lock = threading.Lock()
+_caches: Dict[str, HttpCache] = {}
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Возвращает общий HTTP-кэш процесса или None, если кэш не настроен."""
+    directory = settings.HTTP_CACHE_DIR
+    if not directory:
+        return None
+    with _cache_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = HttpCache(
+                directory, settings.HTTP_CACHE_TTL, settings.HTTP_CACHE_MAX_BYTES
+            )
+        return cache
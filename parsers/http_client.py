@@ -0,0 +1,485 @@
+"""Общий HTTP-клиент парсеров: ограничение частоты, повторы и автомат отключения.
+
+Парсеры не делают пауз между запросами сами, а обращаются к источникам
+через HttpClient, который:
+
+* Ограничивает частоту запросов к каждому хосту корзиной токенов
+  (HTTP_RATE_LIMITS_JSON, HTTP_DEFAULT_RATE, HTTP_BURST). Корзина общая
+  для всех парсеров и потоков процесса, поэтому параллельные обходы одного
+  источника вместе не превышают его лимит. Запросы получают токены в
+  порядке очереди, ожидание доступно и из asyncio (acquire_async).
+* Повторяет запросы после ошибок соединения, таймаутов, ответов 5xx и 429
+  с экспоненциальной задержкой со случайным разбросом (full jitter). Если
+  сервер прислал Retry-After, пауза не короче него и распространяется на
+  все запросы к хосту.
+* Перед каждой паузой повтора вызывает on_retry, если он задан: обход
+  единицами (core.crawl_units) продлевает в нем аренду единицы, которую
+  повторы одной страницы иначе могли бы пережить.
+* Отключает источник автоматом (circuit breaker) после
+  CIRCUIT_FAILURE_THRESHOLD ошибок подряд: в течение CIRCUIT_RESET_SECONDS
+  запросы к нему сразу завершаются CircuitOpenError, затем пропускается
+  один пробный запрос.
+
+Если задан HTTP-кэш (см. parsers.http_cache), запросы проверяют
+сохраненный ответ условными заголовками, а счетчики кэша за обход
+собираются в HttpClient.cache_stats. Если задан регистратор (см.
+parsers.http_recording), успешные ответы сохраняются для воспроизведения.
+Время каждой попытки запроса учитывается в метриках Prometheus источника
+(см. core.metrics).
+
+Лимиты действуют в пределах процесса: при нескольких процессах сборщика
+лимит хоста делится между ними настройкой HTTP_RATE_LIMITS_JSON.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from core.config import settings
+from core.metrics import observe_fetch
+from parsers.http_cache import CacheEntry, CacheStats, HttpCache, normalize_url
+from parsers.http_recording import HttpRecorder
+
+if TYPE_CHECKING:
+    from parsers.proxy_pool import ProxyPool
+
+# Ответы, после которых запрос имеет смысл повторить
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Ответы 4xx, которые описывают ресурс, а не прокси: вакансию сняли
+RESOURCE_STATUSES = frozenset({404, 410})
+
+logger = logging.getLogger(__name__)
+
+Clock = Callable[[], float]
+
+
+class CircuitOpenError(requests.RequestException):
+    """Источник временно отключен после серии ошибок."""
+
+
+class TokenBucket:
+    """Потокобезопасная корзина токенов с резервированием.
+
+    Каждый запрос резервирует токен и ждет его появления, поэтому
+    конкурирующие запросы обслуживаются по очереди, а не гоняются за
+    освободившимся токеном.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Clock = time.monotonic):
+        """Создает полную корзину.
+
+        Args:
+            rate: Скорость пополнения, токенов в секунду.
+            capacity: Емкость корзины (допустимый всплеск запросов).
+            clock: Источник монотонного времени (заменяется в тестах).
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Добавляет токены, накопившиеся с прошлого обращения."""
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Резервирует токены и возвращает, сколько секунд ждать их появления."""
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Ждет токены в текущем потоке."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, tokens: float = 1.0) -> None:
+        """Ждет токены, не блокируя цикл событий."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Запрещает запросы на seconds секунд (например, по Retry-After)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class CircuitBreaker:
+    """Автомат отключения источника после серии ошибок подряд."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Clock = time.monotonic,
+    ):
+        """Создает автомат в замкнутом состоянии.
+
+        Args:
+            failure_threshold: Количество ошибок подряд до отключения.
+            reset_timeout: Через сколько секунд пропустить пробный запрос.
+            clock: Источник монотонного времени (заменяется в тестах).
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние с учетом истекшего времени отключения."""
+        with self._lock:
+            if self._state == self.OPEN and self._reset_due():
+                return self.HALF_OPEN
+            return self._state
+
+    def _reset_due(self) -> bool:
+        """Проверяет, истекло ли время отключения."""
+        return self._clock() - self._opened_at >= self.reset_timeout
+
+    def allow(self) -> bool:
+        """Разрешает запрос; после отключения пропускает один пробный."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            # Если пробный запрос так и не завершился, через reset_timeout
+            # пропускается следующий
+            if self._reset_due():
+                self._state = self.HALF_OPEN
+                self._opened_at = self._clock()
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Учитывает успешный ответ и замыкает автомат."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        """Учитывает ошибку и размыкает автомат после серии ошибок."""
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+_registry_lock = threading.Lock()
+_buckets: Dict[str, TokenBucket] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def set_host_rate(host: str, rate: float, burst: Optional[float] = None) -> None:
+    """Задает лимит запросов к хосту в текущем процессе.
+
+    Args:
+        host: Хост с портом, если он указан в URL (например, "api.hh.ru").
+        rate: Запросов в секунду.
+        burst: Допустимый всплеск запросов; по умолчанию HTTP_BURST.
+    """
+    with _registry_lock:
+        _buckets[host] = TokenBucket(rate, burst or settings.HTTP_BURST)
+
+
+def get_host_bucket(host: str) -> TokenBucket:
+    """Возвращает корзину токенов хоста, создавая ее по настройкам."""
+    with _registry_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            rate = settings.http_rate_limits.get(host, settings.HTTP_DEFAULT_RATE)
+            bucket = _buckets[host] = TokenBucket(rate, settings.HTTP_BURST)
+        return bucket
+
+
+def get_circuit_breaker(source: str) -> CircuitBreaker:
+    """Возвращает автомат отключения источника, создавая его по настройкам."""
+    with _registry_lock:
+        breaker = _breakers.get(source)
+        if breaker is None:
+            breaker = _breakers[source] = CircuitBreaker(
+                settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS
+            )
+        return breaker
+
+
+def is_circuit_open(source: str) -> bool:
+    """Проверяет, отключен ли источник и не подошло ли время пробного запроса."""
+    return get_circuit_breaker(source).state == CircuitBreaker.OPEN
+
+
+def reset_http_state() -> None:
+    """Сбрасывает корзины и автоматы всех хостов и источников."""
+    with _registry_lock:
+        _buckets.clear()
+        _breakers.clear()
+
+
+def proxy_response_ok(status_code: int) -> bool:
+    """Проверяет, говорит ли ответ об исправности прокси.
+
+    Ответы 5xx и 429 повторяются, а 403 и 407 обычно означают, что прокси
+    заблокирован источником или не принимает учетные данные, поэтому
+    ошибкой прокси считаются все ответы от 400, кроме 404 и 410.
+    """
+    if status_code in RESOURCE_STATUSES:
+        return True
+    return status_code < 400
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает заголовок Retry-After в секундах или в формате HTTP-даты.
+
+    Returns:
+        Количество секунд ожидания или None, если заголовка нет или он
+        некорректен.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(
+    attempt: int, base: float, cap: float, retry_after: Optional[float] = None
+) -> float:
+    """Возвращает паузу перед повтором с экспоненциальным ростом и разбросом.
+
+    Args:
+        attempt: Номер неудачной попытки, начиная с 0.
+        base: Пауза после первой попытки без разброса.
+        cap: Максимальная пауза без учета Retry-After.
+        retry_after: Пауза, запрошенная сервером.
+
+    Returns:
+        Пауза в секундах, не меньше retry_after.
+    """
+    delay = random.uniform(0, min(cap, base * 2**attempt))  # nosec B311
+    if retry_after is not None:
+        return max(delay, retry_after)
+    return delay
+
+
+class HttpClient:
+    """HTTP-клиент источника с лимитом частоты, повторами и автоматом отключения."""
+
+    def __init__(
+        self,
+        source: str,
+        session: requests.Session,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        proxy_pool: Optional["ProxyPool"] = None,
+        cache: Optional[HttpCache] = None,
+        recorder: Optional[HttpRecorder] = None,
+        on_retry: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        """Создает клиент поверх сессии requests.
+
+        Args:
+            source: Название источника для автомата отключения.
+            session: Сессия requests с заголовками парсера.
+            max_retries: Количество повторов; по умолчанию HTTP_MAX_RETRIES.
+            timeout: Таймаут запроса; по умолчанию HTTP_TIMEOUT.
+            proxy_pool: Пул прокси; если задан, каждая попытка выполняется
+                через выбранный пулом прокси с заголовками session.
+            cache: HTTP-кэш ответов; если задан, сохраненные ответы
+                проверяются условными запросами.
+            recorder: Регистратор ответов; если задан, успешные ответы
+                сохраняются для воспроизведения.
+            on_retry: Функция, вызываемая с длительностью паузы перед
+                каждым повтором запроса; ее исключение прерывает запрос.
+        """
+        self.source = source
+        self.session = session
+        self.proxy_pool = proxy_pool
+        self.cache = cache
+        self.recorder = recorder
+        self.on_retry = on_retry
+        self.cache_stats = CacheStats()
+        self.max_retries = (
+            settings.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        )
+        self.timeout = settings.HTTP_TIMEOUT if timeout is None else timeout
+
+    def reset_cache_stats(self) -> CacheStats:
+        """Начинает новый подсчет счетчиков кэша и возвращает его."""
+        self.cache_stats = CacheStats()
+        return self.cache_stats
+
+    def _cached_response(
+        self, url: str, response: requests.Response, entry: Optional[CacheEntry]
+    ) -> requests.Response:
+        """Обновляет кэш по ответу и заменяет ответ 304 сохраненным.
+
+        Ответ получает нормализованный URL запроса, чтобы разбор его тела
+        сохранялся под тем же ключом, что и сам ответ, даже после
+        перенаправлений.
+        """
+        if self.cache is None:
+            return response
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(url)
+            self.cache_stats.hits += 1
+            self.cache_stats.bytes_saved += len(entry.body)
+            return entry.to_response()
+        if response.status_code == 200:
+            self.cache.store(url, response)
+            response.url = url
+        return response
+
+    def _recorded(self, response: requests.Response) -> requests.Response:
+        """Сохраняет ответ регистратором, если он задан.
+
+        Ответы из кэша тоже сохраняются, чтобы записанный обход можно было
+        воспроизвести полностью.
+        """
+        if self.recorder is not None:
+            self.recorder.record(response)
+        return response
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Выполняет GET-запрос с повторами после временных ошибок.
+
+        Args:
+            url: Адрес запроса.
+            **kwargs: Параметры requests.Session.get.
+
+        Returns:
+            Успешный ответ; при использовании кэша - сохраненный ответ вместо
+            ответа 304.
+
+        Raises:
+            CircuitOpenError: Если источник отключен.
+            requests.RequestException: Если запрос не удался после всех
+                повторов или ошибка не временная.
+        """
+        bucket = get_host_bucket(urlsplit(url).netloc)
+        breaker = get_circuit_breaker(self.source)
+        kwargs.setdefault("timeout", self.timeout)
+        entry = None
+        conditional: Dict[str, str] = {}
+        if self.cache is not None:
+            # Параметры входят в ключ кэша, поэтому сразу добавляются в URL
+            prepared = requests.Request("GET", url, params=kwargs.pop("params", None))
+            url = normalize_url(prepared.prepare().url or url)
+            self.cache_stats.requests += 1
+            entry = self.cache.lookup(url)
+            if entry is not None:
+                if time.time() - entry.stored_at < settings.HTTP_CACHE_MAX_AGE:
+                    self.cache_stats.hits += 1
+                    self.cache_stats.bytes_saved += len(entry.body)
+                    return self._recorded(entry.to_response())
+                conditional = entry.validators()
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"Источник {self.source} временно отключен")
+            bucket.acquire()
+            proxy = self.proxy_pool.choose() if self.proxy_pool else None
+            started = time.monotonic()
+            try:
+                if proxy is None:
+                    if conditional:
+                        kwargs["headers"] = conditional
+                    response = self.session.get(url, **kwargs)
+                else:
+                    response = proxy.session.get(
+                        url, headers={**self.session.headers, **conditional}, **kwargs
+                    )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                observe_fetch(self.source, time.monotonic() - started)
+                if proxy is not None and self.proxy_pool is not None:
+                    self.proxy_pool.record(proxy, False, None)
+                breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(
+                    attempt, settings.HTTP_BACKOFF_BASE, settings.HTTP_BACKOFF_MAX
+                )
+                logger.warning(
+                    "Ошибка запроса к %s: %s, повтор через %.1f с.", url, e, delay
+                )
+                if self.on_retry is not None:
+                    self.on_retry(delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except Exception:
+                # Без записи результата прокси остался бы в пробном запросе
+                if proxy is not None and self.proxy_pool is not None:
+                    self.proxy_pool.record(proxy, False, None)
+                raise
+
+            elapsed = time.monotonic() - started
+            observe_fetch(self.source, elapsed)
+            if proxy is not None and self.proxy_pool is not None:
+                self.proxy_pool.record(
+                    proxy, proxy_response_ok(response.status_code), elapsed
+                )
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                breaker.record_success()
+                return self._recorded(self._cached_response(url, response, entry))
+            # 429 - ограничение частоты, а не неисправность источника
+            if response.status_code != 429:
+                breaker.record_failure()
+            if attempt >= self.max_retries:
+                response.raise_for_status()
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            delay = backoff_delay(
+                attempt,
+                settings.HTTP_BACKOFF_BASE,
+                settings.HTTP_BACKOFF_MAX,
+                retry_after,
+            )
+            logger.warning(
+                "Ответ %d от %s, повтор через %.1f с.",
+                response.status_code,
+                url,
+                delay,
+            )
+            if self.on_retry is not None:
+                self.on_retry(delay)
+            if retry_after is not None:
+                # Остальные запросы к хосту тоже ждут
+                bucket.pause(delay)
+            else:
+                time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,148 @@
+"""Запись HTTP-трафика парсеров для последующего воспроизведения.
+
+Если задан каталог HTTP_RECORD_DIR, HttpClient сохраняет каждый успешный
+ответ источника в отдельный JSON-файл: URL, статус, Content-Type,
+кодировку и тело в base64. Имя файла - хэш ключа записи, составленного из
+хоста, пути и отсортированных параметров запроса без схемы, поэтому
+записанный обход можно воспроизвести сервером benchmarks.replay_server,
+который принимает запросы вида /<хост>/<путь>.
+
+Запись выполняется через временный файл и os.replace, поэтому каталог
+можно использовать из нескольких потоков и процессов. Повторный ответ на
+тот же запрос заменяет прежнюю запись.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from core.config import settings
+from parsers.http_cache import normalize_url
+
+logger = logging.getLogger(__name__)
+
+RECORDING_SUFFIX = ".json"
+
+
+def recording_key(url: str) -> str:
+    """Возвращает ключ записи: хост, путь и параметры URL без схемы."""
+    parts = urlsplit(normalize_url(url))
+    key = parts.netloc + parts.path
+    return f"{key}?{parts.query}" if parts.query else key
+
+
+def recording_name(key: str) -> str:
+    """Возвращает имя файла записи по ее ключу."""
+    return hashlib.sha256(key.encode()).hexdigest() + RECORDING_SUFFIX
+
+
+@dataclass(frozen=True)
+class Recording:
+    """Записанный ответ.
+
+    Attributes:
+        url: URL запроса.
+        status: Код ответа.
+        body: Тело ответа.
+        content_type: Заголовок Content-Type ответа.
+        encoding: Кодировка тела, определенная requests.
+    """
+
+    url: str
+    status: int
+    body: bytes
+    content_type: Optional[str] = None
+    encoding: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """Ключ записи."""
+        return recording_key(self.url)
+
+
+class HttpRecorder:
+    """Сохраняет ответы источников в каталог записей."""
+
+    def __init__(self, directory: str) -> None:
+        """Создает каталог записей при необходимости.
+
+        Args:
+            directory: Каталог, в который сохраняются ответы.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, response: requests.Response) -> None:
+        """Сохраняет ответ под ключом его URL.
+
+        Args:
+            response: Успешный ответ источника.
+        """
+        data = json.dumps(
+            {
+                "url": response.url,
+                "status": response.status_code,
+                "content_type": response.headers.get("Content-Type"),
+                "encoding": response.encoding,
+                "body": base64.b64encode(response.content).decode(),
+            },
+            ensure_ascii=False,
+        )
+        path = os.path.join(self.directory, recording_name(recording_key(response.url)))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Не удалось сохранить запись ответа %s: %s", response.url, e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def load_recordings(directory: str) -> Iterator[Recording]:
+    """Читает все записи каталога.
+
+    Поврежденные файлы пропускаются с предупреждением.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.name.endswith(RECORDING_SUFFIX):
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as file:
+                    data = json.load(file)
+                yield Recording(
+                    url=data["url"],
+                    status=data["status"],
+                    body=base64.b64decode(data["body"]),
+                    content_type=data.get("content_type"),
+                    encoding=data.get("encoding"),
+                )
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Пропущена запись %s: %s", entry.name, e)
+
+
+_recorder_lock = threading.Lock()
+_recorders: Dict[str, HttpRecorder] = {}
+
+
+def get_http_recorder() -> Optional[HttpRecorder]:
+    """Возвращает общий регистратор процесса или None, если запись выключена."""
+    directory = settings.HTTP_RECORD_DIR
+    if not directory:
+        return None
+    with _recorder_lock:
+        recorder = _recorders.get(directory)
+        if recorder is None:
+            recorder = _recorders[directory] = HttpRecorder(directory)
+        return recorder
@@ -0,0 +1,56 @@
+"""Пул процессов для разбора HTML-страниц выдачи.
+
+Разбор HTML нагружает процессор и, выполняясь в потоке обхода, не дает
+одновременно загружать следующую страницу, а из-за GIL занимает не больше
+одного ядра. Если PARSE_WORKERS больше нуля, парсеры передают тела
+страниц в общий для процесса пул из PARSE_WORKERS процессов и, пока они
+разбираются, загружают следующие страницы (см. SuperJobParser.parse_pages).
+
+Процессы пула запускаются методом spawn: процессы сборщика многопоточны, и
+fork мог бы унаследовать захваченные другими потоками блокировки.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Возвращает пул разбора процесса или None, если PARSE_WORKERS равен нулю."""
+    global _pool
+    if settings.PARSE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("Запущен пул разбора из %d процессов.", settings.PARSE_WORKERS)
+        return _pool
+
+
+def shutdown_parse_pool() -> None:
+    """Останавливает пул разбора; следующий вызов get_parse_pool создаст новый.
+
+    Вызывается при завершении процесса и после аварийного завершения
+    процесса пула (BrokenProcessPool).
+    """
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_parse_pool)
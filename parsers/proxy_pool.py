@@ -0,0 +1,258 @@
+"""Пул прокси с оценкой здоровья и выбором по задержке.
+
+Прокси из PROXY_LIST раньше выбирались случайно для каждого запроса, и
+один мертвый или медленный прокси тормозил весь обход. Пул запоминает
+для каждого прокси:
+
+* экспоненциально сглаженные (EWMA) долю успешных запросов и задержку;
+* ошибки подряд: после PROXY_QUARANTINE_FAILURES прокси уходит в
+  карантин на PROXY_QUARANTINE_SECONDS, и каждый следующий неудачный выход
+  из карантина удваивает срок (не больше PROXY_QUARANTINE_MAX_SECONDS).
+  По истечении срока прокси получает один пробный запрос.
+
+Прокси для запроса выбирается по принципу "лучший из двух случайных" по
+отношению доли успехов к задержке: быстрые и здоровые прокси получают
+основную нагрузку, а остальные не остаются без проверки. У каждого прокси
+своя сессия requests с постоянным пулом соединений.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from core.config import settings
+from parsers.http_client import Clock
+
+ACTIVE = "active"
+PROBING = "probing"
+QUARANTINED = "quarantined"
+
+
+def mask_proxy_url(url: str) -> str:
+    """Скрывает логин и пароль в адресе прокси для журналов и статистики."""
+    parts = urlsplit(url)
+    if parts.username is None and parts.password is None:
+        return url
+    host = parts.hostname or ""
+    if parts.port:
+        host = f"{host}:{parts.port}"
+    return parts._replace(netloc=f"***@{host}").geturl()
+
+
+@dataclass
+class ProxyState:
+    """Состояние прокси в пуле.
+
+    Attributes:
+        url: Адрес прокси.
+        session: Сессия requests, отправляющая запросы через прокси.
+        success_rate: EWMA доли успешных запросов.
+        latency: EWMA задержки успешных запросов в секундах или None.
+        consecutive_failures: Количество ошибок подряд.
+        quarantines: Количество карантинов подряд.
+        quarantined_until: Момент окончания карантина по часам пула.
+        probing: Выполняется ли пробный запрос после карантина.
+        requests: Количество запросов.
+        failures: Количество ошибок.
+        label: Адрес прокси без учетных данных.
+    """
+
+    url: str
+    session: requests.Session
+    success_rate: float = 1.0
+    latency: Optional[float] = None
+    consecutive_failures: int = 0
+    quarantines: int = 0
+    quarantined_until: float = 0.0
+    probing: bool = False
+    requests: int = 0
+    failures: int = 0
+    label: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        """Вычисляет адрес прокси без учетных данных."""
+        self.label = mask_proxy_url(self.url)
+
+    @property
+    def score(self) -> float:
+        """Оценка прокси: доля успехов на секунду задержки."""
+        if self.latency is None:
+            # Прокси без замеров сначала проверяется, а без единого
+            # успешного ответа - выбирается последним
+            return float("inf") if not self.failures else 0.0
+        return self.success_rate / max(self.latency, 0.001)
+
+
+@dataclass(frozen=True)
+class ProxySnapshot:
+    """Статистика прокси для сохранения и отображения."""
+
+    proxy: str
+    state: str
+    requests: int
+    failures: int
+    success_rate: float
+    latency_ms: Optional[float]
+    quarantined_until: Optional[datetime]
+
+
+class ProxyPool:
+    """Потокобезопасный пул прокси с оценкой здоровья."""
+
+    def __init__(
+        self,
+        proxies: List[str],
+        alpha: float,
+        quarantine_failures: int,
+        quarantine_seconds: float,
+        max_quarantine_seconds: float,
+        clock: Clock = time.monotonic,
+    ) -> None:
+        """Создает пул с отдельной сессией для каждого прокси.
+
+        Args:
+            proxies: Адреса прокси.
+            alpha: Вес нового замера в EWMA.
+            quarantine_failures: Количество ошибок подряд до карантина.
+            quarantine_seconds: Срок первого карантина.
+            max_quarantine_seconds: Максимальный срок карантина.
+            clock: Источник монотонного времени (заменяется в тестах).
+        """
+        self.alpha = alpha
+        self.quarantine_failures = quarantine_failures
+        self.quarantine_seconds = quarantine_seconds
+        self.max_quarantine_seconds = max_quarantine_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._states = []
+        for url in proxies:
+            session = requests.Session()
+            session.proxies = {"http": url, "https": url}
+            self._states.append(ProxyState(url, session))
+
+    def _state_name(self, state: ProxyState, now: float) -> str:
+        """Возвращает состояние прокси для статистики."""
+        if state.probing:
+            return PROBING
+        if state.quarantined_until > now:
+            return QUARANTINED
+        return ACTIVE
+
+    def choose(self) -> ProxyState:
+        """Выбирает прокси для запроса.
+
+        Прокси с истекшим карантином получает пробный запрос вне очереди.
+        Если все прокси в карантине, возвращается тот, чей карантин
+        закончится раньше: ошибка запроса через него будет обработана
+        повторами и автоматом отключения HTTP-клиента.
+        """
+        with self._lock:
+            now = self._clock()
+            available = [
+                state
+                for state in self._states
+                if not state.probing and state.quarantined_until <= now
+            ]
+            if not available:
+                return min(self._states, key=lambda state: state.quarantined_until)
+            expired = [state for state in available if state.quarantines]
+            if expired:
+                # Первый запрос после карантина - пробный: без него прокси
+                # с нулевой оценкой никогда не вернулся бы в работу
+                chosen = min(expired, key=lambda state: state.quarantined_until)
+                chosen.probing = True
+                return chosen
+            if len(available) == 1:
+                return available[0]
+            first, second = random.sample(available, 2)  # nosec B311
+            return first if first.score >= second.score else second
+
+    def record(self, state: ProxyState, ok: bool, latency: Optional[float]) -> None:
+        """Учитывает результат запроса через прокси.
+
+        Args:
+            state: Прокси, через который выполнялся запрос.
+            ok: Успешен ли запрос.
+            latency: Время ответа в секундах или None, если ответа нет.
+        """
+        with self._lock:
+            state.requests += 1
+            state.probing = False
+            state.success_rate += self.alpha * (float(ok) - state.success_rate)
+            if ok:
+                state.consecutive_failures = 0
+                state.quarantines = 0
+                if latency is not None:
+                    state.latency = (
+                        latency
+                        if state.latency is None
+                        else state.latency + self.alpha * (latency - state.latency)
+                    )
+                return
+            state.failures += 1
+            state.consecutive_failures += 1
+            if (
+                state.quarantines
+                or state.consecutive_failures >= self.quarantine_failures
+            ):
+                duration = min(
+                    self.quarantine_seconds * 2**state.quarantines,
+                    self.max_quarantine_seconds,
+                )
+                state.quarantined_until = self._clock() + duration
+                state.quarantines += 1
+
+    def snapshot(self) -> List[ProxySnapshot]:
+        """Возвращает статистику всех прокси."""
+        with self._lock:
+            now = self._clock()
+            wall_now = datetime.now()
+            return [
+                ProxySnapshot(
+                    proxy=state.label,
+                    state=self._state_name(state, now),
+                    requests=state.requests,
+                    failures=state.failures,
+                    success_rate=round(state.success_rate, 4),
+                    latency_ms=(
+                        round(state.latency * 1000, 1)
+                        if state.latency is not None
+                        else None
+                    ),
+                    quarantined_until=(
+                        wall_now + timedelta(seconds=state.quarantined_until - now)
+                        if state.quarantined_until > now
+                        else None
+                    ),
+                )
+                for state in self._states
+            ]
+
+
+_pool_lock = threading.Lock()
+_pools: Dict[str, ProxyPool] = {}
+
+
+def get_proxy_pool() -> Optional[ProxyPool]:
+    """Возвращает общий пул прокси процесса или None, если прокси не заданы."""
+    proxies = settings.proxy_list_as_array
+    if not proxies:
+        return None
+    key = ",".join(proxies)
+    with _pool_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ProxyPool(
+                proxies,
+                settings.PROXY_EWMA_ALPHA,
+                settings.PROXY_QUARANTINE_FAILURES,
+                settings.PROXY_QUARANTINE_SECONDS,
+                settings.PROXY_QUARANTINE_MAX_SECONDS,
+            )
+        return pool
@@ -0,0 +1,208 @@
+"""Нормализация строк зарплаты в рубли.
+
+Строка зарплаты разбирается для каждой карточки SuperJob, и прежняя
+функция на каждом вызове заново собирала таблицу валют, искала их перебором
+подстрок и разбирала JSON курсов из настроек. SalaryNormalizer получает
+курсы один раз, разбирает строку одним проходом заранее скомпилированного
+регулярного выражения и запоминает результаты для повторяющихся строк
+(см. benchmarks/bench_salary.py). Курсы общего нормализатора процесса
+берутся у провайдера курсов (см. core.currency_rates).
+"""
+
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from core.currency_rates import BASE_CURRENCY, get_rate_provider, normalize_currency
+
+SalaryRange = Tuple[Optional[int], Optional[int]]
+
+# Обозначения валют в порядке приоритета: если в строке встречается
+# несколько валют, выбирается первая по этому списку
+CURRENCY_SYMBOLS = [
+    ("руб", "RUB"),
+    ("р.", "RUB"),
+    ("₽", "RUB"),
+    ("kzt", "KZT"),
+    ("тенге", "KZT"),
+    ("usd", "USD"),
+    ("$", "USD"),
+    ("eur", "EUR"),
+    ("€", "EUR"),
+]
+CURRENCY_PRIORITY = {
+    symbol: index for index, (symbol, _) in enumerate(CURRENCY_SYMBOLS)
+}
+CURRENCY_CODES = dict(CURRENCY_SYMBOLS)
+# Предлоги "от" и "до" - отдельными словами, обозначения валют - как
+# подстроки, числа - с пробелами между разрядами
+SALARY_TOKEN_RE = re.compile(
+    r"(?P<bound>(?<![а-яё])(?:от|до)(?![а-яё]))"
+    r"|(?P<number>\d[\d\s]*)"
+    r"|(?P<currency>" + "|".join(re.escape(s) for s, _ in CURRENCY_SYMBOLS) + ")"
+)
+UNSPECIFIED_MARKERS = ("не указана", "договор")
+DEFAULT_CACHE_SIZE = 16384
+
+
+class Salary(NamedTuple):
+    """Разобранная зарплата.
+
+    Attributes:
+        min_amount: Нижняя граница в исходной валюте.
+        max_amount: Верхняя граница в исходной валюте.
+        currency: Код исходной валюты или None, если сумм нет.
+        min_rub: Нижняя граница в рублях.
+        max_rub: Верхняя граница в рублях.
+    """
+
+    min_amount: Optional[int] = None
+    max_amount: Optional[int] = None
+    currency: Optional[str] = None
+    min_rub: Optional[int] = None
+    max_rub: Optional[int] = None
+
+
+class SalaryNormalizer:
+    """Разбор строк зарплаты с пересчетом в рубли по фиксированным курсам."""
+
+    def __init__(
+        self, rates: Dict[str, float], cache_size: int = DEFAULT_CACHE_SIZE
+    ) -> None:
+        """Создает нормализатор.
+
+        Args:
+            rates: Курсы валют к рублю по кодам валют.
+            cache_size: Количество запоминаемых результатов для повторных строк.
+        """
+        self.rates = {normalize_currency(code): rate for code, rate in rates.items()}
+        self.rates[BASE_CURRENCY] = 1.0
+        self._parse_cached = lru_cache(maxsize=cache_size)(self._parse)
+
+    def to_rub(self, amount: Optional[int], currency: str) -> Optional[int]:
+        """Пересчитывает сумму в рубли.
+
+        Returns:
+            Сумма в рублях или None, если суммы нет или курс валюты неизвестен.
+        """
+        rate = self.rates.get(currency)
+        if not amount or rate is None:
+            return None
+        return int(amount * rate) or None
+
+    def convert(
+        self,
+        min_amount: Optional[int],
+        max_amount: Optional[int],
+        currency: Optional[str],
+    ) -> Salary:
+        """Пересчитывает границы вилки в исходной валюте в рубли.
+
+        Args:
+            min_amount: Нижняя граница.
+            max_amount: Верхняя граница.
+            currency: Код валюты (например, "USD" или "RUR"); без кода
+                суммы считаются рублевыми.
+        """
+        code = normalize_currency(currency) if currency else BASE_CURRENCY
+        return Salary(
+            min_amount,
+            max_amount,
+            code,
+            self.to_rub(min_amount, code),
+            self.to_rub(max_amount, code),
+        )
+
+    def _parse(self, salary_str: str) -> Salary:
+        """Разбирает строку зарплаты без учета запомненных результатов."""
+        salary_str = salary_str.strip().lower()
+        salary_str = salary_str.replace("\u202f", " ").replace("\xa0", " ")
+        if any(marker in salary_str for marker in UNSPECIFIED_MARKERS):
+            return Salary()
+
+        numbers: List[int] = []
+        has_from = has_to = False
+        currency: Optional[str] = None
+        for match in SALARY_TOKEN_RE.finditer(salary_str):
+            kind = match.lastgroup
+            token = match.group()
+            if kind == "number":
+                numbers.append(int("".join(token.split())))
+            elif kind == "bound":
+                has_from = has_from or token == "от"
+                has_to = has_to or token == "до"
+            elif (
+                currency is None
+                or CURRENCY_PRIORITY[token] < CURRENCY_PRIORITY[currency]
+            ):
+                currency = token
+        if not numbers:
+            return Salary()
+
+        min_salary: Optional[int] = None
+        max_salary: Optional[int] = None
+        if has_from and has_to and len(numbers) >= 2:
+            min_salary, max_salary = min(numbers), max(numbers)
+        elif has_from:
+            min_salary = numbers[0]
+        elif has_to:
+            max_salary = numbers[0]
+        elif len(numbers) == 1:
+            min_salary = max_salary = numbers[0]
+        else:
+            min_salary, max_salary = min(numbers), max(numbers)
+        return self.convert(
+            min_salary, max_salary, CURRENCY_CODES[currency] if currency else None
+        )
+
+    def parse(self, salary_str: Optional[str]) -> Salary:
+        """Разбирает строку зарплаты в суммы исходной валюты и рублей.
+
+        Args:
+            salary_str: Строка зарплаты, например "от 50 000 до 80 000 KZT".
+        """
+        if not salary_str:
+            return Salary()
+        return self._parse_cached(salary_str)
+
+    def normalize(self, salary_str: Optional[str]) -> SalaryRange:
+        """Возвращает (min_salary_rub, max_salary_rub) для строки зарплаты.
+
+        Args:
+            salary_str: Строка зарплаты, например "от 50 000 до 80 000 KZT".
+
+        Returns:
+            Минимальная и максимальная зарплата в рублях; None, если граница
+            не указана или курс валюты неизвестен.
+        """
+        salary = self.parse(salary_str)
+        return salary.min_rub, salary.max_rub
+
+    def normalize_many(self, salary_strs: Iterable[Optional[str]]) -> List[SalaryRange]:
+        """Нормализует несколько строк зарплаты.
+
+        Повторяющиеся строки пачки разбираются один раз.
+        """
+        return [self.normalize(salary_str) for salary_str in salary_strs]
+
+
+_normalizer_lock = threading.Lock()
+_normalizer: Optional[SalaryNormalizer] = None
+_normalizer_rates: Optional[Dict[str, float]] = None
+
+
+def get_salary_normalizer() -> SalaryNormalizer:
+    """Возвращает общий нормализатор процесса для текущих курсов.
+
+    Курсы берутся у провайдера курсов (см. core.currency_rates); после их
+    смены создается новый нормализатор с пустой памятью результатов.
+    """
+    global _normalizer, _normalizer_rates
+    rates = get_rate_provider().rates()
+    with _normalizer_lock:
+        # Провайдер возвращает тот же словарь, пока курсы не перезагружены
+        if _normalizer is None or _normalizer_rates is not rates:
+            _normalizer = SalaryNormalizer(rates)
+            _normalizer_rates = rates
+        return _normalizer
@@ -1,34 +1,226 @@
-"""Парсер для superjob.ru с использованием requests и BeautifulSoup."""
+"""Парсер для superjob.ru с использованием requests и lxml.
+
+Страница поиска разбирается за один проход: lxml строит дерево, а поля
+карточек извлекаются заранее скомпилированными XPath-выражениями. Раньше
+дерево BeautifulSoup обходилось CSS-селектором отдельно для каждого поля
+каждой карточки, и разбор был основной нагрузкой на процессор при обходе
+(см. benchmarks/bench_superjob_extract.py).
+
+Разбор вынесен в функцию extract_page, которая принимает текст страницы и
+возвращает компактные записи CardRecord: при PARSE_WORKERS больше нуля
+страницы разбираются в пуле процессов (см. parsers.parse_pool), пока поток
+обхода загружает следующие.
+"""
 
 import logging
-import random
-import time
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Deque, List, NamedTuple, Optional, Tuple, Union
 from urllib.parse import quote_plus, urljoin
 
 import requests
-from bs4 import BeautifulSoup, Tag
+from lxml import etree, html
 from requests import Session
 
 from core.config import settings
-from parsers.base_parser import BaseParser
+from core.metrics import observe_page, observe_parser_error
+from parsers.base_parser import BaseParser, PageCallback, PageRangeResult, ParsedPage
+from parsers.dates import RussianDateResolver, get_date_resolver, today_reference
 from parsers.dto import VacancyDTO
-from parsers.utils import parse_salary_string
+from parsers.http_cache import get_http_cache
+from parsers.http_client import HttpClient
+from parsers.http_recording import get_http_recorder
+from parsers.parse_pool import get_parse_pool, shutdown_parse_pool
+from parsers.proxy_pool import get_proxy_pool
+from parsers.salary import SalaryNormalizer, get_salary_normalizer
 
 # Константы
 SUPERJOB_BASE_URL = "https://russia.superjob.ru"
-REQUEST_DELAY = 1  # Задержка между запросами
 USER_AGENT = "JobVacancyExplorer/1.0 (https://github.com/Relayn/job-vacancy-explorer)"
 MAX_PAGES = 5
 logger = logging.getLogger(__name__)
 
 
+def _has_classes(*classes: str) -> str:
+    """Возвращает условие XPath на наличие всех классов, как в CSS-селекторе."""
+    return " and ".join(
+        f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+        for name in classes
+    )
+
+
+CARDS_XPATH = etree.XPath(f"//div[{_has_classes('f-test-search-result-item')}]")
+NEXT_BUTTON_XPATH = etree.XPath(f"boolean(//a[{_has_classes('f-test-button-dalshe')}])")
+TITLE_XPATH = etree.XPath('(.//a[contains(@href, "/vakansii/")])[1]')
+COMPANY_XPATH = etree.XPath(
+    f"(.//span[{_has_classes('f-test-text-vacancy-item-company-name')}])[1]"
+)
+# Город - первый span в ближайшем div над значком с меткой
+LOCATION_XPATH = etree.XPath(
+    '((.//svg//use[@href="#pin"])[1]/ancestor::div[1]//span)[1]'
+)
+SALARY_XPATH = etree.XPath(
+    f"(.//*[{_has_classes('f-test-text-company-item-salary')}])[1]"
+)
+DATE_XPATH = etree.XPath(f"(.//span[{_has_classes('_2Q1BH', '_3doCL', '_2eclS')}])[1]")
+DESCRIPTION_XPATH = etree.XPath(
+    f"(.//span[{_has_classes('_2Q1BH', '_3doCL', '_2k8ZM', 'rtYnN', 'sPJuZ')}])"
+)
+
+
+class CardRecord(NamedTuple):
+    """Поля карточки вакансии, извлеченные из страницы поиска.
+
+    Компактная запись, которую процесс пула разбора передает обратно в
+    поток обхода; поля совпадают с одноименными полями VacancyDTO.
+    """
+
+    title: str
+    company: str
+    location: str
+    salary: str
+    description: str
+    published_at: datetime
+    original_url: str
+    salary_min_rub: Optional[int]
+    salary_max_rub: Optional[int]
+    salary_currency: Optional[str]
+    salary_min_amount: Optional[int]
+    salary_max_amount: Optional[int]
+
+
+ExtractedPage = Tuple[List[CardRecord], bool]
+# Разобранная страница или ее разбор в пуле процессов
+PageTask = Union[ParsedPage, "Future[ExtractedPage]"]
+
+
+def _first(xpath: etree.XPath, element: html.HtmlElement) -> Optional[html.HtmlElement]:
+    """Возвращает первый элемент, найденный выражением, или None."""
+    found = xpath(element)
+    return found[0] if found else None
+
+
+def _text(element: html.HtmlElement) -> str:
+    """Возвращает текст элемента без начальных и конечных пробелов."""
+    return str(element.text_content()).strip()
+
+
+def _extract_card(
+    card: html.HtmlElement,
+    base_url: str,
+    salaries: SalaryNormalizer,
+    dates: RussianDateResolver,
+) -> Optional[CardRecord]:
+    """Извлекает данные из одной карточки вакансии."""
+    try:
+        title_tag = _first(TITLE_XPATH, card)
+        if title_tag is None:
+            return None
+        title = _text(title_tag)
+        url = urljoin(base_url, title_tag.get("href"))
+
+        company_tag = _first(COMPANY_XPATH, card)
+        company = _text(company_tag) if company_tag is not None else "Не указана"
+
+        location_tag = _first(LOCATION_XPATH, card)
+        location = _text(location_tag) if location_tag is not None else "Не указан"
+
+        salary_tag = _first(SALARY_XPATH, card)
+        salary_str = (
+            _text(salary_tag) if salary_tag is not None else "По договоренности"
+        )
+
+        date_tag = _first(DATE_XPATH, card)
+        published_at = (
+            dates.resolve(date_tag.text_content())
+            if date_tag is not None
+            else dates.reference
+        )
+
+        # Строки текста каждого фрагмента описания через пробел, как
+        # get_text(separator=" ", strip=True) в BeautifulSoup
+        description = "\n".join(
+            " ".join(part.strip() for part in tag.itertext() if part.strip())
+            for tag in DESCRIPTION_XPATH(card)
+        )
+
+        salary = salaries.parse(salary_str)
+
+        return CardRecord(
+            title=title,
+            company=company,
+            location=location,
+            salary=salary_str,
+            description=description,
+            published_at=published_at,
+            original_url=url,
+            salary_min_rub=salary.min_rub,
+            salary_max_rub=salary.max_rub,
+            salary_currency=salary.currency,
+            salary_min_amount=salary.min_amount,
+            salary_max_amount=salary.max_amount,
+        )
+    except (AttributeError, KeyError, ValueError) as e:
+        logger.error("Ошибка при парсинге карточки вакансии: %s", e)
+        return None
+
+
+def extract_page(
+    text: str, base_url: str, reference: Optional[datetime] = None
+) -> ExtractedPage:
+    """Разбирает HTML-страницу поиска.
+
+    Выполняется и в процессах пула разбора, поэтому принимает и возвращает
+    только сериализуемые pickle значения.
+
+    Args:
+        text: Текст страницы.
+        base_url: Адрес сайта для абсолютных ссылок на вакансии.
+        reference: Момент отсчета обхода для относительных дат ("сегодня");
+            по умолчанию полночь текущего дня.
+
+    Returns:
+        Записи карточек и признак последней страницы.
+    """
+    if not text.strip():
+        return [], True
+    root = html.document_fromstring(text)
+    cards = CARDS_XPATH(root)
+    salaries = get_salary_normalizer()
+    dates = get_date_resolver(reference or today_reference())
+    records = [
+        record
+        for record in (_extract_card(card, base_url, salaries, dates) for card in cards)
+        if record
+    ]
+    # Без вакансий или кнопки "Дальше" страница последняя
+    last = not cards or not NEXT_BUTTON_XPATH(root)
+    return records, bool(last)
+
+
+def _to_page(extracted: ExtractedPage) -> ParsedPage:
+    """Преобразует записи карточек в VacancyDTO."""
+    records, last = extracted
+    return ParsedPage(
+        [VacancyDTO(source="superjob.ru", **record._asdict()) for record in records],
+        last,
+    )
+
+
 class SuperJobParser(BaseParser):
-    """Парсер для сайта superjob.ru, использующий requests и BeautifulSoup."""
+    """Парсер для сайта superjob.ru, использующий requests и lxml."""
+
+    source = "superjob.ru"
 
-    def __init__(self) -> None:
-        """Инициализирует сессию requests и настраивает прокси, если они есть."""
+    def __init__(self, base_url: str = SUPERJOB_BASE_URL) -> None:
+        """Инициализирует сессию requests и HTTP-клиент с пулом прокси, если они есть.
+
+        Args:
+            base_url: Адрес сайта (заменяется в бенчмарках).
+        """
+        self.base_url = base_url
         self.session: Session = requests.Session()
         self.session.headers.update(
             {
@@ -39,155 +231,177 @@ class SuperJobParser(BaseParser):
                 ),
             }
         )
-        self.proxies = settings.proxy_list_as_array
+        self.http = HttpClient(
+            self.source,
+            self.session,
+            proxy_pool=get_proxy_pool(),
+            cache=get_http_cache(),
+            recorder=get_http_recorder(),
+        )
 
     def __del__(self) -> None:
         """Закрывает сессию requests при уничтожении объекта."""
         if hasattr(self, "session"):
             self.session.close()
 
-    def _get_proxy(self) -> Optional[Dict[str, str]]:
-        """Возвращает случайный прокси из списка."""
-        if not self.proxies:
-            return None
-        proxy_url = random.choice(self.proxies)  # nosec B311
-        return {"http": proxy_url, "https": proxy_url}
-
-    def _parse_date(self, date_str: str) -> datetime:
-        """Преобразует строку с датой в объект datetime."""
-        date_str = date_str.strip().lower()
-        if "сегодня" in date_str:
-            return datetime.now()
-        if "вчера" in date_str:
-            return datetime.now() - timedelta(days=1)
-
-        # Обработка формата "19 июля"
-        months_map = {
-            "января": 1,
-            "февраля": 2,
-            "марта": 3,
-            "апреля": 4,
-            "мая": 5,
-            "июня": 6,
-            "июля": 7,
-            "августа": 8,
-            "сентября": 9,
-            "октября": 10,
-            "ноября": 11,
-            "декабря": 12,
-        }
-        parts = date_str.split()
-        if len(parts) >= 2 and parts[1] in months_map:
-            day = int(parts[0])
-            month = months_map[parts[1]]
-            year = datetime.now().year
-            return datetime(year, month, day)
-
-        return datetime.now()  # Возврат текущей даты, если формат не распознан
+    def _parse_page(
+        self, response: requests.Response, reference: Optional[datetime] = None
+    ) -> ParsedPage:
+        """Разбирает HTML-страницу поиска.
+
+        reference - момент отсчета обхода для относительных дат.
+        """
+        return _to_page(extract_page(response.text, self.base_url, reference))
+
+    def _start_page(
+        self,
+        response: requests.Response,
+        pool: Optional[ProcessPoolExecutor],
+        reference: datetime,
+    ) -> PageTask:
+        """Начинает разбор страницы: в пуле процессов или сразу в потоке обхода.
+
+        Страница, тело которой не изменилось, берется из HTTP-кэша.
+        """
+        page = self._cached_page(response)
+        if page is not None:
+            return page
+        if pool is not None:
+            try:
+                return pool.submit(
+                    extract_page, response.text, self.base_url, reference
+                )
+            except BrokenProcessPool:
+                logger.warning("Пул разбора недоступен, разбор в потоке обхода.")
+                shutdown_parse_pool()
+        page = self._parse_page(response, reference)
+        self._store_page(response, page)
+        return page
+
+    def _finish_page(
+        self, response: requests.Response, task: PageTask, reference: datetime
+    ) -> ParsedPage:
+        """Дожидается разбора страницы и сохраняет его в HTTP-кэше."""
+        if isinstance(task, ParsedPage):
+            return task
+        try:
+            page = _to_page(task.result())
+        except BrokenProcessPool:
+            # Процесс пула завершился аварийно - страница разбирается здесь,
+            # а следующий обход создаст новый пул
+            logger.warning("Пул разбора завершился аварийно, разбор в потоке обхода.")
+            shutdown_parse_pool()
+            page = self._parse_page(response, reference)
+        self._store_page(response, page)
+        return page
+
+    @classmethod
+    def page_range(cls) -> Tuple[int, int]:
+        """Возвращает номера первой и последней доступной страницы выдачи."""
+        return 1, MAX_PAGES
 
     def parse(self, search_query: str) -> List[VacancyDTO]:
         """Основной метод парсинга вакансий с superjob.ru."""
         logger.info("Начало парсинга superjob.ru по запросу: '%s'", search_query)
-        vacancies_dto = []
+        first_page, last_page = self.page_range()
+        result = self.parse_pages(search_query, first_page, last_page)
+        logger.info(
+            "Парсинг superjob.ru завершен. Найдено %d вакансий.",
+            len(result.vacancies),
+        )
+        return result.vacancies
+
+    def parse_pages(
+        self,
+        search_query: str,
+        first_page: int,
+        last_page: int,
+        on_page: Optional[PageCallback] = None,
+        area: Optional[str] = None,
+    ) -> PageRangeResult:
+        """Обходит страницы поиска с first_page по last_page включительно.
+
+        area - идентификатор города SuperJob (например, 4 - Москва); без него
+        поиск идет по всей России.
+
+        С пулом разбора (PARSE_WORKERS больше нуля) загрузка и разбор идут
+        конвейером: пока страницы разбираются в процессах пула, поток обхода
+        загружает следующие, но не больше PARSE_QUEUE_SIZE страниц ждут
+        разбора одновременно. Результаты обрабатываются в порядке страниц,
+        а страницы, загруженные после последней, отбрасываются.
+        """
+        vacancies_dto: List[VacancyDTO] = []
+        cache_stats = self.http.reset_cache_stats()
         # quote_plus ожидает строку, гарантируем тип
         encoded_query = quote_plus(str(search_query))
+        region = f"&geo%5Bt%5D%5B0%5D={quote_plus(area)}" if area else ""
+        # Общий момент отсчета дат "сегодня" и "вчера" для всех страниц обхода
+        # и всех обходов одного дня
+        reference = today_reference()
+        pool = get_parse_pool()
+        # Без пула страница разбирается сразу после загрузки
+        depth = max(settings.PARSE_QUEUE_SIZE, 1) if pool is not None else 1
+        pending: Deque[Tuple[requests.Response, PageTask]] = deque()
+        pages_parsed = 0
+
+        def finish_oldest() -> bool:
+            """Обрабатывает самую раннюю страницу; True, если она последняя."""
+            nonlocal pages_parsed
+            response, task = pending.popleft()
+            parsed = self._finish_page(response, task, reference)
+            observe_page(self.source, len(parsed.vacancies))
+            vacancies_dto.extend(parsed.vacancies)
+            pages_parsed += 1
+            if on_page is not None:
+                on_page(pages_parsed, len(vacancies_dto))
+            if parsed.last:
+                logger.info(
+                    "Страница %d последняя, завершение парсинга.",
+                    first_page + pages_parsed - 1,
+                )
+                for _, rest in pending:
+                    if not isinstance(rest, ParsedPage):
+                        rest.cancel()
+                pending.clear()
+            return parsed.last
 
-        for page_num in range(1, MAX_PAGES + 1):
+        for page_num in range(first_page, last_page + 1):
             search_url = (
-                f"{SUPERJOB_BASE_URL}/vacancy/search/"
-                f"?keywords={encoded_query}&page={page_num}"
+                f"{self.base_url}/vacancy/search/"
+                f"?keywords={encoded_query}{region}&page={page_num}"
             )
             logger.info("Парсинг страницы: %s", search_url)
 
             try:
-                response = self.session.get(
-                    search_url, proxies=self._get_proxy(), timeout=10
-                )
-                response.raise_for_status()
+                response = self.http.get(search_url)
             except requests.RequestException as e:
                 logger.error("Ошибка при запросе страницы %d: %s", page_num, e)
-                break
-
-            soup = BeautifulSoup(response.text, "lxml")
-            # Используем новый, более надежный селектор
-            vacancy_cards = soup.select("div.f-test-search-result-item")
-
-            if not vacancy_cards:
-                logger.info("Вакансии на странице не найдены, завершение парсинга.")
-                break
-
-            for card in vacancy_cards:
-                dto = self._parse_vacancy_card(card)
-                if dto:
-                    vacancies_dto.append(dto)
-
-            # Проверка наличия кнопки "Дальше"
-            next_page_tag = soup.select_one("a.f-test-button-dalshe")
-            if not next_page_tag:
-                logger.info("Кнопка 'Дальше' не найдена, это последняя страница.")
-                break
+                observe_parser_error(self.source)
+                # Загруженные до ошибки страницы разбираются до конца
+                while pending:
+                    if finish_oldest():
+                        return PageRangeResult(
+                            vacancies_dto, pages_parsed, True, cache_stats=cache_stats
+                        )
+                return PageRangeResult(
+                    vacancies_dto,
+                    pages_parsed,
+                    False,
+                    failed_page=page_num,
+                    cache_stats=cache_stats,
+                )
 
-            time.sleep(REQUEST_DELAY)
+            pending.append((response, self._start_page(response, pool, reference)))
+            if len(pending) >= depth and finish_oldest():
+                return PageRangeResult(
+                    vacancies_dto, pages_parsed, True, cache_stats=cache_stats
+                )
 
-        logger.info(
-            "Парсинг superjob.ru завершен. Найдено %d вакансий.",
-            len(vacancies_dto),
+        while pending:
+            if finish_oldest():
+                return PageRangeResult(
+                    vacancies_dto, pages_parsed, True, cache_stats=cache_stats
+                )
+        return PageRangeResult(
+            vacancies_dto, pages_parsed, False, cache_stats=cache_stats
         )
-        return vacancies_dto
-
-    def _parse_vacancy_card(self, card: Tag) -> Optional[VacancyDTO]:
-        """Извлекает данные из одной карточки вакансии."""
-        try:
-            title_tag = card.select_one('a[href*="/vakansii/"]')
-            if not title_tag:
-                return None
-            href_value = title_tag.get("href")
-            if not isinstance(href_value, str):
-                return None
-            title = title_tag.text.strip()
-            url = urljoin(SUPERJOB_BASE_URL, href_value)
-
-            company_tag = card.select_one("span.f-test-text-vacancy-item-company-name")
-            company = company_tag.text.strip() if company_tag else "Не указана"
-
-            location_pin = card.select_one('svg use[href="#pin"]')
-            location = "Не указан"
-            if location_pin:
-                parent_div = location_pin.find_parent("div")
-                if isinstance(parent_div, Tag):
-                    location_tag = parent_div.find("span")
-                    if location_tag:
-                        location = location_tag.text.strip()
-
-            salary_tag = card.select_one(".f-test-text-company-item-salary")
-            salary_str = salary_tag.text.strip() if salary_tag else "По договоренности"
-
-            date_tag = card.select_one("span._2Q1BH._3doCL._2eclS")
-            published_at = (
-                self._parse_date(date_tag.text) if date_tag else datetime.now()
-            )
-
-            description_tags = card.select("span._2Q1BH._3doCL._2k8ZM.rtYnN.sPJuZ")
-            description = "\n".join(
-                [tag.get_text(separator=" ", strip=True) for tag in description_tags]
-            )
-
-            # --- Новая логика нормализации зарплаты ---
-            salary_min_rub, salary_max_rub = parse_salary_string(salary_str)
-            # -------------------------------------------
-
-            return VacancyDTO(
-                title=title,
-                company=company,
-                location=location,
-                salary=salary_str,
-                description=description,
-                published_at=published_at,
-                source="superjob.ru",
-                original_url=url,
-                salary_min_rub=salary_min_rub,
-                salary_max_rub=salary_max_rub,
-            )
-        except (AttributeError, KeyError, ValueError) as e:
-            logger.error("Ошибка при парсинге карточки вакансии: %s", e)
-            return None
@@ -1,9 +1,12 @@
 """Модульные тесты для роутов Flask-приложения."""
 
-from unittest.mock import patch
+from datetime import datetime
+from unittest.mock import Mock, patch
 
 from flask.testing import FlaskClient
 
+from core.models import CrawlRun, SavedSearch
+
 
 def test_index_route(
     client: FlaskClient,
@@ -76,23 +79,32 @@ def test_trigger_parse_route(
 ) -> None:
     """Тестирует маршрут '/trigger-parse'.
 
-    Убеждается, что POST-запрос корректно запускает задачу в планировщике.
+    Убеждается, что POST-запрос ставит задачу в очередь, а не запускает ее.
     """
-    # Arrange: Мокируем метод add_job у планировщика
-    with patch("app.routes.scheduler.add_job") as mock_add_job:
-        # Действие: выполняем POST-запрос
+    job = Mock(id=7, query="Data Science")
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.enqueue_parse_job", return_value=(job, True)) as mock_enqueue,
+    ):
         response = client.post("/trigger-parse", data={"query": "Data Science"})
 
-        # Проверка
-        # 1) Произошел редирект на страницу вакансий
         assert response.status_code == 302
         assert response.location == "/vacancies"
+        assert mock_enqueue.call_args.args[1] == "Data Science"
+
 
-        # 2) Метод add_job был вызван один раз
-        mock_add_job.assert_called_once()
-        # 3) Он был вызван с правильным поисковым запросом
-        _, call_kwargs = mock_add_job.call_args
-        assert call_kwargs["args"][0] == "Data Science"
+def test_parse_job_status_route(client: FlaskClient) -> None:
+    """Тестирует эндпоинт состояния задачи парсинга."""
+    status = {"id": 7, "status": "pending", "queue_position": 2}
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.get_parse_job_status", side_effect=[status, None]),
+    ):
+        response = client.get("/parse-jobs/7")
+        assert response.status_code == 200
+        assert response.json == status
+
+        assert client.get("/parse-jobs/8").status_code == 404
 
 
 def test_health_check_route_ok(client: FlaskClient) -> None:
@@ -103,7 +115,8 @@ def test_health_check_route_ok(client: FlaskClient) -> None:
         response = client.get("/health")
         # Assert
         assert response.status_code == 200
-        assert response.json == {"status": "ok"}
+        # На SQLite процесс всегда ведущий
+        assert response.json == {"status": "ok", "scheduler_leader": True}
 
 
 def test_analytics_route(client: FlaskClient) -> None:
@@ -118,3 +131,251 @@ def test_analytics_route(client: FlaskClient) -> None:
         # Assert
         assert response.status_code == 200
         assert "Аналитика по вакансиям".encode("utf-8") in response.data
+
+
+def test_similar_vacancies_route(client: FlaskClient) -> None:
+    """Тестирует эндпоинт /vacancies/<id>/similar."""
+    vacancy = Mock(id=1, title="Python-разработчик", description="Django")
+    similar = Mock(
+        id=2,
+        title="Python developer",
+        company="Acme",
+        location="Москва",
+        salary="от 100000 RUB",
+        source="hh.ru",
+        original_url="https://hh.ru/vacancy/2",
+        published_at=datetime(2025, 7, 1, 12, 0),
+    )
+    index = Mock()
+    index.search.return_value = [(2, 0.81234), (3, 0.5)]
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.get_similarity_index", return_value=index),
+        patch("app.routes.get_vacancy_by_id", return_value=vacancy),
+        patch("app.routes.get_vacancies_by_ids", return_value=[similar]) as mock_ids,
+    ):
+        # Act
+        response = client.get("/vacancies/1/similar?limit=5")
+        # Assert
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["similar"][0]["id"] == 2
+        assert response.json["similar"][0]["score"] == 0.8123
+        assert index.search.call_args.kwargs["exclude_id"] == 1
+        assert mock_ids.call_args.args[1] == [2, 3]
+
+
+def test_similar_vacancies_route_errors(client: FlaskClient) -> None:
+    """Тестирует ответы эндпоинта без индекса и для неизвестной вакансии."""
+    with patch("app.routes.get_similarity_index", return_value=None):
+        assert client.get("/vacancies/1/similar").status_code == 503
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.get_similarity_index", return_value=Mock()),
+        patch("app.routes.get_vacancy_by_id", return_value=None),
+    ):
+        assert client.get("/vacancies/1/similar").status_code == 404
+
+
+def test_saved_search_routes(client: FlaskClient) -> None:
+    """Тестирует сохранение поиска и проверку новых вакансий."""
+    search = SavedSearch(
+        id=7,
+        name="Python",
+        query="Python",
+        location="Москва",
+        new_count=0,
+        last_checked_at=datetime(2025, 8, 1, 12, 0),
+    )
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.create_saved_search", return_value=search) as mock_create,
+        patch("app.routes.check_saved_search", return_value=(search, 5)),
+    ):
+        # Act
+        response = client.post(
+            "/saved-searches", data={"query": "Python", "location": "Москва"}
+        )
+        checked = client.post("/saved-searches/7/check")
+        # Assert
+        assert response.status_code == 302
+        assert "query=Python" in response.headers["Location"]
+        assert mock_create.call_args.kwargs["name"] == "Python"
+        assert checked.status_code == 200
+        assert checked.json is not None
+        assert checked.json["new_count"] == 5
+        assert checked.json["filters"] == {"query": "Python", "location": "Москва"}
+
+
+def test_processes_route(client: FlaskClient) -> None:
+    """Тестирует эндпоинт /processes с метриками веб-процесса и сборщика."""
+    worker = Mock()
+    worker.process_id = "worker-host:42"
+    worker.as_dict.return_value = {"process_id": "worker-host:42", "role": "worker"}
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.get_process_heartbeats", return_value=[worker]),
+    ):
+        response = client.get("/processes")
+
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json["current"]["role"] == "web"
+        assert response.json["current"]["max_rss_kb"] > 0
+        assert set(response.json["db_pool"]) == {
+            "capacity",
+            "checked_out",
+            "peak_checked_out",
+            "checkouts",
+            "saturation",
+        }
+        assert response.json["processes"] == [
+            {"process_id": "worker-host:42", "role": "worker"}
+        ]
+
+
+def test_slow_queries_route(client: FlaskClient) -> None:
+    """Тестирует эндпоинт журнала медленных запросов и его очистку."""
+    queries = [{"statement": "SELECT 1", "duration_ms": 812.5, "plan": None}]
+    with (
+        patch("app.routes.slow_query_log") as mock_log,
+        patch("app.routes.settings.ADMIN_TOKEN", "secret"),
+    ):
+        mock_log.threshold_ms = 500
+        mock_log.snapshot.return_value = queries
+
+        headers = {"Authorization": "Bearer secret"}
+        response = client.get("/slow-queries?limit=5", headers=headers)
+        cleared = client.delete("/slow-queries", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json is not None
+    assert response.json["threshold_ms"] == 500
+    assert response.json["queries"] == queries
+    mock_log.snapshot.assert_called_once_with(5)
+    assert cleared.status_code == 204
+    mock_log.clear.assert_called_once()
+
+
+def test_admin_routes_require_token(client: FlaskClient) -> None:
+    """Тестирует доступ к служебным маршрутам по токену администратора."""
+    with patch("app.routes.slow_query_log") as mock_log:
+        mock_log.threshold_ms = 500
+        mock_log.snapshot.return_value = []
+
+        # Без настроенного токена журнал с параметрами запросов закрыт,
+        # а остальные служебные маршруты только для чтения открыты
+        no_token = client.get("/slow-queries")
+        assert no_token.status_code == 403
+        assert no_token.get_json() == {"error": "admin token is not configured"}
+        assert client.delete("/slow-queries").status_code == 403
+        mock_log.snapshot.assert_not_called()
+        with (
+            patch("app.routes.get_db"),
+            patch("app.routes.get_proxy_stats", return_value=[]),
+        ):
+            assert client.get("/proxies").status_code == 200
+
+        with patch("app.routes.settings.ADMIN_TOKEN", "secret"):
+            assert client.get("/slow-queries").status_code == 401
+            wrong = {"Authorization": "Bearer wrong"}
+            assert client.delete("/slow-queries", headers=wrong).status_code == 401
+            with patch("app.routes.get_db"):
+                assert client.get("/proxies").status_code == 401
+                assert client.get("/processes").status_code == 401
+
+    mock_log.clear.assert_not_called()
+
+
+def test_metrics_route_reports_request_durations(client: FlaskClient) -> None:
+    """Тестирует эндпоинт метрик Prometheus с временем обработки запросов."""
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.get_proxy_stats", return_value=[]),
+    ):
+        client.get("/proxies")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/proxies",'
+        'status="200"}'
+    ) in response.get_data(as_text=True)
+
+
+def test_proxies_route(client: FlaskClient) -> None:
+    """Тестирует эндпоинт статистики прокси процессов сборщика."""
+    stats = [{"process_id": "worker-host:42", "proxy": "http://10.0.0.1:3128"}]
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.get_proxy_stats", return_value=stats),
+    ):
+        response = client.get("/proxies")
+
+        assert response.status_code == 200
+        assert response.json == stats
+
+
+def test_crawl_units_route(client: FlaskClient) -> None:
+    """Тестирует эндпоинт состояния распределенного обхода."""
+    summary = {"hh.ru": {"done": 3, "leased": 1}}
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.get_crawl_summary", return_value=summary),
+    ):
+        response = client.get("/crawl-units")
+
+        assert response.status_code == 200
+        assert response.json == summary
+
+
+def test_crawl_plan_route(client: FlaskClient) -> None:
+    """Тестирует эндпоинт плана обхода со статистикой записей."""
+    stats = [{"key": "hh.ru||Python", "runs": 2, "avg_latency_seconds": 42.0}]
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.get_crawl_plan_stats", return_value=stats) as mock_stats,
+    ):
+        response = client.get("/crawl-plan")
+
+        assert response.status_code == 200
+        assert response.json == stats
+        entries = mock_stats.call_args.args[1]
+        assert [entry.key for entry in entries] == [
+            "hh.ru||Python",
+            "superjob.ru||Python",
+        ]
+
+    with patch("app.routes.configured_crawl_plan", side_effect=ValueError("bad")):
+        response = client.get("/crawl-plan")
+
+        assert response.status_code == 500
+
+
+def test_crawl_plan_history_route(client: FlaskClient) -> None:
+    """Тестирует эндпоинт истории запусков записи плана."""
+    run = CrawlRun(
+        id=3,
+        planned_at=datetime(2025, 9, 1, 12, 0),
+        interval=2400,
+        estimated_pages=5,
+        units_total=1,
+        pages_fetched=5,
+        found_count=100,
+        added_count=0,
+    )
+    with (
+        patch("app.routes.get_db"),
+        patch("app.routes.get_crawl_run_history", return_value=[run]) as mock_history,
+    ):
+        response = client.get("/crawl-plan/history?key=hh.ru||Python&limit=500")
+
+        assert response.status_code == 200
+        assert response.json is not None
+        assert response.json[0]["interval"] == 2400
+        assert response.json[0]["finished_at"] is None
+        assert mock_history.call_args.args[1:] == ("hh.ru||Python", 200)
+
+    assert client.get("/crawl-plan/history").status_code == 400
@@ -0,0 +1,231 @@
+"""Тесты для плана периодического обхода."""
+
+from datetime import datetime, timedelta
+from typing import Any, Generator, List, Optional
+
+import pytest
+from sqlalchemy.orm import Session
+
+from core.crawl_plan import (
+    CrawlPlanEntry,
+    close_finished_runs,
+    crawl_run_to_dict,
+    get_crawl_plan_stats,
+    get_crawl_run_history,
+    load_crawl_plan,
+    next_interval,
+    plan_due_entries,
+)
+from core.crawl_units import DONE
+from core.database import SessionLocal
+from core.models import CrawlRun, CrawlUnit
+
+SOURCES = ["hh.ru", "superjob.ru"]
+RANGES = {"hh.ru": (0, 39), "superjob.ru": (1, 5)}
+NOW = datetime(2025, 9, 1, 12, 0)
+
+
+@pytest.fixture
+def db_session(setup_test_db: Any) -> Generator[Session, None, None]:
+    """Предоставляет чистую сессию БД для каждого теста."""
+    SessionLocal.configure(bind=setup_test_db)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _finish_units(
+    db: Session, pages: int, finished_at: datetime, added: Optional[int] = None
+) -> None:
+    """Завершает все единицы, как если бы их обошли процессы сборщика."""
+    db.query(CrawlUnit).filter(CrawlUnit.status != DONE).update(
+        {
+            CrawlUnit.status: DONE,
+            CrawlUnit.pages_fetched: pages,
+            CrawlUnit.found_count: pages * 20,
+            CrawlUnit.added_count: pages if added is None else added,
+            CrawlUnit.finished_at: finished_at,
+        }
+    )
+    db.commit()
+
+
+def _planned(runs: List[CrawlRun]) -> List[str]:
+    """Возвращает ключи записей созданных запусков."""
+    return [run.entry_key for run in runs]
+
+
+def test_load_crawl_plan_expands_sources_and_intervals() -> None:
+    """Тест раскрытия записей без источника и интервалов по приоритету."""
+    raw = (
+        '[{"query": "Python", "priority": 4},'
+        ' {"query": "Go", "source": "hh.ru", "area": "2", "interval": 600}]'
+    )
+
+    entries = load_crawl_plan(raw, "Python", 3600, SOURCES)
+
+    assert [(entry.key, entry.interval) for entry in entries] == [
+        ("hh.ru||Python", 900),
+        ("superjob.ru||Python", 900),
+        ("hh.ru|2|Go", 600),
+    ]
+    # Без границ интервал постоянен, а границы всегда включают его
+    assert (entries[2].min_interval, entries[2].max_interval) == (600, 600)
+    bounded = load_crawl_plan(raw, "Python", 3600, SOURCES, 700, 86400)
+    assert (bounded[0].min_interval, bounded[0].max_interval) == (700, 86400)
+    assert (bounded[2].min_interval, bounded[2].max_interval) == (600, 86400)
+    assert [entry.key for entry in load_crawl_plan(None, "Rust", 3600, SOURCES)] == [
+        "hh.ru||Rust",
+        "superjob.ru||Rust",
+    ]
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        '{"query": "Python"}',
+        '[{"query": "Python", "area": "1"}]',
+        '[{"query": "Python", "source": "example.com"}]',
+        '[{"query": "Python", "priority": 0}]',
+        '[{"query": "Python", "min_interval": 60, "max_interval": 30}]',
+        '[{"query": "Python"}, {"query": "Python", "source": "hh.ru"}]',
+    ],
+)
+def test_load_crawl_plan_rejects_invalid_plan(raw: str) -> None:
+    """Тест отказа от некорректного плана обхода."""
+    with pytest.raises(ValueError):
+        load_crawl_plan(raw, "Python", 3600, SOURCES)
+
+
+def test_entries_are_planned_by_priority_and_interval(db_session: Session) -> None:
+    """Тест планирования записей только после завершения и истечения интервала."""
+    entries = [
+        CrawlPlanEntry(query="Go", source="superjob.ru", interval=1800),
+        CrawlPlanEntry(query="Python", source="superjob.ru", priority=2, interval=600),
+    ]
+
+    runs = plan_due_entries(db_session, entries, RANGES, {}, 5, now=NOW)
+
+    assert _planned(runs) == ["superjob.ru||Python", "superjob.ru||Go"]
+    assert db_session.query(CrawlUnit).filter_by(priority=2).count() == 1
+    # Запуски еще не завершены
+    later = NOW + timedelta(hours=1)
+    assert plan_due_entries(db_session, entries, RANGES, {}, 5, now=later) == []
+
+    _finish_units(db_session, pages=3, finished_at=NOW + timedelta(minutes=2))
+    assert close_finished_runs(db_session) == 2
+
+    soon = NOW + timedelta(minutes=15)
+    assert _planned(plan_due_entries(db_session, entries, RANGES, {}, 5, now=soon)) == [
+        "superjob.ru||Python"
+    ]
+
+
+def test_source_budget_defers_entries(db_session: Session) -> None:
+    """Тест откладывания записей, не укладывающихся в бюджет источника."""
+    entries = [
+        CrawlPlanEntry(query="Python", source="hh.ru", priority=3, interval=60),
+        CrawlPlanEntry(query="Go", source="hh.ru", max_pages=10, interval=60),
+    ]
+    budgets = {"hh.ru": 45}
+
+    runs = plan_due_entries(db_session, entries, RANGES, budgets, 20, now=NOW)
+
+    # 40 страниц первого запуска не оставляют места для 10 страниц второго
+    assert _planned(runs) == ["hh.ru||Python"]
+    _finish_units(db_session, pages=2, finished_at=NOW + timedelta(minutes=1))
+    close_finished_runs(db_session)
+
+    # Фактически загружено 4 страницы, а оценка следующего запуска - 4
+    later = NOW + timedelta(minutes=2)
+    runs = plan_due_entries(db_session, entries, RANGES, budgets, 20, now=later)
+    assert _planned(runs) == ["hh.ru||Python", "hh.ru||Go"]
+    assert [run.estimated_pages for run in runs] == [4, 10]
+
+
+def test_crawl_plan_stats(db_session: Session) -> None:
+    """Тест статистики задержки и выхода вакансий записей плана."""
+    entries = [
+        CrawlPlanEntry(query="Python", source="superjob.ru", interval=60),
+        CrawlPlanEntry(query="Go", source="superjob.ru", interval=60),
+    ]
+    plan_due_entries(db_session, entries[:1], RANGES, {}, 5, now=NOW)
+    _finish_units(db_session, pages=4, finished_at=NOW + timedelta(seconds=90))
+    close_finished_runs(db_session)
+
+    python, go = get_crawl_plan_stats(db_session, entries)
+
+    assert python["runs"] == 1
+    assert python["last_latency_seconds"] == 90
+    assert python["pages_fetched"] == 4
+    assert python["yield_per_page"] == 20
+    assert go["runs"] == 0 and go["last_planned_at"] is None
+
+
+def test_runs_sum_http_cache_stats(db_session: Session) -> None:
+    """Тест сведения счетчиков HTTP-кэша единиц в итоги запуска."""
+    entry = CrawlPlanEntry(query="Python", source="hh.ru", interval=60)
+    plan_due_entries(db_session, [entry], RANGES, {}, 20, now=NOW)
+    db_session.query(CrawlUnit).update(
+        {
+            CrawlUnit.cache_requests: 20,
+            CrawlUnit.cache_hits: 15,
+            CrawlUnit.cache_bytes_saved: 1000,
+        }
+    )
+    _finish_units(db_session, pages=20, finished_at=NOW)
+    close_finished_runs(db_session)
+
+    run = crawl_run_to_dict(db_session.query(CrawlRun).one())
+
+    assert run["cache_requests"] == 40
+    assert run["cache_hit_ratio"] == 0.75
+    assert run["cache_bytes_saved"] == 2000
+
+
+def test_next_interval_backs_off_on_zero_yield() -> None:
+    """Тест увеличения интервала без новых вакансий и уменьшения с ними."""
+    entry = CrawlPlanEntry(
+        query="Python",
+        source="hh.ru",
+        interval=1000,
+        min_interval=300,
+        max_interval=3000,
+    )
+    idle = CrawlRun(interval=2000, added_count=0, finished_at=NOW)
+    busy = CrawlRun(interval=500, added_count=12, finished_at=NOW)
+
+    assert next_interval(entry, None, 2.0) == 1000
+    assert next_interval(entry, idle, 2.0) == 3000
+    assert next_interval(entry, busy, 2.0) == 300
+    # Незавершенный запуск не меняет интервал
+    assert next_interval(entry, CrawlRun(interval=2000), 2.0) == 1000
+
+
+def test_interval_history_follows_yield(db_session: Session) -> None:
+    """Тест планирования через адаптивный интервал и его истории."""
+    entry = CrawlPlanEntry(
+        query="Python",
+        source="superjob.ru",
+        interval=1200,
+        min_interval=600,
+        max_interval=4800,
+    )
+    now = NOW
+    for added in [0, 0, 5]:
+        runs = plan_due_entries(db_session, [entry], RANGES, {}, 5, now=now)
+        assert len(runs) == 1
+        _finish_units(db_session, 5, now + timedelta(minutes=1), added=added)
+        close_finished_runs(db_session)
+        interval = next_interval(entry, runs[0], 2.0)
+        # Раньше нового интервала запись не планируется
+        early = now + timedelta(seconds=interval - 1)
+        assert plan_due_entries(db_session, [entry], RANGES, {}, 5, now=early) == []
+        now += timedelta(seconds=interval)
+    plan_due_entries(db_session, [entry], RANGES, {}, 5, now=now)
+
+    history = get_crawl_run_history(db_session, entry.key, limit=10)
+    assert [run.interval for run in history] == [2400, 4800, 2400, 1200]
+    assert [run.added_count for run in history] == [0, 5, 0, 0]
@@ -0,0 +1,364 @@
+"""Тесты для распределенного обхода источников единицами с арендой."""
+
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+
+import pytest
+import requests
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.crawl_units import (
+    DONE,
+    FAILED,
+    PENDING,
+    SKIPPED,
+    claim_crawl_unit,
+    extend_crawl_lease,
+    finish_crawl_unit,
+    get_crawl_summary,
+    plan_crawl_units,
+    process_crawl_units,
+)
+from core.database import SessionLocal
+from core.models import CrawlUnit, Vacancy
+from parsers.base_parser import BaseParser, PageCallback, PageRangeResult
+from parsers.dto import VacancyDTO
+from parsers.hh_parser import HHParser
+from parsers.http_client import HttpClient
+
+LEASE = timedelta(minutes=1)
+
+
+@pytest.fixture
+def db_session(setup_test_db: Any) -> Generator[Session, None, None]:
+    """Предоставляет чистую сессию БД для каждого теста."""
+    SessionLocal.configure(bind=setup_test_db)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class FakeParser(BaseParser):
+    """Парсер с выдачей из last_page страниц по одной вакансии."""
+
+    source = "fake"
+    last_page = 6
+
+    def __init__(self) -> None:
+        """Создает HTTP-клиент источника без обращений к сети."""
+        self.http = HttpClient(self.source, requests.Session())
+
+    def parse(self, search_query: str) -> List[VacancyDTO]:
+        """Обходит всю выдачу."""
+        return self.parse_pages(search_query, *self.page_range()).vacancies
+
+    @classmethod
+    def page_range(cls) -> Tuple[int, int]:
+        """Возвращает диапазон страниц выдачи."""
+        return 0, 9
+
+    def parse_pages(
+        self,
+        search_query: str,
+        first_page: int,
+        last_page: int,
+        on_page: Optional[PageCallback] = None,
+        area: Optional[str] = None,
+    ) -> PageRangeResult:
+        """Возвращает по одной вакансии на каждую существующую страницу."""
+        region = f"{area}/" if area else ""
+        vacancies = []
+        for page in range(first_page, min(last_page, self.last_page) + 1):
+            vacancies.append(
+                VacancyDTO(
+                    title=f"{search_query} {page}",
+                    company="Test Co",
+                    location="Москва",
+                    salary=None,
+                    description=f"Страница {page}",
+                    published_at=datetime(2025, 8, 1),
+                    source=self.source,
+                    original_url=f"https://example.com/{region}{search_query}/{page}",
+                )
+            )
+            if on_page is not None:
+                on_page(len(vacancies), len(vacancies))
+        return PageRangeResult(vacancies, len(vacancies), last_page >= self.last_page)
+
+
+def _statuses(db: Session) -> List[Tuple[int, int, str]]:
+    """Возвращает диапазоны и состояния единиц в порядке планирования."""
+    db.expire_all()
+    return [
+        (unit.page_start, unit.page_end, unit.status)
+        for unit in db.query(CrawlUnit).order_by(CrawlUnit.id)
+    ]
+
+
+def test_plan_splits_pages_and_skips_outstanding(db_session: Session) -> None:
+    """Тест деления выдачи на единицы без повторного планирования."""
+    ranges = {"hh.ru": (0, 11), "superjob.ru": (1, 5)}
+
+    assert plan_crawl_units(db_session, "Python", ranges, pages_per_unit=5) == 4
+    assert _statuses(db_session) == [
+        (0, 4, PENDING),
+        (5, 9, PENDING),
+        (10, 11, PENDING),
+        (1, 5, PENDING),
+    ]
+    # Предыдущий обход еще не завершен - новые единицы не нужны
+    assert plan_crawl_units(db_session, "Python", ranges, pages_per_unit=5) == 0
+    assert plan_crawl_units(db_session, "Go", ranges, pages_per_unit=5) == 4
+
+
+def test_units_are_claimed_by_priority_per_area(db_session: Session) -> None:
+    """Тест выдачи единиц по приоритету и независимого планирования регионов."""
+    ranges = {"hh.ru": (0, 4)}
+    plan_crawl_units(db_session, "Python", ranges, pages_per_unit=5)
+    assert plan_crawl_units(db_session, "Python", ranges, 5, area="2", priority=3)
+    # В том же регионе предыдущий обход еще не завершен
+    assert plan_crawl_units(db_session, "Python", ranges, 5, area="2") == 0
+
+    first = claim_crawl_unit(db_session, "host:1", LEASE, 3, ["hh.ru"])
+    second = claim_crawl_unit(db_session, "host:1", LEASE, 3, ["hh.ru"])
+
+    assert first is not None and first.area == "2"
+    assert second is not None and second.area is None
+
+
+def test_expired_lease_is_reclaimed(db_session: Session) -> None:
+    """Тест передачи единицы другому процессу после истечения аренды."""
+    plan_crawl_units(db_session, "Python", {"hh.ru": (0, 4)}, pages_per_unit=5)
+    unit = claim_crawl_unit(db_session, "host:1", LEASE, 3, ["hh.ru"])
+    assert unit is not None
+    assert claim_crawl_unit(db_session, "host:2", LEASE, 3, ["hh.ru"]) is None
+
+    db_session.query(CrawlUnit).update(
+        {CrawlUnit.lease_expires_at: datetime.now() - timedelta(seconds=1)}
+    )
+    db_session.commit()
+    reclaimed = claim_crawl_unit(db_session, "host:2", LEASE, 3, ["hh.ru"])
+
+    assert reclaimed is not None and reclaimed.id == unit.id
+    # Прежний владелец больше не может продлить аренду
+    assert not extend_crawl_lease(db_session, unit.id, "host:1", LEASE)
+    assert extend_crawl_lease(db_session, unit.id, "host:2", LEASE)
+
+
+def test_unit_is_failed_after_max_attempts(db_session: Session) -> None:
+    """Тест, что единица с истекшей последней арендой больше не выдается."""
+    plan_crawl_units(db_session, "Python", {"hh.ru": (0, 4)}, pages_per_unit=5)
+    for owner in ["host:1", "host:2"]:
+        assert claim_crawl_unit(db_session, owner, -LEASE, 2, ["hh.ru"]) is not None
+
+    assert claim_crawl_unit(db_session, "host:3", LEASE, 2, ["hh.ru"]) is None
+    assert _statuses(db_session) == [(0, 4, FAILED)]
+
+
+def test_request_error_requeues_remaining_pages(db_session: Session) -> None:
+    """Тест возврата в очередь необработанной части диапазона."""
+    plan_crawl_units(db_session, "Python", {"hh.ru": (0, 4)}, pages_per_unit=5)
+    unit = claim_crawl_unit(db_session, "host:1", LEASE, 3, ["hh.ru"])
+    assert unit is not None
+
+    result = PageRangeResult([], pages_fetched=2, exhausted=False, failed_page=2)
+    finish_crawl_unit(db_session, unit.id, "host:1", result, 0, max_attempts=3)
+
+    assert _statuses(db_session) == [(2, 4, PENDING)]
+    retry = claim_crawl_unit(db_session, "host:2", LEASE, 3, ["hh.ru"])
+    assert retry is not None and retry.page_start == 2
+
+
+def test_process_crawl_units_stores_vacancies(db_session: Session) -> None:
+    """Тест обхода единиц с пропуском страниц после конца выдачи."""
+    plan_crawl_units(db_session, "Python", {"fake": (0, 9)}, pages_per_unit=3)
+    plan_crawl_units(db_session, "Python", {"hh.ru": (0, 2)}, pages_per_unit=3)
+
+    processed = process_crawl_units({"fake": FakeParser}, "host:1", LEASE, 3)
+
+    # Выдача закончилась на странице 6: единица 9-9 не понадобилась
+    assert processed == 3
+    assert _statuses(db_session) == [
+        (0, 2, DONE),
+        (3, 5, DONE),
+        (6, 8, DONE),
+        (9, 9, SKIPPED),
+        # Единицы источника без парсера остаются другим процессам
+        (0, 2, PENDING),
+    ]
+    assert db_session.query(Vacancy).count() == 7
+    assert get_crawl_summary(db_session) == {
+        "fake": {DONE: 3, SKIPPED: 1},
+        "hh.ru": {PENDING: 1},
+    }
+
+
+class RetryingParser(FakeParser):
+    """Парсер, повторяющий запрос с долгой паузой перед разбором выдачи."""
+
+    retry_delay = 600.0
+    lease_expires_at: Optional[datetime] = None
+
+    def parse_pages(
+        self,
+        search_query: str,
+        first_page: int,
+        last_page: int,
+        on_page: Optional[PageCallback] = None,
+        area: Optional[str] = None,
+    ) -> PageRangeResult:
+        """Вызывает продление аренды перед повтором и запоминает ее срок."""
+        assert self.http.on_retry is not None
+        self.http.on_retry(self.retry_delay)
+        with SessionLocal() as db:
+            RetryingParser.lease_expires_at = db.query(
+                CrawlUnit.lease_expires_at
+            ).scalar()
+        return super().parse_pages(search_query, first_page, last_page, on_page, area)
+
+
+def test_lease_is_extended_before_request_retries(db_session: Session) -> None:
+    """Тест, что аренда продлевается на время паузы перед повтором запроса."""
+    plan_crawl_units(db_session, "Python", {"fake": (0, 2)}, pages_per_unit=3)
+    started = datetime.now()
+
+    assert process_crawl_units({"fake": RetryingParser}, "host:1", LEASE, 3) == 1
+
+    assert RetryingParser.lease_expires_at is not None
+    assert RetryingParser.lease_expires_at >= started + LEASE + timedelta(
+        seconds=RetryingParser.retry_delay
+    )
+    assert _statuses(db_session) == [(0, 2, DONE)]
+
+
+def test_lost_lease_stops_request_retries(db_session: Session) -> None:
+    """Тест, что обход прекращается, если аренду забрали во время повторов."""
+    plan_crawl_units(db_session, "Python", {"fake": (0, 2)}, pages_per_unit=3)
+
+    class StolenLeaseParser(RetryingParser):
+        def parse_pages(self, *args: Any, **kwargs: Any) -> PageRangeResult:
+            with SessionLocal() as db:
+                db.query(CrawlUnit).update({CrawlUnit.lease_owner: "host:2"})
+                db.commit()
+            return super().parse_pages(*args, **kwargs)
+
+    process_crawl_units({"fake": StolenLeaseParser}, "host:1", LEASE, 3)
+
+    assert db_session.query(Vacancy).count() == 0
+    db_session.expire_all()
+    assert db_session.query(CrawlUnit.lease_owner).scalar() == "host:2"
+
+
+class SlowDetailsParser(HHParser):
+    """Парсер hh.ru, полные описания которого загружаются дольше аренды."""
+
+    source = "fake-hh"
+    fetch_delay = 0.2
+    leases_valid: List[bool] = []
+
+    def parse_pages(
+        self,
+        search_query: str,
+        first_page: int,
+        last_page: int,
+        on_page: Optional[PageCallback] = None,
+        area: Optional[str] = None,
+    ) -> PageRangeResult:
+        """Возвращает четыре вакансии hh.ru одной страницей."""
+        vacancies = [
+            VacancyDTO(
+                title=f"{search_query} {i}",
+                company="Test Co",
+                location="Москва",
+                salary=None,
+                description="Фрагмент",
+                published_at=datetime(2025, 8, 1),
+                source="hh.ru",
+                original_url=f"https://hh.ru/vacancy/{i}",
+            )
+            for i in range(1, 5)
+        ]
+        if on_page is not None:
+            on_page(1, len(vacancies))
+        return PageRangeResult(vacancies, 1, True)
+
+    def fetch_description(self, vacancy_id: str) -> str:
+        """Загружает описание дольше, чем действует половина аренды."""
+        time.sleep(self.fetch_delay)
+        return f"Полное описание {vacancy_id}"
+
+    def on_description(self) -> None:
+        """Запоминает, действует ли аренда после загрузки описания."""
+        with SessionLocal() as db:
+            expires_at = db.query(CrawlUnit.lease_expires_at).scalar()
+        SlowDetailsParser.leases_valid.append(
+            expires_at is not None and expires_at > datetime.now()
+        )
+
+    def fetch_descriptions(
+        self,
+        vacancy_ids: List[str],
+        workers: int,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> Dict[str, str]:
+        """Проверяет аренду после каждого описания, до продления."""
+
+        def check_then_report(done: int) -> None:
+            # Тестовая БД в памяти доступна только из потока обхода
+            self.on_description()
+            if on_progress is not None:
+                on_progress(done)
+
+        return super().fetch_descriptions(vacancy_ids, workers, check_then_report)
+
+
+@pytest.fixture
+def slow_details(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Включает загрузку описаний hh.ru в один поток."""
+    monkeypatch.setattr(settings, "HH_DETAILS_ENABLED", True)
+    monkeypatch.setattr(settings, "HH_DETAILS_WORKERS", 1)
+    SlowDetailsParser.leases_valid = []
+
+
+def test_lease_is_extended_while_descriptions_load(
+    db_session: Session, slow_details: None
+) -> None:
+    """Тест, что загрузка описаний дольше аренды не теряет единицу."""
+    lease = timedelta(seconds=0.4)
+    plan_crawl_units(db_session, "Python", {"fake-hh": (0, 0)}, pages_per_unit=1)
+
+    assert process_crawl_units({"fake-hh": SlowDetailsParser}, "host:1", lease, 3) == 1
+
+    # Четыре описания по 0.2 с загружаются дольше аренды в 0.4 с
+    assert SlowDetailsParser.leases_valid == [True] * 4
+    assert _statuses(db_session) == [(0, 0, DONE)]
+    descriptions = {v.description for v in db_session.query(Vacancy)}
+    assert descriptions == {f"Полное описание {i}" for i in range(1, 5)}
+
+
+def test_lost_lease_stops_description_loading(
+    db_session: Session, slow_details: None
+) -> None:
+    """Тест, что загрузка описаний прекращается, если аренду забрали."""
+    plan_crawl_units(db_session, "Python", {"fake-hh": (0, 0)}, pages_per_unit=1)
+
+    class StolenLeaseParser(SlowDetailsParser):
+        def on_description(self) -> None:
+            with SessionLocal() as db:
+                db.query(CrawlUnit).update({CrawlUnit.lease_owner: "host:2"})
+                db.commit()
+            super().on_description()
+
+    process_crawl_units(
+        {"fake-hh": StolenLeaseParser}, "host:1", timedelta(seconds=0.4), 3
+    )
+
+    # Продление после первого же описания не удалось, остальные не загружались
+    assert len(SlowDetailsParser.leases_valid) < 4
+    assert db_session.query(Vacancy).count() == 0
+    db_session.expire_all()
+    assert db_session.query(CrawlUnit.lease_owner).scalar() == "host:2"
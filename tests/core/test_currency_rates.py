@@ -0,0 +1,161 @@
+"""Тесты для курсов валют и пересчета зарплат вакансий."""
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Generator, List, Optional
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from core.currency_rates import (
+    CurrencyRateProvider,
+    file_rate_source,
+    import_rate_source,
+    renormalize_salaries,
+)
+from core.database import SessionLocal
+from core.models import Vacancy
+from parsers.salary import SalaryNormalizer
+
+
+@pytest.fixture
+def db_session(setup_test_db: Any) -> Generator[Session, None, None]:
+    """Предоставляет чистую сессию БД для каждого теста."""
+    SessionLocal.configure(bind=setup_test_db)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_provider_caches_rates_for_ttl() -> None:
+    """Тест, что курсы загружаются из источника не чаще раза за TTL."""
+    now = [0.0]
+    source = Mock(side_effect=[{"usd": 90, "RUR": 1}, {"USD": 95}])
+    provider = CurrencyRateProvider(source, ttl=60, clock=lambda: now[0])
+
+    rates = provider.rates()
+    now[0] = 59
+    assert provider.rates() is rates
+    assert rates == {"USD": 90.0, "RUB": 1.0}
+    now[0] = 60
+    assert provider.rates() == {"USD": 95.0, "RUB": 1.0}
+    assert source.call_count == 2
+
+
+def test_provider_keeps_last_rates_when_source_fails() -> None:
+    """Тест, что при ошибке источника используются последние курсы."""
+    now = [0.0]
+    source = Mock(side_effect=[{"USD": 90}, OSError("нет файла"), {"USD": -1}])
+    provider = CurrencyRateProvider(source, ttl=60, clock=lambda: now[0])
+
+    assert provider.rates()["USD"] == 90.0
+    now[0] = 60
+    assert provider.rates()["USD"] == 90.0
+    now[0] = 120
+    # Отрицательный курс отклоняется
+    assert provider.rates()["USD"] == 90.0
+
+
+def test_provider_falls_back_to_settings_rates() -> None:
+    """Тест, что без единой успешной загрузки используются курсы из настроек."""
+    provider = CurrencyRateProvider(Mock(side_effect=ValueError), ttl=60)
+
+    assert provider.rates()["EUR"] == 100.0
+
+
+def test_file_and_imported_sources(tmp_path: Path) -> None:
+    """Тест загрузки курсов из файла и из функции "модуль:функция"."""
+    path = tmp_path / "rates.json"
+    path.write_text(json.dumps({"USD": 91.5}), encoding="utf-8")
+
+    assert file_rate_source(str(path))() == {"USD": 91.5}
+    source = import_rate_source("core.currency_rates:settings_rate_source")
+    assert source()["USD"] == 90.0
+    with pytest.raises(ValueError):
+        import_rate_source("core.currency_rates")
+
+
+def _vacancy(
+    number: int,
+    currency: Optional[str],
+    min_amount: Optional[int],
+    max_amount: Optional[int],
+    min_rub: Optional[int],
+    max_rub: Optional[int],
+) -> Vacancy:
+    """Создает вакансию с зарплатой в валюте источника."""
+    return Vacancy(
+        title=f"Вакансия {number}",
+        company="Test Co",
+        published_at=datetime(2025, 9, 1),
+        source="hh.ru",
+        original_url=f"https://hh.ru/vacancy/{number}",
+        salary_currency=currency,
+        salary_min_amount=min_amount,
+        salary_max_amount=max_amount,
+        salary_min_rub=min_rub,
+        salary_max_rub=max_rub,
+    )
+
+
+def _salaries(db: Session) -> List[List[Optional[int]]]:
+    """Возвращает рублевые зарплаты вакансий в порядке номеров."""
+    return [
+        [vacancy.salary_min_rub, vacancy.salary_max_rub]
+        for vacancy in db.query(Vacancy).order_by(Vacancy.id)
+    ]
+
+
+def test_renormalize_salaries_rewrites_stale_rows(db_session: Session) -> None:
+    """Тест пакетного пересчета рублевых зарплат по новым курсам."""
+    db_session.add_all(
+        [
+            # Суммы hh.ru в долларах, сохраненные без пересчета
+            _vacancy(1, "USD", 1000, 2000, 1000, 2000),
+            _vacancy(2, "USD", None, 3000, None, 3000),
+            _vacancy(3, "EUR", 1500, None, 150000, None),
+            _vacancy(4, "RUB", 100000, 150000, 100000, 150000),
+            # Валюта без курса и вакансия без исходной валюты не меняются
+            _vacancy(5, "UZS", 10000000, None, None, None),
+            _vacancy(6, None, None, None, 80000, None),
+        ]
+    )
+    db_session.commit()
+    rates: Dict[str, float] = {"USD": 90.5, "EUR": 100.0, "RUB": 1.0}
+
+    assert renormalize_salaries(db_session, rates, batch_size=1) == 2
+    assert renormalize_salaries(db_session, rates, batch_size=1) == 0
+
+    db_session.expire_all()
+    assert _salaries(db_session) == [
+        [90500, 181000],
+        [None, 271500],
+        [150000, None],
+        [100000, 150000],
+        [None, None],
+        [80000, None],
+    ]
+    # Пересчет в базе совпадает с пересчетом при разборе
+    normalizer = SalaryNormalizer(rates)
+    assert normalizer.convert(1000, 2000, "USD")[3:] == (90500, 181000)
+
+
+def test_renormalize_salaries_after_rate_change(db_session: Session) -> None:
+    """Тест, что смена курса переписывает только вакансии этой валюты."""
+    db_session.add_all(
+        [
+            _vacancy(1, "USD", 1000, None, 90000, None),
+            _vacancy(2, "EUR", 1000, None, 100000, None),
+        ]
+    )
+    db_session.commit()
+
+    updated = renormalize_salaries(db_session, {"USD": 95.0, "EUR": 100.0})
+
+    assert updated == 1
+    db_session.expire_all()
+    assert _salaries(db_session) == [[95000, None], [100000, None]]
@@ -1,6 +1,6 @@
 """Модульные тесты для функций взаимодействия с базой данных."""
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, Generator
 
 import pytest
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from core.database import (
     SessionLocal,
     add_vacancies_from_dto,
+    expire_stale_vacancies,
     get_average_salary_by_city,
     get_filtered_vacancies,
     get_top_companies_by_vacancies,
@@ -16,7 +17,7 @@ from core.database import (
     get_unique_cities,
     get_unique_sources,
 )
-from core.models import Vacancy
+from core.models import Vacancy, VacancyUrl
 from parsers.dto import VacancyDTO
 
 
@@ -151,6 +152,52 @@ def test_add_vacancies_from_dto_duplicates(
     assert db_session.query(Vacancy).count() == 6  # 5 from populate_db + 1 new
 
 
+def test_add_vacancies_from_dto_dedupes_url_across_publication_dates(
+    db_session: Session, populate_db: None
+) -> None:
+    """Тест, что известный URL с новой датой публикации не вставляется снова."""
+    vacancy = (
+        db_session.query(Vacancy).filter_by(original_url="http://test.com/1").one()
+    )
+    db_session.add(
+        VacancyUrl(original_url=vacancy.original_url, published_at=vacancy.published_at)
+    )
+    db_session.commit()
+
+    dtos = [
+        VacancyDTO(
+            title=vacancy.title,
+            company=vacancy.company,
+            location=vacancy.location,
+            salary=vacancy.salary,
+            description=None,
+            published_at=vacancy.published_at + timedelta(hours=1),
+            source=vacancy.source,
+            original_url=vacancy.original_url,
+        ),
+        # Повтор URL внутри пакета тоже вставляется один раз
+        *(
+            VacancyDTO(
+                title="Сегодняшняя вакансия",
+                company="NewCo",
+                location="Kazan",
+                salary=None,
+                description=None,
+                published_at=datetime(2025, 2, 1, hour),
+                source="superjob.ru",
+                original_url="http://new.com/today",
+            )
+            for hour in (10, 11)
+        ),
+    ]
+    assert add_vacancies_from_dto(db_session, dtos) == 1
+    assert db_session.query(Vacancy).count() == 6
+    assert {url.original_url for url in db_session.query(VacancyUrl)} == {
+        "http://test.com/1",
+        "http://new.com/today",
+    }
+
+
 def test_get_unique_sources(db_session: Session, populate_db: None) -> None:
     """Тест получения уникальных, отсортированных источников."""
     sources = get_unique_sources(db_session)
@@ -276,3 +323,63 @@ def test_get_filtered_vacancies_by_source_and_asc_sort(
     # Проверка сортировки по дате по возрастанию (самая старая вакансия - первая)
     vacancies_asc = get_filtered_vacancies(db_session, sort_order="asc")
     assert vacancies_asc[0].title == "Python Developer"
+
+
+def test_get_filtered_vacancies_by_published_from(
+    db_session: Session, populate_db: None
+) -> None:
+    """Тест фильтрации по нижней границе даты публикации."""
+    published_from = datetime(2025, 1, 4)
+    vacancies = get_filtered_vacancies(db_session, published_from=published_from)
+    assert {v.title for v in vacancies} == {"Senior Python Developer", "Data Scientist"}
+    assert get_total_vacancies_count(db_session, published_from=published_from) == 2
+
+
+def test_add_vacancies_from_dto_refreshes_last_seen(
+    db_session: Session, populate_db: None
+) -> None:
+    """Тест, что повторно встреченная вакансия обновляет last_seen_at и оживает."""
+    vacancy = (
+        db_session.query(Vacancy).filter_by(original_url="http://test.com/1").one()
+    )
+    vacancy.last_seen_at = datetime(2025, 1, 1)
+    vacancy.expired_at = datetime(2025, 1, 20)
+    db_session.commit()
+
+    dto = VacancyDTO(
+        title=vacancy.title,
+        company=vacancy.company,
+        location=vacancy.location,
+        salary=vacancy.salary,
+        description=None,
+        published_at=vacancy.published_at,
+        source=vacancy.source,
+        original_url=vacancy.original_url,
+    )
+    assert add_vacancies_from_dto(db_session, [dto]) == 0
+
+    db_session.refresh(vacancy)
+    assert vacancy.last_seen_at > datetime(2025, 1, 1)
+    assert vacancy.expired_at is None
+
+
+def test_expire_stale_vacancies(db_session: Session, populate_db: None) -> None:
+    """Тест пакетной пометки устаревших вакансий и их исключения из выдачи."""
+    stale_seen_at = datetime.now() - timedelta(days=30)
+    for vacancy in db_session.query(Vacancy).filter_by(company="Tech Corp"):
+        vacancy.last_seen_at = stale_seen_at
+    db_session.query(Vacancy).filter_by(
+        company="Big Blue"
+    ).one().last_seen_at = stale_seen_at
+    db_session.commit()
+
+    # Размер пакета меньше числа устаревших вакансий: нужно несколько проходов
+    assert expire_stale_vacancies(db_session, max_age_days=14, batch_size=2) == 3
+    assert expire_stale_vacancies(db_session, max_age_days=14, batch_size=2) == 0
+
+    assert get_total_vacancies_count(db_session) == 2
+    assert get_unique_sources(db_session) == ["hh.ru"]
+    assert {v.company for v in get_filtered_vacancies(db_session)} == {
+        "Web Solutions",
+        "AI Innovations",
+    }
@@ -0,0 +1,172 @@
+"""Тесты для поиска почти-дубликатов вакансий (MinHash/LSH)."""
+
+from datetime import datetime
+from typing import Any, Generator
+
+import pytest
+from sqlalchemy.orm import Session
+
+from core.database import (
+    SessionLocal,
+    add_vacancies_from_dto,
+    expire_stale_vacancies,
+    get_filtered_vacancies,
+    get_total_vacancies_count,
+)
+from core.dedup import (
+    LSHIndex,
+    band_keys,
+    estimate_similarity,
+    minhash_signature,
+    pack_signature,
+    prune_signatures,
+    unpack_signature,
+    vacancy_features,
+)
+from core.models import Vacancy, VacancyLSHBand, VacancySignature
+from parsers.dto import VacancyDTO
+
+HH_TITLE = "Python-разработчик (Middle)"
+SJ_TITLE = "Python разработчик Middle"
+HH_DESCRIPTION = "Опыт работы с Django от 3 лет. Разработка backend сервисов"
+SJ_DESCRIPTION = "Разработка backend сервисов на Django, PostgreSQL"
+
+
+@pytest.fixture
+def db_session(setup_test_db: Any) -> Generator[Session, None, None]:
+    """Предоставляет чистую сессию БД для каждого теста."""
+    SessionLocal.configure(bind=setup_test_db)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _dto(title: str, company: str, description: str, source: str, url: str) -> Any:
+    """Создает DTO вакансии с фиксированной датой публикации."""
+    return VacancyDTO(
+        title=title,
+        company=company,
+        location="Москва",
+        salary=None,
+        description=description,
+        published_at=datetime(2025, 8, 1, 12, 0),
+        source=source,
+        original_url=url,
+    )
+
+
+def test_signature_is_deterministic_and_packable() -> None:
+    """Тест детерминированности сигнатуры и ее упаковки для БД."""
+    features = vacancy_features(HH_TITLE, "Ромашка", HH_DESCRIPTION)
+    signature = minhash_signature(features)
+    assert signature == minhash_signature(set(features))
+    assert unpack_signature(pack_signature(signature)) == signature
+    assert len(set(band_keys(signature))) == len(band_keys(signature))
+
+
+def test_similarity_separates_duplicates_from_other_vacancies() -> None:
+    """Тест, что похожие вакансии близки, а разные - нет."""
+    hh = minhash_signature(vacancy_features(HH_TITLE, "ООО Ромашка", HH_DESCRIPTION))
+    sj = minhash_signature(vacancy_features(SJ_TITLE, "Ромашка", SJ_DESCRIPTION))
+    other = minhash_signature(vacancy_features("Java developer", "Лютик", "Spring"))
+    assert estimate_similarity(hh, sj) >= 0.6
+    assert estimate_similarity(hh, other) < 0.2
+
+
+def test_lsh_index_returns_cluster_of_best_match() -> None:
+    """Тест поиска группы в LSH-индексе в памяти."""
+    index = LSHIndex()
+    index.add(1, minhash_signature(vacancy_features(HH_TITLE, "Ромашка", None)), 1)
+    index.add(2, minhash_signature(vacancy_features("Java", "Лютик", None)), 2)
+
+    match = index.query(minhash_signature(vacancy_features(SJ_TITLE, "Ромашка", None)))
+    assert match is not None
+    assert match[0] == 1
+    assert (
+        index.query(minhash_signature(vacancy_features("Повар", "Кафе", None))) is None
+    )
+
+
+def test_cross_source_duplicates_share_cluster(db_session: Session) -> None:
+    """Тест, что дубликат с другой площадки попадает в ту же группу."""
+    add_vacancies_from_dto(
+        db_session,
+        [_dto(HH_TITLE, "ООО Ромашка", HH_DESCRIPTION, "hh.ru", "http://hh/1")],
+    )
+    add_vacancies_from_dto(
+        db_session,
+        [
+            _dto(SJ_TITLE, "Ромашка", SJ_DESCRIPTION, "superjob.ru", "http://sj/1"),
+            _dto(
+                "Java developer", "Лютик", "Spring Boot", "superjob.ru", "http://sj/2"
+            ),
+        ],
+    )
+
+    clusters = {
+        v.original_url: v.duplicate_cluster_id for v in db_session.query(Vacancy)
+    }
+    assert clusters["http://sj/1"] == clusters["http://hh/1"]
+    assert clusters["http://sj/2"] != clusters["http://hh/1"]
+    assert db_session.query(VacancySignature).count() == 3
+
+    # Режим свертки оставляет по одной вакансии на группу
+    assert get_total_vacancies_count(db_session) == 3
+    assert get_total_vacancies_count(db_session, collapse_duplicates=True) == 2
+    collapsed = get_filtered_vacancies(db_session, collapse_duplicates=True)
+    assert len(collapsed) == 2
+    # Фильтры применяются к представителю группы - ее самой свежей вакансии
+    # (при равной дате - вставленной позже)
+    only_hh = get_filtered_vacancies(
+        db_session, source="hh.ru", collapse_duplicates=True
+    )
+    assert only_hh == []
+    only_sj = get_filtered_vacancies(
+        db_session, source="superjob.ru", collapse_duplicates=True
+    )
+    assert {v.original_url for v in only_sj} == {"http://sj/1", "http://sj/2"}
+
+
+def test_cluster_representative_follows_active_vacancies(db_session: Session) -> None:
+    """Тест, что представитель группы меняется при устаревании и возврате."""
+    sj = _dto(SJ_TITLE, "Ромашка", SJ_DESCRIPTION, "superjob.ru", "http://sj/1")
+    add_vacancies_from_dto(
+        db_session,
+        [_dto(HH_TITLE, "ООО Ромашка", HH_DESCRIPTION, "hh.ru", "http://hh/1"), sj],
+    )
+
+    def representatives() -> list[str]:
+        db_session.expire_all()
+        return [
+            v.original_url
+            for v in get_filtered_vacancies(db_session, collapse_duplicates=True)
+        ]
+
+    assert representatives() == ["http://sj/1"]
+
+    db_session.query(Vacancy).filter(Vacancy.original_url == sj.original_url).update(
+        {Vacancy.last_seen_at: datetime(2025, 1, 1)}
+    )
+    db_session.commit()
+    assert expire_stale_vacancies(db_session, max_age_days=14) == 1
+    assert representatives() == ["http://hh/1"]
+    assert get_total_vacancies_count(db_session, collapse_duplicates=True) == 1
+
+    # Вакансия снова встретилась в выдаче источника
+    assert add_vacancies_from_dto(db_session, [sj]) == 0
+    assert representatives() == ["http://sj/1"]
+    assert (
+        db_session.query(Vacancy).filter(Vacancy.is_cluster_representative).count() == 1
+    )
+
+
+def test_prune_signatures(db_session: Session) -> None:
+    """Тест удаления сигнатур старых вакансий вместе с ключами полос."""
+    add_vacancies_from_dto(
+        db_session, [_dto(HH_TITLE, "Ромашка", HH_DESCRIPTION, "hh.ru", "http://hh/1")]
+    )
+    assert prune_signatures(db_session, datetime(2025, 9, 1)) == 1
+    assert db_session.query(VacancySignature).count() == 0
+    assert db_session.query(VacancyLSHBand).count() == 0
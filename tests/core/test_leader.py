@@ -0,0 +1,80 @@
+"""Тесты для выбора ведущего процесса планировщика."""
+
+from unittest.mock import Mock, patch
+
+from core.leader import LeaderElection, leader_only
+
+
+def _make_engine(acquired: bool) -> tuple[Mock, Mock]:
+    """Создает мок engine PostgreSQL и соединения с результатом блокировки."""
+    engine = Mock()
+    engine.dialect.name = "postgresql"
+    connection = engine.connect.return_value.execution_options.return_value
+    connection.execute.return_value.scalar.return_value = acquired
+    return engine, connection
+
+
+def test_first_process_becomes_leader() -> None:
+    """Тест получения блокировки и ее проверки при следующих вызовах."""
+    engine, connection = _make_engine(acquired=True)
+    election = LeaderElection(engine, lock_key=42)
+
+    assert election.try_acquire()
+    assert election.try_acquire()
+
+    assert election.is_leader
+    # Соединение открыто один раз, повторная проверка - только SELECT 1
+    engine.connect.assert_called_once()
+    assert str(connection.execute.call_args.args[0]) == "SELECT 1"
+
+
+def test_process_without_lock_is_follower() -> None:
+    """Тест, что при занятой блокировке соединение сразу закрывается."""
+    engine, connection = _make_engine(acquired=False)
+    election = LeaderElection(engine, lock_key=42)
+
+    assert not election.try_acquire()
+    assert not election.is_leader
+    connection.close.assert_called_once()
+
+
+def test_leader_steps_down_when_connection_is_lost() -> None:
+    """Тест, что потеря соединения снимает лидерство до повторного захвата."""
+    engine, connection = _make_engine(acquired=True)
+    election = LeaderElection(engine, lock_key=42)
+    election.try_acquire()
+
+    # Соединение разорвано, а блокировку уже перехватил другой процесс
+    connection.execute.side_effect = [
+        ConnectionError("lost"),
+        Mock(scalar=Mock(return_value=False)),
+    ]
+
+    assert not election.try_acquire()
+    assert not election.is_leader
+    assert engine.connect.call_count == 2
+
+
+def test_non_postgres_process_is_always_leader() -> None:
+    """Тест, что без PostgreSQL координация не требуется."""
+    engine = Mock()
+    engine.dialect.name = "sqlite"
+    election = LeaderElection(engine, lock_key=42)
+
+    assert election.try_acquire()
+    engine.connect.assert_not_called()
+
+
+@patch("core.leader.leader_election")
+def test_leader_only_skips_job_on_follower(mock_election: Mock) -> None:
+    """Тест, что обернутая задача выполняется только в ведущем процессе."""
+    job = Mock(__name__="job")
+    wrapped = leader_only(job)
+
+    mock_election.try_acquire.return_value = False
+    wrapped("Python")
+    job.assert_not_called()
+
+    mock_election.try_acquire.return_value = True
+    wrapped("Python")
+    job.assert_called_once_with("Python")
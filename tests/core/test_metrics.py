@@ -0,0 +1,87 @@
+"""Тесты для метрик Prometheus."""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_SUBMITTED,
+    JobExecutionEvent,
+    JobSubmissionEvent,
+)
+from prometheus_client import REGISTRY
+
+from core.metrics import JobMetrics, job_name, timed_query
+
+
+def _sample(name: str, **labels: str) -> float:
+    """Возвращает значение метрики или 0, если ряда еще нет."""
+    value: Optional[float] = REGISTRY.get_sample_value(name, labels)
+    return value or 0.0
+
+
+def test_timed_query_observes_calls_including_failures() -> None:
+    """Тест учета времени функции, в том числе завершившейся ошибкой."""
+
+    @timed_query
+    def load_test_rows(fail: bool) -> int:
+        if fail:
+            raise ValueError("ошибка")
+        return 1
+
+    before = _sample("db_query_duration_seconds_count", function="load_test_rows")
+    assert load_test_rows(False) == 1
+    try:
+        load_test_rows(True)
+    except ValueError:
+        pass
+
+    after = _sample("db_query_duration_seconds_count", function="load_test_rows")
+    assert after - before == 2
+    assert load_test_rows.__name__ == "load_test_rows"
+
+
+def test_job_metrics_tracks_durations_and_overlaps() -> None:
+    """Тест времени задач планировщика, выполняющихся запусков и наложений."""
+    metrics = JobMetrics()
+    run_time = datetime.now(timezone.utc) - timedelta(seconds=2)
+    labels = {"job": "test_job"}
+    before_count = _sample(
+        "scheduler_job_duration_seconds_count", job="test_job", outcome="error"
+    )
+    before_overlaps = _sample("scheduler_job_overlaps_total", **labels)
+
+    metrics._on_submitted(
+        JobSubmissionEvent(EVENT_JOB_SUBMITTED, "test_job_12", "default", [run_time])
+    )
+    assert _sample("scheduler_jobs_running", **labels) == 1
+    metrics._on_finished(
+        JobExecutionEvent(
+            EVENT_JOB_ERROR,
+            "test_job_12",
+            "default",
+            run_time,
+            exception=RuntimeError("сбой"),
+        )
+    )
+    metrics._on_skipped(
+        JobSubmissionEvent(EVENT_JOB_MAX_INSTANCES, "test_job", "default", [run_time])
+    )
+
+    assert _sample("scheduler_jobs_running", **labels) == 0
+    count = _sample(
+        "scheduler_job_duration_seconds_count", job="test_job", outcome="error"
+    )
+    assert count - before_count == 1
+    assert (
+        _sample("scheduler_job_duration_seconds_sum", job="test_job", outcome="error")
+        >= 2
+    )
+    assert _sample("scheduler_job_overlaps_total", **labels) - before_overlaps == 1
+
+
+def test_job_name_drops_queue_job_number() -> None:
+    """Тест имени задачи без номера задачи очереди."""
+    assert job_name("parse_job_42") == "parse_job"
+    assert job_name("crawl_units_job") == "crawl_units_job"
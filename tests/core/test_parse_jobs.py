@@ -0,0 +1,115 @@
+"""Тесты для очереди задач ручного парсинга."""
+
+from datetime import datetime, timedelta
+from typing import Any, Generator
+
+import pytest
+from sqlalchemy.orm import Session
+
+from core.database import SessionLocal
+from core.parse_jobs import (
+    DONE,
+    FAILED,
+    PENDING,
+    RUNNING,
+    claim_parse_jobs,
+    enqueue_parse_job,
+    finish_parse_job,
+    get_parse_job_status,
+    reclaim_stale_parse_jobs,
+    update_parse_job_progress,
+)
+
+
+@pytest.fixture
+def db_session(setup_test_db: Any) -> Generator[Session, None, None]:
+    """Предоставляет чистую сессию БД для каждого теста."""
+    SessionLocal.configure(bind=setup_test_db)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_enqueue_coalesces_pending_jobs(db_session: Session) -> None:
+    """Тест объединения одинаковых ожидающих запросов."""
+    first, created = enqueue_parse_job(db_session, "Python")
+    second, coalesced = enqueue_parse_job(db_session, "  Python ")
+    other, _ = enqueue_parse_job(db_session, "Go")
+
+    assert created and not coalesced
+    assert second.id == first.id
+    assert other.id != first.id
+
+    # Пока задача выполняется, повторный запуск ставит новую
+    claim_parse_jobs(db_session, "host:1", concurrency=1, lock_key=1)
+    third, created = enqueue_parse_job(db_session, "Python")
+    assert created and third.id != first.id
+
+
+def test_claim_respects_global_concurrency(db_session: Session) -> None:
+    """Тест, что выполняется не больше задач, чем разрешено всем процессам."""
+    for query in ["Python", "Go", "Java"]:
+        enqueue_parse_job(db_session, query)
+
+    claimed = claim_parse_jobs(db_session, "host:1", concurrency=2, lock_key=1)
+    assert [job.query for job in claimed] == ["Python", "Go"]
+    assert all(job.status == RUNNING and job.attempts == 1 for job in claimed)
+    assert claim_parse_jobs(db_session, "host:2", concurrency=2, lock_key=1) == []
+
+    finish_parse_job(db_session, claimed[0].id, "host:1", added_count=5)
+    claimed_later = claim_parse_jobs(db_session, "host:2", concurrency=2, lock_key=1)
+    assert [job.query for job in claimed_later] == ["Java"]
+
+
+def test_job_progress_and_status(db_session: Session) -> None:
+    """Тест отчета о прогрессе и позиции в очереди."""
+    job, _ = enqueue_parse_job(db_session, "Python")
+    waiting, _ = enqueue_parse_job(db_session, "Go")
+    claim_parse_jobs(db_session, "host:1", concurrency=1, lock_key=1)
+
+    update_parse_job_progress(db_session, job.id, "host:1", 2, 1, 40)
+    # Чужой процесс не может менять состояние задачи
+    finish_parse_job(db_session, job.id, "host:2", error="boom")
+
+    status = get_parse_job_status(db_session, job.id)
+    assert status is not None
+    assert status["status"] == RUNNING
+    assert (status["sources_done"], status["sources_total"]) == (1, 2)
+    assert status["found_count"] == 40
+
+    finish_parse_job(db_session, job.id, "host:1", added_count=30)
+    status = get_parse_job_status(db_session, job.id)
+    assert status is not None
+    assert status["status"] == DONE and status["added_count"] == 30
+
+    waiting_status = get_parse_job_status(db_session, waiting.id)
+    assert waiting_status is not None
+    assert waiting_status["queue_position"] == 0
+    assert get_parse_job_status(db_session, 999) is None
+
+
+def test_reclaim_requeues_jobs_of_dead_process(db_session: Session) -> None:
+    """Тест возврата в очередь задач процесса, переставшего отвечать."""
+    for query in ["Python", "Go", "Java"]:
+        enqueue_parse_job(db_session, query)
+    python, go, java = claim_parse_jobs(db_session, "host:1", concurrency=3, lock_key=1)
+    java.attempts = 3
+    for job in (python, go, java):
+        job.heartbeat_at = datetime.now() - timedelta(minutes=10)
+    db_session.commit()
+    # Пока процесс молчал, запрос Go поставили в очередь повторно
+    duplicate, _ = enqueue_parse_job(db_session, "Go")
+
+    reclaimed = reclaim_stale_parse_jobs(
+        db_session, timedelta(minutes=2), max_attempts=3
+    )
+
+    assert reclaimed == 3
+    assert python.status == PENDING and python.worker_id is None
+    assert go.status == FAILED and f"#{duplicate.id}" in (go.error or "")
+    assert java.status == FAILED
+    # Задачу снова можно забрать, это будет вторая попытка
+    claimed = claim_parse_jobs(db_session, "host:2", concurrency=3, lock_key=1)
+    assert {job.query: job.attempts for job in claimed} == {"Python": 2, "Go": 1}
@@ -0,0 +1,98 @@
+"""Тесты для обслуживания помесячных секций таблицы вакансий."""
+
+from datetime import date
+from unittest.mock import Mock, patch
+
+from core.partitions import (
+    MonthPartition,
+    add_months,
+    drop_expired_partitions,
+    ensure_month_partitions,
+    parse_partition_name,
+    partition_name,
+)
+
+
+def _make_session(dialect: str = "postgresql") -> Mock:
+    """Создает мок сессии с заданным диалектом."""
+    db = Mock()
+    db.get_bind.return_value.dialect.name = dialect
+    return db
+
+
+def _executed_sql(db: Mock) -> list[str]:
+    """Возвращает тексты SQL, переданные в db.execute."""
+    return [str(call.args[0]) for call in db.execute.call_args_list]
+
+
+def test_add_months_handles_year_boundaries() -> None:
+    """Тест сдвига месяцев через границу года в обе стороны."""
+    assert add_months(date(2025, 11, 15), 2) == date(2026, 1, 1)
+    assert add_months(date(2025, 1, 31), -1) == date(2024, 12, 1)
+    assert add_months(date(2025, 7, 1), -12) == date(2024, 7, 1)
+
+
+def test_partition_name_roundtrip() -> None:
+    """Тест формирования и разбора имени секции."""
+    name = partition_name(date(2025, 7, 1))
+    assert name == "vacancies_y2025m07"
+    assert parse_partition_name(name) == MonthPartition(name, date(2025, 7, 1))
+    assert parse_partition_name("vacancies_default") is None
+
+
+def test_partition_maintenance_is_noop_without_postgres() -> None:
+    """Тест, что на SQLite обслуживание секций ничего не выполняет."""
+    db = _make_session("sqlite")
+    assert ensure_month_partitions(db) == []
+    assert drop_expired_partitions(db) == []
+    db.execute.assert_not_called()
+
+
+@patch("core.partitions.list_month_partitions")
+def test_ensure_month_partitions_creates_missing(mock_list: Mock) -> None:
+    """Тест, что создаются только отсутствующие секции."""
+    mock_list.return_value = [MonthPartition("vacancies_y2025m12", date(2025, 12, 1))]
+    db = _make_session()
+
+    created = ensure_month_partitions(db, months_ahead=2, today=date(2025, 12, 20))
+
+    assert created == ["vacancies_y2026m01", "vacancies_y2026m02"]
+    statements = _executed_sql(db)
+    assert len(statements) == 2
+    assert "FROM ('2026-01-01') TO ('2026-02-01')" in statements[0]
+    db.commit.assert_called_once()
+
+
+@patch("core.partitions.list_month_partitions")
+def test_drop_expired_partitions(mock_list: Mock) -> None:
+    """Тест удаления секций, целиком вышедших за срок хранения."""
+    mock_list.return_value = [
+        MonthPartition(partition_name(date(2024, m, 1)), date(2024, m, 1))
+        for m in (5, 6, 7)
+    ]
+    db = _make_session()
+
+    dropped = drop_expired_partitions(
+        db, retention_months=12, archive=False, today=date(2025, 7, 10)
+    )
+
+    # Граница хранения - 2024-07-01: июль 2024 еще хранится
+    assert dropped == ["vacancies_y2024m05", "vacancies_y2024m06"]
+    statements = _executed_sql(db)
+    assert statements[0] == "DROP TABLE vacancies_y2024m05"
+    assert statements[-1].startswith("DELETE FROM vacancies_default")
+
+
+@patch("core.partitions.list_month_partitions")
+def test_drop_expired_partitions_archive_mode(mock_list: Mock) -> None:
+    """Тест, что в режиме архивации секции отсоединяются, а не удаляются."""
+    mock_list.return_value = [MonthPartition("vacancies_y2024m01", date(2024, 1, 1))]
+    db = _make_session()
+
+    drop_expired_partitions(
+        db, retention_months=6, archive=True, today=date(2025, 1, 1)
+    )
+
+    assert _executed_sql(db)[0] == (
+        "ALTER TABLE vacancies DETACH PARTITION vacancies_y2024m01"
+    )
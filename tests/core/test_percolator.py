@@ -0,0 +1,123 @@
+"""Тесты для сопоставления новых вакансий с сохраненными поисками."""
+
+from datetime import datetime
+from typing import Any, Generator
+
+import pytest
+from sqlalchemy.orm import Session
+
+from core.database import (
+    SessionLocal,
+    add_vacancies_from_dto,
+    check_saved_search,
+    create_saved_search,
+    delete_saved_search,
+    get_saved_searches,
+)
+from core.dedup import InsertedVacancy
+from core.percolator import Percolator, SearchPredicate
+from parsers.dto import VacancyDTO
+
+
+@pytest.fixture
+def db_session(setup_test_db: Any) -> Generator[Session, None, None]:
+    """Предоставляет чистую сессию БД для каждого теста."""
+    SessionLocal.configure(bind=setup_test_db)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _vacancy(vacancy_id: int, title: str, **fields: Any) -> InsertedVacancy:
+    """Создает новую вакансию для сопоставления."""
+    return InsertedVacancy(
+        id=vacancy_id,
+        published_at=datetime(2025, 8, 1),
+        title=title,
+        company=fields.pop("company", "Tech Corp"),
+        description=fields.pop("description", None),
+        **fields,
+    )
+
+
+def test_predicate_requires_all_query_terms() -> None:
+    """Тест, что текстовое условие требует всех слов запроса в любой форме."""
+    predicate = SearchPredicate(1, frozenset({"python", "django"}))
+    vacancy = _vacancy(1, "Python-разработчик", description="Знание Django")
+
+    assert Percolator([predicate]).match(vacancy) == [1]
+    assert Percolator([predicate]).match(_vacancy(2, "Python-разработчик")) == []
+
+
+def test_predicate_mirrors_sql_filters() -> None:
+    """Тест фильтров по городу, компании, источнику и зарплате."""
+    predicate = SearchPredicate(
+        1,
+        frozenset(),
+        location="моск",
+        company="tech",
+        source="hh.ru",
+        salary_min=150000,
+    )
+    percolator = Percolator([predicate])
+    matching = _vacancy(
+        1, "Разработчик", location="Москва", source="hh.ru", salary_max_rub=200000
+    )
+
+    assert percolator.match(matching) == [1]
+    assert percolator.match(_vacancy(2, "Разработчик", location="Москва")) == []
+    # Неизвестная зарплата не проходит фильтр, как NULL в SQL
+    unknown_salary = _vacancy(3, "Разработчик", location="Москва", source="hh.ru")
+    assert percolator.match(unknown_salary) == []
+
+
+def test_percolator_counts_matches_per_search() -> None:
+    """Тест подсчета новых вакансий по нескольким поискам."""
+    percolator = Percolator(
+        [
+            SearchPredicate(1, frozenset({"python"})),
+            SearchPredicate(2, frozenset({"бухгал"})),
+            SearchPredicate(3, frozenset(), source="superjob.ru"),
+        ]
+    )
+    vacancies = [
+        _vacancy(1, "Python developer", source="hh.ru"),
+        _vacancy(2, "Senior Python developer", source="superjob.ru"),
+        _vacancy(3, "Водитель", source="hh.ru"),
+    ]
+
+    assert percolator.count_matches(vacancies) == {1: 2, 3: 1}
+
+
+def test_saved_search_counts_new_vacancies_on_insert(db_session: Session) -> None:
+    """Тест полного цикла: сохранение, загрузка вакансий, проверка и удаление."""
+    search = create_saved_search(db_session, name="Python", query="Python")
+    other = create_saved_search(db_session, name="Java", query="Java")
+    dtos = [
+        VacancyDTO(
+            title=title,
+            company="Tech Corp",
+            location="Москва",
+            salary=None,
+            description=None,
+            published_at=datetime(2025, 8, 1, 12, 0),
+            source="hh.ru",
+            original_url=f"http://test.com/{number}",
+        )
+        for number, title in enumerate(["Python Developer", "Python Lead", "QA"])
+    ]
+    assert add_vacancies_from_dto(db_session, dtos) == 3
+
+    counts = {s.name: s.new_count for s in get_saved_searches(db_session)}
+    assert counts == {"Python": 2, "Java": 0}
+
+    checked = check_saved_search(db_session, search.id)
+    assert checked is not None and checked[1] == 2
+    assert checked[0].new_count == 0
+    assert check_saved_search(db_session, 999) is None
+
+    assert delete_saved_search(db_session, other.id)
+    assert not delete_saved_search(db_session, other.id)
+    assert [s.name for s in get_saved_searches(db_session)] == ["Python"]
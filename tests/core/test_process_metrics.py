@@ -0,0 +1,142 @@
+"""Тесты для метрик потребления ресурсов процессов."""
+
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Any, Generator
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from core.database import SessionLocal
+from core.models import ProcessHeartbeat
+from core.process_metrics import (
+    PoolUsageTracker,
+    collect_process_metrics,
+    current_process_id,
+    get_process_heartbeats,
+    get_proxy_stats,
+    record_heartbeat,
+    record_proxy_stats,
+)
+from parsers.proxy_pool import ProxySnapshot
+
+
+@pytest.fixture
+def db_session(setup_test_db: Any) -> Generator[Session, None, None]:
+    """Предоставляет чистую сессию БД для каждого теста."""
+    SessionLocal.configure(bind=setup_test_db)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_pool_usage_tracker_counts_peak_checkouts() -> None:
+    """Тест подсчета выданных соединений пула и их максимума."""
+    db_engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=2)
+    tracker = PoolUsageTracker(db_engine, capacity=4)
+
+    connections = [db_engine.connect() for _ in range(3)]
+    assert tracker.snapshot().checked_out == 3
+    # Третье соединение выдано сверх pool_size
+    assert REGISTRY.get_sample_value("db_pool_checked_out") == 3
+    assert REGISTRY.get_sample_value("db_pool_overflow") == 1
+    for connection in connections:
+        connection.close()
+    with db_engine.connect():
+        pass
+
+    stats = tracker.snapshot()
+    assert (stats.checked_out, stats.peak_checked_out, stats.checkouts) == (0, 3, 4)
+    assert stats.as_dict()["saturation"] == 0.75
+    assert REGISTRY.get_sample_value("db_pool_overflow") == 0
+
+
+def test_collect_process_metrics() -> None:
+    """Тест снимка ресурсов текущего процесса."""
+    metrics = collect_process_metrics("worker", is_leader=True)
+
+    assert metrics.process_id == current_process_id()
+    assert metrics.role == "worker"
+    assert metrics.max_rss_kb > 0
+    assert metrics.threads >= 1
+    assert metrics.cpu_user_seconds >= 0
+    assert metrics.as_dict()["updated_at"] == metrics.updated_at.isoformat()
+
+
+def test_record_heartbeat_upserts_and_prunes(db_session: Session) -> None:
+    """Тест перезаписи строки процесса и удаления давно остановленных."""
+    metrics = collect_process_metrics("worker", is_leader=False)
+    stale = replace(
+        metrics,
+        process_id="old-host:1",
+        updated_at=metrics.updated_at - timedelta(days=2),
+    )
+    db_session.add(
+        ProcessHeartbeat(
+            **stale.as_dict()
+            | {
+                "started_at": stale.started_at,
+                "updated_at": stale.updated_at,
+            }
+        )
+    )
+    db_session.commit()
+
+    record_heartbeat(db_session, metrics)
+    record_heartbeat(db_session, replace(metrics, is_leader=True))
+
+    rows = db_session.query(ProcessHeartbeat).all()
+    assert [row.process_id for row in rows] == [metrics.process_id]
+    assert rows[0].is_leader
+
+
+def test_get_process_heartbeats_skips_silent_processes(db_session: Session) -> None:
+    """Тест, что процессы без свежего снимка не показываются."""
+    metrics = collect_process_metrics("worker", is_leader=False)
+    record_heartbeat(db_session, metrics)
+    record_heartbeat(
+        db_session,
+        replace(
+            metrics,
+            process_id="silent-host:7",
+            updated_at=datetime.now() - timedelta(minutes=10),
+        ),
+    )
+
+    heartbeats = get_process_heartbeats(db_session, max_age_seconds=90)
+
+    assert [h.process_id for h in heartbeats] == [metrics.process_id]
+
+
+def test_record_proxy_stats_replaces_process_rows(db_session: Session) -> None:
+    """Тест перезаписи статистики прокси процесса и ее выдачи."""
+    now = datetime.now()
+    snapshot = ProxySnapshot(
+        proxy="http://***@10.0.0.1:3128",
+        state="quarantined",
+        requests=12,
+        failures=4,
+        success_rate=0.6,
+        latency_ms=None,
+        quarantined_until=now + timedelta(minutes=1),
+    )
+    record_proxy_stats(db_session, "worker-host:1", [snapshot], now)
+    record_proxy_stats(
+        db_session, "worker-host:1", [replace(snapshot, state="active")], now
+    )
+    record_proxy_stats(
+        db_session, "silent-host:7", [snapshot], now - timedelta(minutes=10)
+    )
+
+    stats = get_proxy_stats(db_session, max_age_seconds=90)
+
+    assert [(s["process_id"], s["state"]) for s in stats] == [
+        ("worker-host:1", "active")
+    ]
+    assert stats[0]["requests"] == 12
+    assert stats[0]["quarantined_until"] is not None
@@ -1,90 +1,134 @@
 """Тесты для модуля планировщика."""
 
-from datetime import datetime
 from unittest.mock import Mock, patch
 
-from core.scheduler import update_vacancies
-from parsers.dto import VacancyDTO
+from core.scheduler import (
+    crawl_vacancies,
+    dispatch_parse_jobs,
+    plan_crawl,
+    run_parse_job,
+)
 
 
+@patch("core.scheduler.prune_crawl_runs")
+@patch("core.scheduler.prune_crawl_units")
+@patch("core.scheduler.close_finished_runs")
+@patch("core.scheduler.plan_due_entries")
 @patch("core.scheduler.get_db")
-@patch("core.scheduler.add_vacancies_from_dto")
-@patch("core.scheduler.SuperJobParser")
-@patch("core.scheduler.HHParser")
-def test_update_vacancies_success(
-    mock_hh_parser: Mock,
-    mock_superjob_parser: Mock,
-    mock_add_vacancies: Mock,
+def test_plan_crawl_plans_due_entries(
     mock_get_db: Mock,
+    mock_plan: Mock,
+    mock_close: Mock,
+    mock_prune_units: Mock,
+    mock_prune_runs: Mock,
 ) -> None:
-    """Тест успешного выполнения задачи обновления вакансий."""
-    # 1. Настраиваем мок парсера
-    mock_parser_instance = mock_hh_parser.return_value
-    mock_dto_list = [
-        VacancyDTO(
-            title="Test Vacancy",
-            company="Test Co",
-            location="Test City",
-            salary="100-200",
-            description="Desc",
-            published_at=datetime.now(),
-            source="hh.ru",
-            original_url="http://test.com/1",
-            salary_min_rub=100,
-            salary_max_rub=200,
-        )
+    """Тест планирования записей плана обхода по умолчанию во всех источниках."""
+    mock_db_session = Mock()
+    mock_get_db.return_value.__enter__.return_value = mock_db_session
+    mock_plan.return_value = []
+
+    plan_crawl()
+
+    mock_close.assert_called_once_with(mock_db_session)
+    db, entries, page_ranges, budgets, pages_per_unit, factor = mock_plan.call_args.args
+    assert db is mock_db_session
+    assert [(entry.source, entry.query) for entry in entries] == [
+        ("hh.ru", "Python"),
+        ("superjob.ru", "Python"),
     ]
-    mock_parser_instance.parse.return_value = mock_dto_list
+    assert page_ranges == {"hh.ru": (0, 39), "superjob.ru": (1, 5)}
+    assert budgets == {"hh.ru": 1500, "superjob.ru": 300}
+    assert pages_per_unit == 5
+    assert factor == 2.0
+    assert (entries[0].min_interval, entries[0].max_interval) == (900, 86400)
+    mock_prune_units.assert_called_once()
+    mock_prune_runs.assert_called_once()
 
-    # Настраиваем мок для SuperJobParser, чтобы он возвращал пустой список
-    mock_superjob_instance = mock_superjob_parser.return_value
-    mock_superjob_instance.parse.return_value = []
 
-    # 2. Настраиваем мок функции добавления в БД
-    mock_add_vacancies.return_value = len(mock_dto_list)
+@patch("core.scheduler.plan_due_entries")
+@patch("core.scheduler.settings")
+def test_plan_crawl_survives_invalid_plan(mock_settings: Mock, mock_plan: Mock) -> None:
+    """Тест: некорректный план обхода не роняет задачу планировщика."""
+    mock_settings.CRAWL_PLAN_JSON = '{"query": "Python"}'
 
-    # 3. Настраиваем мок контекстного менеджера get_db
-    mock_db_session = Mock()
-    mock_get_db.return_value.__enter__.return_value = mock_db_session
+    plan_crawl()
 
-    # Act
-    update_vacancies(search_query="Python")
+    mock_plan.assert_not_called()
 
-    # Assert
-    # Проверяем, что парсер был создан и вызван
-    mock_hh_parser.assert_called_once()
-    mock_parser_instance.parse.assert_called_once_with("Python")
 
-    # Проверяем, что была запрошена сессия БД
-    mock_get_db.assert_called_once()
+@patch("core.scheduler.process_crawl_units")
+def test_crawl_vacancies_uses_parsers_by_source(mock_process: Mock) -> None:
+    """Тест обхода единиц парсерами всех источников."""
+    mock_process.return_value = 0
 
-    # Проверяем, что функция сохранения была вызвана с правильными данными
-    mock_add_vacancies.assert_called_once_with(mock_db_session, mock_dto_list)
+    crawl_vacancies()
 
+    parsers = mock_process.call_args.args[0]
+    assert set(parsers) == {"hh.ru", "superjob.ru"}
+
+
+@patch("core.scheduler.is_circuit_open", side_effect=lambda source: source == "hh.ru")
+@patch("core.scheduler.process_crawl_units")
+def test_crawl_vacancies_skips_open_circuits(
+    mock_process: Mock, mock_circuit: Mock
+) -> None:
+    """Тест, что единицы отключенного источника не берутся в обход."""
+    mock_process.return_value = 0
 
+    crawl_vacancies()
+
+    assert set(mock_process.call_args.args[0]) == {"superjob.ru"}
+
+
+@patch("core.scheduler.update_parse_job_progress")
+@patch("core.scheduler.finish_parse_job")
 @patch("core.scheduler.get_db")
 @patch("core.scheduler.add_vacancies_from_dto")
 @patch("core.scheduler.SuperJobParser")
 @patch("core.scheduler.HHParser")
-def test_update_vacancies_no_vacancies_found(
+def test_run_parse_job_reports_progress(
     mock_hh_parser: Mock,
     mock_superjob_parser: Mock,
     mock_add_vacancies: Mock,
     mock_get_db: Mock,
+    mock_finish: Mock,
+    mock_progress: Mock,
+) -> None:
+    """Тест выполнения задачи очереди с сохранением прогресса по источникам."""
+    mock_hh_parser.return_value.parse.return_value = [Mock(), Mock()]
+    mock_superjob_parser.__name__ = "SuperJobParser"
+    mock_superjob_parser.return_value.parse.side_effect = RuntimeError("down")
+    mock_add_vacancies.return_value = 2
+    mock_db_session = Mock()
+    mock_get_db.return_value.__enter__.return_value = mock_db_session
+
+    run_parse_job(7, "Python")
+
+    progress = [call.args[3:] for call in mock_progress.call_args_list]
+    assert progress == [(2, 1, 2), (2, 2, 2)]
+    # Ошибка одного источника не делает задачу неудачной
+    assert mock_finish.call_args.args[1] == 7
+    assert mock_finish.call_args.args[3:] == (2, None)
+
+
+@patch("core.scheduler.scheduler")
+@patch("core.scheduler.claim_parse_jobs")
+@patch("core.scheduler.reclaim_stale_parse_jobs")
+@patch("core.scheduler.get_db")
+def test_dispatch_parse_jobs_runs_claimed_jobs(
+    mock_get_db: Mock,
+    mock_reclaim: Mock,
+    mock_claim: Mock,
+    mock_scheduler: Mock,
 ) -> None:
-    """Тест сценария, когда парсер не нашел ни одной вакансии."""
-    # Парсеры возвращают пустые списки
-    mock_hh_parser.return_value.parse.return_value = []
-    mock_superjob_parser.return_value.parse.return_value = []
-
-    # Act
-    update_vacancies(search_query="ExoticLanguage")
-
-    # Assert
-    # Парсеры были вызваны
-    mock_hh_parser.return_value.parse.assert_called_once_with("ExoticLanguage")
-    mock_superjob_parser.return_value.parse.assert_called_once_with("ExoticLanguage")
-
-    # А вот функции для работы с БД - нет, так как список вакансий пуст
-    mock_get_db.assert_not_called()
-    mock_add_vacancies.assert_not_called()
+    """Тест запуска забранных из очереди задач в пуле планировщика."""
+    job = Mock(id=7, query="Python")
+    mock_claim.return_value = [job]
+
+    dispatch_parse_jobs()
+
+    mock_reclaim.assert_called_once()
+    mock_scheduler.add_job.assert_called_once()
+    _, call_kwargs = mock_scheduler.add_job.call_args
+    assert call_kwargs["args"] == [7, "Python"]
+    assert call_kwargs["id"] == "parse_job_7"
@@ -0,0 +1,136 @@
+"""Тесты для индекса похожих вакансий."""
+
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from core.dedup import InsertedVacancy
+from core.similarity import (
+    SimilarityIndex,
+    document_terms,
+    get_similarity_index,
+    update_similarity_index,
+)
+
+DOCUMENTS = [
+    (1, "Python-разработчик", "Django, PostgreSQL, Celery, Docker"),
+    (2, "Python developer", "Django REST framework, PostgreSQL, Docker"),
+    (3, "Бухгалтер", "1С, налоговая отчетность, первичные документы"),
+    (4, "Главный бухгалтер", "1С, отчетность в налоговую, сверки"),
+    (5, "Водитель-экспедитор", "Категория B, доставка по городу"),
+]
+
+
+def test_document_terms_normalizes_word_forms() -> None:
+    """Тест, что формы слова с общей основой дают один признак."""
+    first = dict(document_terms("Разработчики", None))
+    second = dict(document_terms("разработчик", None))
+    assert first.keys() == second.keys()
+    # Токены названия весят вдвое больше токенов описания
+    assert list(first.values()) == [2.0]
+    assert list(dict(document_terms("", "разработчик")).values()) == [1.0]
+
+
+def test_search_ranks_related_vacancies_first() -> None:
+    """Тест, что ближайшая вакансия из той же профессии идет первой."""
+    index = SimilarityIndex.build(DOCUMENTS)
+
+    results = index.search(DOCUMENTS[0][1], DOCUMENTS[0][2], limit=3, exclude_id=1)
+
+    assert results[0][0] == 2
+    assert all(vacancy_id != 1 for vacancy_id, _ in results)
+    assert [score for _, score in results] == sorted(
+        (score for _, score in results), reverse=True
+    )
+
+
+def test_added_documents_are_searchable() -> None:
+    """Тест, что вакансии из дельты находятся вместе с базовыми."""
+    index = SimilarityIndex.build(DOCUMENTS)
+
+    assert index.add([(10, "Бухгалтер по расчету зарплаты", "1С, отчетность")]) == 1
+
+    results = index.search(DOCUMENTS[2][1], DOCUMENTS[2][2], exclude_id=3)
+    assert {4, 10} <= {vacancy_id for vacancy_id, _ in results}
+    assert len(index) == len(DOCUMENTS) + 1
+
+
+def test_save_and_load_roundtrip(tmp_path: Path) -> None:
+    """Тест, что индекс и дельта переживают сохранение и загрузку."""
+    index = SimilarityIndex.build(DOCUMENTS)
+    index.add([(10, "Python-разработчик", "Django")])
+    index.save_base(tmp_path)
+    index.save_delta(tmp_path)
+
+    loaded = SimilarityIndex.load(tmp_path)
+
+    assert len(loaded) == len(index)
+    assert loaded.search("Python-разработчик", "Django") == index.search(
+        "Python-разработчик", "Django"
+    )
+
+
+def test_replace_delta_keeps_only_newer_documents() -> None:
+    """Тест, что после перестройки в дельте остаются только новые вакансии."""
+    previous = SimilarityIndex()
+    previous.add([(4, "Бухгалтер", None), (7, "Python-разработчик", None)])
+    rebuilt = SimilarityIndex.build(DOCUMENTS)
+
+    rebuilt.replace_delta(previous)
+
+    assert len(rebuilt) == len(DOCUMENTS) + 1
+    assert rebuilt.search("Python-разработчик", None, limit=1)[0][0] == 7
+
+
+def test_update_similarity_index_is_noop_when_disabled() -> None:
+    """Тест, что без каталога индекса обновление ничего не делает."""
+    vacancy = InsertedVacancy(1, datetime.now(), "Python", "Acme", None)
+    with patch("core.similarity.settings.SIMILARITY_INDEX_DIR", None):
+        assert update_similarity_index([vacancy]) == 0
+        assert get_similarity_index() is None
+
+
+@pytest.mark.parametrize("build_base", [True, False])
+def test_update_similarity_index_writes_delta(tmp_path: Path, build_base: bool) -> None:
+    """Тест инкрементального обновления индекса на диске."""
+    if build_base:
+        SimilarityIndex.build(DOCUMENTS).save_base(tmp_path)
+    vacancy = InsertedVacancy(
+        20, datetime.now(), "Водитель погрузчика", "Acme", "Склад, смены"
+    )
+
+    with patch("core.similarity.settings.SIMILARITY_INDEX_DIR", str(tmp_path)):
+        assert update_similarity_index([vacancy]) == 1
+        index = get_similarity_index()
+
+    assert index is not None
+    assert 20 in {vacancy_id for vacancy_id, _ in index.search("Водитель", None)}
+
+
+def _add_vacancies(directory: str, first_id: int, count: int) -> None:
+    """Дописывает вакансии в дельту по одной, как процесс сборщика."""
+    with patch("core.similarity.settings.SIMILARITY_INDEX_DIR", directory):
+        for vacancy_id in range(first_id, first_id + count):
+            vacancy = InsertedVacancy(
+                vacancy_id, datetime.now(), "Python-разработчик", "Acme", "Django"
+            )
+            update_similarity_index([vacancy])
+
+
+def test_update_similarity_index_from_several_processes(tmp_path: Path) -> None:
+    """Тест, что параллельные процессы не теряют векторы друг друга."""
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_add_vacancies, args=(str(tmp_path), 1000 * i, 30))
+        for i in range(1, 5)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert [process.exitcode for process in processes] == [0] * 4
+    assert len(SimilarityIndex.load(tmp_path)) == 120
@@ -0,0 +1,79 @@
+"""Тесты для журнала медленных SQL-запросов."""
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+from core.slow_queries import SlowQueryLog, is_explainable
+
+
+class StepClock:
+    """Часы, сдвигающиеся на step секунд при каждом обращении.
+
+    Журнал обращается к часам до и после запроса, поэтому длительность
+    каждого запроса равна step.
+    """
+
+    def __init__(self) -> None:
+        """Создает часы с нулевым шагом."""
+        self.now = 0.0
+        self.step = 0.0
+
+    def __call__(self) -> float:
+        """Возвращает текущее время и сдвигает его."""
+        self.now += self.step
+        return self.now
+
+
+def _run(db_engine: Engine, clock: StepClock, duration_ms: float, value: int) -> None:
+    """Выполняет запрос длительностью duration_ms по часам clock."""
+    with db_engine.connect() as conn:
+        clock.step = duration_ms / 1000
+        conn.exec_driver_sql("SELECT ?", (value,))
+        clock.step = 0.0
+
+
+def test_slow_query_log_keeps_slowest_queries() -> None:
+    """Тест, что журнал хранит самые долгие запросы выше порога с параметрами."""
+    db_engine = create_engine("sqlite://")
+    clock = StepClock()
+    log = SlowQueryLog(db_engine, threshold_ms=100, capacity=2, clock=clock)
+
+    for duration_ms, value in [(50, 1), (300, 2), (200, 3), (400, 4), (250, 5)]:
+        _run(db_engine, clock, duration_ms, value)
+
+    queries = log.snapshot()
+    assert [q["parameters"] for q in queries] == [[4], [2]]
+    assert [q["duration_ms"] for q in queries] == [400.0, 300.0]
+    assert queries[0]["statement"] == "SELECT ?"
+    # Планы строятся только для PostgreSQL
+    assert queries[0]["plan"] is None
+    assert log.snapshot(limit=1) == queries[:1]
+
+    log.clear()
+    assert log.snapshot() == []
+
+
+def test_slow_query_log_disabled_with_zero_threshold() -> None:
+    """Тест, что при нулевом пороге журнал не подписывается на события."""
+    db_engine = create_engine("sqlite://")
+    log = SlowQueryLog(db_engine, threshold_ms=0, explain_sample_rate=1.0)
+
+    assert not event.contains(db_engine, "after_cursor_execute", log._after_execute)
+
+
+def test_locking_queries_are_not_explained() -> None:
+    """Тест, что запросы с блокировками не повторяются под EXPLAIN ANALYZE."""
+    # Так компилируется захват единицы обхода в core.crawl_units
+    for_update = (
+        "SELECT crawl_units.id, crawl_units.status FROM crawl_units "
+        "WHERE crawl_units.id = %(id_1)s AND crawl_units.lease_owner = %(owner)s "
+        "FOR UPDATE"
+    )
+
+    assert is_explainable("SELECT * FROM vacancies WHERE id = %(id)s")
+    assert is_explainable("  select count(*) from vacancies")
+    assert not is_explainable(for_update)
+    assert not is_explainable("SELECT id FROM crawl_units FOR SHARE SKIP LOCKED")
+    assert not is_explainable("SELECT pg_try_advisory_lock(%(key)s)")
+    assert not is_explainable("SELECT pg_advisory_unlock_all()")
+    assert not is_explainable("UPDATE vacancies SET expired_at = NULL")
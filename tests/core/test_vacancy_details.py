@@ -0,0 +1,87 @@
+"""Тесты для обогащения вакансий hh.ru полными описаниями."""
+
+from datetime import datetime
+from typing import Any, Generator, List
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from core.database import SessionLocal
+from core.models import Vacancy, VacancyDetail
+from core.vacancy_details import enrich_descriptions
+from parsers.dto import VacancyDTO
+
+
+@pytest.fixture
+def db_session(setup_test_db: Any) -> Generator[Session, None, None]:
+    """Предоставляет чистую сессию БД для каждого теста."""
+    SessionLocal.configure(bind=setup_test_db)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _dto(vacancy_id: int, day: int, source: str = "hh.ru") -> VacancyDTO:
+    """Создает вакансию с фрагментом описания."""
+    return VacancyDTO(
+        title=f"Python {vacancy_id}",
+        company="Test Co",
+        location="Москва",
+        salary=None,
+        description="Фрагмент",
+        published_at=datetime(2025, 9, day),
+        source=source,
+        original_url=f"https://hh.ru/vacancy/{vacancy_id}",
+    )
+
+
+def _parser() -> Mock:
+    """Создает парсер, загружающий описание "Полное <id>"."""
+    parser = Mock()
+    parser.fetch_descriptions.side_effect = lambda ids, workers, on_progress: {
+        vacancy_id: f"Полное {vacancy_id}" for vacancy_id in ids
+    }
+    return parser
+
+
+def _descriptions(vacancies: List[VacancyDTO]) -> List[str]:
+    """Возвращает описания вакансий."""
+    return [dto.description or "" for dto in vacancies]
+
+
+def test_only_new_and_changed_vacancies_are_fetched(db_session: Session) -> None:
+    """Тест использования кэша и повторной загрузки переопубликованных вакансий."""
+    parser = _parser()
+    enrich_descriptions(db_session, [_dto(1, 1), _dto(2, 1)], parser, 10, 2)
+
+    vacancies = [_dto(1, 1), _dto(2, 5), _dto(3, 1, source="superjob.ru")]
+    stats = enrich_descriptions(db_session, vacancies, parser, 10, 2)
+
+    assert parser.fetch_descriptions.call_args.args[0] == ["2"]
+    assert (stats.cached, stats.fetched) == (1, 1)
+    assert _descriptions(vacancies) == ["Полное 1", "Полное 2", "Фрагмент"]
+    detail = db_session.get(VacancyDetail, ("hh.ru", "2"))
+    assert detail is not None and detail.version == "2025-09-05T00:00:00"
+
+
+def test_budget_defers_older_vacancies(db_session: Session) -> None:
+    """Тест бюджета загрузок и обновления уже сохраненных вакансий."""
+    stored = _dto(1, 1)
+    db_session.add(Vacancy(**stored.model_dump()))
+    db_session.commit()
+    parser = _parser()
+
+    vacancies = [stored, _dto(2, 3), _dto(3, 2)]
+    stats = enrich_descriptions(db_session, vacancies, parser, 2, 2)
+
+    assert parser.fetch_descriptions.call_args.args[0] == ["2", "3"]
+    assert stats.deferred == 1
+    assert _descriptions(vacancies) == ["Фрагмент", "Полное 2", "Полное 3"]
+
+    # В следующем обходе отложенная вакансия обновляется в таблице вакансий
+    enrich_descriptions(db_session, [stored, _dto(2, 3)], parser, 2, 2)
+    db_session.expire_all()
+    assert db_session.query(Vacancy).one().description == "Полное 1"
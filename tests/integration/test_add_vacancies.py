@@ -0,0 +1,90 @@
+"""Integration tests for inserting vacancies into PostgreSQL."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import add_vacancies_from_dto, get_db
+from core.models import Vacancy, VacancySignature, VacancyUrl
+from parsers.dto import VacancyDTO
+
+URL_PREFIX = "https://integration.test/vacancy/"
+
+
+def _dto(url: str, published_at: datetime, source: str) -> VacancyDTO:
+    """Создает DTO тестовой вакансии."""
+    return VacancyDTO(
+        title="Интеграционный тест",
+        company="Тестовая компания",
+        location="Москва",
+        salary=None,
+        description="Описание",
+        published_at=published_at,
+        source=source,
+        original_url=URL_PREFIX + url,
+    )
+
+
+def _cleanup(db: Session) -> None:
+    """Удаляет тестовые вакансии."""
+    db.rollback()
+    urls = Vacancy.original_url.startswith(URL_PREFIX)
+    db.execute(
+        delete(VacancySignature).where(
+            VacancySignature.vacancy_id.in_(select(Vacancy.id).where(urls))
+        )
+    )
+    db.execute(delete(Vacancy).where(urls))
+    db.execute(delete(VacancyUrl).where(VacancyUrl.original_url.startswith(URL_PREFIX)))
+    db.commit()
+
+
+@pytest.mark.integration
+def test_add_vacancies_with_hh_timezone_offset() -> None:
+    """Проверяет вставку вакансии hh.ru с датой в формате API (+0300)."""
+    assert settings.TEST_DATABASE_URL is None, (
+        "Интеграционные тесты не должны использовать TEST_DATABASE_URL"
+    )
+    dto = _dto("hh", datetime.fromisoformat("2026-10-18T10:00:00+0300"), "hh.ru")
+    with get_db() as db:
+        try:
+            assert add_vacancies_from_dto(db, [dto]) == 1
+            # Повторный парсинг той же вакансии ничего не добавляет
+            assert add_vacancies_from_dto(db, [dto]) == 0
+
+            vacancy = db.scalars(
+                select(Vacancy).where(Vacancy.original_url == dto.original_url)
+            ).one()
+            assert vacancy.duplicate_cluster_id is not None
+            assert vacancy.is_cluster_representative
+        finally:
+            _cleanup(db)
+
+
+@pytest.mark.integration
+def test_add_vacancies_dedupes_url_across_partitions_key() -> None:
+    """Проверяет, что URL с новой датой публикации не вставляется повторно.
+
+    Даты SuperJob "сегодня" и "вчера" меняются между обходами, а
+    уникальность секционированной таблицы включает published_at.
+    """
+    assert settings.TEST_DATABASE_URL is None, (
+        "Интеграционные тесты не должны использовать TEST_DATABASE_URL"
+    )
+    published_at = datetime(2026, 10, 18, 9)
+    with get_db() as db:
+        try:
+            first = _dto("superjob", published_at, "superjob.ru")
+            assert add_vacancies_from_dto(db, [first]) == 1
+            later = _dto("superjob", published_at + timedelta(hours=1), "superjob.ru")
+            assert add_vacancies_from_dto(db, [later]) == 0
+
+            count = db.scalar(
+                select(func.count()).where(Vacancy.original_url == first.original_url)
+            )
+            assert count == 1
+        finally:
+            _cleanup(db)
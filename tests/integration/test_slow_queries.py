@@ -0,0 +1,71 @@
+"""Integration tests for the slow-query log."""
+
+import pytest
+from sqlalchemy import create_engine
+
+from core.config import settings
+from core.slow_queries import SlowQueryLog
+
+
+@pytest.mark.integration
+def test_slow_query_log_captures_explain_analyze_plan() -> None:
+    """Проверяет построение плана медленного запроса в PostgreSQL."""
+    assert settings.TEST_DATABASE_URL is None, (
+        "Интеграционные тесты не должны использовать TEST_DATABASE_URL"
+    )
+    db_engine = create_engine(settings.database_url)
+    log = SlowQueryLog(db_engine, threshold_ms=20, explain_sample_rate=1.0)
+    try:
+        with db_engine.connect() as conn:
+            conn.exec_driver_sql(
+                "SELECT pg_sleep(0.05), %(label)s AS label", {"label": "медленно"}
+            )
+        log.shutdown()
+
+        [query] = log.snapshot()
+        assert query["parameters"] == {"label": "медленно"}
+        assert query["explain_error"] is None
+        assert any("Execution Time" in line for line in query["plan"])
+    finally:
+        log.shutdown()
+        db_engine.dispose()
+
+
+@pytest.mark.integration
+def test_slow_query_log_skips_and_guards_side_effects() -> None:
+    """Проверяет, что план не строится ценой побочных эффектов запроса.
+
+    Рекомендательная блокировка не повторяется, а запрос, изменяющий
+    данные, выполняется в транзакции только для чтения и завершается
+    ошибкой.
+    """
+    assert settings.TEST_DATABASE_URL is None, (
+        "Интеграционные тесты не должны использовать TEST_DATABASE_URL"
+    )
+    db_engine = create_engine(settings.database_url)
+    log = SlowQueryLog(db_engine, threshold_ms=20, explain_sample_rate=1.0)
+    try:
+        with db_engine.connect() as conn:
+            conn.exec_driver_sql("SELECT pg_sleep(0.05), pg_try_advisory_lock(8231)")
+            conn.exec_driver_sql("SELECT pg_advisory_unlock(8231)")
+        log.shutdown()
+        [locking] = log.snapshot()
+        assert locking["plan"] is None and locking["explain_error"] is None
+        with db_engine.connect() as conn:
+            held = conn.exec_driver_sql(
+                "SELECT count(*) FROM pg_locks "
+                "WHERE locktype = 'advisory' AND objid = 8231"
+            ).scalar()
+        assert held == 0
+
+        log.clear()
+        with db_engine.connect() as conn:
+            conn.exec_driver_sql("SELECT pg_sleep(0.05), nextval('vacancies_id_seq')")
+            conn.rollback()
+        log.shutdown()
+        [writing] = log.snapshot()
+        assert writing["plan"] is None
+        assert "read-only" in writing["explain_error"]
+    finally:
+        log.shutdown()
+        db_engine.dispose()
@@ -0,0 +1,58 @@
+"""Тесты для разбора дат публикации на русском языке."""
+
+from datetime import date, datetime, time, timedelta
+
+from parsers.dates import RussianDateResolver, get_date_resolver, today_reference
+
+
+def test_relative_dates_use_reference() -> None:
+    """Тест, что относительные даты разрешаются от момента отсчета."""
+    reference = datetime(2025, 7, 20, 15, 30)
+    resolver = RussianDateResolver(reference)
+
+    assert resolver.resolve("Сегодня") == reference
+    assert resolver.resolve(" вчера ") == reference - timedelta(days=1)
+    assert resolver.resolve("19 июля") == datetime(2025, 7, 19)
+    assert resolver.resolve("3 марта 2024") == datetime(2024, 3, 3)
+    assert resolver.resolve("Неизвестная дата") == reference
+    assert resolver.resolve("31 июня") == reference
+
+
+def test_year_rollover() -> None:
+    """Тест, что дата позже момента отсчета относится к прошлому году."""
+    resolver = RussianDateResolver(datetime(2026, 1, 2, 9, 0))
+
+    assert resolver.resolve("31 декабря") == datetime(2025, 12, 31)
+    assert resolver.resolve("2 января") == datetime(2026, 1, 2)
+    # Разница часовых поясов: дата на день впереди остается в текущем году
+    assert resolver.resolve("3 января") == datetime(2026, 1, 3)
+    assert resolver.resolve("29 февраля") == datetime(2026, 1, 2, 9, 0)
+
+
+def test_repeated_strings_are_resolved_once() -> None:
+    """Тест, что одинаковые строки разбираются один раз."""
+    resolver = RussianDateResolver(datetime(2025, 7, 20))
+
+    for _ in range(3):
+        resolver.resolve("19 июля")
+        resolver.resolve("Сегодня")
+
+    assert resolver._resolve_cached.cache_info().misses == 2
+
+
+def test_shared_resolver_per_reference() -> None:
+    """Тест, что для одного момента отсчета используется один разборщик."""
+    reference = datetime(2025, 7, 20)
+
+    assert get_date_resolver(reference) is get_date_resolver(reference)
+    assert get_date_resolver(reference + timedelta(seconds=1)).reference == (
+        reference + timedelta(seconds=1)
+    )
+
+
+def test_default_reference_is_midnight() -> None:
+    """Тест, что по умолчанию отсчет идет от полуночи текущего дня."""
+    midnight = datetime.combine(date.today(), time.min)
+
+    assert today_reference() == midnight
+    assert RussianDateResolver().resolve("Сегодня") == midnight
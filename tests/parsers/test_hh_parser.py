@@ -9,6 +9,7 @@ import requests
 
 from parsers.dto import VacancyDTO
 from parsers.hh_parser import HHParser
+from parsers.salary import SalaryNormalizer
 
 # Мок-ответ от API hh.ru для тестов
 MOCK_API_RESPONSE: Dict[str, Any] = {
@@ -84,6 +85,23 @@ def test_hh_parser_success(mock_requests_get: Mock) -> None:
     assert v2.salary is None
 
 
+def test_hh_parser_converts_salary_to_rub() -> None:
+    """Тест пересчета зарплаты в валюте вакансии в рубли."""
+    item = {
+        **MOCK_API_RESPONSE["items"][0],
+        "salary": {"from": 2000, "to": None, "currency": "USD"},
+    }
+    parser = HHParser()
+
+    vacancy = parser._parse_api_item(item, SalaryNormalizer({"USD": 90}))
+
+    assert vacancy is not None
+    assert vacancy.salary == "от 2000 USD"
+    assert (vacancy.salary_min_rub, vacancy.salary_max_rub) == (180000, None)
+    assert vacancy.salary_currency == "USD"
+    assert (vacancy.salary_min_amount, vacancy.salary_max_amount) == (2000, None)
+
+
 def test_hh_parser_api_error(mock_requests_get: Mock) -> None:
     """Тест обработки ошибки от API."""
     # Arrange
@@ -118,3 +136,20 @@ def test_hh_parser_malformed_item(mock_requests_get: Mock) -> None:
     # Парсер должен пропустить сломанную вакансию и вернуть только валидную
     assert len(vacancies) == 1
     assert vacancies[0].title == "Python Developer"
+
+
+def test_fetch_descriptions(mock_requests_get: Mock) -> None:
+    """Тест загрузки полных описаний с пропуском неудачных запросов."""
+    detail = Mock()
+    detail.json.return_value = {
+        "description": "<p>Пишем <strong>backend</strong></p><ul><li>Django</li></ul>",
+        "key_skills": [{"name": "Python"}, {"name": "SQL"}],
+    }
+    mock_requests_get.side_effect = lambda url, **kwargs: (
+        detail if url.endswith("/1") else Mock(json=Mock(side_effect=ValueError))
+    )
+    parser = HHParser()
+
+    descriptions = parser.fetch_descriptions(["1", "2"], workers=2)
+
+    assert descriptions == {"1": "Пишем\nbackend\nDjango\nКлючевые навыки: Python, SQL"}
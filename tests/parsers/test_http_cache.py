@@ -0,0 +1,89 @@
+"""Тесты для дискового HTTP-кэша парсеров."""
+
+import os
+import time
+from pathlib import Path
+from typing import Optional
+from unittest.mock import Mock
+
+import requests
+
+from parsers.http_cache import HttpCache, normalize_url
+from parsers.http_client import HttpClient, reset_http_state
+
+URL = "https://api.hh.ru/vacancies?page=0&text=Python"
+
+
+def _response(
+    status: int, body: bytes = b"", etag: Optional[str] = None
+) -> requests.Response:
+    """Создает ответ requests с телом и ETag."""
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.url = URL
+    response.encoding = "utf-8"
+    if etag:
+        response.headers["ETag"] = etag
+    return response
+
+
+def _age(cache: HttpCache, url: str, seconds: float) -> None:
+    """Состаривает запись кэша на seconds секунд."""
+    path = cache._path(url, ".gz")
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_normalize_url() -> None:
+    """Тест канонического вида URL для ключа кэша."""
+    assert normalize_url("HTTPS://API.hh.ru/vacancies?text=Python&page=0#top") == URL
+
+
+def test_store_lookup_and_evict(tmp_path: Path) -> None:
+    """Тест сохранения ответа, условных заголовков и вытеснения записей."""
+    cache = HttpCache(str(tmp_path), ttl=60, max_bytes=10_000)
+    cache.store(URL, _response(200, b'{"items": []}', etag='"v1"'))
+
+    entry = cache.lookup(URL)
+
+    assert entry is not None
+    assert entry.to_response().json() == {"items": []}
+    assert entry.validators() == {"If-None-Match": '"v1"'}
+    _age(cache, URL, 120)
+    assert cache.lookup(URL) is None
+
+    # При превышении объема удаляются самые старые записи
+    cache = HttpCache(str(tmp_path), ttl=60, max_bytes=1500)
+    for page in range(3):
+        url = f"{URL}&x={page}"
+        cache.store(url, _response(200, os.urandom(1000)))
+        _age(cache, url, 30 - page)
+    cache.evict()
+    assert [cache.lookup(f"{URL}&x={page}") is None for page in range(3)] == [
+        True,
+        True,
+        False,
+    ]
+
+
+def test_client_revalidates_with_etag(tmp_path: Path) -> None:
+    """Тест условного запроса и подстановки сохраненного ответа вместо 304."""
+    reset_http_state()
+    session = Mock()
+    session.get.side_effect = [
+        _response(200, b'{"items": [1]}', etag='"v1"'),
+        _response(304),
+    ]
+    client = HttpClient("hh.ru", session, cache=HttpCache(str(tmp_path), 60, 10_000))
+    params = {"text": "Python", "page": 0}
+
+    first = client.get("https://api.hh.ru/vacancies", params=params)
+    second = client.get("https://api.hh.ru/vacancies", params=params)
+
+    assert first.json() == second.json() == {"items": [1]}
+    assert session.get.call_args.args[0] == URL
+    assert session.get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+    stats = client.cache_stats
+    assert (stats.requests, stats.hits, stats.bytes_saved) == (2, 1, 14)
+    assert stats.hit_ratio == 0.5
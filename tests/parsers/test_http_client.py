@@ -0,0 +1,245 @@
+"""Тесты для общего HTTP-клиента парсеров."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Generator, List, Optional
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+import requests
+
+from parsers.http_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    HttpClient,
+    TokenBucket,
+    get_circuit_breaker,
+    get_host_bucket,
+    is_circuit_open,
+    parse_retry_after,
+    proxy_response_ok,
+    reset_http_state,
+)
+from parsers.proxy_pool import ACTIVE, ProxyPool
+
+
+class FakeClock:
+    """Управляемые тестом монотонные часы."""
+
+    def __init__(self) -> None:
+        """Начинает отсчет с нуля."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Возвращает текущее время."""
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clean_http_state() -> Generator[None, None, None]:
+    """Сбрасывает корзины и автоматы между тестами."""
+    reset_http_state()
+    yield
+    reset_http_state()
+
+
+def _response(status: int, retry_after: Optional[str] = None) -> Mock:
+    """Создает ответ requests с заданным статусом."""
+    response = Mock(status_code=status, headers={})
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    if status >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(str(status))
+    return response
+
+
+def test_token_bucket_queues_reservations() -> None:
+    """Тест очереди резервирований после исчерпания всплеска."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+
+    waits = [bucket.reserve() for _ in range(4)]
+
+    assert waits == [0.0, 0.0, 0.5, 1.0]
+    clock.now = 10
+    # Корзина пополняется не выше емкости
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.5]
+
+
+def test_token_bucket_async_and_pause() -> None:
+    """Тест ожидания токенов в asyncio и паузы по Retry-After."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1, capacity=1, clock=clock)
+    bucket.pause(30)
+
+    with patch("parsers.http_client.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+        asyncio.run(bucket.acquire_async())
+
+    assert mock_sleep.await_args is not None
+    assert mock_sleep.await_args.args[0] == 31
+
+
+def test_circuit_breaker_opens_and_half_opens() -> None:
+    """Тест отключения после серии ошибок и пробного запроса."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    clock.now = 10
+    assert breaker.allow()
+    # Пока пробный запрос не завершился, остальные не пропускаются
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_parse_retry_after() -> None:
+    """Тест разбора Retry-After в секундах и в формате HTTP-даты."""
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=120)
+
+    assert parse_retry_after("7") == 7
+    assert 100 < (parse_retry_after(format_datetime(retry_at, usegmt=True)) or 0)
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+@patch("parsers.http_client.time.sleep")
+def test_client_retries_server_errors(mock_sleep: Mock) -> None:
+    """Тест повторов после 503 и паузы хоста по Retry-After после 429."""
+    session = Mock()
+    session.get.side_effect = [
+        _response(503),
+        _response(429, retry_after="20"),
+        _response(200),
+    ]
+    client = HttpClient("hh.ru", session, max_retries=3)
+
+    response = client.get("https://api.hh.ru/vacancies", params={"page": 0})
+
+    assert response.status_code == 200
+    assert session.get.call_count == 3
+    assert session.get.call_args.kwargs["timeout"] == 10
+    delays: List[float] = [call.args[0] for call in mock_sleep.call_args_list]
+    # Пауза по Retry-After выдерживается корзиной токенов хоста
+    assert max(delays) >= 20
+    assert get_circuit_breaker("hh.ru").state == CircuitBreaker.CLOSED
+
+
+@patch("parsers.http_client.time.sleep")
+def test_client_opens_circuit_after_failures(mock_sleep: Mock) -> None:
+    """Тест отключения источника после исчерпания повторов."""
+    session = Mock()
+    session.get.side_effect = requests.ConnectionError("reset")
+    client = HttpClient("superjob.ru", session, max_retries=4)
+
+    with pytest.raises(requests.ConnectionError):
+        client.get("https://russia.superjob.ru/vacancy/search/")
+
+    assert session.get.call_count == 5
+    assert is_circuit_open("superjob.ru")
+    with pytest.raises(CircuitOpenError):
+        client.get("https://russia.superjob.ru/vacancy/search/")
+    assert session.get.call_count == 5
+
+
+@patch("parsers.http_client.time.sleep")
+def test_client_calls_on_retry_before_each_pause(mock_sleep: Mock) -> None:
+    """Тест, что on_retry получает паузу перед повтором и может прервать запрос."""
+    session = Mock()
+    session.get.side_effect = [
+        requests.ConnectionError("reset"),
+        _response(503),
+        _response(200),
+    ]
+    on_retry = Mock()
+    client = HttpClient("hh.ru", session, max_retries=3, on_retry=on_retry)
+
+    assert client.get("https://api.hh.ru/vacancies").status_code == 200
+    assert on_retry.call_count == 2
+    # Ограничитель частоты тоже спит, поэтому паузы повторов ищутся среди всех
+    pauses = [call.args[0] for call in mock_sleep.call_args_list]
+    assert all(call.args[0] in pauses for call in on_retry.call_args_list)
+
+    session.get.side_effect = [_response(503), _response(200)]
+    on_retry.side_effect = RuntimeError("аренда потеряна")
+    with pytest.raises(RuntimeError):
+        client.get("https://api.hh.ru/vacancies")
+    assert session.get.call_count == 4
+
+
+def _proxy_pool() -> ProxyPool:
+    """Создает пул из одного прокси с карантином после первой ошибки."""
+    return ProxyPool(
+        ["http://proxy:3128"],
+        alpha=0.5,
+        quarantine_failures=1,
+        quarantine_seconds=0,
+        max_quarantine_seconds=0,
+    )
+
+
+def test_proxy_response_ok() -> None:
+    """Тест, какие ответы считаются ошибкой прокси."""
+    assert proxy_response_ok(200)
+    assert proxy_response_ok(304)
+    assert proxy_response_ok(404)
+    assert not proxy_response_ok(403)
+    assert not proxy_response_ok(407)
+    assert not proxy_response_ok(503)
+
+
+def test_client_records_proxy_client_errors_as_failures() -> None:
+    """Тест, что ответ 403 через прокси учитывается как ошибка прокси."""
+    pool = _proxy_pool()
+    [proxy] = pool._states
+    proxy.session = Mock()
+    proxy.session.get.return_value = _response(403)
+    client = HttpClient("hh.ru", requests.Session(), proxy_pool=pool)
+
+    with pytest.raises(requests.HTTPError):
+        client.get("https://api.hh.ru/vacancies")
+    assert proxy.failures == 1
+    assert proxy.success_rate < 1
+
+
+def test_client_records_proxy_after_unexpected_request_error() -> None:
+    """Тест, что прокси не остается в пробном запросе после ошибки ответа."""
+    pool = _proxy_pool()
+    [proxy] = pool._states
+    proxy.session = Mock()
+    proxy.session.get.side_effect = requests.exceptions.ChunkedEncodingError()
+    client = HttpClient("hh.ru", requests.Session(), proxy_pool=pool)
+
+    # Карантин нулевой длины: следующий выбор - пробный запрос
+    pool.record(proxy, False, None)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.get("https://api.hh.ru/vacancies")
+    assert proxy.failures == 2
+    assert not proxy.probing
+
+    proxy.session.get.side_effect = None
+    proxy.session.get.return_value = _response(200)
+    assert client.get("https://api.hh.ru/vacancies").status_code == 200
+    assert pool.snapshot()[0].state == ACTIVE
+
+
+def test_client_does_not_retry_client_errors() -> None:
+    """Тест, что ошибки 4xx, кроме 429, не повторяются."""
+    session = Mock()
+    session.get.return_value = _response(404)
+    client = HttpClient("hh.ru", session)
+
+    with pytest.raises(requests.HTTPError):
+        client.get("https://api.hh.ru/vacancies/1")
+
+    assert session.get.call_count == 1
+    assert get_host_bucket("api.hh.ru").rate == 2
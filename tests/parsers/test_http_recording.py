@@ -0,0 +1,99 @@
+"""Тесты для записи HTTP-трафика парсеров и его воспроизведения."""
+
+import json
+from pathlib import Path
+from unittest.mock import Mock
+
+import requests
+
+from benchmarks.replay_server import ReplayServer
+from parsers.hh_parser import HHParser
+from parsers.http_client import HttpClient, reset_http_state
+from parsers.http_recording import HttpRecorder, load_recordings, recording_key
+
+URL = "https://api.hh.ru/vacancies?text=Python&page=0"
+
+
+def _response(url: str, body: bytes) -> requests.Response:
+    """Создает успешный ответ requests с JSON-телом."""
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers["Content-Type"] = "application/json"
+    return response
+
+
+def test_recording_key_ignores_scheme_and_parameter_order() -> None:
+    """Тест ключа записи, не зависящего от схемы и порядка параметров."""
+    key = recording_key(URL)
+
+    assert key == "api.hh.ru/vacancies?page=0&text=Python"
+    assert recording_key("http://API.hh.ru/vacancies?page=0&text=Python") == key
+    assert recording_key("https://russia.superjob.ru") == "russia.superjob.ru/"
+
+
+def test_client_records_successful_responses(tmp_path: Path) -> None:
+    """Тест, что клиент сохраняет ответы, заменяя запись повторного запроса."""
+    reset_http_state()
+    session = Mock()
+    session.get.side_effect = [
+        _response(URL, b'{"items": []}'),
+        _response(URL.replace("page=0", "page=1"), b'{"items": [1]}'),
+        _response(URL, b'{"items": [2]}'),
+    ]
+    client = HttpClient("hh.ru", session, recorder=HttpRecorder(str(tmp_path)))
+
+    client.get(URL)
+    client.get(URL.replace("page=0", "page=1"))
+    client.get(URL)
+
+    recordings = {r.key: r for r in load_recordings(str(tmp_path))}
+    assert len(recordings) == 2
+    recording = recordings["api.hh.ru/vacancies?page=0&text=Python"]
+    assert recording.status == 200
+    assert recording.content_type == "application/json"
+    assert json.loads(recording.body) == {"items": [2]}
+
+
+def test_load_recordings_skips_damaged_files(tmp_path: Path) -> None:
+    """Тест, что поврежденные записи пропускаются."""
+    HttpRecorder(str(tmp_path)).record(_response(URL, b"{}"))
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+
+    assert [r.url for r in load_recordings(str(tmp_path))] == [URL]
+
+
+def test_replay_server_serves_recorded_crawl(tmp_path: Path) -> None:
+    """Тест воспроизведения записанной выдачи парсеру и внесения ошибок."""
+    reset_http_state()
+    item = {
+        "name": "Python Developer",
+        "employer": {"name": "Test Co"},
+        "published_at": "2025-09-01T10:00:00+0300",
+        "alternate_url": "https://hh.ru/vacancy/1",
+    }
+    body = json.dumps({"items": [item], "pages": 1}).encode()
+    recorder = HttpRecorder(str(tmp_path))
+    recorder.record(
+        _response(
+            "https://api.hh.ru/vacancies?text=Python&area=1&per_page=50&page=0", body
+        )
+    )
+
+    with ReplayServer(str(tmp_path)) as server:
+        parser = HHParser(server.url_for("https://api.hh.ru/vacancies"))
+        parser.http.cache = None
+        result = parser.parse_pages("Python", 0, 1)
+
+        assert [dto.title for dto in result.vacancies] == ["Python Developer"]
+        assert result.exhausted
+        assert requests.get(f"{server.url}/api.hh.ru/missing").status_code == 404
+        server.error_rate = 1.0
+        assert requests.get(server.url_for(URL)).status_code == 503
+    assert (server.stats.served, server.stats.missing, server.stats.errors) == (
+        1,
+        1,
+        1,
+    )
@@ -0,0 +1,81 @@
+"""Тесты для нормализатора строк зарплаты."""
+
+from unittest.mock import Mock, patch
+
+from core.currency_rates import CurrencyRateProvider
+from parsers.salary import Salary, SalaryNormalizer, get_salary_normalizer
+
+RATES = {"USD": 90.0, "EUR": 100.0, "KZT": 0.2}
+
+
+def test_normalize_bounds_and_currencies() -> None:
+    """Тест разбора границ вилки и пересчета валют в рубли."""
+    normalizer = SalaryNormalizer(RATES)
+
+    assert normalizer.normalize("от 50 000 до 80 000 руб.") == (50000, 80000)
+    assert normalizer.normalize("от 2 000 $") == (180000, None)
+    assert normalizer.normalize("до 400\xa0000 тенге") == (None, 80000)
+    assert normalizer.normalize("1 000 – 1 500 €") == (100000, 150000)
+    assert normalizer.normalize("По договорённости") == (None, None)
+    assert normalizer.normalize("Зарплата") == (None, None)
+
+
+def test_bound_words_are_not_matched_inside_words() -> None:
+    """Тест, что "от" и "до" внутри слов не считаются границами вилки."""
+    normalizer = SalaryNormalizer(RATES)
+
+    assert normalizer.normalize("100 000 ₽, работа в офисе") == (100000, 100000)
+    assert normalizer.normalize("от100 000 ₽") == (100000, None)
+
+
+def test_currency_priority_and_unknown_rate() -> None:
+    """Тест выбора валюты по приоритету и курса 1 для валюты без курса."""
+    normalizer = SalaryNormalizer({"USD": 90.0})
+
+    assert normalizer.normalize("1 000 $ (90 000 руб.)") == (1000, 90000)
+    # Без курса валюты сумма в рублях неизвестна
+    assert normalizer.normalize("до 1 000 EUR") == (None, None)
+    assert normalizer.parse("до 1 000 EUR") == Salary(None, 1000, "EUR")
+
+
+def test_repeated_strings_are_parsed_once() -> None:
+    """Тест, что повторяющиеся строки разбираются один раз."""
+    normalizer = SalaryNormalizer(RATES)
+    salaries = ["от 100 000 ₽", None, "от 100 000 ₽", "до 500 EUR", "от 100 000 ₽"]
+
+    results = normalizer.normalize_many(salaries)
+
+    assert results == [
+        (100000, None),
+        (None, None),
+        (100000, None),
+        (None, 50000),
+        (100000, None),
+    ]
+    assert normalizer._parse_cached.cache_info().misses == 2
+
+
+def test_convert_source_amounts() -> None:
+    """Тест пересчета границ вилки в валюте источника."""
+    normalizer = SalaryNormalizer(RATES)
+
+    assert normalizer.convert(1000, 2000, "usd") == Salary(
+        1000, 2000, "USD", 90000, 180000
+    )
+    assert normalizer.convert(100000, None, "RUR") == Salary(
+        100000, None, "RUB", 100000, None
+    )
+    assert normalizer.convert(None, 5000, None) == Salary(None, 5000, "RUB", None, 5000)
+
+
+def test_shared_normalizer_follows_rate_provider() -> None:
+    """Тест, что общий нормализатор пересоздается после перезагрузки курсов."""
+    now = [0.0]
+    source = Mock(side_effect=[{"USD": 80}, {"USD": 95}])
+    provider = CurrencyRateProvider(source, ttl=60, clock=lambda: now[0])
+    with patch("parsers.salary.get_rate_provider", return_value=provider):
+        normalizer = get_salary_normalizer()
+        assert get_salary_normalizer() is normalizer
+        assert normalizer.normalize("от 1 000 USD") == (80000, None)
+        now[0] = 60
+        assert get_salary_normalizer().normalize("от 1 000 USD") == (95000, None)
@@ -1,13 +1,16 @@
 """Тесты для SuperJobParser."""
 
-from datetime import datetime, timedelta
-from typing import Generator
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Generator, List
 from unittest.mock import Mock, patch
 
 import pytest
 import requests
 
 from parsers.dto import VacancyDTO
+from parsers.http_cache import HttpCache
+from parsers.parse_pool import shutdown_parse_pool
 from parsers.superjob_parser import SuperJobParser
 
 # Мок-ответ HTML от superjob.ru для основного теста
@@ -65,6 +68,29 @@ MOCK_HTML_EDGE_CASES = """
 </div>
 """
 
+# Карточка со вложенной разметкой для проверки извлечения текста
+MOCK_HTML_NESTED = """
+<html><body><div class="search">
+    <div class="_3Zxb f-test-search-result-item">
+        <h2><a class="link" href="/vakansii/python-razrabotchik-1.html">
+            Python-<b>разработчик</b>
+        </a></h2>
+        <a href="/vakansii/python-razrabotchik-1.html#apply">Откликнуться</a>
+        <span class="_1h3Zg f-test-text-vacancy-item-company-name">
+            <a href="/clients/1">ООО Ромашка</a>
+        </span>
+        <div><div><svg><use href="#pin"></use></svg>
+            <span><span>Санкт-Петербург</span>, Невский район</span>
+        </div></div>
+        <span class="f-test-text-company-item-salary">50 000 — 80 000 ₽</span>
+        <span class="_2Q1BH _3doCL _2eclS">19 июля</span>
+        <span class="_2Q1BH _3doCL _2k8ZM rtYnN sPJuZ">Опыт с <b>Django</b> и
+            <i>PostgreSQL</i><!-- скрыто --></span>
+        <span class="_2Q1BH _3doCL _2k8ZM rtYnN sPJuZ"> Удаленная работа </span>
+    </div>
+</div></body></html>
+"""
+
 
 @pytest.fixture
 def mock_requests_get() -> Generator[Mock, None, None]:
@@ -90,6 +116,14 @@ def test_superjob_parser_success(mock_requests_get: Mock) -> None:
     assert v1.salary == "По договорённости"
 
 
+def test_superjob_parse_pages_with_area(mock_requests_get: Mock) -> None:
+    """Тест передачи города SuperJob в URL поиска."""
+    parser = SuperJobParser()
+    parser.parse_pages("Python", 1, 1, area="4")
+    url = mock_requests_get.call_args.args[0]
+    assert "geo%5Bt%5D%5B0%5D=4" in url
+
+
 @patch("parsers.superjob_parser.MAX_PAGES", 1)
 def test_superjob_parser_edge_cases(mock_requests_get: Mock) -> None:
     """Тест парсинга вакансий с отсутствующими полями (граничные случаи)."""
@@ -111,18 +145,46 @@ def test_superjob_parser_edge_cases(mock_requests_get: Mock) -> None:
     assert v3.salary == "По договоренности"
 
 
-@patch("parsers.superjob_parser.datetime")
-def test_date_parsing(mock_datetime_class: Mock) -> None:
-    """Тест внутреннего метода парсинга дат."""
-    real_datetime_class = datetime
-    now = real_datetime_class(2025, 7, 20)
-    mock_datetime_class.now.return_value = now
-    mock_datetime_class.side_effect = lambda *a, **kw: real_datetime_class(*a, **kw)
+def test_nested_card_extraction() -> None:
+    """Тест извлечения полей из вложенной разметки, как в прежнем разборе CSS."""
+    parser = SuperJobParser()
+
+    page = parser._parse_page(Mock(text=MOCK_HTML_NESTED), datetime(2025, 9, 1))
+
+    assert page.last
+    assert page.vacancies == [
+        VacancyDTO(
+            title="Python-разработчик",
+            company="ООО Ромашка",
+            location="Санкт-Петербург, Невский район",
+            salary="50 000 — 80 000 ₽",
+            description="Опыт с Django и PostgreSQL\nУдаленная работа",
+            published_at=datetime(2025, 7, 19),
+            source="superjob.ru",
+            original_url=(
+                "https://russia.superjob.ru/vakansii/python-razrabotchik-1.html"
+            ),
+            salary_min_rub=50000,
+            salary_max_rub=80000,
+            salary_currency="RUB",
+            salary_min_amount=50000,
+            salary_max_amount=80000,
+        )
+    ]
+
+
+def test_relative_dates_share_crawl_reference(mock_requests_get: Mock) -> None:
+    """Тест, что "Сегодня" и "Вчера" разрешаются от полуночи дня обхода."""
     parser = SuperJobParser()
-    assert parser._parse_date("Сегодня") == now
-    assert parser._parse_date("Вчера") == now - timedelta(days=1)
-    assert parser._parse_date("19 июля") == real_datetime_class(2025, 7, 19)
-    assert parser._parse_date("Неизвестная дата") == now
+
+    vacancies = parser.parse_pages("Python", 1, 1).vacancies
+    repeated = parser.parse_pages("Python", 1, 1).vacancies
+
+    yesterday, today = vacancies[0].published_at, vacancies[1].published_at
+    assert today - yesterday == timedelta(days=1)
+    assert today == datetime.combine(date.today(), time.min)
+    # Повторный обход в тот же день дает те же даты публикации
+    assert [v.published_at for v in repeated] == [yesterday, today]
 
 
 def test_superjob_parser_network_error() -> None:
@@ -136,13 +198,128 @@ def test_superjob_parser_network_error() -> None:
         assert len(vacancies) == 0
 
 
-def test_get_proxy_with_proxies_configured() -> None:
-    """Тест, что _get_proxy возвращает корректный прокси, если они настроены."""
+def test_superjob_parser_uses_proxy_pool() -> None:
+    """Тест, что при настроенных прокси запросы идут через сессии пула прокси."""
     proxy_list = ["http://proxy1.com", "http://proxy2.com"]
     proxy_string = ",".join(proxy_list)
-    with patch("parsers.superjob_parser.settings.PROXY_LIST", proxy_string):
+    with (
+        patch("parsers.proxy_pool.settings.PROXY_LIST", proxy_string),
+        patch("requests.Session.get") as mock_get,
+    ):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.text = MOCK_HTML_RESPONSE
         parser = SuperJobParser()
-        proxy = parser._get_proxy()
-        assert proxy is not None
-        assert proxy["http"] in proxy_list
-        assert proxy["https"] in proxy_list
+        parser.parse_pages("Python", 1, 1)
+
+    assert parser.http.proxy_pool is not None
+    snapshot = parser.http.proxy_pool.snapshot()
+    assert {stat.proxy for stat in snapshot} == set(proxy_list)
+    assert sum(stat.requests for stat in snapshot) == 1
+    # Заголовки парсера передаются в сессию прокси
+    assert mock_get.call_args.kwargs["headers"] == parser.session.headers
+
+
+@patch("requests.Session.get")
+def test_unchanged_page_is_not_parsed_again(mock_get: Mock, tmp_path: Path) -> None:
+    """Тест, что неизмененная страница берется из сохраненного разбора."""
+    page = requests.Response()
+    page.status_code = 200
+    page._content = MOCK_HTML_RESPONSE.encode()
+    page.headers["ETag"] = '"p1"'
+    not_modified = requests.Response()
+    not_modified.status_code = 304
+    mock_get.side_effect = [page, not_modified]
+    cache = HttpCache(str(tmp_path), 60, 1_000_000)
+    with patch("parsers.superjob_parser.get_http_cache", return_value=cache):
+        parser = SuperJobParser()
+
+    first = parser.parse_pages("Python", 1, 1)
+    with patch("parsers.superjob_parser.extract_page") as mock_extract:
+        second = parser.parse_pages("Python", 1, 1)
+
+    mock_extract.assert_not_called()
+    assert second.vacancies == first.vacancies
+    assert second.cache_stats is not None
+    assert second.cache_stats.parses_skipped == 1
+    assert second.cache_stats.hits == 1
+
+
+@pytest.fixture
+def parse_pool() -> Generator[None, None, None]:
+    """Фикстура, включающая пул разбора из двух процессов."""
+    with (
+        patch("parsers.parse_pool.settings.PARSE_WORKERS", 2),
+        patch("parsers.superjob_parser.settings.PARSE_QUEUE_SIZE", 2),
+    ):
+        yield
+    shutdown_parse_pool()
+
+
+def _pages(last_page: int) -> List[Mock]:
+    """Создает ответы страниц поиска; на странице last_page нет кнопки "Дальше"."""
+    responses = []
+    for page_num in range(1, last_page + 1):
+        text = MOCK_HTML_RESPONSE.replace("stazher-", f"stazher-{page_num}-")
+        if page_num == last_page:
+            text = text.replace("f-test-button-dalshe", "")
+        responses.append(Mock(text=text, status_code=200))
+    return responses
+
+
+@pytest.mark.usefixtures("parse_pool")
+def test_parse_pool_matches_sequential_parsing() -> None:
+    """Тест, что разбор в пуле процессов дает те же вакансии в том же порядке."""
+    with (
+        patch("parsers.parse_pool.settings.PARSE_WORKERS", 0),
+        patch("requests.Session.get", side_effect=_pages(3)),
+    ):
+        sequential = SuperJobParser().parse_pages("Python", 1, 5)
+    pages_seen = []
+    # Страница после последней загружается заранее и отбрасывается
+    with patch("requests.Session.get", side_effect=_pages(3) + _pages(1)):
+        pooled = SuperJobParser().parse_pages(
+            "Python", 1, 5, on_page=lambda pages, _: pages_seen.append(pages)
+        )
+
+    # Относительные даты ("Сегодня") зависят от дня разбора
+    assert [v.model_dump(exclude={"published_at"}) for v in pooled.vacancies] == [
+        v.model_dump(exclude={"published_at"}) for v in sequential.vacancies
+    ]
+    assert len(pooled.vacancies) == 6
+    assert pooled.pages_fetched == sequential.pages_fetched == 3
+    assert pooled.exhausted and sequential.exhausted
+    assert pages_seen == [1, 2, 3]
+
+
+@pytest.mark.usefixtures("parse_pool")
+def test_parse_pool_limits_pages_fetched_ahead() -> None:
+    """Тест, что поток обхода загружает не больше PARSE_QUEUE_SIZE страниц."""
+    with patch("requests.Session.get", side_effect=_pages(5)) as mock_get:
+        result = SuperJobParser().parse_pages("Python", 1, 5)
+
+    assert result.exhausted
+    assert result.pages_fetched == 5
+    assert mock_get.call_count == 5
+
+    with patch("requests.Session.get", side_effect=_pages(1) * 5) as mock_get:
+        result = SuperJobParser().parse_pages("Python", 1, 5)
+
+    # Первая страница последняя: до ее разбора загружена только вторая
+    assert result.pages_fetched == 1
+    assert len(result.vacancies) == 2
+    assert mock_get.call_count == 2
+
+
+@pytest.mark.usefixtures("parse_pool")
+def test_parse_pool_finishes_pages_before_fetch_error() -> None:
+    """Тест, что после ошибки загрузки разбираются уже загруженные страницы."""
+    side_effect = [*_pages(3)[:2], requests.RequestException("Connection error")]
+    with (
+        patch("parsers.http_client.settings.HTTP_MAX_RETRIES", 0),
+        patch("requests.Session.get", side_effect=side_effect),
+    ):
+        result = SuperJobParser().parse_pages("Python", 1, 5)
+
+    assert result.pages_fetched == 2
+    assert result.failed_page == 3
+    assert len(result.vacancies) == 4
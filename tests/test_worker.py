@@ -0,0 +1,31 @@
+"""Тесты для точки входа отдельного процесса сбора вакансий."""
+
+import threading
+from unittest.mock import Mock, patch
+
+from core.scheduler import crawl_stop_event
+from worker import run_worker
+
+
+@patch("worker.leader_election")
+@patch("worker.scheduler")
+@patch("worker.record_process_heartbeat")
+@patch("worker.start_scheduler")
+def test_run_worker_starts_and_stops_scheduler(
+    mock_start: Mock,
+    mock_heartbeat: Mock,
+    mock_scheduler: Mock,
+    mock_leader: Mock,
+) -> None:
+    """Тест запуска планировщика в роли сборщика и корректной остановки."""
+    stop_event = threading.Event()
+    stop_event.set()
+
+    run_worker(stop_event)
+
+    mock_start.assert_called_once_with(role="worker")
+    mock_heartbeat.assert_called_once_with("worker")
+    mock_scheduler.shutdown.assert_called_once_with(wait=True)
+    mock_leader.release.assert_called_once()
+    assert crawl_stop_event.is_set()
+    crawl_stop_event.clear()
@@ -0,0 +1,77 @@
+"""Точка входа отдельного процесса сбора вакансий.
+
+Запускает планировщик с парсерами и обслуживанием БД без веб-сервера, чтобы
+разбор HTML и паузы между запросами не конкурировали с обработкой
+HTTP-запросов за GIL и пул соединений. Веб-приложение при этом запускается
+с RUN_SCHEDULER=False. Процессов сборщика может быть несколько, в том
+числе на разных узлах: периодические задачи выполняет только ведущий
+(см. core.leader), а единицы обхода источников делятся между всеми
+процессами (см. core.crawl_units). При заданном WORKER_METRICS_PORT процесс
+отдает метрики Prometheus (см. core.metrics) на этом порту.
+
+Пример запуска::
+
+    python worker.py
+"""
+
+import logging
+import signal
+import threading
+from types import FrameType
+from typing import Optional
+
+from core.config import settings
+from core.extensions import scheduler
+from core.leader import leader_election
+from core.metrics import start_metrics_server
+from core.scheduler import (
+    crawl_stop_event,
+    record_process_heartbeat,
+    start_scheduler,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker(stop_event: threading.Event) -> None:
+    """Запускает планировщик и ждет сигнала остановки.
+
+    Args:
+        stop_event: Событие, по которому процесс завершает работу.
+    """
+    if settings.WORKER_METRICS_PORT:
+        start_metrics_server(settings.WORKER_METRICS_PORT)
+    start_scheduler(role="worker")
+    record_process_heartbeat("worker")
+    logger.info("Процесс сбора вакансий запущен.")
+    stop_event.wait()
+
+    logger.info("Остановка процесса сбора вакансий...")
+    # Обход дорабатывает текущую единицу и не берет новых
+    crawl_stop_event.set()
+    # Дожидаемся выполняющихся задач, чтобы не оборвать вставку на середине
+    scheduler.shutdown(wait=True)
+    leader_election.release()
+    logger.info("Процесс сбора вакансий остановлен.")
+
+
+def main() -> None:
+    """Настраивает логирование и обработку сигналов и запускает сборщик."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    stop_event = threading.Event()
+
+    def _stop(signum: int, frame: Optional[FrameType]) -> None:
+        logger.info("Получен сигнал %s.", signal.Signals(signum).name)
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    run_worker(stop_event)
+
+
+if __name__ == "__main__":
+    main()